@@ -0,0 +1,115 @@
+"""人格识别推理后端基准测试脚本
+
+对比 fp32 / int8 / onnx 三种推理后端的延迟、模型大小和进程内存占用。
+
+用法：
+    python examples/personality_inference_benchmark.py [用户数] [重复次数]
+"""
+import gc
+import io
+import resource
+import sys
+import time
+sys.path.append('.')
+
+from src.services.personality_recognition_service import (
+    PersonalityRecognitionService,
+    INFERENCE_BACKENDS,
+    ML_AVAILABLE
+)
+
+
+SAMPLE_TEXTS = [
+    "我喜欢和朋友们一起出去玩，感觉很开心。",
+    "我经常会担心很多事情，有时候会感到焦虑。",
+    "我喜欢尝试新的事物，对未知充满好奇。",
+    "我做事情比较有计划，喜欢按部就班。",
+    "我很在意别人的感受，愿意帮助他人。"
+]
+
+
+def model_size_mb(service: PersonalityRecognitionService) -> float:
+    """计算模型序列化后的大小（MB）"""
+    import torch
+
+    buffer = io.BytesIO()
+    torch.save(service.model.state_dict(), buffer)
+    return buffer.tell() / (1024 * 1024)
+
+
+def peak_rss_mb() -> float:
+    """当前进程的峰值常驻内存（MB）"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def benchmark_backend(backend: str, text_batches, repeats: int):
+    """
+    测试单个推理后端
+
+    Returns:
+        (服务实例, 平均每用户延迟毫秒, 得分列表)
+    """
+    service = PersonalityRecognitionService(device='cpu', backend=backend, background_load=False)
+    if not service.ml_enabled:
+        return None, 0.0, []
+
+    # 预热
+    service.batch_analyze(text_batches[:2])
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        results = service.batch_analyze(text_batches)
+    elapsed = time.perf_counter() - start
+
+    latency_ms = elapsed * 1000 / (repeats * len(text_batches))
+    return service, latency_ms, results
+
+
+def main():
+    """主函数"""
+    print("=" * 60)
+    print("青春伴行 - 人格识别推理后端基准测试")
+    print("=" * 60)
+
+    if not ML_AVAILABLE:
+        print("\n未安装ML依赖，无法运行基准测试：")
+        print("  pip install torch transformers numpy")
+        return
+
+    num_users = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    text_batches = [SAMPLE_TEXTS[: (i % len(SAMPLE_TEXTS)) + 1] for i in range(num_users)]
+
+    print(f"\n用户数: {num_users}，重复次数: {repeats}\n")
+    print(f"{'后端':<8}{'实际后端':<10}{'延迟(ms/用户)':<16}{'模型大小(MB)':<16}"
+          f"{'峰值内存(MB)':<16}{'与fp32最大偏差':<16}")
+    print("-" * 80)
+
+    baseline = None
+    for backend in INFERENCE_BACKENDS:
+        service, latency_ms, results = benchmark_backend(backend, text_batches, repeats)
+        if service is None:
+            print(f"{backend:<8}模型加载失败")
+            continue
+
+        if baseline is None:
+            baseline = results
+        max_diff = max(
+            abs(getattr(a, trait) - getattr(b, trait))
+            for a, b in zip(results, baseline)
+            for trait in ['neuroticism', 'agreeableness', 'extraversion',
+                          'openness', 'conscientiousness']
+        )
+
+        print(f"{backend:<8}{service.backend:<10}{latency_ms:<16.2f}"
+              f"{model_size_mb(service):<16.1f}{peak_rss_mb():<16.1f}{max_diff:<16.4f}")
+
+        del service
+        gc.collect()
+
+    print()
+    print("注：峰值内存为进程累计峰值，按后端顺序单调不减，仅供参考。")
+
+
+if __name__ == "__main__":
+    main()
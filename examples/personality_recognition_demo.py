@@ -17,7 +17,11 @@ def main():
     print("正在初始化人格识别服务...")
     try:
         service = PersonalityRecognitionService(device='cpu')
-        print("✓ 服务初始化成功")
+        # 模型在后台线程中加载，等待预热完成后再演示模型推理
+        if service.wait_until_ready():
+            print("✓ 服务初始化成功")
+        else:
+            print("✓ 服务初始化成功（模型不可用，使用简化版本）")
     except Exception as e:
         print(f"✗ 服务初始化失败: {e}")
         print("\n提示：请确保已安装所需依赖：")
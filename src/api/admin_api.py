@@ -0,0 +1,61 @@
+"""运维管理API"""
+import asyncio
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, status, Depends
+from pydantic import BaseModel
+from typing import List, Optional
+from src.utils.exceptions import ValidationError, AIModelError
+from src.api.auth_api import verify_staff
+
+router = APIRouter(prefix="/api/admin", tags=["admin"])
+
+# 导入共享服务实例
+from src.api.dependencies import get_message_embedding_service
+
+# 服务实例
+message_embedding_service = get_message_embedding_service()
+
+
+class EmbeddingJobRequest(BaseModel):
+    """消息嵌入批处理任务请求"""
+    job_name: Optional[str] = None  # 默认按当前时间命名
+    conversation_ids: Optional[List[str]] = None  # 默认全部对话
+    since: Optional[datetime] = None
+
+
+@router.post("/embedding-jobs", response_model=dict)
+async def run_embedding_job(
+    request: EmbeddingJobRequest,
+    user_id: str = Depends(verify_staff)
+):
+    """
+    运行消息嵌入离线批处理任务
+
+    在线程池中编码对话存储中的消息，不阻塞事件循环；同一时间只运行一个任务
+    """
+    job_name = request.job_name or f"messages_{datetime.now():%Y%m%d_%H%M%S}"
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(
+            None,
+            lambda: message_embedding_service.run_embedding_job(
+                job_name,
+                conversation_ids=request.conversation_ids,
+                since=request.since
+            )
+        )
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except AIModelError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
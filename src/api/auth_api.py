@@ -75,6 +75,16 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security))
         )
 
 
+def verify_staff(user_id: str = Depends(verify_token)) -> str:
+    """验证当前用户为平台工作人员（心理健康值班咨询师、运维管理人员）"""
+    if user_id not in settings.staff_user_ids:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="仅限工作人员访问"
+        )
+    return user_id
+
+
 @router.post("/login", response_model=LoginResponse)
 async def login(request: LoginRequest):
     """
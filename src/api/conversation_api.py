@@ -1,5 +1,8 @@
 """对话管理API"""
-from fastapi import APIRouter, HTTPException, status, Depends, Query
+import asyncio
+import json
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
@@ -7,14 +10,30 @@ from src.models.conversation import Conversation, Message
 from src.services.conversation_service import ConversationService
 from src.utils.exceptions import ValidationError, NotFoundError
 from src.api.auth_api import verify_token
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 router = APIRouter(prefix="/api/conversations", tags=["conversations"])
 
 # 导入共享服务实例
-from src.api.dependencies import get_conversation_service
+from src.api.dependencies import (
+    get_conversation_service,
+    get_profile_update_service,
+    get_mental_health_monitor,
+    get_dialogue_assistant_service,
+    get_silence_scheduler
+)
 
 # 服务实例
 conversation_service = get_conversation_service()
+profile_update_service = get_profile_update_service()
+mental_health_monitor = get_mental_health_monitor()
+dialogue_assistant_service = get_dialogue_assistant_service()
+silence_scheduler = get_silence_scheduler()
+
+# 话题建议流无新建议时发送保活注释的间隔（秒）
+STREAM_KEEPALIVE_SECONDS = 15.0
 
 
 class CreateConversationRequest(BaseModel):
@@ -159,6 +178,20 @@ async def send_message(
             content=request.content,
             message_type=request.message_type
         )
+        
+        # 根据新消息增量更新发送者的人格估计：评分在微批调度器的后台线程中进行，
+        # 不阻塞事件循环（失败不影响消息发送）
+        try:
+            profile_update_service.submit_personality_message(user_id, request.content)
+        except Exception as e:
+            logger.warning(f"Failed to update personality from message for user {user_id}: {e}")
+        
+        # 心理健康监测在后台处理，危机关键词走快速通道
+        mental_health_monitor.submit(user_id, request.content, message.message_id)
+        
+        # 重置沉默定时器，沉默超过阈值时由服务端主动推送话题建议
+        dialogue_assistant_service.update_last_message_time(conversation_id, message.timestamp)
+        
         return message
     except NotFoundError as e:
         raise HTTPException(
@@ -228,6 +261,7 @@ async def pause_conversation(
     """
     try:
         conversation = conversation_service.pause_conversation(conversation_id, user_id)
+        dialogue_assistant_service.cancel_silence_timer(conversation_id)
         return {
             "message": "对话已暂停",
             "conversation": conversation
@@ -261,6 +295,7 @@ async def end_conversation(
     """
     try:
         conversation = conversation_service.end_conversation(conversation_id, user_id)
+        dialogue_assistant_service.cancel_silence_timer(conversation_id)
         return {
             "message": "对话已结束",
             "conversation": conversation
@@ -363,6 +398,59 @@ async def get_ai_suggestions(
         )
 
 
+@router.get("/{conversation_id}/ai-suggestions/stream")
+async def stream_ai_suggestions(
+    conversation_id: str,
+    http_request: Request,
+    user_id: str = Depends(verify_token)
+):
+    """
+    实时话题建议流
+    
+    以 Server-Sent Events 推送服务端沉默检测生成的话题建议，替代轮询 ai-suggestions
+    """
+    try:
+        conversation = conversation_service.get_conversation(conversation_id)
+    except NotFoundError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    if user_id not in [conversation.user_a_id, conversation.user_b_id]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="无权访问此对话"
+        )
+    
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    
+    def on_suggestion(suggested_conversation_id: str, payload: dict) -> None:
+        # 建议由调度线程生成
+        if suggested_conversation_id == conversation_id:
+            loop.call_soon_threadsafe(queue.put_nowait, payload)
+    
+    silence_scheduler.add_suggestion_listener(on_suggestion)
+    
+    async def event_stream():
+        try:
+            while not await http_request.is_disconnected():
+                try:
+                    payload = await asyncio.wait_for(queue.get(), timeout=STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: suggestion\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+        finally:
+            silence_scheduler.remove_suggestion_listener(on_suggestion)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
+
+
 class AIInterventionResponse(BaseModel):
     """AI介入响应"""
     response: str  # accepted, rejected, ignored
@@ -431,12 +519,13 @@ async def respond_to_ai_intervention(
 @router.get("/{conversation_id}/ai-history", response_model=list)
 async def get_ai_intervention_history(
     conversation_id: str,
+    limit: Optional[int] = Query(None, ge=1, description="最多返回的最近记录数"),
     user_id: str = Depends(verify_token)
 ):
     """
     获取AI介入历史
     
-    查询对话中AI助手的所有介入记录
+    查询对话中AI助手最近的介入记录（每个对话只保留最近若干条，总计数见 ai-stats）
     """
     try:
         # 验证用户权限
@@ -451,9 +540,51 @@ async def get_ai_intervention_history(
         from src.api.dependencies import get_dialogue_assistant_service
         assistant_service = get_dialogue_assistant_service()
         
-        interventions = assistant_service.get_intervention_history(conversation_id)
+        interventions = assistant_service.get_intervention_history(conversation_id, limit=limit)
         
         return interventions
+    except HTTPException:
+        raise
+    except NotFoundError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+
+@router.get("/{conversation_id}/ai-stats", response_model=dict)
+async def get_ai_intervention_stats(
+    conversation_id: str,
+    user_id: str = Depends(verify_token)
+):
+    """
+    获取AI介入统计
+    
+    返回对话中AI介入的总次数以及按触发类型、介入类型和用户响应的计数
+    """
+    try:
+        # 验证用户权限
+        conversation = conversation_service.get_conversation(conversation_id)
+        if user_id not in [conversation.user_a_id, conversation.user_b_id]:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="无权访问此对话"
+            )
+        
+        from src.api.dependencies import get_dialogue_assistant_service
+        assistant_service = get_dialogue_assistant_service()
+        
+        return {
+            "conversation_id": conversation_id,
+            **assistant_service.get_intervention_stats(conversation_id)
+        }
+    except HTTPException:
+        raise
     except NotFoundError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -1,4 +1,6 @@
 """API依赖项"""
+from datetime import timedelta
+from src.config import settings
 from src.services.user_profile_service import UserProfileService
 from src.services.matching_service import MatchingService
 from src.services.conversation_service import ConversationService
@@ -6,18 +8,122 @@ from src.services.report_service import ReportService
 from src.services.content_moderation_service import ContentModerationService
 from src.services.dialogue_assistant_service import DialogueAssistantService
 from src.services.profile_update_service import ProfileUpdateService
+from src.services.profile_analysis_job import ProfileAnalysisJob
+from src.services.message_embedding_service import MessageEmbeddingService
+from src.services.recommendation_service import RecommendationService
+from src.services.match_recalculation_scheduler import MatchRecalculationScheduler
+from src.services.mental_health_service import MentalHealthService
+from src.services.mental_health_monitor import MentalHealthMonitor
+from src.services.silence_scheduler import SilenceScheduler
+from src.services.scene_registry import SceneRegistry, FileSceneStore, RedisSceneStore
+from src.services.personality_recognition_service import (
+    PersonalityRecognitionService,
+    PersonalityBatchScheduler
+)
+from src.utils.exclusion_filter import ExclusionFilter
+from src.utils.match_event_log import MatchEventLog
 
 # 创建共享的服务实例
-user_profile_service = UserProfileService()
-matching_service = MatchingService(user_profile_service=user_profile_service)
-conversation_service = ConversationService()
+exclusion_filter = ExclusionFilter()
+personality_service = PersonalityRecognitionService(
+    model_name=settings.bert_model_path,
+    use_ml=settings.personality_use_ml
+)
+personality_batch_scheduler = PersonalityBatchScheduler(
+    personality_service,
+    max_batch_size=settings.personality_batch_size,
+    max_wait_ms=settings.personality_batch_wait_ms
+)
+user_profile_service = UserProfileService(
+    personality_service=personality_service,
+    personality_scheduler=personality_batch_scheduler,
+    personality_flush_seconds=settings.personality_flush_seconds
+)
+match_event_log = (
+    MatchEventLog(
+        settings.match_event_log_dir,
+        max_records_per_chunk=settings.match_event_log_chunk_records
+    )
+    if settings.match_event_log_dir else None
+)
+if settings.scene_registry_backend == "redis":
+    from src.database.redis_db import get_redis
+    scene_store = RedisSceneStore(get_redis)
+elif settings.scene_registry_backend == "file":
+    scene_store = FileSceneStore(settings.scene_registry_path)
+else:
+    scene_store = None
+scene_registry = SceneRegistry(store=scene_store, poll_interval=settings.scene_registry_poll_seconds)
+matching_service = MatchingService(
+    user_profile_service=user_profile_service,
+    event_log=match_event_log,
+    exclusion_filter=exclusion_filter,
+    scene_registry=scene_registry
+)
+recommendation_service = RecommendationService(
+    matching_service,
+    user_profile_service,
+    top_k=settings.recommendation_top_k,
+    max_staleness=timedelta(seconds=settings.recommendation_max_staleness_seconds),
+    scene_max_staleness={
+        scene: timedelta(seconds=seconds)
+        for scene, seconds in settings.recommendation_scene_staleness_seconds.items()
+    },
+    num_workers=settings.recommendation_refresh_workers,
+    idle_ttl=timedelta(seconds=settings.recommendation_idle_seconds)
+)
+conversation_service = ConversationService(exclusion_filter=exclusion_filter)
 report_service = ReportService()
-content_moderation_service = ContentModerationService()
-dialogue_assistant_service = DialogueAssistantService()
+content_moderation_service = ContentModerationService(exclusion_filter=exclusion_filter)
+dialogue_assistant_service = DialogueAssistantService(
+    silence_tick_seconds=settings.silence_tick_seconds,
+    history_size=settings.intervention_history_size,
+    max_conversations=settings.intervention_max_conversations,
+    idle_seconds=settings.dialogue_idle_seconds
+)
+silence_scheduler = SilenceScheduler(
+    dialogue_assistant_service,
+    conversation_service,
+    tick_seconds=settings.silence_tick_seconds,
+    evict_interval_seconds=settings.dialogue_evict_interval_seconds
+)
+mental_health_service = MentalHealthService()
+mental_health_monitor = MentalHealthMonitor(
+    mental_health_service,
+    queue_size=settings.mental_health_queue_size,
+    num_workers=settings.mental_health_workers
+)
+match_recalculation_scheduler = MatchRecalculationScheduler(
+    recommendation_service,
+    debounce_seconds=settings.match_recalculation_debounce_seconds,
+    num_workers=settings.match_recalculation_workers
+)
 profile_update_service = ProfileUpdateService(
     user_profile_service=user_profile_service,
-    matching_service=matching_service
+    matching_service=matching_service,
+    personality_service=personality_service,
+    recalculation_scheduler=match_recalculation_scheduler,
+    personality_scheduler=personality_batch_scheduler
 )
+message_embedding_service = MessageEmbeddingService(
+    conversation_service,
+    personality_service,
+    output_dir=settings.message_embedding_dir,
+    batch_size=settings.message_embedding_batch_size,
+    num_workers=settings.message_embedding_workers
+)
+profile_analysis_job = ProfileAnalysisJob(
+    conversation_service,
+    profile_update_service,
+    state_path=settings.profile_analysis_state_path,
+    num_workers=settings.profile_analysis_workers,
+    interval_seconds=settings.profile_analysis_interval_seconds
+)
+
+
+def get_personality_batch_scheduler() -> PersonalityBatchScheduler:
+    """获取人格推理微批调度器实例"""
+    return personality_batch_scheduler
 
 
 def get_user_profile_service() -> UserProfileService:
@@ -25,11 +131,21 @@ def get_user_profile_service() -> UserProfileService:
     return user_profile_service
 
 
+def get_scene_registry() -> SceneRegistry:
+    """获取场景配置注册表实例"""
+    return scene_registry
+
+
 def get_matching_service() -> MatchingService:
     """获取匹配服务实例"""
     return matching_service
 
 
+def get_recommendation_service() -> RecommendationService:
+    """获取推荐列表服务实例"""
+    return recommendation_service
+
+
 def get_conversation_service() -> ConversationService:
     """获取对话服务实例"""
     return conversation_service
@@ -50,6 +166,31 @@ def get_dialogue_assistant_service() -> DialogueAssistantService:
     return dialogue_assistant_service
 
 
+def get_silence_scheduler() -> SilenceScheduler:
+    """获取对话沉默检测调度器实例"""
+    return silence_scheduler
+
+
+def get_mental_health_service() -> MentalHealthService:
+    """获取心理健康服务实例"""
+    return mental_health_service
+
+
+def get_mental_health_monitor() -> MentalHealthMonitor:
+    """获取心理健康异步监测流水线实例"""
+    return mental_health_monitor
+
+
 def get_profile_update_service() -> ProfileUpdateService:
     """获取画像更新服务实例"""
     return profile_update_service
+
+
+def get_profile_analysis_job() -> ProfileAnalysisJob:
+    """获取对话画像分析批处理任务实例"""
+    return profile_analysis_job
+
+
+def get_message_embedding_service() -> MessageEmbeddingService:
+    """获取消息嵌入离线批处理服务实例"""
+    return message_embedding_service
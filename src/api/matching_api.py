@@ -10,10 +10,11 @@ from src.api.auth_api import verify_token
 router = APIRouter(prefix="/api/matching", tags=["matching"])
 
 # 导入共享服务实例
-from src.api.dependencies import get_matching_service
+from src.api.dependencies import get_matching_service, get_recommendation_service
 
 # 服务实例
 matching_service = get_matching_service()
+recommendation_service = get_recommendation_service()
 
 
 class MatchRequest(BaseModel):
@@ -36,10 +37,10 @@ async def find_matches(
     """
     查找匹配对象
     
-    根据用户画像和场景查找合适的匹配对象
+    根据用户画像和场景查找合适的匹配对象（优先返回预计算的推荐列表）
     """
     try:
-        matches = matching_service.find_matches(
+        matches = recommendation_service.get_recommendations(
             user_id=user_id,
             scene=request.scene,
             limit=request.limit
@@ -0,0 +1,230 @@
+"""心理健康预警与转介API"""
+import asyncio
+import json
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from typing import List, Optional
+from src.models.mental_health import RiskAlert, ProfessionalReferral
+from src.utils.exceptions import ValidationError, NotFoundError
+from src.api.auth_api import verify_token, verify_staff
+
+router = APIRouter(prefix="/api/mental-health", tags=["mental-health"])
+
+# 导入共享服务实例
+from src.api.dependencies import get_mental_health_service, get_mental_health_monitor
+
+# 服务实例
+mental_health_service = get_mental_health_service()
+mental_health_monitor = get_mental_health_monitor()
+
+# 预警流无新预警时发送保活注释的间隔（秒）
+STREAM_KEEPALIVE_SECONDS = 15.0
+
+
+class UpdateStatusRequest(BaseModel):
+    """更新处理状态请求"""
+    status: str
+
+
+@router.get("/alerts", response_model=List[RiskAlert])
+async def get_alerts(
+    status_filter: Optional[str] = Query(None, description="状态过滤（默认待处理，按紧急程度排序）"),
+    user_id: str = Depends(verify_staff)
+):
+    """
+    获取风险预警
+
+    不指定状态时返回待处理预警，按风险等级从高到低、同级按创建时间排序
+    """
+    try:
+        if status_filter is None or status_filter == 'pending':
+            return mental_health_service.get_pending_alerts()
+        return mental_health_service.get_alerts_by_status(status_filter)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+
+@router.post("/alerts/next", response_model=RiskAlert)
+async def claim_next_alert(
+    user_id: str = Depends(verify_staff)
+):
+    """
+    领取下一条预警
+
+    取出最紧急的待处理预警并标记为处理中
+    """
+    alert = mental_health_service.get_next_alert()
+    if alert is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="没有待处理的风险预警"
+        )
+    return alert
+
+
+@router.put("/alerts/{alert_id}/status", response_model=RiskAlert)
+async def update_alert_status(
+    alert_id: str,
+    request: UpdateStatusRequest,
+    user_id: str = Depends(verify_staff)
+):
+    """
+    更新预警状态
+
+    标记预警为处理中、已解决、已忽略，或退回待处理
+    """
+    try:
+        return mental_health_service.update_alert_status(alert_id, request.status)
+    except NotFoundError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+
+@router.get("/alerts/stream")
+async def stream_alerts(
+    http_request: Request,
+    user_id: str = Depends(verify_staff)
+):
+    """
+    实时预警流
+
+    以 Server-Sent Events 推送新创建的风险预警，供值班看板订阅
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+
+    def on_alert(alert: RiskAlert) -> None:
+        # 预警可能在其他线程中创建
+        loop.call_soon_threadsafe(queue.put_nowait, alert)
+
+    mental_health_service.add_alert_listener(on_alert)
+
+    async def event_stream():
+        try:
+            while not await http_request.is_disconnected():
+                try:
+                    alert = await asyncio.wait_for(queue.get(), timeout=STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                payload = json.dumps(jsonable_encoder(alert), ensure_ascii=False)
+                yield f"event: alert\ndata: {payload}\n\n"
+        finally:
+            mental_health_service.remove_alert_listener(on_alert)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
+
+
+@router.get("/monitor/stats", response_model=dict)
+async def get_monitor_stats(
+    user_id: str = Depends(verify_staff)
+):
+    """
+    获取异步监测流水线指标
+
+    返回各通道队列深度、处理/丢弃/失败计数和处理延迟
+    """
+    return mental_health_monitor.get_stats()
+
+
+@router.get("/referrals", response_model=List[ProfessionalReferral])
+async def get_my_referrals(
+    user_id: str = Depends(verify_token)
+):
+    """
+    获取我的专业转介记录
+
+    普通用户只能查看自己的转介，其余预警与转介接口仅限值班人员
+    """
+    try:
+        return mental_health_service.get_user_referrals(user_id)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+
+@router.get("/referrals/pending", response_model=List[ProfessionalReferral])
+async def get_pending_referrals(
+    user_id: str = Depends(verify_staff)
+):
+    """
+    获取待处理的专业转介
+
+    按紧急程度从高到低、同级按创建时间排序
+    """
+    try:
+        return mental_health_service.get_pending_referrals()
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+
+@router.post("/referrals/next", response_model=ProfessionalReferral)
+async def claim_next_referral(
+    user_id: str = Depends(verify_staff)
+):
+    """
+    领取下一条转介
+
+    取出最紧急的待处理转介并标记为处理中
+    """
+    referral = mental_health_service.get_next_referral()
+    if referral is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="没有待处理的专业转介"
+        )
+    return referral
+
+
+@router.put("/referrals/{referral_id}/status", response_model=ProfessionalReferral)
+async def update_referral_status(
+    referral_id: str,
+    request: UpdateStatusRequest,
+    user_id: str = Depends(verify_staff)
+):
+    """
+    更新转介状态
+    """
+    try:
+        return mental_health_service.update_referral_status(referral_id, request.status)
+    except NotFoundError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
@@ -1,5 +1,7 @@
 """用户注册与画像构建API"""
-from fastapi import APIRouter, HTTPException, status
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, status
 from src.models.user import (
     User, UserProfile, BigFiveScores,
     UserRegistrationRequest, MBTITestRequest, BigFiveTestRequest,
@@ -244,20 +246,24 @@ async def get_profile_updates(
 
 
 @router.get("/profile/{user_id}/changes", response_model=dict)
+@router.get("/{user_id}/profile-changes", response_model=dict)
 async def get_profile_changes(
     user_id: str,
+    since_version: int = Query(0, ge=0, description="查询此版本之后的变化"),
     since: Optional[datetime] = Query(None, description="查询此时间之后的变化")
 ):
     """
     获取画像变化详情
     
-    查询用户画像在指定时间段内的变化情况
+    从画像变更日志中读取指定版本（或时间）之后的字段级变化，无需对比历史快照
     """
     try:
         profile = user_service.get_profile(user_id)
+        changes = user_service.get_profile_changes(user_id, since_version)
+        if since is not None:
+            changes['changes'] = [c for c in changes['changes'] if c['changed_at'] > since]
+            changes['compacted'] = [c for c in changes['compacted'] if c['changed_at'] > since]
         
-        # 返回当前画像状态
-        # 实际应用中应该对比历史快照
         return {
             "user_id": user_id,
             "current_profile": {
@@ -272,10 +278,15 @@ async def get_profile_changes(
                 },
                 "scenes": profile.current_scenes
             },
-            "changes": [],  # 实际应该包含变化历史
+            "current_version": changes['current_version'],
+            "since_version": since_version,
+            "compacted": changes['compacted'],
+            "changes": changes['changes'],
             "last_updated": profile.updated_at
         }
     except NotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except ValidationError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
@@ -1,6 +1,6 @@
 """应用配置管理"""
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, List, Optional
 
 
 class Settings(BaseSettings):
@@ -36,10 +36,65 @@ class Settings(BaseSettings):
     secret_key: str = "dev-secret-key-change-in-production"
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
+    # 工作人员（心理健康值班咨询师/运维人员）用户ID，只有他们可以处理风险预警与转介、触发离线批处理任务
+    staff_user_ids: List[str] = []
     
     # AI模型配置
     bert_model_path: str = "bert-base-chinese"
     chatglm_model_path: str = "THUDM/chatglm3-6b"
+    # 人格识别推理后端: fp32 / int8（动态量化） / onnx（需安装onnxruntime）
+    personality_inference_backend: str = "fp32"
+    personality_onnx_path: str = "data/personality_classifier.onnx"
+    # 是否加载BERT人格识别模型（关闭时使用关键词规则分析）
+    personality_use_ml: bool = True
+    # 人格推理微批调度：单批次最大请求数、收集一个批次的最长等待时间（毫秒）
+    personality_batch_size: int = 16
+    personality_batch_wait_ms: float = 10.0
+    # 消息嵌入离线批处理：输出目录、编码批次大小、编码线程数
+    message_embedding_dir: str = "data/embeddings"
+    message_embedding_batch_size: int = 64
+    message_embedding_workers: int = 2
+    
+    # 匹配事件日志配置（目录为空表示不记录）
+    match_event_log_dir: Optional[str] = None
+    match_event_log_chunk_records: int = 1000000
+    
+    # 推荐列表预计算配置
+    recommendation_top_k: int = 20
+    recommendation_max_staleness_seconds: int = 1800
+    # 按场景覆盖的过期上限（秒），如 {"心理树洞": 300}
+    recommendation_scene_staleness_seconds: Dict[str, int] = {}
+    recommendation_refresh_workers: int = 2
+    # 列表超过该时长未被读取时删除，不再后台刷新（秒）
+    recommendation_idle_seconds: int = 7200
+    
+    # 匹配重新计算调度配置
+    match_recalculation_debounce_seconds: float = 5.0
+    match_recalculation_workers: int = 2
+    
+    # 心理健康异步监测配置
+    mental_health_queue_size: int = 1000
+    mental_health_workers: int = 2
+    
+    # 对话沉默检测调度配置（时间轮刻度，秒）
+    silence_tick_seconds: float = 1.0
+    
+    # AI介入记录与对话状态保留配置
+    intervention_history_size: int = 50
+    intervention_max_conversations: int = 100000
+    dialogue_idle_seconds: int = 21600
+    dialogue_evict_interval_seconds: float = 60.0
+    
+    # 场景配置注册表（memory: 仅本进程 / file: 共享文件 / redis: 共享Redis）
+    scene_registry_backend: str = "memory"
+    scene_registry_path: str = "data/scene_registry.json"
+    scene_registry_poll_seconds: float = 0.5
+    
+    # 对话画像分析批处理配置
+    profile_analysis_state_path: str = "data/profile_analysis_state.json"
+    profile_analysis_workers: int = 2
+    profile_analysis_interval_seconds: float = 3600.0  # 后台定时运行间隔（0表示不定时运行）
+    personality_flush_seconds: float = 600.0  # 流式人格估计后台写回间隔
     
     class Config:
         env_file = ".env"
@@ -17,6 +17,19 @@ from src.api.matching_api import router as matching_router
 from src.api.conversation_api import router as conversation_router
 from src.api.report_api import router as report_router
 from src.api.moderation_api import router as moderation_router
+from src.api.mental_health_api import router as mental_health_router
+from src.api.admin_api import router as admin_router
+from src.api.dependencies import (
+    match_event_log,
+    scene_registry,
+    recommendation_service,
+    match_recalculation_scheduler,
+    mental_health_monitor,
+    silence_scheduler,
+    personality_batch_scheduler,
+    profile_analysis_job,
+    profile_update_service
+)
 import logging
 
 # 初始化日志系统
@@ -39,6 +52,7 @@ app = FastAPI(
     * **对话管理** - 实时对话、消息发送、历史记录
     * **成长报告** - 周报、月报、年报生成与分享
     * **内容审查** - 违规检测、用户举报、申诉处理
+    * **心理健康** - 风险预警排队处理、实时预警流、专业转介
     
     ## 技术栈
     
@@ -79,6 +93,8 @@ app.include_router(matching_router)
 app.include_router(conversation_router)
 app.include_router(report_router)
 app.include_router(moderation_router)
+app.include_router(mental_health_router)
+app.include_router(admin_router)
 
 
 @app.on_event("startup")
@@ -100,6 +116,27 @@ async def startup_event():
         logger.info("Redis连接完成")
         
         logger.info("所有数据库连接初始化完成")
+        
+        # 加载共享场景配置并启动轮询
+        scene_registry.start()
+        
+        # 启动推荐列表后台刷新
+        recommendation_service.start()
+        
+        # 启动匹配重新计算调度
+        match_recalculation_scheduler.start()
+        
+        # 启动心理健康异步监测
+        mental_health_monitor.start()
+        
+        # 启动对话沉默检测
+        silence_scheduler.start()
+        
+        # 启动对话画像分析定时批处理
+        profile_analysis_job.start()
+        
+        # 启动流式人格估计定时写回
+        profile_update_service.start()
     except Exception as e:
         logger.error(f"数据库初始化失败: {e}")
         raise
@@ -114,6 +151,34 @@ async def shutdown_event():
     mongodb.close()
     redis_cache.close()
     
+    # 停止推荐列表后台刷新
+    recommendation_service.close()
+    
+    # 停止场景配置轮询
+    scene_registry.close()
+    
+    # 停止匹配重新计算调度
+    match_recalculation_scheduler.close()
+    
+    # 停止对话沉默检测
+    silence_scheduler.close()
+    
+    # 处理完已排队的心理健康监测后停止
+    mental_health_monitor.close()
+    
+    # 停止对话画像分析定时批处理
+    profile_analysis_job.close()
+    
+    # 处理完已排队的人格推理请求后停止
+    personality_batch_scheduler.close()
+    
+    # 写回尚未落到画像的流式人格估计
+    profile_update_service.close()
+    
+    # 写出匹配事件日志缓冲区
+    if match_event_log is not None:
+        match_event_log.close()
+    
     logger.info("应用已关闭")
 
 
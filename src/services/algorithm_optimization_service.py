@@ -1,18 +1,147 @@
 """匹配算法优化服务"""
 import uuid
-import random
+import hashlib
+from bisect import bisect_left, bisect_right, insort
 from typing import List, Dict, Optional, Tuple
-from datetime import datetime, timedelta
+from datetime import date, datetime, time, timedelta
 from collections import defaultdict
 from src.models.optimization import (
     FeedbackData, WeightAdjustment, ABTestConfig, ABTestResult, PerformanceMetrics
 )
 from src.utils.exceptions import ValidationError, NotFoundError
 from src.utils.logger import get_logger
+from src.utils.running_stats import RunningStats, welch_t_test
 
 logger = get_logger(__name__)
 
 
+class SceneFeedbackStore:
+    """
+    单个场景的反馈存储
+    
+    反馈按created_at有序存放，时间范围查询使用二分查找；
+    同时按天维护满意度、对话质量和匹配准确度的累计和，
+    窗口内的平均值由日汇总计算，只有窗口首尾两天需要逐条累加。
+    """
+    
+    def __init__(self):
+        """初始化存储"""
+        self._times: List[datetime] = []
+        self._items: List[FeedbackData] = []
+        self._days: List[date] = []
+        # 日期 -> [数量, 满意度和, 对话质量和, 匹配准确度和]
+        self._day_totals: Dict[date, List[float]] = {}
+    
+    def add(self, feedback: FeedbackData) -> None:
+        """
+        添加反馈
+        
+        Args:
+            feedback: 反馈数据
+        """
+        created_at = feedback.created_at
+        if not self._times or created_at >= self._times[-1]:
+            # 绝大多数反馈按时间顺序到达，直接追加
+            self._times.append(created_at)
+            self._items.append(feedback)
+        else:
+            index = bisect_right(self._times, created_at)
+            self._times.insert(index, created_at)
+            self._items.insert(index, feedback)
+        
+        day = created_at.date()
+        totals = self._day_totals.get(day)
+        if totals is None:
+            totals = [0, 0.0, 0.0, 0.0]
+            self._day_totals[day] = totals
+            insort(self._days, day)
+        totals[0] += 1
+        totals[1] += feedback.satisfaction_score
+        totals[2] += feedback.conversation_quality
+        totals[3] += feedback.match_accuracy
+    
+    def range(
+        self,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> List[FeedbackData]:
+        """
+        获取时间范围内的反馈（按created_at升序）
+        
+        Args:
+            start_date: 开始时间（含）
+            end_date: 结束时间（含）
+            
+        Returns:
+            List[FeedbackData]: 反馈数据列表
+        """
+        lo, hi = self._bounds(start_date, end_date)
+        return self._items[lo:hi]
+    
+    def aggregate(
+        self,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> Tuple[int, float, float, float]:
+        """
+        汇总时间范围内的反馈
+        
+        Args:
+            start_date: 开始时间（含）
+            end_date: 结束时间（含）
+            
+        Returns:
+            Tuple: (数量, 满意度和, 对话质量和, 匹配准确度和)
+        """
+        lo, hi = self._bounds(start_date, end_date)
+        if lo >= hi:
+            return 0, 0.0, 0.0, 0.0
+        
+        first_day = self._times[lo].date()
+        last_day = self._times[hi - 1].date()
+        if first_day == last_day:
+            return self._sum_items(lo, hi)
+        
+        # 首尾两天可能只有部分落在窗口内，逐条累加
+        head_end = bisect_left(self._times, datetime.combine(first_day + timedelta(days=1), time.min))
+        tail_start = bisect_left(self._times, datetime.combine(last_day, time.min))
+        head = self._sum_items(lo, head_end)
+        tail = self._sum_items(tail_start, hi)
+        totals = [head[k] + tail[k] for k in range(4)]
+        
+        # 中间的整天直接使用日汇总
+        day_lo = bisect_right(self._days, first_day)
+        day_hi = bisect_left(self._days, last_day)
+        for day in self._days[day_lo:day_hi]:
+            day_totals = self._day_totals[day]
+            for k in range(4):
+                totals[k] += day_totals[k]
+        
+        return int(totals[0]), totals[1], totals[2], totals[3]
+    
+    def __len__(self) -> int:
+        return len(self._items)
+    
+    def _bounds(
+        self,
+        start_date: Optional[datetime],
+        end_date: Optional[datetime]
+    ) -> Tuple[int, int]:
+        """计算时间范围对应的下标区间"""
+        lo = bisect_left(self._times, start_date) if start_date else 0
+        hi = bisect_right(self._times, end_date) if end_date else len(self._times)
+        return lo, hi
+    
+    def _sum_items(self, lo: int, hi: int) -> Tuple[int, float, float, float]:
+        """逐条累加下标区间内的反馈"""
+        satisfaction = quality = accuracy = 0.0
+        for feedback in self._items[lo:hi]:
+            satisfaction += feedback.satisfaction_score
+            quality += feedback.conversation_quality
+            accuracy += feedback.match_accuracy
+        return max(hi - lo, 0), satisfaction, quality, accuracy
+
+
 class AlgorithmOptimizationService:
     """匹配算法优化服务类"""
     
@@ -25,10 +154,15 @@ class AlgorithmOptimizationService:
         """
         self._matching_service = matching_service
         self._feedbacks: Dict[str, FeedbackData] = {}
+        self._feedback_stores: Dict[str, SceneFeedbackStore] = {}  # scene -> 有序反馈存储
         self._weight_adjustments: Dict[str, WeightAdjustment] = {}
         self._ab_tests: Dict[str, ABTestConfig] = {}
         self._ab_test_results: Dict[str, ABTestResult] = {}
-        self._ab_test_assignments: Dict[str, str] = {}  # user_id -> group (control/treatment)
+        self._ab_test_salts: Dict[str, bytes] = {}  # test_id -> 分桶哈希盐
+        self._ab_test_overrides: Dict[str, Dict[str, str]] = defaultdict(dict)  # test_id -> {user_id: group}
+        self._scene_ab_tests: Dict[str, List[str]] = defaultdict(list)  # scene -> test_id列表
+        # test_id -> group -> {'satisfaction': RunningStats, 'quality': RunningStats}
+        self._ab_test_stats: Dict[str, Dict[str, Dict[str, RunningStats]]] = {}
         self.logger = logger
     
     # ==================== 反馈数据收集 ====================
@@ -84,6 +218,13 @@ class AlgorithmOptimizationService:
         )
         
         self._feedbacks[feedback.feedback_id] = feedback
+        self._get_feedback_store(scene).add(feedback)
+        
+        # 更新该场景进行中的A/B测试分组的在线统计
+        for test_id in self._scene_ab_tests.get(scene, ()):
+            if self._ab_tests[test_id].status == "active":
+                self._record_ab_test_feedback(test_id, self._resolve_group(test_id, user_id), feedback)
+        
         self.logger.info(f"Collected feedback from user {user_id} for match {match_id}")
         
         return feedback
@@ -119,17 +260,54 @@ class AlgorithmOptimizationService:
         Returns:
             List[FeedbackData]: 反馈数据列表
         """
-        feedbacks = [
-            fb for fb in self._feedbacks.values()
-            if fb.scene == scene
-        ]
+        store = self._feedback_stores.get(scene)
+        if store is None:
+            return []
         
-        if start_date:
-            feedbacks = [fb for fb in feedbacks if fb.created_at >= start_date]
-        if end_date:
-            feedbacks = [fb for fb in feedbacks if fb.created_at <= end_date]
+        return store.range(start_date, end_date)
+    
+    def _get_feedback_store(self, scene: str) -> SceneFeedbackStore:
+        """
+        获取（必要时创建）场景的反馈存储
         
-        return feedbacks
+        Args:
+            scene: 场景
+            
+        Returns:
+            SceneFeedbackStore: 场景反馈存储
+        """
+        store = self._feedback_stores.get(scene)
+        if store is None:
+            store = SceneFeedbackStore()
+            self._feedback_stores[scene] = store
+        return store
+    
+    def _aggregate_feedbacks(
+        self,
+        scene: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> Tuple[int, float, float, float]:
+        """
+        汇总场景在时间范围内的反馈
+        
+        Args:
+            scene: 场景
+            start_date: 开始时间
+            end_date: 结束时间
+            
+        Returns:
+            Tuple: (数量, 平均满意度, 平均对话质量, 平均匹配准确度)
+        """
+        store = self._feedback_stores.get(scene)
+        if store is None:
+            return 0, 0.0, 0.0, 0.0
+        
+        count, satisfaction, quality, accuracy = store.aggregate(start_date, end_date)
+        if count == 0:
+            return 0, 0.0, 0.0, 0.0
+        
+        return count, satisfaction / count, quality / count, accuracy / count
     
     # ==================== 权重动态调整 ====================
     
@@ -220,20 +398,15 @@ class AlgorithmOptimizationService:
         Returns:
             float: 性能得分 (0-100)
         """
-        # 获取最近的反馈数据
-        recent_feedbacks = self.get_feedbacks_by_scene(
+        # 汇总最近7天的反馈数据
+        count, avg_satisfaction, avg_quality, avg_accuracy = self._aggregate_feedbacks(
             scene,
             start_date=datetime.now() - timedelta(days=7)
         )
         
-        if not recent_feedbacks:
+        if count == 0:
             return 50.0  # 默认中等分数
         
-        # 计算平均满意度和质量
-        avg_satisfaction = sum(fb.satisfaction_score for fb in recent_feedbacks) / len(recent_feedbacks)
-        avg_quality = sum(fb.conversation_quality for fb in recent_feedbacks) / len(recent_feedbacks)
-        avg_accuracy = sum(fb.match_accuracy for fb in recent_feedbacks) / len(recent_feedbacks)
-        
         # 综合得分（归一化到0-100）
         score = (
             (avg_satisfaction / 5.0) * 0.4 +
@@ -348,6 +521,12 @@ class AlgorithmOptimizationService:
         )
         
         self._ab_tests[test_config.test_id] = test_config
+        self._ab_test_salts[test_config.test_id] = test_config.test_id.encode('utf-8')
+        self._scene_ab_tests[scene].append(test_config.test_id)
+        self._ab_test_stats[test_config.test_id] = {
+            group: {'satisfaction': RunningStats(), 'quality': RunningStats()}
+            for group in ("control", "treatment")
+        }
         self.logger.info(f"Created A/B test: {test_name} for scene {scene}")
         
         return test_config
@@ -360,6 +539,9 @@ class AlgorithmOptimizationService:
         """
         将用户分配到测试组
         
+        分组由 hash(test_id, user_id) 确定性计算，不保存分配记录，
+        跨进程和重启保持一致；显式覆盖优先。
+        
         Args:
             test_id: 测试ID
             user_id: 用户ID
@@ -370,18 +552,81 @@ class AlgorithmOptimizationService:
         if test_id not in self._ab_tests:
             raise NotFoundError(f"A/B test not found: {test_id}")
         
-        test_config = self._ab_tests[test_id]
+        return self._resolve_group(test_id, user_id)
+    
+    def set_test_group_override(
+        self,
+        test_id: str,
+        user_id: str,
+        group: Optional[str]
+    ) -> None:
+        """
+        设置（或清除）用户在测试中的固定分组
+        
+        覆盖只影响之后的分组和反馈统计，已计入的反馈不会迁移。
         
-        # 检查用户是否已经分配
-        assignment_key = f"{test_id}:{user_id}"
-        if assignment_key in self._ab_test_assignments:
-            return self._ab_test_assignments[assignment_key]
+        Args:
+            test_id: 测试ID
+            user_id: 用户ID
+            group: 组别 (control 或 treatment)，None表示清除覆盖
+        """
+        if test_id not in self._ab_tests:
+            raise NotFoundError(f"A/B test not found: {test_id}")
         
-        # 随机分配
-        group = "treatment" if random.random() < test_config.traffic_split else "control"
-        self._ab_test_assignments[assignment_key] = group
+        if group is None:
+            self._ab_test_overrides[test_id].pop(user_id, None)
+            return
+        if group not in ("control", "treatment"):
+            raise ValidationError(f"Invalid test group: {group}")
         
-        return group
+        self._ab_test_overrides[test_id][user_id] = group
+        self.logger.info(f"Override user {user_id} to group {group} in A/B test {test_id}")
+    
+    def bucket_value(self, test_id: str, user_id: str) -> float:
+        """
+        计算用户在测试中的分桶值
+        
+        Args:
+            test_id: 测试ID
+            user_id: 用户ID
+            
+        Returns:
+            float: [0, 1) 区间内的分桶值
+        """
+        digest = hashlib.blake2b(
+            user_id.encode('utf-8'), digest_size=8, key=self._ab_test_salts[test_id]
+        ).digest()
+        return int.from_bytes(digest, 'big') / 2.0 ** 64
+    
+    def _resolve_group(self, test_id: str, user_id: str) -> str:
+        """计算用户所属组别（覆盖优先，否则按分桶值与流量比例比较）"""
+        overrides = self._ab_test_overrides.get(test_id)
+        if overrides:
+            group = overrides.get(user_id)
+            if group is not None:
+                return group
+        
+        if self.bucket_value(test_id, user_id) < self._ab_tests[test_id].traffic_split:
+            return "treatment"
+        return "control"
+    
+    def _record_ab_test_feedback(
+        self,
+        test_id: str,
+        group: str,
+        feedback: FeedbackData
+    ) -> None:
+        """
+        将反馈计入A/B测试分组的在线统计
+        
+        Args:
+            test_id: 测试ID
+            group: 组别
+            feedback: 反馈数据
+        """
+        stats = self._ab_test_stats[test_id][group]
+        stats['satisfaction'].update(feedback.satisfaction_score)
+        stats['quality'].update(feedback.conversation_quality)
     
     def get_test_weights(
         self,
@@ -398,13 +643,11 @@ class AlgorithmOptimizationService:
         Returns:
             Dict[str, float]: 权重配置
         """
-        if test_id not in self._ab_tests:
+        test_config = self._ab_tests.get(test_id)
+        if test_config is None:
             raise NotFoundError(f"A/B test not found: {test_id}")
         
-        test_config = self._ab_tests[test_id]
-        group = self.assign_to_test_group(test_id, user_id)
-        
-        if group == "treatment":
+        if self._resolve_group(test_id, user_id) == "treatment":
             return test_config.treatment_weights
         else:
             return test_config.control_weights
@@ -426,51 +669,34 @@ class AlgorithmOptimizationService:
             raise NotFoundError(f"A/B test not found: {test_id}")
         
         test_config = self._ab_tests[test_id]
-        
-        # 收集两组的反馈数据
-        control_feedbacks = []
-        treatment_feedbacks = []
-        
-        for assignment_key, group in self._ab_test_assignments.items():
-            if not assignment_key.startswith(f"{test_id}:"):
-                continue
-            
-            user_id = assignment_key.split(":")[1]
-            user_feedbacks = [
-                fb for fb in self._feedbacks.values()
-                if fb.user_id == user_id and fb.scene == test_config.scene
-            ]
-            
-            if group == "control":
-                control_feedbacks.extend(user_feedbacks)
-            else:
-                treatment_feedbacks.extend(user_feedbacks)
+        control = self._ab_test_stats[test_id]["control"]
+        treatment = self._ab_test_stats[test_id]["treatment"]
+        control_size = control['satisfaction'].count
+        treatment_size = treatment['satisfaction'].count
         
         # 检查样本量
-        if len(control_feedbacks) < test_config.min_sample_size:
+        if control_size < test_config.min_sample_size:
             raise ValidationError(
                 f"Insufficient control group sample size: "
-                f"{len(control_feedbacks)} < {test_config.min_sample_size}"
+                f"{control_size} < {test_config.min_sample_size}"
             )
-        if len(treatment_feedbacks) < test_config.min_sample_size:
+        if treatment_size < test_config.min_sample_size:
             raise ValidationError(
                 f"Insufficient treatment group sample size: "
-                f"{len(treatment_feedbacks)} < {test_config.min_sample_size}"
+                f"{treatment_size} < {test_config.min_sample_size}"
             )
         
-        # 计算统计指标
-        control_satisfaction = sum(fb.satisfaction_score for fb in control_feedbacks) / len(control_feedbacks)
-        control_quality = sum(fb.conversation_quality for fb in control_feedbacks) / len(control_feedbacks)
-        
-        treatment_satisfaction = sum(fb.satisfaction_score for fb in treatment_feedbacks) / len(treatment_feedbacks)
-        treatment_quality = sum(fb.conversation_quality for fb in treatment_feedbacks) / len(treatment_feedbacks)
+        # 计算统计指标（在线累加器，O(1)）
+        control_satisfaction = control['satisfaction'].mean
+        control_quality = control['quality'].mean
         
-        # 简化的统计显著性检验（实际应使用t检验）
-        satisfaction_diff = abs(treatment_satisfaction - control_satisfaction)
-        quality_diff = abs(treatment_quality - control_quality)
+        treatment_satisfaction = treatment['satisfaction'].mean
+        treatment_quality = treatment['quality'].mean
         
-        # 简化的p值计算（实际应使用统计检验）
-        p_value = max(0.01, 1.0 - (satisfaction_diff + quality_diff) / 10.0)
+        # 对满意度和对话质量分别做Welch t检验，按Bonferroni校正取两者中较小的p值
+        _, satisfaction_p = welch_t_test(treatment['satisfaction'], control['satisfaction'])
+        _, quality_p = welch_t_test(treatment['quality'], control['quality'])
+        p_value = min(1.0, 2 * min(satisfaction_p, quality_p))
         is_significant = p_value < 0.05
         
         # 确定获胜组
@@ -489,10 +715,10 @@ class AlgorithmOptimizationService:
         
         result = ABTestResult(
             test_id=test_id,
-            control_sample_size=len(control_feedbacks),
+            control_sample_size=control_size,
             control_avg_satisfaction=control_satisfaction,
             control_avg_quality=control_quality,
-            treatment_sample_size=len(treatment_feedbacks),
+            treatment_sample_size=treatment_size,
             treatment_avg_satisfaction=treatment_satisfaction,
             treatment_avg_quality=treatment_quality,
             is_significant=is_significant,
@@ -556,10 +782,12 @@ class AlgorithmOptimizationService:
         end_date = datetime.now()
         start_date = end_date - timedelta(days=period_days)
         
-        # 获取反馈数据
-        feedbacks = self.get_feedbacks_by_scene(scene, start_date, end_date)
+        # 汇总反馈数据
+        total_feedbacks, avg_satisfaction, avg_quality, avg_accuracy = self._aggregate_feedbacks(
+            scene, start_date, end_date
+        )
         
-        if not feedbacks:
+        if total_feedbacks == 0:
             # 返回默认指标
             return PerformanceMetrics(
                 scene=scene,
@@ -575,13 +803,8 @@ class AlgorithmOptimizationService:
                 avg_message_count=0.0
             )
         
-        # 计算指标
-        total_feedbacks = len(feedbacks)
-        avg_satisfaction = sum(fb.satisfaction_score for fb in feedbacks) / total_feedbacks
-        avg_quality = sum(fb.conversation_quality for fb in feedbacks) / total_feedbacks
-        avg_accuracy = sum(fb.match_accuracy for fb in feedbacks) / total_feedbacks
-        
         # 获取匹配数据（简化版本）
+        feedbacks = self.get_feedbacks_by_scene(scene, start_date, end_date)
         unique_matches = len(set(fb.match_id for fb in feedbacks))
         
         metrics = PerformanceMetrics(
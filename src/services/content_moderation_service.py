@@ -17,8 +17,18 @@ logger = get_logger(__name__)
 class ContentModerationService:
     """内容审查与监管服务"""
     
-    def __init__(self):
-        """初始化服务"""
+    # 使用户从匹配候选中移除的处罚类型
+    MATCH_BLOCKING_PENALTIES = (Penalty.TYPE_SUSPEND, Penalty.TYPE_BAN)
+    
+    def __init__(self, exclusion_filter=None):
+        """
+        初始化服务
+        
+        Args:
+            exclusion_filter: 匹配候选排除过滤器（暂停和封号期间不出现在匹配中）
+        """
+        self._exclusion_filter = exclusion_filter
+        
         # 违规关键词库
         self.keyword_library = self._build_keyword_library()
         
@@ -315,6 +325,9 @@ class ContentModerationService:
         
         self.penalties[penalty_id] = penalty
         
+        if self._exclusion_filter is not None and penalty_type in self.MATCH_BLOCKING_PENALTIES:
+            self._exclusion_filter.block(user_id, until=expires_at)
+        
         logger.warning(f"Penalty applied: user={user_id}, type={penalty_type}, "
                       f"duration={duration}")
         
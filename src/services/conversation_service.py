@@ -23,11 +23,17 @@ logger = get_logger(__name__)
 class ConversationService:
     """对话系统服务类"""
     
-    def __init__(self):
-        """初始化对话服务"""
+    def __init__(self, exclusion_filter=None):
+        """
+        初始化对话服务
+        
+        Args:
+            exclusion_filter: 匹配候选排除过滤器（创建对话后双方不再互相推荐）
+        """
         # 使用内存存储（实际应用中应使用数据库）
         self.conversations: Dict[str, Conversation] = {}
         self.messages: Dict[str, List[Message]] = {}
+        self._exclusion_filter = exclusion_filter
         logger.info("ConversationService initialized")
     
     def create_conversation(self, request: ConversationCreateRequest) -> Conversation:
@@ -57,6 +63,9 @@ class ConversationService:
         self.conversations[conversation_id] = conversation
         self.messages[conversation_id] = []
         
+        if self._exclusion_filter is not None:
+            self._exclusion_filter.exclude_pair(request.user_a_id, request.user_b_id)
+        
         logger.info(
             f"Created conversation {conversation_id} between "
             f"{request.user_a_id} and {request.user_b_id} in scene {request.scene}"
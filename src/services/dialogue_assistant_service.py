@@ -1,5 +1,7 @@
 """AI对话助手服务"""
+import threading
 import uuid
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import List, Optional, Dict, Tuple
 from src.models.conversation import (
@@ -10,6 +12,8 @@ from src.models.conversation import (
     Conversation
 )
 from src.utils.logger import get_logger
+from src.utils.timing_wheel import TimingWheel
+from src.utils.intervention_store import InterventionStore
 from src.utils.exceptions import ConversationNotFoundError
 
 logger = get_logger(__name__)
@@ -26,18 +30,41 @@ class DialogueAssistantService:
     # 介入频率控制
     INTERVENTION_COOLDOWN = 20 * 60  # 20分钟（秒）
     
-    def __init__(self):
-        """初始化对话助手服务"""
+    def __init__(
+        self,
+        silence_tick_seconds: float = 1.0,
+        history_size: int = 50,
+        max_conversations: int = 100000,
+        idle_seconds: float = 6 * 3600
+    ):
+        """
+        初始化对话助手服务
+        
+        Args:
+            silence_tick_seconds: 沉默定时器的时间精度（秒）
+            history_size: 每个对话保留的最近介入条数
+            max_conversations: 最多保留介入历史的对话数
+            idle_seconds: 对话（及默认偏好）空闲多久后被淘汰（秒）
+        """
         # 使用内存存储（实际应用中应使用数据库）
-        self.interventions: Dict[str, List[AIIntervention]] = {}
-        self.user_preferences: Dict[str, UserPreference] = {}
-        self.last_message_time: Dict[str, datetime] = {}
+        self.interventions = InterventionStore(
+            max_per_conversation=history_size,
+            max_conversations=max_conversations
+        )
+        # 以下两个字典按最近更新排序，空闲淘汰从头部开始
+        self.user_preferences: "OrderedDict[str, UserPreference]" = OrderedDict()
+        self.last_message_time: "OrderedDict[str, datetime]" = OrderedDict()
+        self.idle_seconds = idle_seconds
+        self._state_lock = threading.Lock()  # 保护上面两个字典的重排与后台淘汰
+        # 每个对话一个沉默定时器，在最后消息时间之后 SILENCE_DURATION_THRESHOLD 秒到期
+        self.silence_timers: TimingWheel[str] = TimingWheel(tick_seconds=silence_tick_seconds)
         logger.info("DialogueAssistantService initialized")
     
     def detect_silence(
         self,
         conversation_id: str,
-        recent_messages: List[Message]
+        recent_messages: List[Message],
+        now: Optional[datetime] = None
     ) -> Tuple[bool, Optional[SilenceType]]:
         """
         检测对话沉默
@@ -45,12 +72,13 @@ class DialogueAssistantService:
         Args:
             conversation_id: 对话ID
             recent_messages: 最近的消息列表
+            now: 当前时间（默认当前时间）
             
         Returns:
             Tuple[bool, Optional[SilenceType]]: (是否沉默, 沉默类型)
         """
         # 检查时间沉默
-        current_time = datetime.now()
+        current_time = now or datetime.now()
         last_msg_time = self.last_message_time.get(conversation_id)
         
         time_silence = False
@@ -314,10 +342,8 @@ class DialogueAssistantService:
             timestamp=datetime.now()
         )
         
-        # 存储介入记录
-        if conversation_id not in self.interventions:
-            self.interventions[conversation_id] = []
-        self.interventions[conversation_id].append(intervention)
+        # 存储介入记录（有界，超出部分只计入聚合计数）
+        self.interventions.append(intervention)
         
         logger.info(
             f"Recorded AI intervention {intervention_id} for conversation {conversation_id}"
@@ -342,19 +368,17 @@ class DialogueAssistantService:
         Returns:
             AIIntervention: 更新后的AI介入记录
         """
-        interventions = self.interventions.get(conversation_id, [])
+        intervention = self.interventions.find(intervention_id)
+        if intervention is None or intervention.conversation_id != conversation_id:
+            raise ValueError(f"Intervention {intervention_id} not found")
         
-        for intervention in interventions:
-            if intervention.intervention_id == intervention_id:
-                intervention.user_response = response
-                
-                logger.info(
-                    f"Updated user response for intervention {intervention_id}: {response}"
-                )
-                
-                return intervention
+        self.interventions.update_response(intervention_id, response)
+        
+        logger.info(
+            f"Updated user response for intervention {intervention_id}: {response}"
+        )
         
-        raise ValueError(f"Intervention {intervention_id} not found")
+        return intervention
     
     def record_user_preference(
         self,
@@ -371,24 +395,26 @@ class DialogueAssistantService:
         Returns:
             UserPreference: 用户偏好
         """
-        preference = self.user_preferences.get(user_id)
+        with self._state_lock:
+            preference = self.user_preferences.get(user_id)
         
-        if preference:
-            preference.ai_intervention_enabled = ai_intervention_enabled
-            preference.updated_at = datetime.now()
+            if preference:
+                preference.ai_intervention_enabled = ai_intervention_enabled
+                preference.updated_at = datetime.now()
+                self.user_preferences.move_to_end(user_id)
             
-            if not ai_intervention_enabled:
-                preference.last_rejection_time = datetime.now()
-                preference.rejection_count += 1
-        else:
-            preference = UserPreference(
-                user_id=user_id,
-                ai_intervention_enabled=ai_intervention_enabled,
-                last_rejection_time=datetime.now() if not ai_intervention_enabled else None,
-                rejection_count=1 if not ai_intervention_enabled else 0,
-                updated_at=datetime.now()
-            )
-            self.user_preferences[user_id] = preference
+                if not ai_intervention_enabled:
+                    preference.last_rejection_time = datetime.now()
+                    preference.rejection_count += 1
+            else:
+                preference = UserPreference(
+                    user_id=user_id,
+                    ai_intervention_enabled=ai_intervention_enabled,
+                    last_rejection_time=datetime.now() if not ai_intervention_enabled else None,
+                    rejection_count=1 if not ai_intervention_enabled else 0,
+                    updated_at=datetime.now()
+                )
+                self.user_preferences[user_id] = preference
         
         logger.info(
             f"Recorded user preference for user {user_id}: "
@@ -411,18 +437,45 @@ class DialogueAssistantService:
     
     def get_intervention_history(
         self,
-        conversation_id: str
+        conversation_id: str,
+        limit: Optional[int] = None
     ) -> List[AIIntervention]:
         """
         获取对话的AI介入历史
         
+        Args:
+            conversation_id: 对话ID
+            limit: 最多返回的最近条数（默认全部保留的记录）
+            
+        Returns:
+            List[AIIntervention]: AI介入记录列表（按时间正序，最多 history_size 条）
+        """
+        history = self.interventions.get(conversation_id)
+        if history is None:
+            return []
+        return history.recent(limit)
+    
+    def get_intervention_stats(self, conversation_id: str) -> Dict:
+        """
+        获取对话的AI介入聚合计数（包含已被挤出历史缓冲区的记录）
+        
         Args:
             conversation_id: 对话ID
             
         Returns:
-            List[AIIntervention]: AI介入记录列表
+            Dict: 总次数、保留条数、按触发类型/介入类型/用户响应的计数和最后介入时间
         """
-        return self.interventions.get(conversation_id, [])
+        history = self.interventions.get(conversation_id)
+        if history is None:
+            return {
+                'total': 0,
+                'retained': 0,
+                'by_trigger': {},
+                'by_type': {},
+                'by_response': {},
+                'last_active': None
+            }
+        return history.get_stats()
     
     def update_last_message_time(
         self,
@@ -436,7 +489,90 @@ class DialogueAssistantService:
             conversation_id: 对话ID
             timestamp: 时间戳
         """
-        self.last_message_time[conversation_id] = timestamp
+        with self._state_lock:
+            self.last_message_time[conversation_id] = timestamp
+            self.last_message_time.move_to_end(conversation_id)
+        # O(1) 重置沉默定时器
+        self.silence_timers.schedule(
+            conversation_id,
+            timestamp.timestamp() + self.SILENCE_DURATION_THRESHOLD
+        )
+    
+    def pop_silent_conversations(self, now: Optional[datetime] = None) -> List[str]:
+        """
+        取出沉默定时器已到期的对话
+        
+        每段沉默只返回一次，对话有新消息后才会重新计时
+        
+        Args:
+            now: 当前时间（默认当前时间）
+            
+        Returns:
+            List[str]: 沉默超过阈值的对话ID列表
+        """
+        return self.silence_timers.advance((now or datetime.now()).timestamp())
+    
+    def cancel_silence_timer(self, conversation_id: str) -> None:
+        """
+        取消对话的沉默定时器（对话结束或暂停时调用）
+        
+        Args:
+            conversation_id: 对话ID
+        """
+        self.silence_timers.cancel(conversation_id)
+    
+    def evict_idle(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        淘汰空闲超过 idle_seconds 的对话状态和默认偏好
+        
+        最后消息时间和介入历史都按最近更新排序，只需从头部淘汰到第一个仍活跃的条目；
+        被淘汰对话的沉默定时器一并取消。关闭了AI介入的用户偏好会一直保留。
+        
+        Args:
+            now: 当前时间（默认当前时间）
+            
+        Returns:
+            Dict[str, int]: 各类被淘汰的条目数
+        """
+        cutoff = (now or datetime.now()) - timedelta(seconds=self.idle_seconds)
+        
+        with self._state_lock:
+            idle_conversations = []
+            while self.last_message_time:
+                conversation_id, last_time = next(iter(self.last_message_time.items()))
+                if last_time >= cutoff:
+                    break
+                del self.last_message_time[conversation_id]
+                self.silence_timers.cancel(conversation_id)
+                idle_conversations.append(conversation_id)
+            
+            evicted_histories = self.interventions.evict_idle(cutoff)
+            
+            stale_users = []
+            for user_id, preference in self.user_preferences.items():
+                if preference.updated_at >= cutoff:
+                    break
+                stale_users.append(user_id)
+            evicted_preferences = 0
+            for user_id in stale_users:
+                if self.user_preferences[user_id].ai_intervention_enabled:
+                    del self.user_preferences[user_id]
+                    evicted_preferences += 1
+                else:
+                    # 保留关闭介入的偏好，移到末尾避免每次淘汰都重复扫描
+                    self.user_preferences.move_to_end(user_id)
+        
+        if idle_conversations or evicted_histories or evicted_preferences:
+            logger.info(
+                f"Evicted idle dialogue state: {len(idle_conversations)} conversations, "
+                f"{len(evicted_histories)} intervention histories, {evicted_preferences} preferences"
+            )
+        
+        return {
+            'conversations': len(idle_conversations),
+            'intervention_histories': len(evicted_histories),
+            'preferences': evicted_preferences
+        }
         
     def get_silence_duration(self, conversation_id: str) -> float:
         """
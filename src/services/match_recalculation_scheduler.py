@@ -0,0 +1,232 @@
+"""匹配重新计算调度器（合并去抖）"""
+import queue
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Set, Tuple
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+RecalculationKey = Tuple[str, str]  # (user_id, scene)
+
+
+class MatchRecalculationScheduler:
+    """
+    匹配重新计算调度器
+
+    画像或场景变化时只把 (用户, 场景) 标记为待重算，调用为O(1)。
+    首次标记后经过去抖窗口才真正重算，窗口内的重复标记被合并，
+    因此每个窗口内每个 (用户, 场景) 至多重算一次；到期的键交给有界工作线程池执行。
+    重算通过推荐列表服务完成：只刷新实际提供给 /find 的预计算列表，没有列表或列表已反映
+    最新画像（已被画像变更监听器刷新）时跳过。
+    """
+
+    _STOP = object()
+
+    def __init__(
+        self,
+        recommendation_service,
+        debounce_seconds: float = 5.0,
+        num_workers: int = 2,
+        queue_size: int = 1000
+    ):
+        """
+        初始化调度器
+
+        Args:
+            recommendation_service: 推荐列表服务实例
+            debounce_seconds: 去抖窗口（秒）
+            num_workers: 重算工作线程数
+            queue_size: 已到期待执行的重算队列容量
+        """
+        self._recommendation_service = recommendation_service
+        self.debounce_seconds = debounce_seconds
+        self.num_workers = max(1, num_workers)
+        self.logger = logger
+
+        self._deadlines: Dict[RecalculationKey, float] = {}  # 待重算的键 -> 到期时间
+        # 去抖窗口固定，到期时间与标记顺序一致，用先进先出队列即可
+        self._order: Deque[RecalculationKey] = deque()
+        self._running: Set[RecalculationKey] = set()
+        self._condition = threading.Condition()
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, queue_size))
+        self._workers: List[threading.Thread] = []
+        self._stop = threading.Event()
+        self._stats = {'marked': 0, 'coalesced': 0, 'recalculated': 0, 'skipped': 0, 'failed': 0}
+
+    def mark_dirty(self, user_id: str, scene: str) -> None:
+        """
+        标记 (用户, 场景) 待重算
+
+        Args:
+            user_id: 用户ID
+            scene: 场景
+        """
+        key = (user_id, scene)
+        with self._condition:
+            self._stats['marked'] += 1
+            if key in self._deadlines:
+                self._stats['coalesced'] += 1
+                return
+            self._deadlines[key] = time.monotonic() + self.debounce_seconds
+            self._order.append(key)
+            if len(self._order) == 1:
+                self._condition.notify()
+
+    def mark_user_dirty(self, user_id: str, scenes: Iterable[str]) -> None:
+        """
+        标记用户的多个场景待重算
+
+        Args:
+            user_id: 用户ID
+            scenes: 场景列表
+        """
+        for scene in scenes:
+            self.mark_dirty(user_id, scene)
+
+    def is_pending(self, user_id: str, scene: str) -> bool:
+        """
+        判断 (用户, 场景) 是否在等待重算
+
+        Args:
+            user_id: 用户ID
+            scene: 场景
+
+        Returns:
+            bool: 是否待重算
+        """
+        with self._condition:
+            return (user_id, scene) in self._deadlines
+
+    def run_due(self, now: Optional[float] = None) -> int:
+        """
+        在当前线程中重算已到期的键（未启动后台线程时使用）
+
+        Args:
+            now: 当前时间（time.monotonic()，默认当前值）
+
+        Returns:
+            int: 重算的键数
+        """
+        due = self._pop_due(time.monotonic() if now is None else now)
+        for key in due:
+            self._recalculate(key)
+        return len(due)
+
+    def flush(self) -> int:
+        """
+        忽略去抖窗口，立即在当前线程中重算全部待重算的键
+
+        Returns:
+            int: 重算的键数
+        """
+        return self.run_due(now=float('inf'))
+
+    def start(self) -> None:
+        """启动调度线程和重算工作线程"""
+        if self._workers:
+            return
+        self._stop.clear()
+        for i in range(self.num_workers):
+            worker = threading.Thread(
+                target=self._run_worker,
+                name=f"match-recalculation-{i}",
+                daemon=True
+            )
+            worker.start()
+            self._workers.append(worker)
+        dispatcher = threading.Thread(
+            target=self._run_dispatcher,
+            name="match-recalculation-dispatcher",
+            daemon=True
+        )
+        dispatcher.start()
+        self._workers.append(dispatcher)
+        self.logger.info(f"Match recalculation scheduler started with {self.num_workers} workers")
+
+    def close(self) -> None:
+        """停止后台线程（未到期的键被丢弃）"""
+        if not self._workers:
+            return
+        self._stop.set()
+        with self._condition:
+            self._condition.notify_all()
+        for _ in range(self.num_workers):
+            self._queue.put(self._STOP)
+        for worker in self._workers:
+            worker.join(timeout=5.0)
+        self._workers = []
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        获取调度统计
+
+        Returns:
+            Dict[str, int]: 待重算数、执行中数、标记/合并/重算/跳过/失败次数和执行队列长度
+        """
+        with self._condition:
+            return {
+                'pending': len(self._deadlines),
+                'running': len(self._running),
+                **self._stats,
+                'queue_depth': self._queue.qsize()
+            }
+
+    # ==================== 内部方法 ====================
+
+    def _pop_due(self, now: float) -> List[RecalculationKey]:
+        """取出已到期的键并标记为执行中（正在执行的键顺延一个窗口）"""
+        due = []
+        deferred = []
+        with self._condition:
+            while self._order and self._deadlines[self._order[0]] <= now:
+                key = self._order.popleft()
+                if key in self._running:
+                    deferred.append(key)
+                    continue
+                del self._deadlines[key]
+                self._running.add(key)
+                due.append(key)
+            for key in deferred:
+                self._deadlines[key] = time.monotonic() + self.debounce_seconds
+                self._order.append(key)
+        return due
+
+    def _recalculate(self, key: RecalculationKey) -> None:
+        """重算单个 (用户, 场景)，失败时记录日志"""
+        user_id, scene = key
+        try:
+            refreshed = self._recommendation_service.request_refresh(user_id, scene)
+            outcome = 'recalculated' if refreshed else 'skipped'
+            if refreshed:
+                self.logger.info(f"Requested match recalculation for user {user_id} in scene {scene}")
+        except Exception as e:
+            outcome = 'failed'
+            self.logger.error(f"Failed to recalculate matches for user {user_id} in scene {scene}: {e}")
+        with self._condition:
+            self._running.discard(key)
+            self._stats[outcome] += 1
+
+    def _run_dispatcher(self) -> None:
+        """调度线程：等到最早的键到期后交给工作线程"""
+        while not self._stop.is_set():
+            with self._condition:
+                if not self._order:
+                    self._condition.wait()
+                    continue
+                wait = self._deadlines[self._order[0]] - time.monotonic()
+                if wait > 0:
+                    self._condition.wait(timeout=wait)
+                    continue
+            for key in self._pop_due(time.monotonic()):
+                self._queue.put(key)
+
+    def _run_worker(self) -> None:
+        """重算工作线程主循环"""
+        while True:
+            key = self._queue.get()
+            if key is self._STOP:
+                return
+            self._recalculate(key)
@@ -1,11 +1,16 @@
 """智能匹配服务"""
 import uuid
 import math
-from typing import List, Dict, Optional
-from datetime import datetime
+import heapq
+import threading
+from bisect import bisect_left, insort
+from typing import List, Dict, Optional, Tuple
+from datetime import datetime, timedelta
 from src.models.matching import Match, SceneConfig, MatchRequest, MatchResult
 from src.models.user import UserProfile
+from src.services.scene_registry import SceneRegistry
 from src.utils.exceptions import NotFoundError, ValidationError
+from src.utils.exclusion_filter import ExclusionFilter
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -14,96 +19,50 @@ logger = get_logger(__name__)
 class MatchingService:
     """智能匹配服务类"""
     
-    def __init__(self, user_profile_service=None):
+    # 待处理匹配的默认有效期
+    PENDING_MATCH_TTL = timedelta(days=7)
+    
+    # 参与匹配打分的画像字段，其他字段变化不影响匹配结果
+    PROFILE_FIELDS = frozenset({
+        'mbti_type', 'big_five', 'social_energy', 'emotion_stability',
+        'academic_interests', 'career_interests', 'hobby_interests',
+        'current_scenes', 'scene_priorities'
+    })
+    
+    def __init__(
+        self,
+        user_profile_service=None,
+        event_log=None,
+        pending_ttl: Optional[timedelta] = None,
+        exclusion_filter: Optional[ExclusionFilter] = None,
+        scene_registry: Optional[SceneRegistry] = None
+    ):
         """
         初始化匹配服务
         
         Args:
             user_profile_service: 用户画像服务实例（用于依赖注入）
+            event_log: 匹配事件日志（MatchEventLog，None表示不记录）
+            pending_ttl: 待处理匹配的有效期（默认7天），过期后被清理
+            exclusion_filter: 候选排除过滤器（与对话、内容审查服务共享）
+            scene_registry: 场景配置注册表（与场景管理服务共享，默认新建）
         """
         self._user_profile_service = user_profile_service
+        self._event_log = event_log
+        self.exclusion_filter = exclusion_filter or ExclusionFilter()
+        self.pending_ttl = pending_ttl or self.PENDING_MATCH_TTL
         self._matches: Dict[str, Match] = {}
-        self._scene_configs: Dict[str, SceneConfig] = self._initialize_scene_configs()
+        # user_id -> [(created_at, match_id)]，按创建时间升序
+        self._user_matches: Dict[str, List[Tuple[datetime, str]]] = {}
+        # (user_id, user_id, scene) -> 待处理的match_id，同一对用户在同一场景只保留一条待处理匹配
+        self._pending_by_pair: Dict[Tuple[str, str, str], str] = {}
+        # (created_at, match_id) 最小堆，用于清理过期的待处理匹配（惰性删除）
+        self._pending_expiry: List[Tuple[datetime, str]] = []
+        # 保护以上匹配记录和索引；find_matches 会被请求线程和后台刷新线程并发调用
+        self._store_lock = threading.RLock()
+        self.scene_registry = scene_registry or SceneRegistry()
         self.logger = logger
     
-    def _initialize_scene_configs(self) -> Dict[str, SceneConfig]:
-        """初始化场景配置"""
-        configs = {}
-        
-        # 考研自习室场景
-        configs['考研自习室'] = SceneConfig(
-            scene_name='考研自习室',
-            display_name='考研自习室',
-            description='为准备考研的同学提供学习伙伴匹配',
-            match_weights={
-                'personality': 0.25,
-                'interest': 0.35,
-                'scene': 0.30,
-                'emotion': 0.10
-            },
-            topic_templates=[
-                '你的目标院校是哪里？',
-                '你每天的学习时间安排是怎样的？',
-                '有什么好的学习方法可以分享吗？'
-            ]
-        )
-        
-        # 职业咨询室场景
-        configs['职业咨询室'] = SceneConfig(
-            scene_name='职业咨询室',
-            display_name='职业咨询室',
-            description='为职业规划和求职提供交流平台',
-            match_weights={
-                'personality': 0.20,
-                'interest': 0.40,
-                'scene': 0.30,
-                'emotion': 0.10
-            },
-            topic_templates=[
-                '你对哪个行业感兴趣？',
-                '你有什么职业规划？',
-                '你参加过哪些实习或项目？'
-            ]
-        )
-        
-        # 心理树洞场景
-        configs['心理树洞'] = SceneConfig(
-            scene_name='心理树洞',
-            display_name='心理树洞',
-            description='提供情感支持和心理倾诉空间',
-            match_weights={
-                'personality': 0.30,
-                'interest': 0.10,
-                'scene': 0.20,
-                'emotion': 0.40
-            },
-            topic_templates=[
-                '最近有什么让你感到困扰的事情吗？',
-                '你通常如何缓解压力？',
-                '有什么让你感到开心的事情吗？'
-            ]
-        )
-        
-        # 兴趣社群场景
-        configs['兴趣社群'] = SceneConfig(
-            scene_name='兴趣社群',
-            display_name='兴趣社群',
-            description='基于共同兴趣爱好的社交匹配',
-            match_weights={
-                'personality': 0.20,
-                'interest': 0.50,
-                'scene': 0.20,
-                'emotion': 0.10
-            },
-            topic_templates=[
-                '你最喜欢的兴趣爱好是什么？',
-                '你平时喜欢做什么？',
-                '有什么想一起做的活动吗？'
-            ]
-        )
-        
-        return configs
-    
     def calculate_match_score(
         self,
         user_a_id: str,
@@ -128,9 +87,9 @@ class MatchingService:
         profile_a = self._user_profile_service.get_profile(user_a_id)
         profile_b = self._user_profile_service.get_profile(user_b_id)
         
-        # 获取场景配置
-        scene_config = self._scene_configs.get(scene)
-        if not scene_config:
+        # 获取场景权重（不可变快照中的只读映射，无需加锁）
+        weights = self.scene_registry.snapshot.get_match_weights(scene)
+        if weights is None:
             raise ValidationError(f"Invalid scene: {scene}")
         
         # 计算各维度得分
@@ -140,7 +99,6 @@ class MatchingService:
         emotion_score = self._calculate_emotion_sync_score(profile_a, profile_b)
         
         # 根据场景权重计算总分
-        weights = scene_config.match_weights
         total_score = (
             personality_score * weights.get('personality', 0.25) +
             interest_score * weights.get('interest', 0.25) +
@@ -389,11 +347,16 @@ class MatchingService:
         if not self._user_profile_service:
             raise ValidationError("User profile service not initialized")
         
+        self.expire_pending_matches()
+        
         # 获取所有用户（实际应该从数据库查询）
         all_user_ids = self._get_all_user_ids()
         
-        # 排除自己
-        candidate_ids = [uid for uid in all_user_ids if uid != user_id]
+        # 排除自己，以及已接受、已拒绝、正在对话或被封禁的用户
+        candidate_ids = self.exclusion_filter.filter_candidates(
+            user_id,
+            (uid for uid in all_user_ids if uid != user_id)
+        )
         
         if not candidate_ids:
             return []
@@ -411,14 +374,130 @@ class MatchingService:
                 continue
         
         # 按匹配度排序并限制数量
-        sorted_matches = self._sort_and_limit_matches(matches, limit)
+        ranked_matches = self._sort_and_limit_matches(matches, len(matches))
         
-        # 保存匹配记录
-        for match in sorted_matches:
-            self._matches[match.match_id] = match
+        # 保存匹配记录（同一对用户已有待处理匹配时复用该记录）
+        with self._store_lock:
+            sorted_matches = [self._store_match(match) for match in ranked_matches[:limit]]
+        
+        # 记录全部候选的维度得分和排名（包括未返回的候选）
+        if self._event_log is not None:
+            self._event_log.append_ranked(
+                sorted_matches + ranked_matches[limit:], len(sorted_matches)
+            )
         
         return sorted_matches
     
+    def _store_match(self, match: Match) -> Match:
+        """
+        保存匹配记录并更新索引
+        
+        同一对用户在同一场景已有待处理匹配时，用新的得分刷新已有记录并保留其match_id。
+        调用方需持有 _store_lock。
+        
+        Args:
+            match: 新计算的匹配记录
+            
+        Returns:
+            Match: 实际保存的匹配记录
+        """
+        pair_key = self._pair_key(match)
+        existing_id = self._pending_by_pair.get(pair_key)
+        existing = self._matches.get(existing_id) if existing_id else None
+        
+        if existing is not None and existing.status == 'pending':
+            self._unindex_user_matches(existing)
+            existing.match_score = match.match_score
+            existing.match_reason = match.match_reason
+            existing.personality_score = match.personality_score
+            existing.interest_score = match.interest_score
+            existing.scene_score = match.scene_score
+            existing.emotion_sync_score = match.emotion_sync_score
+            existing.created_at = match.created_at
+            match = existing
+        else:
+            self._matches[match.match_id] = match
+            self._pending_by_pair[pair_key] = match.match_id
+        
+        entry = (match.created_at, match.match_id)
+        for user_id in (match.user_a_id, match.user_b_id):
+            insort(self._user_matches.setdefault(user_id, []), entry)
+        heapq.heappush(self._pending_expiry, entry)
+        # 刷新和处理匹配都会在堆中留下过时条目，过时条目过多时压缩
+        if len(self._pending_expiry) > 2 * len(self._pending_by_pair) + 64:
+            self._pending_expiry = [
+                (created_at, match_id) for created_at, match_id in self._pending_expiry
+                if self._is_live_expiry_entry(created_at, match_id)
+            ]
+            heapq.heapify(self._pending_expiry)
+        
+        return match
+    
+    def _is_live_expiry_entry(self, created_at: datetime, match_id: str) -> bool:
+        """过期堆条目是否仍对应一条未被刷新的待处理匹配"""
+        match = self._matches.get(match_id)
+        return match is not None and match.status == 'pending' and match.created_at == created_at
+    
+    def expire_pending_matches(self, now: Optional[datetime] = None) -> int:
+        """
+        清理超过有效期的待处理匹配
+        
+        按创建时间从最早开始弹出，遇到未过期的记录即停止，摊销开销与过期数量成正比。
+        
+        Args:
+            now: 当前时间（默认datetime.now()）
+            
+        Returns:
+            int: 清理的匹配数量
+        """
+        cutoff = (now or datetime.now()) - self.pending_ttl
+        expired = 0
+        
+        with self._store_lock:
+            while self._pending_expiry and self._pending_expiry[0][0] <= cutoff:
+                created_at, match_id = heapq.heappop(self._pending_expiry)
+                # 已处理或已被刷新的记录是过时条目，直接丢弃
+                if not self._is_live_expiry_entry(created_at, match_id):
+                    continue
+                match = self._matches[match_id]
+                
+                del self._matches[match_id]
+                self._unindex_user_matches(match)
+                self._release_pending(match)
+                if self._event_log is not None:
+                    self._event_log.append(match, 'expired')
+                expired += 1
+        
+        if expired:
+            self.logger.info(f"Expired {expired} pending matches")
+        
+        return expired
+    
+    @staticmethod
+    def _pair_key(match: Match) -> Tuple[str, str, str]:
+        """匹配的去重键（与用户顺序无关）"""
+        user_a, user_b = sorted((match.user_a_id, match.user_b_id))
+        return user_a, user_b, match.scene
+    
+    def _release_pending(self, match: Match) -> None:
+        """匹配不再待处理时移除去重索引"""
+        pair_key = self._pair_key(match)
+        if self._pending_by_pair.get(pair_key) == match.match_id:
+            del self._pending_by_pair[pair_key]
+    
+    def _unindex_user_matches(self, match: Match) -> None:
+        """从双方的用户索引中移除匹配"""
+        entry = (match.created_at, match.match_id)
+        for user_id in (match.user_a_id, match.user_b_id):
+            entries = self._user_matches.get(user_id)
+            if not entries:
+                continue
+            index = bisect_left(entries, entry)
+            if index < len(entries) and entries[index] == entry:
+                del entries[index]
+            if not entries:
+                del self._user_matches[user_id]
+    
     def _create_match(
         self,
         user_a_id: str,
@@ -584,19 +663,13 @@ class MatchingService:
         """
         更新场景的匹配权重
         
+        新权重以新版本快照发布到场景注册表，共享存储时同步到其他工作进程
+        
         Args:
             scene: 场景名称
             weights: 新的权重配置
         """
-        if scene not in self._scene_configs:
-            raise ValidationError(f"Invalid scene: {scene}")
-        
-        # 验证权重总和
-        if abs(sum(weights.values()) - 1.0) > 0.01:
-            raise ValidationError("Weights must sum to 1.0")
-        
-        self._scene_configs[scene].match_weights = weights
-        self.logger.info(f"Updated match weights for scene: {scene}")
+        self.scene_registry.update_match_weights(scene, weights)
     
     def get_scene_config(self, scene: str) -> SceneConfig:
         """
@@ -608,9 +681,7 @@ class MatchingService:
         Returns:
             SceneConfig: 场景配置
         """
-        if scene not in self._scene_configs:
-            raise ValidationError(f"Invalid scene: {scene}")
-        return self._scene_configs[scene]
+        return self.scene_registry.get_scene_config(scene)
     
     def _get_all_user_ids(self) -> List[str]:
         """
@@ -712,15 +783,15 @@ class MatchingService:
         Returns:
             List[Match]: 匹配记录列表
         """
-        user_matches = [
-            match for match in self._matches.values()
-            if match.user_a_id == user_id or match.user_b_id == user_id
-        ]
-        
-        # 按创建时间倒序排序
-        user_matches.sort(key=lambda x: x.created_at, reverse=True)
+        self.expire_pending_matches()
         
-        return user_matches[:limit]
+        # 索引按创建时间升序，从尾部取最近的limit条
+        with self._store_lock:
+            entries = self._user_matches.get(user_id, [])
+            return [
+                self._matches[match_id]
+                for _, match_id in reversed(entries[-limit:] if limit > 0 else [])
+            ]
     
     def accept_match(self, match_id: str, user_id: str) -> Match:
         """
@@ -743,7 +814,12 @@ class MatchingService:
             raise ValidationError("User not authorized to accept this match")
         
         # 更新状态
-        match.status = "accepted"
+        with self._store_lock:
+            match.status = "accepted"
+            self._release_pending(match)
+        self.exclusion_filter.exclude_pair(match.user_a_id, match.user_b_id)
+        if self._event_log is not None:
+            self._event_log.append(match, "accepted")
         
         self.logger.info(f"Match {match_id} accepted by user {user_id}")
         
@@ -770,7 +846,12 @@ class MatchingService:
             raise ValidationError("User not authorized to reject this match")
         
         # 更新状态
-        match.status = "rejected"
+        with self._store_lock:
+            match.status = "rejected"
+            self._release_pending(match)
+        self.exclusion_filter.exclude_pair(match.user_a_id, match.user_b_id)
+        if self._event_log is not None:
+            self._event_log.append(match, "rejected")
         
         self.logger.info(f"Match {match_id} rejected by user {user_id}")
         
@@ -0,0 +1,238 @@
+"""心理健康异步监测流水线"""
+import queue
+import threading
+import time
+import zlib
+from collections import deque
+from typing import Deque, Dict, List, Optional
+from src.utils.logger import get_logger
+from src.utils.running_stats import RunningStats
+
+logger = get_logger(__name__)
+
+
+class MonitoringTask:
+    """待监测的一条消息"""
+
+    __slots__ = ('user_id', 'text', 'message_id', 'submitted_at')
+
+    def __init__(self, user_id: str, text: str, message_id: Optional[str]):
+        self.user_id = user_id
+        self.text = text
+        self.message_id = message_id
+        self.submitted_at = time.monotonic()
+
+
+class MentalHealthMonitor:
+    """
+    心理健康异步监测流水线
+
+    消息发送后只做一次危机关键词扫描即返回，完整的 monitor_and_respond
+    （情感分析、状态检查、资源推送、转介）移出请求路径：
+    普通消息按用户分片进入有界队列，由工作线程池处理，同一用户的消息保持顺序；
+    命中危机关键词的消息走独立的快速通道，不排在积压的普通消息之后。
+    队列已满时丢弃普通消息并计数，发送消息永不阻塞。
+    """
+
+    LANES = ('normal', 'critical')
+
+    # 每个通道保留最近多少条处理延迟用于计算分位数
+    LATENCY_WINDOW = 1024
+
+    _STOP = object()
+
+    def __init__(
+        self,
+        mental_health_service,
+        queue_size: int = 1000,
+        num_workers: int = 2
+    ):
+        """
+        初始化流水线
+
+        Args:
+            mental_health_service: 心理健康服务实例
+            queue_size: 普通消息队列总容量（平均分配给各工作线程）
+            num_workers: 普通消息工作线程数
+        """
+        self._service = mental_health_service
+        self.num_workers = max(1, num_workers)
+        self.queue_size = max(self.num_workers, queue_size)
+        self.logger = logger
+
+        shard_size = self.queue_size // self.num_workers
+        self._queues: List[queue.Queue] = [
+            queue.Queue(maxsize=shard_size) for _ in range(self.num_workers)
+        ]
+        self._critical_queue: queue.Queue = queue.Queue()
+        # 同一用户的处理互斥（快速通道与普通通道可能同时处理同一用户）
+        self._user_locks = [threading.Lock() for _ in range(self.num_workers)]
+        self._workers: List[threading.Thread] = []
+
+        self._stats_lock = threading.Lock()
+        self._counters = {'submitted': 0, 'critical': 0, 'processed': 0, 'dropped': 0, 'failed': 0}
+        self._latency_stats: Dict[str, RunningStats] = {lane: RunningStats() for lane in self.LANES}
+        self._recent_latency: Dict[str, Deque[float]] = {
+            lane: deque(maxlen=self.LATENCY_WINDOW) for lane in self.LANES
+        }
+        self._max_latency: Dict[str, float] = {lane: 0.0 for lane in self.LANES}
+
+    def submit(self, user_id: str, text: str, message_id: Optional[str] = None) -> bool:
+        """
+        提交一条消息进行监测
+
+        Args:
+            user_id: 发送者ID
+            text: 消息内容
+            message_id: 消息ID
+
+        Returns:
+            bool: 是否已接收（普通队列已满时返回False）
+        """
+        task = MonitoringTask(user_id, text, message_id)
+        critical = bool(self._service.detect_critical_keywords(text))
+        with self._stats_lock:
+            self._counters['submitted'] += 1
+            if critical:
+                self._counters['critical'] += 1
+
+        if critical:
+            if self._workers:
+                self._critical_queue.put(task)
+            else:
+                # 未启动后台线程时危机消息立即处理
+                self._process(task, 'critical')
+            return True
+
+        try:
+            self._queues[self._shard(user_id)].put_nowait(task)
+        except queue.Full:
+            with self._stats_lock:
+                self._counters['dropped'] += 1
+            self.logger.warning(f"Mental health monitor queue full, dropped message from user {user_id}")
+            return False
+        return True
+
+    def run_pending(self) -> int:
+        """
+        在当前线程中处理队列中的全部消息（未启动后台线程时使用）
+
+        Returns:
+            int: 处理的消息数
+        """
+        count = 0
+        for lane, lane_queue in [('critical', self._critical_queue)] + [
+            ('normal', shard) for shard in self._queues
+        ]:
+            while True:
+                try:
+                    task = lane_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if task is not self._STOP:
+                    self._process(task, lane)
+                    count += 1
+        return count
+
+    def start(self) -> None:
+        """启动工作线程和快速通道线程"""
+        if self._workers:
+            return
+        for i, shard in enumerate(self._queues):
+            worker = threading.Thread(
+                target=self._run_worker,
+                args=(shard, 'normal'),
+                name=f"mental-health-monitor-{i}",
+                daemon=True
+            )
+            worker.start()
+            self._workers.append(worker)
+        critical_worker = threading.Thread(
+            target=self._run_worker,
+            args=(self._critical_queue, 'critical'),
+            name="mental-health-monitor-critical",
+            daemon=True
+        )
+        critical_worker.start()
+        self._workers.append(critical_worker)
+        self.logger.info(f"Mental health monitor started with {self.num_workers} workers")
+
+    def close(self) -> None:
+        """处理完已排队的消息后停止后台线程"""
+        if not self._workers:
+            return
+        for shard in self._queues:
+            shard.put(self._STOP)
+        self._critical_queue.put(self._STOP)
+        for worker in self._workers:
+            worker.join(timeout=5.0)
+        self._workers = []
+
+    def get_stats(self) -> Dict[str, object]:
+        """
+        获取流水线指标
+
+        Returns:
+            Dict: 各通道队列深度、提交/危机/处理/丢弃/失败计数，
+                以及各通道从提交到处理完成的延迟（毫秒：均值、p50、p95、最大值）
+        """
+        with self._stats_lock:
+            latency = {}
+            for lane in self.LANES:
+                recent = sorted(self._recent_latency[lane])
+                latency[lane] = {
+                    'count': self._latency_stats[lane].count,
+                    'mean_ms': self._latency_stats[lane].mean * 1000.0,
+                    'p50_ms': self._percentile(recent, 0.50) * 1000.0,
+                    'p95_ms': self._percentile(recent, 0.95) * 1000.0,
+                    'max_ms': self._max_latency[lane] * 1000.0
+                }
+            return {
+                'queue_depth': {
+                    'normal': sum(shard.qsize() for shard in self._queues),
+                    'critical': self._critical_queue.qsize()
+                },
+                'queue_capacity': self.queue_size,
+                **self._counters,
+                'latency': latency
+            }
+
+    # ==================== 内部方法 ====================
+
+    def _shard(self, user_id: str) -> int:
+        """用户所在分片（稳定哈希）"""
+        return zlib.crc32(user_id.encode('utf-8')) % self.num_workers
+
+    def _process(self, task: MonitoringTask, lane: str) -> None:
+        """处理一条消息并记录指标，失败时记录日志"""
+        failed = False
+        try:
+            with self._user_locks[self._shard(task.user_id)]:
+                self._service.monitor_and_respond(task.user_id, task.text, task.message_id)
+        except Exception as e:
+            failed = True
+            self.logger.warning(f"Mental health monitoring failed for user {task.user_id}: {e}")
+
+        latency = time.monotonic() - task.submitted_at
+        with self._stats_lock:
+            self._counters['failed' if failed else 'processed'] += 1
+            self._latency_stats[lane].update(latency)
+            self._recent_latency[lane].append(latency)
+            if latency > self._max_latency[lane]:
+                self._max_latency[lane] = latency
+
+    def _run_worker(self, lane_queue: queue.Queue, lane: str) -> None:
+        """工作线程主循环"""
+        while True:
+            task = lane_queue.get()
+            if task is self._STOP:
+                return
+            self._process(task, lane)
+
+    @staticmethod
+    def _percentile(sorted_values: List[float], fraction: float) -> float:
+        """已排序样本的分位数（最近秩），无样本时为0"""
+        if not sorted_values:
+            return 0.0
+        index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+        return sorted_values[index]
@@ -2,7 +2,7 @@
 import re
 import uuid
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Tuple
+from typing import Callable, List, Optional, Dict, Tuple
 from collections import defaultdict
 
 from src.models.mental_health import (
@@ -16,6 +16,10 @@ from src.models.mental_health import (
     EmotionAnalysisRequest,
     MentalHealthCheckRequest
 )
+from src.utils.emotion_timeline import EmotionTimeline, EmotionWindowSummary
+from src.utils.exceptions import NotFoundError, ValidationError
+from src.utils.keyword_automaton import KeywordAutomaton
+from src.utils.priority_store import PriorityRecordStore
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -34,6 +38,38 @@ class MentalHealthService:
         'self_harm': ['自残', '伤害自己', '割伤', '烫伤', '打自己']
     }
     
+    # 一般负面/正面词（未命中情绪关键词时用于粗略判断）
+    SENTIMENT_WORDS = {
+        'negative_sentiment': ['不好', '糟糕', '难受', '不开心', '烦'],
+        'positive_sentiment': ['开心', '高兴', '快乐', '好', '棒', '喜欢']
+    }
+    
+    # 关键词类别的严重程度
+    KEYWORD_SEVERITY = {
+        'suicide_risk': 3,
+        'self_harm': 3,
+        'depressed': 2,
+        'anxious': 1,
+        'negative_sentiment': 0,
+        'positive_sentiment': 0
+    }
+    CRITICAL_SEVERITY = 3
+    
+    # 危机关键词（自杀风险或自残）
+    CRITICAL_KEYWORDS = frozenset(NEGATIVE_KEYWORDS['suicide_risk'] + NEGATIVE_KEYWORDS['self_harm'])
+    SUICIDE_RISK_KEYWORDS = frozenset(NEGATIVE_KEYWORDS['suicide_risk'])
+    
+    # 预警风险等级和转介紧急程度的优先级（越大越优先处理）
+    ALERT_PRIORITY = {'critical': 3, 'high': 2, 'medium': 1, 'low': 0}
+    REFERRAL_PRIORITY = {'emergency': 3, 'high': 2, 'medium': 1, 'low': 0}
+    
+    # 预警和转介的处理状态
+    ALERT_STATUSES = ('pending', 'processing', 'resolved', 'dismissed')
+    REFERRAL_STATUSES = ('pending', 'processing', 'completed', 'declined')
+    
+    # 情绪记录保留天数
+    EMOTION_RETENTION_DAYS = 30
+    
     # 心理健康资源库
     DEFAULT_RESOURCES = [
         {
@@ -86,17 +122,25 @@ class MentalHealthService:
     def __init__(self):
         """初始化服务"""
         # 存储用户情绪状态（实际应使用数据库）
-        self.emotion_states: Dict[str, List[EmotionState]] = defaultdict(list)
+        self.emotion_states: Dict[str, EmotionTimeline] = defaultdict(self._new_timeline)
         # 存储心理健康状态
         self.health_statuses: Dict[str, MentalHealthStatus] = {}
         # 存储资源推送记录
         self.push_records: Dict[str, List[ResourcePushRecord]] = defaultdict(list)
-        # 存储风险预警
-        self.risk_alerts: List[RiskAlert] = []
+        # 存储风险预警（待处理预警按 (风险等级, 创建时间) 排队，并按用户和状态索引）
+        self.risk_alerts: PriorityRecordStore[RiskAlert] = PriorityRecordStore(
+            'alert_id', lambda alert: self.ALERT_PRIORITY.get(alert.risk_level, 0)
+        )
+        self._alert_listeners: List[Callable[[RiskAlert], None]] = []
         # 存储匿名会话
         self.anonymous_sessions: Dict[str, AnonymousSession] = {}
-        # 存储专业转介
-        self.referrals: List[ProfessionalReferral] = []
+        # 存储专业转介（按紧急程度排队）
+        self.referrals: PriorityRecordStore[ProfessionalReferral] = PriorityRecordStore(
+            'referral_id', lambda referral: self.REFERRAL_PRIORITY.get(referral.urgency, 0)
+        )
+        
+        # 编译关键词自动机（每条消息只扫描一遍）
+        self.keyword_matcher = self._build_keyword_matcher()
         
         # 初始化资源库
         self.resources: Dict[str, MentalHealthResource] = {}
@@ -128,12 +172,18 @@ class MentalHealthService:
             'negative': 0.0
         }
         
-        # 检测各类关键词
-        for emotion_type, keywords in self.NEGATIVE_KEYWORDS.items():
-            for keyword in keywords:
-                if keyword in text:
-                    detected_keywords.append(keyword)
-                    emotion_scores[emotion_type] += 1.0
+        neg_count = 0
+        pos_count = 0
+        
+        # 单遍扫描命中全部情绪、危机和一般正负面词
+        for keyword, (category, _severity) in self.keyword_matcher.find_all(text):
+            if category in self.NEGATIVE_KEYWORDS:
+                detected_keywords.append(keyword)
+                emotion_scores[category] += 1.0
+            elif category == 'negative_sentiment':
+                neg_count += 1
+            else:
+                pos_count += 1
         
         # 确定主要情绪类型和强度
         if emotion_scores['suicide_risk'] > 0:
@@ -150,12 +200,6 @@ class MentalHealthService:
             intensity = min(1.0, 0.5 + emotion_scores['anxious'] * 0.1)
         else:
             # 简单的正面/负面判断
-            negative_words = ['不好', '糟糕', '难受', '不开心', '烦']
-            positive_words = ['开心', '高兴', '快乐', '好', '棒', '喜欢']
-            
-            neg_count = sum(1 for word in negative_words if word in text)
-            pos_count = sum(1 for word in positive_words if word in text)
-            
             if neg_count > pos_count:
                 emotion_type = 'negative'
                 intensity = min(0.6, 0.3 + neg_count * 0.1)
@@ -178,13 +222,10 @@ class MentalHealthService:
         
         # 存储情绪状态
         if request.user_id:
-            self.emotion_states[request.user_id].append(emotion_state)
+            timeline = self.emotion_states[request.user_id]
+            timeline.append(emotion_state)
             # 只保留最近30天的记录
-            cutoff_date = datetime.now() - timedelta(days=30)
-            self.emotion_states[request.user_id] = [
-                es for es in self.emotion_states[request.user_id]
-                if es.timestamp >= cutoff_date
-            ]
+            timeline.expire()
         
         logger.info(f"情感分析完成: user_id={request.user_id}, emotion={emotion_type}, intensity={intensity:.2f}")
         
@@ -203,58 +244,25 @@ class MentalHealthService:
         user_id = request.user_id
         check_days = request.check_recent_days
         
-        # 获取最近的情绪记录
+        # 汇总最近的情绪记录（按天分桶增量维护，无需重新扫描和分组）
         cutoff_date = datetime.now() - timedelta(days=check_days)
-        recent_emotions = [
-            es for es in self.emotion_states.get(user_id, [])
-            if es.timestamp >= cutoff_date
-        ]
+        timeline = self.emotion_states.get(user_id) or self._new_timeline()
+        summary = timeline.summarize(cutoff_date)
         
-        # 计算负面情绪天数
-        negative_emotion_days = 0
-        last_negative_date = None
-        
-        if recent_emotions:
-            # 按日期分组
-            emotions_by_date = defaultdict(list)
-            for emotion in recent_emotions:
-                date_key = emotion.timestamp.date()
-                emotions_by_date[date_key].append(emotion)
-            
-            # 检查连续负面情绪天数
-            sorted_dates = sorted(emotions_by_date.keys(), reverse=True)
-            consecutive_negative = 0
-            
-            for date in sorted_dates:
-                day_emotions = emotions_by_date[date]
-                # 如果当天有负面情绪（焦虑或抑郁）
-                has_negative = any(
-                    e.emotion_type in ['anxious', 'depressed'] and e.intensity > 0.5
-                    for e in day_emotions
-                )
-                
-                if has_negative:
-                    consecutive_negative += 1
-                    if last_negative_date is None:
-                        last_negative_date = datetime.combine(date, datetime.min.time())
-                else:
-                    break
-            
-            negative_emotion_days = consecutive_negative
+        # 连续负面情绪天数
+        negative_emotion_days = summary.negative_days
+        last_negative_date = summary.last_negative_date
         
         # 计算情绪稳定性得分
-        if recent_emotions:
+        if summary.count:
             # 情绪波动越大，稳定性越低
-            intensities = [e.intensity for e in recent_emotions]
-            if len(intensities) > 1:
-                variance = sum((x - sum(intensities)/len(intensities))**2 for x in intensities) / len(intensities)
-                emotion_stability_score = max(0.0, 1.0 - variance)
+            if summary.count > 1:
+                emotion_stability_score = max(0.0, 1.0 - summary.stats.population_variance)
             else:
                 emotion_stability_score = 0.7
             
             # 负面情绪占比
-            negative_count = sum(1 for e in recent_emotions if e.emotion_type in ['anxious', 'depressed'])
-            negative_ratio = negative_count / len(recent_emotions)
+            negative_ratio = summary.negative_count / summary.count
             emotion_stability_score *= (1.0 - negative_ratio * 0.5)
         else:
             emotion_stability_score = 0.8  # 默认值
@@ -263,7 +271,7 @@ class MentalHealthService:
         risk_level = self._calculate_risk_level(
             negative_emotion_days,
             emotion_stability_score,
-            recent_emotions
+            summary
         )
         
         # 创建或更新心理健康状态
@@ -273,7 +281,7 @@ class MentalHealthService:
             emotion_stability_score=emotion_stability_score,
             negative_emotion_days=negative_emotion_days,
             last_negative_emotion_date=last_negative_date,
-            recent_emotions=recent_emotions[-10:],  # 只保留最近10条
+            recent_emotions=summary.recent,  # 只保留最近10条
             updated_at=datetime.now()
         )
         
@@ -288,7 +296,7 @@ class MentalHealthService:
         self,
         negative_days: int,
         stability_score: float,
-        recent_emotions: List[EmotionState]
+        summary: EmotionWindowSummary
     ) -> str:
         """
         计算风险等级
@@ -296,28 +304,17 @@ class MentalHealthService:
         Args:
             negative_days: 连续负面情绪天数
             stability_score: 情绪稳定性得分
-            recent_emotions: 最近的情绪记录
+            summary: 最近的情绪汇总
             
         Returns:
             str: 风险等级
         """
         # 检查是否有自杀风险或自残关键词
-        has_critical_keywords = any(
-            keyword in self.NEGATIVE_KEYWORDS['suicide_risk'] + self.NEGATIVE_KEYWORDS['self_harm']
-            for emotion in recent_emotions
-            for keyword in emotion.detected_keywords
-        )
-        
-        if has_critical_keywords:
+        if summary.has_critical_keywords:
             return 'critical'
         
         # 检查严重抑郁
-        severe_depression = any(
-            emotion.emotion_type == 'depressed' and emotion.intensity > 0.8
-            for emotion in recent_emotions
-        )
-        
-        if severe_depression or negative_days >= 7:
+        if summary.has_severe_depression or negative_days >= 7:
             return 'high'
         
         if negative_days >= 3 or stability_score < 0.4:
@@ -325,6 +322,42 @@ class MentalHealthService:
         
         return 'low'
     
+    def detect_critical_keywords(self, text: str) -> List[str]:
+        """
+        检测文本中的危机关键词（自杀风险或自残）
+        
+        Args:
+            text: 用户文本
+            
+        Returns:
+            List[str]: 命中的危机关键词
+        """
+        return [
+            keyword
+            for keyword, (_category, severity) in self.keyword_matcher.find_all(text.lower())
+            if severity >= self.CRITICAL_SEVERITY
+        ]
+    
+    def _build_keyword_matcher(self) -> KeywordAutomaton:
+        """
+        构建关键词自动机
+        
+        Returns:
+            KeywordAutomaton: 关键词 -> (类别, 严重程度)
+        """
+        keywords = []
+        for category, words in list(self.NEGATIVE_KEYWORDS.items()) + list(self.SENTIMENT_WORDS.items()):
+            severity = self.KEYWORD_SEVERITY[category]
+            keywords.extend((word.lower(), (category, severity)) for word in words)
+        return KeywordAutomaton(keywords)
+    
+    def _new_timeline(self) -> EmotionTimeline:
+        """创建用户情绪时间序列"""
+        return EmotionTimeline(
+            self.CRITICAL_KEYWORDS,
+            retention=timedelta(days=self.EMOTION_RETENTION_DAYS)
+        )
+    
     def push_mental_health_resources(
         self,
         user_id: str,
@@ -404,8 +437,6 @@ class MentalHealthService:
             created_at=datetime.now()
         )
         
-        self.risk_alerts.append(alert)
-        
         # 如果是严重风险，立即标记为已通知工作人员
         if risk_level == 'critical':
             alert.notified_staff = True
@@ -413,6 +444,9 @@ class MentalHealthService:
                           f"confidence={confidence:.2f}")
             # 实际应用中应该发送通知给人工客服
         
+        self.risk_alerts.add(alert)
+        self._notify_alert_listeners(alert)
+        
         logger.info(f"创建风险预警: alert_id={alert.alert_id}, user_id={user_id}, "
                    f"type={alert_type}")
         
@@ -508,7 +542,7 @@ class MentalHealthService:
             created_at=datetime.now()
         )
         
-        self.referrals.append(referral)
+        self.referrals.add(referral)
         
         logger.info(f"创建专业转介: referral_id={referral.referral_id}, "
                    f"user_id={user_id}, type={referral_type}, urgency={urgency}")
@@ -553,13 +587,12 @@ class MentalHealthService:
         # 3. 根据情况采取行动
         
         # 3.1 检测到自杀风险或自残 - 最高优先级
-        if any(kw in self.NEGATIVE_KEYWORDS['suicide_risk'] + self.NEGATIVE_KEYWORDS['self_harm']
-               for kw in emotion_state.detected_keywords):
+        if not self.CRITICAL_KEYWORDS.isdisjoint(emotion_state.detected_keywords):
             # 创建严重风险预警
             alert = self.create_risk_alert(
                 user_id=user_id,
-                alert_type='suicide_risk' if any(kw in self.NEGATIVE_KEYWORDS['suicide_risk'] 
-                                                 for kw in emotion_state.detected_keywords) else 'self_harm',
+                alert_type='self_harm' if self.SUICIDE_RISK_KEYWORDS.isdisjoint(
+                    emotion_state.detected_keywords) else 'suicide_risk',
                 detected_content=text[:100],
                 confidence=emotion_state.intensity
             )
@@ -624,9 +657,113 @@ class MentalHealthService:
         return self.push_records.get(user_id, [])
     
     def get_pending_alerts(self) -> List[RiskAlert]:
-        """获取待处理的风险预警"""
-        return [alert for alert in self.risk_alerts if alert.status == 'pending']
+        """获取待处理的风险预警（按处理顺序：风险等级从高到低，同级按创建时间）"""
+        return self.risk_alerts.pending_by_priority()
+    
+    def get_alerts_by_status(self, status: str) -> List[RiskAlert]:
+        """获取某状态的风险预警"""
+        return self.risk_alerts.by_status(status)
+    
+    def get_user_alerts(self, user_id: str, status: Optional[str] = None) -> List[RiskAlert]:
+        """获取用户的风险预警"""
+        return self.risk_alerts.by_user(user_id, status)
+    
+    def get_next_alert(self) -> Optional[RiskAlert]:
+        """
+        取出最紧急的待处理预警并标记为处理中
+        
+        Returns:
+            Optional[RiskAlert]: 风险预警，没有待处理预警时返回None
+        """
+        alert = self.risk_alerts.pop_next('processing')
+        if alert:
+            logger.info(f"分配风险预警: alert_id={alert.alert_id}, risk_level={alert.risk_level}")
+        return alert
+    
+    def update_alert_status(self, alert_id: str, status: str) -> RiskAlert:
+        """
+        更新风险预警状态
+        
+        Args:
+            alert_id: 预警ID
+            status: 新状态（pending / processing / resolved / dismissed）
+            
+        Returns:
+            RiskAlert: 更新后的预警
+            
+        Raises:
+            ValidationError: 状态无效
+            NotFoundError: 预警不存在
+        """
+        if status not in self.ALERT_STATUSES:
+            raise ValidationError(f"Invalid alert status: {status}")
+        alert = self.risk_alerts.set_status(alert_id, status)
+        if alert is None:
+            raise NotFoundError(f"Risk alert {alert_id} not found")
+        return alert
+    
+    def add_alert_listener(self, listener: Callable[[RiskAlert], None]) -> None:
+        """
+        注册新预警监听器
+        
+        Args:
+            listener: 回调函数，参数为新创建的预警
+        """
+        self._alert_listeners.append(listener)
+    
+    def remove_alert_listener(self, listener: Callable[[RiskAlert], None]) -> None:
+        """
+        移除新预警监听器
+        
+        Args:
+            listener: 之前注册的回调函数
+        """
+        if listener in self._alert_listeners:
+            self._alert_listeners.remove(listener)
+    
+    def _notify_alert_listeners(self, alert: RiskAlert) -> None:
+        """通知新预警监听器"""
+        for listener in list(self._alert_listeners):
+            try:
+                listener(alert)
+            except Exception as e:
+                logger.warning(f"Alert listener failed for alert {alert.alert_id}: {e}")
     
     def get_user_referrals(self, user_id: str) -> List[ProfessionalReferral]:
         """获取用户的专业转介记录"""
-        return [ref for ref in self.referrals if ref.user_id == user_id]
+        return self.referrals.by_user(user_id)
+    
+    def get_pending_referrals(self) -> List[ProfessionalReferral]:
+        """获取待处理的专业转介（按紧急程度从高到低，同级按创建时间）"""
+        return self.referrals.pending_by_priority()
+    
+    def get_next_referral(self) -> Optional[ProfessionalReferral]:
+        """
+        取出最紧急的待处理转介并标记为处理中
+        
+        Returns:
+            Optional[ProfessionalReferral]: 专业转介，没有待处理转介时返回None
+        """
+        return self.referrals.pop_next('processing')
+    
+    def update_referral_status(self, referral_id: str, status: str) -> ProfessionalReferral:
+        """
+        更新专业转介状态
+        
+        Args:
+            referral_id: 转介ID
+            status: 新状态（pending / processing / completed / declined）
+            
+        Returns:
+            ProfessionalReferral: 更新后的转介
+            
+        Raises:
+            ValidationError: 状态无效
+            NotFoundError: 转介不存在
+        """
+        if status not in self.REFERRAL_STATUSES:
+            raise ValidationError(f"Invalid referral status: {status}")
+        referral = self.referrals.set_status(referral_id, status)
+        if referral is None:
+            raise NotFoundError(f"Professional referral {referral_id} not found")
+        return referral
@@ -0,0 +1,305 @@
+"""消息嵌入离线批处理服务"""
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+from src.models.conversation import Message
+from src.utils.exceptions import AIModelError, ValidationError
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+class EmbeddingMatrix:
+    """
+    只读的消息嵌入矩阵
+
+    向量以float16存放在内存映射文件中，通过消息ID索引定位行号。
+    """
+
+    def __init__(self, path: str):
+        """
+        打开嵌入矩阵
+
+        Args:
+            path: 矩阵数据文件路径（同目录下需有对应的 .ids.json 索引文件）
+        """
+        self.path = Path(path)
+        index_data = json.loads(
+            MessageEmbeddingService.index_path(self.path).read_text(encoding='utf-8')
+        )
+        self.dim: int = index_data['dim']
+        self.ids: List[str] = index_data['ids']
+        self.created_at: Optional[str] = index_data.get('created_at')
+        self._rows: Dict[str, int] = {message_id: row for row, message_id in enumerate(self.ids)}
+        self.vectors = np.memmap(self.path, dtype=np.float16, mode='r', shape=(len(self.ids), self.dim))
+
+    def get(self, message_id: str):
+        """
+        获取消息的嵌入向量
+
+        Args:
+            message_id: 消息ID
+
+        Returns:
+            嵌入向量（float32），不存在时返回None
+        """
+        row = self._rows.get(message_id)
+        if row is None:
+            return None
+        return np.array(self.vectors[row], dtype=np.float32)
+
+    def __contains__(self, message_id: str) -> bool:
+        return message_id in self._rows
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+class MessageEmbeddingService:
+    """
+    消息嵌入离线批处理服务类
+
+    从对话存储中流式读取消息，以大批次在线程池上进行BERT编码，
+    将池化后的嵌入写入float16内存映射矩阵并保存消息ID索引，
+    供匹配、话题和分析等下游功能复用，无需重复运行BERT。
+    """
+
+    # 任务名称决定输出文件名，只允许字母、数字、下划线和连字符
+    JOB_NAME_PATTERN = re.compile(r'[A-Za-z0-9_\-]+')
+
+    def __init__(
+        self,
+        conversation_service,
+        personality_service,
+        output_dir: str = "data/embeddings",
+        batch_size: int = 64,
+        num_workers: int = 2
+    ):
+        """
+        初始化服务
+
+        Args:
+            conversation_service: 对话服务实例（消息来源）
+            personality_service: 人格识别服务实例（提供BERT编码）
+            output_dir: 嵌入矩阵输出目录
+            batch_size: 每个编码批次的消息数
+            num_workers: 并行编码的线程数
+        """
+        self._conversation_service = conversation_service
+        self._personality_service = personality_service
+        self.output_dir = Path(output_dir)
+        self.batch_size = batch_size
+        self.num_workers = max(1, num_workers)
+        # 同一时间只运行一个任务（任务会调整进程级的torch线程数）
+        self._job_lock = threading.Lock()
+        self.logger = logger
+
+    @staticmethod
+    def index_path(matrix_path: Path) -> Path:
+        """
+        获取嵌入矩阵对应的消息ID索引文件路径
+
+        Args:
+            matrix_path: 矩阵数据文件路径
+
+        Returns:
+            Path: 索引文件路径
+        """
+        return matrix_path.with_name(matrix_path.name + '.ids.json')
+
+    def iter_messages(
+        self,
+        conversation_ids: Optional[List[str]] = None,
+        since: Optional[datetime] = None
+    ) -> Iterator[Message]:
+        """
+        流式遍历对话存储中的消息
+
+        Args:
+            conversation_ids: 限定的对话ID列表（None表示全部对话）
+            since: 只返回该时间之后的消息
+
+        Yields:
+            Message: 消息对象
+        """
+        store = self._conversation_service.messages
+        for conversation_id in (conversation_ids if conversation_ids is not None else list(store.keys())):
+            for message in store.get(conversation_id, []):
+                if since is not None and message.timestamp < since:
+                    continue
+                if message.message_type != 'text' or not message.content:
+                    continue
+                yield message
+
+    def run_embedding_job(
+        self,
+        job_name: str,
+        conversation_ids: Optional[List[str]] = None,
+        since: Optional[datetime] = None
+    ) -> Dict[str, any]:
+        """
+        执行一次消息嵌入批处理任务
+
+        Args:
+            job_name: 任务名称（决定输出文件名）
+            conversation_ids: 限定的对话ID列表（None表示全部对话）
+            since: 只处理该时间之后的消息
+
+        Returns:
+            Dict: 任务统计（消息数、输出路径、耗时等）
+
+        Raises:
+            ValidationError: 任务名称非法，或已有任务在运行
+            AIModelError: 模型或numpy不可用
+        """
+        if not self.JOB_NAME_PATTERN.fullmatch(job_name):
+            raise ValidationError(f"Invalid embedding job name: {job_name}")
+        if not NUMPY_AVAILABLE:
+            raise AIModelError("numpy is required for embedding jobs")
+        if not self._personality_service.wait_until_ready():
+            raise AIModelError("Personality model is not available for embedding jobs")
+        if not self._job_lock.acquire(blocking=False):
+            raise ValidationError("Another embedding job is already running")
+
+        previous_threads = self._tune_torch_threads()
+        try:
+            return self._run_job(job_name, conversation_ids, since)
+        finally:
+            self._restore_torch_threads(previous_threads)
+            self._job_lock.release()
+
+    def _run_job(
+        self,
+        job_name: str,
+        conversation_ids: Optional[List[str]],
+        since: Optional[datetime]
+    ) -> Dict[str, any]:
+        """执行嵌入任务主体（调用方持有任务锁）"""
+        started_at = datetime.now()
+
+        # 先统计消息数以分配矩阵，再流式编码写入
+        total = sum(1 for _ in self.iter_messages(conversation_ids, since))
+        dim = self._personality_service.model.bert.config.hidden_size
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        matrix_path = self.output_dir / f"{job_name}.f16"
+        ids: List[str] = []
+
+        if total > 0:
+            matrix = np.memmap(matrix_path, dtype=np.float16, mode='w+', shape=(total, dim))
+            write_lock = threading.Lock()
+
+            def encode_chunk(offset: int, texts: List[str]) -> None:
+                vectors = self._personality_service.extract_personality_features_batch(
+                    texts, batch_size=self.batch_size
+                )
+                block = np.asarray(vectors, dtype=np.float16)
+                with write_lock:
+                    matrix[offset:offset + len(texts)] = block
+
+            with ThreadPoolExecutor(max_workers=self.num_workers) as executor:
+                futures = []
+                for offset, chunk in self._iter_chunks(conversation_ids, since, total):
+                    ids.extend(message.message_id for message in chunk)
+                    futures.append(executor.submit(
+                        encode_chunk, offset, [message.content for message in chunk]
+                    ))
+                for future in futures:
+                    future.result()
+
+            matrix.flush()
+            del matrix
+        else:
+            matrix_path.write_bytes(b'')
+
+        self.index_path(matrix_path).write_text(json.dumps({
+            'dim': dim,
+            'ids': ids,
+            'created_at': started_at.isoformat()
+        }), encoding='utf-8')
+
+        elapsed = (datetime.now() - started_at).total_seconds()
+        self.logger.info(f"Embedding job {job_name} encoded {len(ids)} messages in {elapsed:.1f}s")
+
+        return {
+            'job_name': job_name,
+            'message_count': len(ids),
+            'dim': dim,
+            'path': str(matrix_path),
+            'elapsed_seconds': elapsed,
+            'completed_at': datetime.now()
+        }
+
+    def load_embeddings(self, job_name: str) -> EmbeddingMatrix:
+        """
+        加载已完成任务的嵌入矩阵
+
+        Args:
+            job_name: 任务名称
+
+        Returns:
+            EmbeddingMatrix: 嵌入矩阵
+        """
+        return EmbeddingMatrix(str(self.output_dir / f"{job_name}.f16"))
+
+    def _iter_chunks(
+        self,
+        conversation_ids: Optional[List[str]],
+        since: Optional[datetime],
+        total: int
+    ) -> Iterator[Tuple[int, List[Message]]]:
+        """
+        将消息流切分为批次
+
+        Yields:
+            (起始行号, 消息列表)
+        """
+        chunk: List[Message] = []
+        offset = 0
+        for message in self.iter_messages(conversation_ids, since):
+            # 统计后新增的消息留给下一次任务
+            if offset + len(chunk) >= total:
+                break
+            chunk.append(message)
+            if len(chunk) >= self.batch_size:
+                yield offset, chunk
+                offset += len(chunk)
+                chunk = []
+        if chunk:
+            yield offset, chunk
+
+    def _tune_torch_threads(self) -> Optional[int]:
+        """
+        按CPU核数为每个编码线程分配torch算子内并行线程数
+
+        Returns:
+            Optional[int]: 调整前的torch线程数（torch不可用时为None）
+        """
+        try:
+            import torch
+        except ImportError:
+            return None
+        previous = torch.get_num_threads()
+        threads = max(1, (os.cpu_count() or 1) // self.num_workers)
+        torch.set_num_threads(threads)
+        self.logger.info(f"Embedding job using {self.num_workers} workers x {threads} torch threads")
+        return previous
+
+    @staticmethod
+    def _restore_torch_threads(previous: Optional[int]) -> None:
+        """任务结束后恢复进程级的torch线程数，避免影响在线推理"""
+        if previous is None:
+            return
+        import torch
+        torch.set_num_threads(previous)
@@ -0,0 +1,67 @@
+"""基于BERT的人格特质分类器（依赖torch和transformers，由人格识别服务按需导入）"""
+import torch
+import torch.nn as nn
+from transformers import BertModel
+
+
+class PersonalityClassifier(nn.Module):
+    """基于BERT的人格特质分类器"""
+    
+    def __init__(self, bert_model: BertModel, hidden_size: int = 768, num_traits: int = 5):
+        """
+        初始化分类器
+        
+        Args:
+            bert_model: BERT模型
+            hidden_size: BERT隐藏层大小
+            num_traits: 人格特质数量（大五人格为5）
+        """
+        super(PersonalityClassifier, self).__init__()
+        self.bert = bert_model
+        
+        # 人工神经网络分类器
+        self.classifier = nn.Sequential(
+            nn.Linear(hidden_size, 512),
+            nn.ReLU(),
+            nn.Dropout(0.3),
+            nn.Linear(512, 256),
+            nn.ReLU(),
+            nn.Dropout(0.2),
+            nn.Linear(256, num_traits),
+            nn.Sigmoid()  # 输出0-1之间的分数
+        )
+    
+    def forward(self, input_ids: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
+        """
+        前向传播
+        
+        Args:
+            input_ids: 输入token IDs
+            attention_mask: 注意力掩码
+            
+        Returns:
+            torch.Tensor: 人格特质得分
+        """
+        # 获取BERT输出
+        outputs = self.bert(input_ids=input_ids, attention_mask=attention_mask)
+        
+        # 使用[CLS] token的输出作为句子表示
+        pooled_output = outputs.pooler_output
+        
+        # 通过分类器
+        scores = self.classifier(pooled_output)
+        
+        return scores
+
+
+def quantize_model(model: nn.Module) -> nn.Module:
+    """
+    对模型中的全连接层做int8动态量化（仅支持CPU推理）
+    
+    Args:
+        model: fp32模型
+        
+    Returns:
+        nn.Module: 量化后的模型副本
+    """
+    return torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
@@ -1,77 +1,87 @@
 """人格识别模型服务"""
+import hashlib
+import importlib
+import importlib.util
+import os
+import queue
+import re
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
 from typing import List, Dict, Optional
+from src.config import settings
 from src.models.user import BigFiveScores
+from src.utils.embedding_cache import EmbeddingCache
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
-# 尝试导入ML库，如果不可用则使用简化版本
-try:
-    import torch
-    import torch.nn as nn
-    import numpy as np
-    from transformers import BertTokenizer, BertModel
-    ML_AVAILABLE = True
-except ImportError:
-    ML_AVAILABLE = False
+# 只检测ML库是否安装，不在模块导入时加载（torch/transformers导入耗时且占用大量内存），
+# 首次加载模型时再由_load_ml_modules导入
+ML_AVAILABLE = all(
+    importlib.util.find_spec(name) is not None
+    for name in ('torch', 'transformers', 'numpy')
+)
+ONNX_AVAILABLE = importlib.util.find_spec('onnxruntime') is not None
+
+if not ML_AVAILABLE:
     logger.warning("ML libraries not available. Using simplified personality recognition.")
 
+# 支持的推理后端
+INFERENCE_BACKENDS = ('fp32', 'int8', 'onnx')
 
-if ML_AVAILABLE:
-    class PersonalityClassifier(nn.Module):
-        """基于BERT的人格特质分类器"""
-        
-        def __init__(self, bert_model: BertModel, hidden_size: int = 768, num_traits: int = 5):
-            """
-            初始化分类器
-            
-            Args:
-                bert_model: BERT模型
-                hidden_size: BERT隐藏层大小
-                num_traits: 人格特质数量（大五人格为5）
-            """
-            super(PersonalityClassifier, self).__init__()
-            self.bert = bert_model
-            
-            # 人工神经网络分类器
-            self.classifier = nn.Sequential(
-                nn.Linear(hidden_size, 512),
-                nn.ReLU(),
-                nn.Dropout(0.3),
-                nn.Linear(512, 256),
-                nn.ReLU(),
-                nn.Dropout(0.2),
-                nn.Linear(256, num_traits),
-                nn.Sigmoid()  # 输出0-1之间的分数
-            )
-        
-        def forward(self, input_ids: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
-            """
-            前向传播
-            
-            Args:
-                input_ids: 输入token IDs
-                attention_mask: 注意力掩码
-                
-            Returns:
-                torch.Tensor: 人格特质得分
-            """
-            # 获取BERT输出
-            outputs = self.bert(input_ids=input_ids, attention_mask=attention_mask)
-            
-            # 使用[CLS] token的输出作为句子表示
-            pooled_output = outputs.pooler_output
-            
-            # 通过分类器
-            scores = self.classifier(pooled_output)
-            
-            return scores
+# 延迟导入的ML模块
+torch = None
+np = None
+_classifier_module = None
+_ml_import_lock = threading.Lock()
+
+
+def _load_ml_modules():
+    """
+    导入torch、numpy和分类器模块（线程安全，只导入一次）
+    
+    Returns:
+        分类器模块
+    """
+    global torch, np, _classifier_module
+    with _ml_import_lock:
+        if _classifier_module is None:
+            import torch as torch_module
+            import numpy as numpy_module
+            classifier_module = importlib.import_module('src.services.personality_classifier')
+            torch = torch_module
+            np = numpy_module
+            _classifier_module = classifier_module
+    return _classifier_module
+
+
+def __getattr__(name: str):
+    """按需暴露分类器相关对象，保持 `from ... import PersonalityClassifier` 可用"""
+    if name in ('PersonalityClassifier', 'quantize_model') and ML_AVAILABLE:
+        return getattr(_load_ml_modules(), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class PersonalityRecognitionService:
     """人格识别服务类"""
     
-    def __init__(self, model_name: str = "bert-base-chinese", device: Optional[str] = None, use_ml: bool = True):
+    # BERT单个输入窗口的最大token数（含[CLS]/[SEP]）
+    MAX_SEQ_LENGTH = 512
+    
+    # 大五人格维度（与分类器输出顺序一致）
+    TRAITS = ('neuroticism', 'agreeableness', 'extraversion', 'openness', 'conscientiousness')
+    
+    def __init__(
+        self,
+        model_name: str = "bert-base-chinese",
+        device: Optional[str] = None,
+        use_ml: bool = True,
+        embedding_cache: Optional[EmbeddingCache] = None,
+        backend: Optional[str] = None,
+        background_load: bool = True
+    ):
         """
         初始化人格识别服务
         
@@ -79,41 +89,97 @@ class PersonalityRecognitionService:
             model_name: BERT模型名称
             device: 计算设备 ('cpu', 'cuda', 'mps' 或 None自动检测)
             use_ml: 是否使用ML模型（如果False，使用简化版本）
+            embedding_cache: 文本嵌入缓存（可选，启用后只编码未见过的文本）
+            backend: 推理后端 ('fp32', 'int8', 'onnx'，None时读取配置)
+            background_load: 是否在后台线程中加载模型（加载完成前使用简化版本分析）
         """
         self.logger = logger
+        self.model_name = model_name
+        self.embedding_cache = embedding_cache
+        self.backend = 'fp32'
+        self._onnx_session = None
         self.ml_enabled = ML_AVAILABLE and use_ml
+        self.device = None
+        self.tokenizer = None
+        self.model = None
+        
+        # 模型加载完成（无论成功与否）时置位
+        self._load_finished = threading.Event()
+        self._load_thread: Optional[threading.Thread] = None
         
         if not self.ml_enabled:
             self.logger.info("Using simplified personality recognition (ML libraries not available or disabled)")
-            self.device = None
-            self.tokenizer = None
-            self.model = None
+            self._load_finished.set()
             return
         
-        # 设置设备
-        if device is None:
-            if torch.cuda.is_available():
-                self.device = torch.device('cuda')
-            elif torch.backends.mps.is_available():
-                self.device = torch.device('mps')
-            else:
-                self.device = torch.device('cpu')
+        if background_load:
+            # 在后台线程中预热模型，加载完成前使用简化版本分析
+            self._load_thread = threading.Thread(
+                target=self._load_model,
+                args=(model_name, device, backend),
+                name="personality-model-warmup",
+                daemon=True
+            )
+            self._load_thread.start()
         else:
-            self.device = torch.device(device)
+            self._load_model(model_name, device, backend)
+    
+    @property
+    def is_ready(self) -> bool:
+        """模型是否已加载完成并可用于推理"""
+        return self._load_finished.is_set() and self.ml_enabled and self.model is not None
+    
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待模型加载完成
         
-        self.logger.info(f"Using device: {self.device}")
+        Args:
+            timeout: 最长等待时间（秒），None表示一直等待
+            
+        Returns:
+            bool: 模型是否可用于推理（加载失败或超时返回False）
+        """
+        self._load_finished.wait(timeout)
+        return self.is_ready
+    
+    def _load_model(self, model_name: str, device: Optional[str], backend: Optional[str]) -> None:
+        """
+        导入ML库并加载BERT tokenizer和人格分类器
         
-        # 加载BERT tokenizer和模型
+        Args:
+            model_name: BERT模型名称
+            device: 计算设备
+            backend: 推理后端
+        """
         try:
+            classifier_module = _load_ml_modules()
+            from transformers import BertTokenizer, BertModel
+            
+            # 设置设备
+            if device is None:
+                if torch.cuda.is_available():
+                    self.device = torch.device('cuda')
+                elif torch.backends.mps.is_available():
+                    self.device = torch.device('mps')
+                else:
+                    self.device = torch.device('cpu')
+            else:
+                self.device = torch.device(device)
+            
+            self.logger.info(f"Using device: {self.device}")
+            
+            # 加载BERT tokenizer和模型
             self.tokenizer = BertTokenizer.from_pretrained(model_name)
             bert_model = BertModel.from_pretrained(model_name)
             
             # 创建人格分类器
-            self.model = PersonalityClassifier(bert_model)
+            self.model = classifier_module.PersonalityClassifier(bert_model)
             self.model.to(self.device)
             self.model.eval()  # 设置为评估模式
             
             self.logger.info(f"Successfully loaded model: {model_name}")
+            
+            self._apply_backend(backend or settings.personality_inference_backend)
         except Exception as e:
             self.logger.error(f"Failed to load model: {e}")
             self.logger.info("Falling back to simplified personality recognition")
@@ -121,6 +187,143 @@ class PersonalityRecognitionService:
             self.device = None
             self.tokenizer = None
             self.model = None
+        finally:
+            self._load_finished.set()
+    
+    def _apply_backend(self, backend: str) -> None:
+        """
+        按配置切换推理后端
+        
+        int8和onnx后端只在CPU上运行；onnxruntime不可用或导出失败时退回int8。
+        
+        Args:
+            backend: 推理后端名称
+        """
+        backend = backend.lower()
+        if backend not in INFERENCE_BACKENDS:
+            self.logger.error(f"Unknown inference backend: {backend}, using fp32")
+            return
+        if backend == 'fp32':
+            return
+        
+        if self.device.type != 'cpu':
+            self.logger.info(f"Backend {backend} runs on CPU, moving model from {self.device}")
+            self.device = torch.device('cpu')
+            self.model.to(self.device)
+        
+        if backend == 'onnx':
+            if not ONNX_AVAILABLE:
+                self.logger.warning("onnxruntime not available, falling back to int8 backend")
+            else:
+                try:
+                    self._onnx_session = self._load_onnx_session(
+                        self._onnx_export_path(settings.personality_onnx_path)
+                    )
+                    self.backend = 'onnx'
+                    self.logger.info("Using ONNX Runtime inference backend")
+                    return
+                except Exception as e:
+                    self.logger.error(f"Failed to prepare ONNX backend: {e}, falling back to int8")
+        
+        self.model = _classifier_module.quantize_model(self.model)
+        self.model.eval()
+        self.backend = 'int8'
+        self.logger.info("Using int8 dynamic quantization inference backend")
+    
+    def _onnx_export_path(self, onnx_path: str) -> Path:
+        """
+        生成与当前模型对应的ONNX导出路径
+        
+        文件名中包含模型名称和权重哈希，更换模型或权重后路径随之变化，
+        不会加载为其他模型导出的旧文件。
+        
+        Args:
+            onnx_path: 配置的ONNX模型文件路径
+            
+        Returns:
+            Path: 导出路径，如 data/personality_classifier.bert-base-chinese.<哈希>.onnx
+        """
+        digest = hashlib.sha256(self.model_name.encode('utf-8'))
+        for name, tensor in self.model.state_dict().items():
+            digest.update(name.encode('utf-8'))
+            digest.update(tensor.detach().cpu().contiguous().numpy().tobytes())
+        safe_name = re.sub(r'[^0-9A-Za-z_.-]+', '-', self.model_name)
+        path = Path(onnx_path)
+        return path.with_name(f"{path.stem}.{safe_name}.{digest.hexdigest()[:16]}{path.suffix or '.onnx'}")
+    
+    def _load_onnx_session(self, onnx_path):
+        """
+        导出（如尚不存在）并加载ONNX模型
+        
+        Args:
+            onnx_path: 与当前模型对应的ONNX模型文件路径（见 _onnx_export_path）
+            
+        Returns:
+            onnxruntime.InferenceSession: 推理会话
+        """
+        path = Path(onnx_path)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # 先导出到临时文件再原子替换，其他进程不会读到写了一半的文件
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            dummy_ids = torch.ones((1, 8), dtype=torch.long)
+            dummy_mask = torch.ones((1, 8), dtype=torch.long)
+            torch.onnx.export(
+                self.model,
+                (dummy_ids, dummy_mask),
+                str(tmp_path),
+                input_names=['input_ids', 'attention_mask'],
+                output_names=['scores'],
+                dynamic_axes={
+                    'input_ids': {0: 'batch', 1: 'sequence'},
+                    'attention_mask': {0: 'batch', 1: 'sequence'},
+                    'scores': {0: 'batch'}
+                },
+                opset_version=14
+            )
+            os.replace(tmp_path, path)
+            self.logger.info(f"Exported personality classifier to {path}")
+        
+        import onnxruntime as ort
+        return ort.InferenceSession(str(path), providers=['CPUExecutionProvider'])
+    
+    def _embedding_cache_key(self, text: str) -> str:
+        """
+        计算文本嵌入的缓存键
+        
+        命名空间包含模型名称和推理后端，fp32与int8量化等不同后端的嵌入不会互相命中。
+        
+        Args:
+            text: 文本内容
+            
+        Returns:
+            str: 缓存键
+        """
+        return EmbeddingCache.make_key(text, f"{self.model_name}:{self.backend}")
+    
+    def _forward_scores(self, input_ids, attention_mask):
+        """
+        使用当前推理后端计算人格得分
+        
+        Args:
+            input_ids: 输入token IDs
+            attention_mask: 注意力掩码
+            
+        Returns:
+            torch.Tensor: 人格特质得分
+        """
+        if self._onnx_session is not None:
+            outputs = self._onnx_session.run(
+                ['scores'],
+                {
+                    'input_ids': input_ids.cpu().numpy(),
+                    'attention_mask': attention_mask.cpu().numpy()
+                }
+            )
+            return torch.from_numpy(outputs[0])
+        
+        with torch.no_grad():
+            return self.model(input_ids, attention_mask)
     
     def analyze_personality(self, text_data: List[str]) -> BigFiveScores:
         """
@@ -134,64 +337,278 @@ class PersonalityRecognitionService:
         """
         if not text_data:
             # 如果没有文本数据，返回默认中性得分
-            return BigFiveScores(
-                neuroticism=0.5,
-                agreeableness=0.5,
-                extraversion=0.5,
-                openness=0.5,
-                conscientiousness=0.5
-            )
+            return self._default_scores()
         
-        # 如果ML不可用，使用简化的基于规则的分析
-        if not self.ml_enabled:
+        # 如果ML不可用或模型尚未预热完成，使用简化的基于规则的分析
+        if not self.is_ready:
             return self._analyze_personality_simple(text_data)
         
         try:
-            # 合并文本数据
-            combined_text = " ".join(text_data)
-            
-            # 文本预处理和分词
-            encoded = self.tokenizer(
-                combined_text,
-                padding=True,
-                truncation=True,
-                max_length=512,
-                return_tensors='pt'
-            )
-            
-            # 移动到设备
-            input_ids = encoded['input_ids'].to(self.device)
-            attention_mask = encoded['attention_mask'].to(self.device)
-            
-            # 推理
-            with torch.no_grad():
-                scores = self.model(input_ids, attention_mask)
-            
-            # 转换为numpy数组
-            scores_np = scores.cpu().numpy()[0]
-            
-            # 创建BigFiveScores对象
-            big_five_scores = BigFiveScores(
-                neuroticism=float(scores_np[0]),
-                agreeableness=float(scores_np[1]),
-                extraversion=float(scores_np[2]),
-                openness=float(scores_np[3]),
-                conscientiousness=float(scores_np[4])
-            )
-            
+            big_five_scores = self._infer_batch([text_data])[0]
             self.logger.info(f"Analyzed personality from {len(text_data)} texts")
             return big_five_scores
             
         except Exception as e:
             self.logger.error(f"Error analyzing personality: {e}")
             # 返回默认得分
-            return BigFiveScores(
-                neuroticism=0.5,
-                agreeableness=0.5,
-                extraversion=0.5,
-                openness=0.5,
-                conscientiousness=0.5
-            )
+            return self._default_scores()
+    
+    def _infer_batch(self, text_batches: List[List[str]], batch_size: int = 16) -> List[BigFiveScores]:
+        """
+        对多个用户的文本分窗口推理，并按用户汇总得分
+        
+        每个用户的历史文本被切分为不超过MAX_SEQ_LENGTH个token的窗口，
+        所有用户的窗口按长度分桶后成批推理，最后按窗口token数加权平均得到用户得分。
+        
+        Args:
+            text_batches: 多个用户的文本数据列表
+            batch_size: 单次前向传播包含的最大窗口数
+            
+        Returns:
+            List[BigFiveScores]: 与输入顺序一致的大五人格得分列表
+        """
+        if self.embedding_cache is not None:
+            return self._infer_batch_cached(text_batches, batch_size)
+        
+        windows: List[List[int]] = []
+        owners: List[int] = []
+        for i, text_data in enumerate(text_batches):
+            if not text_data:
+                continue
+            for window in self._build_windows(text_data):
+                windows.append(window)
+                owners.append(i)
+        
+        window_scores = self._run_windows(windows, batch_size) if windows else []
+        
+        # 按窗口token数加权汇总每个用户的得分
+        totals: Dict[int, List[float]] = {}
+        weights: Dict[int, int] = {}
+        for window, owner, scores in zip(windows, owners, window_scores):
+            weight = len(window)
+            acc = totals.setdefault(owner, [0.0] * 5)
+            for k in range(5):
+                acc[k] += float(scores[k]) * weight
+            weights[owner] = weights.get(owner, 0) + weight
+        
+        results = []
+        for i in range(len(text_batches)):
+            if i in totals:
+                results.append(self._scores_from_vector(
+                    [value / weights[i] for value in totals[i]]
+                ))
+            else:
+                # 空文本直接返回中性得分，不参与推理
+                results.append(self._default_scores())
+        
+        return results
+    
+    def _infer_batch_cached(self, text_batches: List[List[str]], batch_size: int = 16) -> List[BigFiveScores]:
+        """
+        基于嵌入缓存的批量推理
+        
+        每条文本的池化嵌入按内容哈希缓存，只编码未见过的文本；
+        用户的文本嵌入取平均后直接送入分类头。
+        
+        Args:
+            text_batches: 多个用户的文本数据列表
+            batch_size: 单次前向传播包含的最大窗口数
+            
+        Returns:
+            List[BigFiveScores]: 与输入顺序一致的大五人格得分列表
+        """
+        user_keys: List[List[str]] = []
+        key_texts: Dict[str, str] = {}
+        for text_data in text_batches:
+            keys = []
+            for text in text_data:
+                if not text:
+                    continue
+                key = self._embedding_cache_key(text)
+                keys.append(key)
+                key_texts[key] = text
+            user_keys.append(keys)
+        
+        embeddings = self.embedding_cache.get_many(key_texts.keys())
+        missing = [key for key in key_texts if key not in embeddings]
+        if missing:
+            encoded = self._encode_texts([key_texts[key] for key in missing], batch_size)
+            for key, vector in zip(missing, encoded):
+                self.embedding_cache.put(key, vector)
+                embeddings[key] = vector
+            self.logger.info(f"Encoded {len(missing)} new texts, {len(key_texts) - len(missing)} from cache")
+        
+        indices = [i for i, keys in enumerate(user_keys) if keys]
+        results = [self._default_scores() for _ in text_batches]
+        if not indices:
+            return results
+        
+        pooled = np.stack([
+            np.mean([embeddings[key] for key in user_keys[i]], axis=0) for i in indices
+        ]).astype(np.float32)
+        
+        with torch.no_grad():
+            scores = self.model.classifier(torch.from_numpy(pooled).to(self.device))
+        
+        scores_np = scores.cpu().numpy()
+        for row, i in enumerate(indices):
+            results[i] = self._scores_from_vector(scores_np[row])
+        
+        return results
+    
+    def _encode_texts(self, texts: List[str], batch_size: int = 16) -> List:
+        """
+        批量编码文本为池化后的BERT嵌入
+        
+        超长文本先切分窗口，再按窗口token数加权平均。
+        
+        Args:
+            texts: 文本列表
+            batch_size: 单次前向传播包含的最大窗口数
+            
+        Returns:
+            List: 与texts顺序一致的768维嵌入向量
+        """
+        windows: List[List[int]] = []
+        owners: List[int] = []
+        for i, text in enumerate(texts):
+            for window in self._build_windows([text]):
+                windows.append(window)
+                owners.append(i)
+        
+        pooled = self._run_windows(windows, batch_size, pooled=True) if windows else []
+        
+        hidden_size = self.model.bert.config.hidden_size
+        sums = [np.zeros(hidden_size, dtype=np.float32) for _ in texts]
+        weights = [0] * len(texts)
+        for window, owner, vector in zip(windows, owners, pooled):
+            sums[owner] += vector * len(window)
+            weights[owner] += len(window)
+        
+        return [total / weight if weight else total for total, weight in zip(sums, weights)]
+    
+    def _build_windows(self, text_data: List[str]) -> List[List[int]]:
+        """
+        将用户的文本切分为不超过MAX_SEQ_LENGTH个token的窗口
+        
+        短文本依次拼接（以[SEP]分隔）直到填满窗口，超长文本单独切分，不丢弃任何内容。
+        
+        Args:
+            text_data: 文本数据列表
+            
+        Returns:
+            List[List[int]]: 带[CLS]/[SEP]的token ID窗口列表
+        """
+        body_size = self.MAX_SEQ_LENGTH - 2
+        cls_id = self.tokenizer.cls_token_id
+        sep_id = self.tokenizer.sep_token_id
+        
+        token_lists = self.tokenizer(list(text_data), add_special_tokens=False)['input_ids']
+        
+        bodies: List[List[int]] = []
+        current: List[int] = []
+        for ids in token_lists:
+            for start in range(0, len(ids), body_size):
+                piece = ids[start:start + body_size]
+                if current and len(current) + 1 + len(piece) > body_size:
+                    bodies.append(current)
+                    current = []
+                if current:
+                    current.append(sep_id)
+                current.extend(piece)
+        if current:
+            bodies.append(current)
+        
+        return [[cls_id] + body + [sep_id] for body in bodies]
+    
+    @staticmethod
+    def _bucket_windows(windows: List[List[int]], batch_size: int) -> List[List[int]]:
+        """
+        将窗口按长度分桶，使同一批次内的窗口长度相近以减少填充
+        
+        Args:
+            windows: token ID窗口列表
+            batch_size: 每批最大窗口数
+            
+        Returns:
+            List[List[int]]: 每个批次包含的窗口下标
+        """
+        order = sorted(range(len(windows)), key=lambda i: len(windows[i]))
+        return [order[start:start + batch_size] for start in range(0, len(order), batch_size)]
+    
+    def _run_windows(self, windows: List[List[int]], batch_size: int, pooled: bool = False):
+        """
+        分桶批量推理所有窗口
+        
+        Args:
+            windows: token ID窗口列表
+            batch_size: 每批最大窗口数
+            pooled: 为True时只运行BERT，返回池化嵌入而不是人格得分
+            
+        Returns:
+            与windows顺序一致的5维得分向量（或768维嵌入）列表
+        """
+        pad_id = self.tokenizer.pad_token_id
+        results = [None] * len(windows)
+        
+        for bucket in self._bucket_windows(windows, batch_size):
+            # 只填充到本批次内最长窗口的长度
+            max_len = max(len(windows[i]) for i in bucket)
+            input_ids = torch.full((len(bucket), max_len), pad_id, dtype=torch.long)
+            attention_mask = torch.zeros((len(bucket), max_len), dtype=torch.long)
+            for row, i in enumerate(bucket):
+                length = len(windows[i])
+                input_ids[row, :length] = torch.tensor(windows[i], dtype=torch.long)
+                attention_mask[row, :length] = 1
+            
+            input_ids = input_ids.to(self.device)
+            attention_mask = attention_mask.to(self.device)
+            with torch.no_grad():
+                if pooled:
+                    scores = self.model.bert(
+                        input_ids=input_ids, attention_mask=attention_mask
+                    ).pooler_output
+                else:
+                    scores = self._forward_scores(input_ids, attention_mask)
+            
+            scores_np = scores.cpu().numpy()
+            for row, i in enumerate(bucket):
+                results[i] = scores_np[row]
+        
+        return results
+    
+    def _scores_from_vector(self, vector) -> BigFiveScores:
+        """
+        将模型输出的5维向量转换为BigFiveScores
+        
+        Args:
+            vector: 长度为5的得分向量
+            
+        Returns:
+            BigFiveScores: 大五人格得分
+        """
+        return BigFiveScores(
+            neuroticism=float(vector[0]),
+            agreeableness=float(vector[1]),
+            extraversion=float(vector[2]),
+            openness=float(vector[3]),
+            conscientiousness=float(vector[4])
+        )
+    
+    def _default_scores(self) -> BigFiveScores:
+        """
+        返回默认的中性大五人格得分
+        
+        Returns:
+            BigFiveScores: 各维度均为0.5的得分
+        """
+        return BigFiveScores(
+            neuroticism=0.5,
+            agreeableness=0.5,
+            extraversion=0.5,
+            openness=0.5,
+            conscientiousness=0.5
+        )
     
     def _analyze_personality_simple(self, text_data: List[str]) -> BigFiveScores:
         """
@@ -264,6 +681,107 @@ class PersonalityRecognitionService:
             conscientiousness=self._clip_score(conscientiousness)
         )
     
+    def extract_personality_features_batch(self, texts: List[str], batch_size: int = 32) -> List:
+        """
+        批量提取文本的人格特征向量
+        
+        文本按长度分桶后成批编码，配置了嵌入缓存时只编码未缓存的文本。
+        
+        Args:
+            texts: 文本列表
+            batch_size: 单次前向传播包含的最大窗口数
+            
+        Returns:
+            List: 与texts顺序一致的特征向量
+        """
+        if not self.is_ready:
+            return [self.extract_personality_features(text) for text in texts]
+        
+        keys: List[Optional[str]] = [None] * len(texts)
+        results: List = [None] * len(texts)
+        if self.embedding_cache is not None:
+            keys = [self._embedding_cache_key(text) for text in texts]
+            cached = self.embedding_cache.get_many(keys)
+            for i, key in enumerate(keys):
+                results[i] = cached.get(key)
+        
+        missing = [i for i, vector in enumerate(results) if vector is None]
+        if missing:
+            encoded = self._encode_texts([texts[i] for i in missing], batch_size)
+            for i, vector in zip(missing, encoded):
+                results[i] = vector
+                if keys[i] is not None:
+                    self.embedding_cache.put(keys[i], vector)
+        
+        return results
+    
+    def score_message(self, text: str) -> Dict[str, float]:
+        """
+        计算单条消息的人格得分，用于流式更新人格估计
+        
+        模型可用时使用（可缓存的）BERT嵌入经分类头得到全部5个维度的得分；
+        否则使用关键词规则，只返回消息中出现了相关关键词的维度。
+        
+        Args:
+            text: 消息内容
+            
+        Returns:
+            Dict[str, float]: 维度名到得分的映射（可能为空）
+        """
+        if not text:
+            return {}
+        
+        if self.is_ready:
+            try:
+                features = self.extract_personality_features(text)
+                with torch.no_grad():
+                    vector = torch.as_tensor(features, dtype=torch.float32).unsqueeze(0).to(self.device)
+                    scores = self.model.classifier(vector).cpu().numpy()[0]
+                return {trait: float(score) for trait, score in zip(self.TRAITS, scores)}
+            except Exception as e:
+                self.logger.error(f"Error scoring message: {e}")
+                return {}
+        
+        simple_scores = self._analyze_personality_simple([text])
+        # 没有命中关键词的维度保持中性得分，不作为证据
+        return {
+            trait: getattr(simple_scores, trait)
+            for trait in self.TRAITS
+            if getattr(simple_scores, trait) != 0.5
+        }
+    
+    def score_messages(self, texts: List[str], batch_size: int = 32) -> List[Dict[str, float]]:
+        """
+        批量计算多条消息的人格得分
+        
+        模型可用时所有消息的嵌入成批编码，分类头一次前向传播；否则逐条使用关键词规则。
+        
+        Args:
+            texts: 消息内容列表
+            batch_size: 单次前向传播包含的最大窗口数
+            
+        Returns:
+            List[Dict[str, float]]: 与texts顺序一致的维度得分映射（可能为空）
+        """
+        if not self.is_ready:
+            return [self.score_message(text) for text in texts]
+        
+        results: List[Dict[str, float]] = [{} for _ in texts]
+        indices = [i for i, text in enumerate(texts) if text]
+        if not indices:
+            return results
+        try:
+            features = self.extract_personality_features_batch([texts[i] for i in indices], batch_size)
+            with torch.no_grad():
+                vectors = torch.as_tensor(np.stack(features), dtype=torch.float32).to(self.device)
+                scores = self.model.classifier(vectors).cpu().numpy()
+        except Exception as e:
+            self.logger.error(f"Error scoring messages: {e}")
+            return results
+        for i, row in zip(indices, scores):
+            results[i] = {trait: float(score) for trait, score in zip(self.TRAITS, row)}
+        return results
+    
     def calculate_trait_scores(self, text_data: List[str]) -> Dict[str, float]:
         """
         计算人格特质评分（返回字典格式）
@@ -284,21 +802,29 @@ class PersonalityRecognitionService:
             'conscientiousness': scores.conscientiousness
         }
     
-    def batch_analyze(self, text_batches: List[List[str]]) -> List[BigFiveScores]:
+    def batch_analyze(self, text_batches: List[List[str]], batch_size: int = 16) -> List[BigFiveScores]:
         """
         批量分析多个用户的文本数据
         
+        ML模式下所有用户的文本窗口按长度分桶，每batch_size个窗口执行一次前向传播。
+        
         Args:
             text_batches: 多个用户的文本数据列表
+            batch_size: 单次前向传播包含的最大窗口数
             
         Returns:
             List[BigFiveScores]: 大五人格得分列表
         """
-        results = []
-        for text_data in text_batches:
-            scores = self.analyze_personality(text_data)
-            results.append(scores)
+        if not self.is_ready:
+            return [self.analyze_personality(text_data) for text_data in text_batches]
         
+        try:
+            results = self._infer_batch(text_batches, batch_size)
+        except Exception as e:
+            self.logger.error(f"Error in batch personality analysis: {e}")
+            return [self._default_scores() for _ in text_batches]
+        
+        self.logger.info(f"Batch analyzed personality for {len(text_batches)} users")
         return results
     
     def update_personality_from_behavior(
@@ -397,10 +923,17 @@ class PersonalityRecognitionService:
         Returns:
             特征向量（numpy数组或列表）
         """
-        if not self.ml_enabled:
+        if not self.is_ready:
             # 简化版本：返回基于文本长度和关键词的简单特征
             return [len(text) / 100.0, text.count('我') / 10.0, text.count('你') / 10.0]
         
+        cache_key = None
+        if self.embedding_cache is not None:
+            cache_key = self._embedding_cache_key(text)
+            cached = self.embedding_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
         try:
             # 编码文本
             encoded = self.tokenizer(
@@ -420,11 +953,195 @@ class PersonalityRecognitionService:
                 outputs = self.model.bert(input_ids=input_ids, attention_mask=attention_mask)
                 features = outputs.pooler_output
             
-            return features.cpu().numpy()[0]
+            features = features.cpu().numpy()[0]
+            if cache_key is not None:
+                self.embedding_cache.put(cache_key, features)
+            
+            return features
             
         except Exception as e:
             self.logger.error(f"Error extracting features: {e}")
-            if ML_AVAILABLE:
+            if np is not None:
                 return np.zeros(768)  # 返回零向量
             else:
                 return [0.0] * 768
+
+
+class PersonalityBatchScheduler:
+    """
+    人格推理微批调度器
+    
+    收集并发提交的分析请求，在max_wait_ms毫秒内或凑满max_batch_size个请求后
+    合并为一个批次推理，并分别完成每个调用方的Future。用户文本分析（submit）
+    合并调用batch_analyze，单条消息评分（submit_message）合并调用score_messages。
+    """
+    
+    _STOP = object()
+    
+    # 请求类型
+    ANALYZE = 'analyze'
+    SCORE = 'score'
+    
+    def __init__(
+        self,
+        service: PersonalityRecognitionService,
+        max_batch_size: int = 16,
+        max_wait_ms: float = 10.0
+    ):
+        """
+        初始化调度器并启动后台工作线程
+        
+        Args:
+            service: 人格识别服务实例
+            max_batch_size: 单批次最大请求数
+            max_wait_ms: 收集一个批次的最长等待时间（毫秒）
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        
+        self.service = service
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.logger = logger
+        
+        self._queue: queue.Queue = queue.Queue()
+        self._closed = False
+        self._lock = threading.Lock()
+        self._stats = {'requests': 0, 'batches': 0, 'max_batch_size': 0}
+        
+        self._worker = threading.Thread(
+            target=self._run,
+            name="personality-batch-scheduler",
+            daemon=True
+        )
+        self._worker.start()
+    
+    def submit(self, text_data: List[str]) -> Future:
+        """
+        提交一个人格分析请求
+        
+        Args:
+            text_data: 用户文本数据列表
+            
+        Returns:
+            Future: 完成后结果为BigFiveScores
+        """
+        return self._enqueue(self.ANALYZE, text_data)
+    
+    def submit_message(self, text: str) -> Future:
+        """
+        提交一条消息的人格评分请求
+        
+        Args:
+            text: 消息内容
+            
+        Returns:
+            Future: 完成后结果为维度名到得分的映射（见 score_message）
+        """
+        return self._enqueue(self.SCORE, text)
+    
+    def analyze(self, text_data: List[str], timeout: Optional[float] = None) -> BigFiveScores:
+        """
+        同步提交并等待分析结果
+        
+        Args:
+            text_data: 用户文本数据列表
+            timeout: 最长等待时间（秒）
+            
+        Returns:
+            BigFiveScores: 大五人格得分
+        """
+        return self.submit(text_data).result(timeout=timeout)
+    
+    def close(self, timeout: Optional[float] = None) -> None:
+        """
+        停止接收新请求，处理完已排队的请求后退出工作线程
+        
+        Args:
+            timeout: 等待工作线程退出的最长时间（秒）
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(self._STOP)
+        self._worker.join(timeout)
+    
+    def get_stats(self) -> Dict[str, float]:
+        """
+        获取调度统计信息
+        
+        Returns:
+            Dict[str, float]: 请求数、批次数、平均及最大批大小
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        stats['avg_batch_size'] = (
+            stats['requests'] / stats['batches'] if stats['batches'] else 0.0
+        )
+        return stats
+    
+    def _run(self) -> None:
+        """工作线程主循环"""
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is self._STOP:
+                break
+            
+            batch = [item]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is self._STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            
+            self._dispatch(batch)
+    
+    def _dispatch(self, batch: List[tuple]) -> None:
+        """
+        执行一个批次并完成对应的Future
+        
+        Args:
+            batch: (请求类型, 请求内容, future) 列表
+        """
+        # 跳过已被调用方取消的请求，按请求类型分组
+        groups: Dict[str, List[tuple]] = {}
+        for kind, payload, future in batch:
+            if future.set_running_or_notify_cancel():
+                groups.setdefault(kind, []).append((payload, future))
+        
+        for kind, active in groups.items():
+            infer = self.service.batch_analyze if kind == self.ANALYZE else self.service.score_messages
+            try:
+                results = infer([payload for payload, _ in active], batch_size=self.max_batch_size)
+            except Exception as e:
+                self.logger.error(f"Batch personality inference failed: {e}")
+                for _, future in active:
+                    future.set_exception(e)
+                continue
+            
+            with self._lock:
+                self._stats['requests'] += len(active)
+                self._stats['batches'] += 1
+                self._stats['max_batch_size'] = max(self._stats['max_batch_size'], len(active))
+            
+            for (_, future), result in zip(active, results):
+                future.set_result(result)
+    
+    def _enqueue(self, kind: str, payload) -> Future:
+        """将请求放入队列"""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Batch scheduler is closed")
+            future: Future = Future()
+            self._queue.put((kind, payload, future))
+        return future
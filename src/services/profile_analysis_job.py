@@ -0,0 +1,314 @@
+"""对话画像分析批处理任务"""
+import json
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, FrozenSet, List, Optional, Tuple
+from src.services.profile_update_service import ProfileUpdateService
+from src.utils.exceptions import NotFoundError, ValidationError
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 进程池任务单元：(对话ID, [(发送者ID, 消息内容), ...])
+ConversationTexts = Tuple[str, List[Tuple[str, str]]]
+
+
+def analyze_conversation_batch(batch: List[ConversationTexts]) -> List[Dict]:
+    """
+    分析一批对话（进程池工作函数，只依赖消息文本）
+
+    Args:
+        batch: 对话文本列表
+
+    Returns:
+        List[Dict]: 每个对话的分析结果
+    """
+    return [
+        ProfileUpdateService.analyze_message_texts(conversation_id, messages)
+        for conversation_id, messages in batch
+    ]
+
+
+class ProfileAnalysisJob:
+    """
+    对话画像分析批处理任务
+
+    每次运行收集自上次水位线以来结束的全部对话，在进程池中逐条消息单遍分析，
+    按用户合并各对话的兴趣和情绪统计后，对每个用户只写入一次画像。
+    水位线为最晚结束时间及该时刻已处理的对话ID，与上一批最后一个对话同一时刻结束的对话不会被跳过；
+    全部更新完成后才推进水位线（写临时文件后原子替换），
+    任务中途失败时下次运行会重新处理同一批对话。
+    调用 start() 后由后台线程每 interval_seconds 秒运行一次。
+    """
+
+    def __init__(
+        self,
+        conversation_service,
+        profile_update_service: ProfileUpdateService,
+        state_path: str = "data/profile_analysis_state.json",
+        num_workers: int = 2,
+        batch_size: int = 50,
+        interval_seconds: float = 3600.0
+    ):
+        """
+        初始化任务
+
+        Args:
+            conversation_service: 对话服务实例（对话和消息来源）
+            profile_update_service: 画像更新服务实例
+            state_path: 水位线状态文件路径
+            num_workers: 分析进程数（1表示在当前进程中分析）
+            batch_size: 每个进程池任务包含的对话数
+            interval_seconds: 后台定时运行的间隔（秒，不大于0时 start() 不启动后台线程）
+        """
+        self._conversation_service = conversation_service
+        self._profile_update_service = profile_update_service
+        self.state_path = Path(state_path)
+        self.num_workers = max(1, num_workers)
+        self.batch_size = max(1, batch_size)
+        self.interval_seconds = interval_seconds
+        self.logger = logger
+
+        self._run_lock = threading.Lock()
+        self._watermark, self._watermark_ids = self._load_watermark()
+        self._timer: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def watermark(self) -> Optional[datetime]:
+        """已处理对话的最晚结束时间（从未运行时为None）"""
+        return self._watermark
+
+    @property
+    def watermark_ids(self) -> Optional[FrozenSet[str]]:
+        """在水位线时刻结束且已处理的对话ID"""
+        return self._watermark_ids
+
+    def collect_conversations(self, until: Optional[datetime] = None) -> List:
+        """
+        收集水位线之后结束的对话
+
+        Args:
+            until: 只收集该时间及之前结束的对话（默认当前时间）
+
+        Returns:
+            List[Conversation]: 按结束时间排序的对话列表
+        """
+        until = until or datetime.now()
+        conversations = [
+            conversation for conversation in list(self._conversation_service.conversations.values())
+            if conversation.status == "ended"
+            and conversation.ended_at is not None
+            and self._after_watermark(conversation)
+            and conversation.ended_at <= until
+        ]
+        conversations.sort(key=lambda conversation: (conversation.ended_at, conversation.conversation_id))
+        return conversations
+
+    def run(self, until: Optional[datetime] = None) -> Dict[str, any]:
+        """
+        执行一次批处理
+
+        Args:
+            until: 只处理该时间及之前结束的对话（默认当前时间）
+
+        Returns:
+            Dict: 任务统计（对话数、消息数、更新用户数、水位线、耗时等）
+
+        Raises:
+            ValidationError: 已有任务在运行
+        """
+        if not self._run_lock.acquire(blocking=False):
+            raise ValidationError("Profile analysis job is already running")
+        try:
+            return self._run(until)
+        finally:
+            self._run_lock.release()
+
+    def start(self) -> None:
+        """启动定时运行的后台线程"""
+        if self._timer is not None or self.interval_seconds <= 0:
+            return
+        self._stop.clear()
+        self._timer = threading.Thread(target=self._run_timer, name="profile-analysis-job", daemon=True)
+        self._timer.start()
+        self.logger.info(f"Profile analysis job scheduled every {self.interval_seconds}s")
+
+    def close(self) -> None:
+        """停止后台线程（正在执行的批处理完成后退出）"""
+        if self._timer is None:
+            return
+        self._stop.set()
+        self._timer.join(timeout=5.0)
+        self._timer = None
+
+    # ==================== 内部方法 ====================
+
+    def _run_timer(self) -> None:
+        """后台线程主循环"""
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                self.run()
+            except ValidationError as e:
+                self.logger.info(f"Skipping scheduled profile analysis: {e}")
+            except Exception as e:
+                self.logger.error(f"Scheduled profile analysis failed: {e}")
+
+    def _after_watermark(self, conversation) -> bool:
+        """判断对话是否在水位线之后结束"""
+        if self._watermark is None or conversation.ended_at > self._watermark:
+            return True
+        # 旧版状态文件没有对话ID时，与水位线同一时刻结束的对话视为已处理
+        return (
+            conversation.ended_at == self._watermark
+            and self._watermark_ids is not None
+            and conversation.conversation_id not in self._watermark_ids
+        )
+
+    def _run(self, until: Optional[datetime]) -> Dict[str, any]:
+        """在持有运行锁的情况下执行批处理"""
+        started_at = datetime.now()
+        # 先写回各用户尚未落盘的流式人格估计，对话分析在其基础上调整
+        flushed_users = self._profile_update_service.flush_personality_estimates()
+        conversations = self.collect_conversations(until)
+
+        texts = [self._conversation_texts(conversation) for conversation in conversations]
+        analyses = self._analyze(texts)
+
+        user_data = self._merge_by_user(conversations, analyses)
+        updated_users = 0
+        notified_users = 0
+        skipped_users = 0
+        for user_id, conversation_data in user_data.items():
+            try:
+                result = self._profile_update_service.update_profile_from_conversation(
+                    user_id=user_id,
+                    conversation_data=conversation_data
+                )
+            except NotFoundError:
+                skipped_users += 1
+                continue
+            updated_users += 1
+            if result['should_notify']:
+                notified_users += 1
+
+        if conversations:
+            self._advance_watermark(conversations)
+
+        elapsed = (datetime.now() - started_at).total_seconds()
+        message_count = sum(len(messages) for _, messages in texts)
+        self.logger.info(
+            f"Profile analysis job processed {len(conversations)} conversations "
+            f"({message_count} messages) for {updated_users} users in {elapsed:.1f}s"
+        )
+
+        return {
+            'conversation_count': len(conversations),
+            'message_count': message_count,
+            'updated_users': updated_users,
+            'notified_users': notified_users,
+            'skipped_users': skipped_users,
+            'flushed_personality_users': flushed_users,
+            'watermark': self._watermark,
+            'elapsed_seconds': elapsed,
+            'completed_at': datetime.now()
+        }
+
+    def _conversation_texts(self, conversation) -> ConversationTexts:
+        """提取对话中的文本消息"""
+        messages = self._conversation_service.messages.get(conversation.conversation_id, [])
+        return conversation.conversation_id, [
+            (message.sender_id, message.content)
+            for message in messages
+            if message.message_type == 'text' and message.content
+        ]
+
+    def _analyze(self, texts: List[ConversationTexts]) -> List[Dict]:
+        """按批分析对话，多于一批且配置了多个进程时使用进程池"""
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        if self.num_workers == 1 or len(batches) <= 1:
+            results = [analyze_conversation_batch(batch) for batch in batches]
+        else:
+            with ProcessPoolExecutor(max_workers=min(self.num_workers, len(batches))) as executor:
+                results = list(executor.map(analyze_conversation_batch, batches))
+        return [analysis for batch_result in results for analysis in batch_result]
+
+    def _merge_by_user(self, conversations: List, analyses: List[Dict]) -> Dict[str, Dict]:
+        """
+        按用户合并多个对话的分析结果
+
+        兴趣取并集；情绪计数按用户累加后重新计算比例。
+        """
+        emotion_types = list(ProfileUpdateService.EMOTION_KEYWORDS)
+        merged: Dict[str, Dict] = {}
+        for conversation, analysis in zip(conversations, analyses):
+            for user_id in (conversation.user_a_id, conversation.user_b_id):
+                data = merged.setdefault(user_id, {
+                    'conversation_ids': [],
+                    'topics': {},
+                    'interests': {},
+                    'emotions': {}
+                })
+                data['conversation_ids'].append(conversation.conversation_id)
+                data['topics'].update(dict.fromkeys(analysis['topics']))
+                data['interests'].update(dict.fromkeys(analysis['interests']))
+
+                counts = analysis['emotions'].get(user_id)
+                if counts:
+                    totals = data['emotions'].setdefault(
+                        user_id, {key: 0 for key in emotion_types + ['total']}
+                    )
+                    for key in totals:
+                        totals[key] += counts[key]
+
+        for data in merged.values():
+            data['topics'] = list(data['topics'])
+            data['interests'] = list(data['interests'])
+            for totals in data['emotions'].values():
+                for emotion_type in emotion_types:
+                    totals[f'{emotion_type}_ratio'] = totals[emotion_type] / totals['total']
+        return merged
+
+    def _load_watermark(self) -> Tuple[Optional[datetime], Optional[FrozenSet[str]]]:
+        """读取持久化的水位线 (结束时间, 该时刻已处理的对话ID)"""
+        if not self.state_path.exists():
+            return None, None
+        try:
+            state = json.loads(self.state_path.read_text(encoding='utf-8'))
+            ids = state.get('watermark_ids')
+            return datetime.fromisoformat(state['watermark']), frozenset(ids) if ids is not None else None
+        except (ValueError, KeyError, TypeError) as e:
+            self.logger.warning(f"Ignoring unreadable profile analysis state {self.state_path}: {e}")
+            return None, None
+
+    def _advance_watermark(self, conversations: List) -> None:
+        """
+        推进水位线到本批最晚的结束时间，并记录该时刻结束的对话ID
+
+        先写临时文件再原子替换状态文件，成功后更新内存中的水位线。
+
+        Args:
+            conversations: 本批已处理的对话（按结束时间排序）
+        """
+        watermark = conversations[-1].ended_at
+        ids = {
+            conversation.conversation_id
+            for conversation in conversations
+            if conversation.ended_at == watermark
+        }
+        if watermark == self._watermark and self._watermark_ids:
+            ids |= self._watermark_ids
+
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.state_path.with_name(self.state_path.name + '.tmp')
+        tmp_path.write_text(json.dumps({
+            'watermark': watermark.isoformat(),
+            'watermark_ids': sorted(ids),
+            'updated_at': datetime.now().isoformat()
+        }), encoding='utf-8')
+        os.replace(tmp_path, self.state_path)
+        self._watermark = watermark
+        self._watermark_ids = frozenset(ids)
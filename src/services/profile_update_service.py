@@ -1,9 +1,13 @@
 """用户画像动态更新服务"""
 import re
+import threading
+from concurrent.futures import Future
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Set, Tuple
+from typing import Iterable, List, Dict, Optional, Set, Tuple
 from src.models.conversation import Message
 from src.models.user import BigFiveScores
+from src.services.personality_recognition_service import PersonalityRecognitionService
+from src.utils.keyword_automaton import KeywordAutomaton
 from src.utils.logger import get_logger
 from src.utils.exceptions import NotFoundError, ValidationError
 
@@ -31,69 +35,164 @@ class ProfileUpdateService:
     # 画像更新阈值
     UPDATE_THRESHOLD = 0.15  # 画像变化超过15%时通知用户
     
-    def __init__(self, user_profile_service=None, matching_service=None):
+    # 流式人格估计中单条消息的权重（指数加权平均系数）
+    MESSAGE_PERSONALITY_ALPHA = 0.05
+    # 流式人格估计写回画像的条件：任一维度相对已写回值的偏移达到阈值，或距上次写回超过间隔
+    MESSAGE_PERSONALITY_WRITE_THRESHOLD = 0.03
+    MESSAGE_PERSONALITY_FLUSH_SECONDS = 600
+    
+    # 兴趣与情绪关键词的联合自动机（首次分析时编译）
+    _keyword_matcher: Optional[KeywordAutomaton] = None
+    
+    def __init__(
+        self,
+        user_profile_service=None,
+        matching_service=None,
+        personality_service=None,
+        recalculation_scheduler=None,
+        personality_scheduler=None,
+        personality_flush_seconds: Optional[float] = None
+    ):
         """
         初始化服务
         
         Args:
             user_profile_service: 用户画像服务实例
             matching_service: 匹配服务实例
+            personality_service: 人格识别服务实例（可选，未提供时使用关键词规则评分）
+            recalculation_scheduler: 匹配重新计算调度器（可选，未提供时同步重算）
+            personality_scheduler: 人格推理微批调度器（可选，提供时消息评分在后台合并为批次推理）
+            personality_flush_seconds: 后台批量写回流式人格估计的间隔（秒，默认 MESSAGE_PERSONALITY_FLUSH_SECONDS）
         """
         self._user_profile_service = user_profile_service
         self._matching_service = matching_service
-        self._profile_snapshots: Dict[str, Dict] = {}  # 用于跟踪画像变化
+        self._recalculation_scheduler = recalculation_scheduler
+        self._personality_service = personality_service or PersonalityRecognitionService(use_ml=False)
+        self._personality_scheduler = personality_scheduler
+        # 流式人格估计：用户ID -> {'scores': 当前估计, 'persisted': 已写回画像的得分, 'written_at': 写回时间}
+        self._personality_estimates: Dict[str, Dict] = {}
+        self._estimate_lock = threading.Lock()
+        self.personality_flush_seconds = (
+            personality_flush_seconds if personality_flush_seconds is not None
+            else self.MESSAGE_PERSONALITY_FLUSH_SECONDS
+        )
+        self._flusher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
         self.logger = logger
     
-    def analyze_conversation(
-        self,
+    @classmethod
+    def _get_keyword_matcher(cls) -> KeywordAutomaton:
+        """获取兴趣与情绪关键词的联合自动机（按类首次使用时编译）"""
+        matcher = cls._keyword_matcher
+        if matcher is None:
+            # 兴趣关键词的附加信息为None，情绪关键词为情绪类别的优先级
+            entries = [
+                (keyword, None)
+                for keywords in cls.INTEREST_KEYWORDS.values()
+                for keyword in keywords
+            ]
+            entries.extend(
+                (keyword, rank)
+                for rank, keywords in enumerate(cls.EMOTION_KEYWORDS.values())
+                for keyword in keywords
+            )
+            matcher = KeywordAutomaton(entries)
+            cls._keyword_matcher = matcher
+        return matcher
+    
+    @classmethod
+    def analyze_message_texts(
+        cls,
         conversation_id: str,
-        messages: List[Message]
+        messages: Iterable[Tuple[str, str]]
     ) -> Dict[str, any]:
         """
-        分析对话内容并提取关键信息
+        单遍分析对话消息
+        
+        每条消息只转小写一次、用关键词自动机扫描一次，同时得到兴趣/话题关键词和情绪类别。
+        只依赖消息文本，可在进程池中执行。
         
         Args:
             conversation_id: 对话ID
-            messages: 消息列表
+            messages: (发送者ID, 消息内容) 序列
             
         Returns:
             Dict: 包含话题、情绪、兴趣等关键信息的字典
         """
-        if not messages:
-            return {
-                'topics': [],
-                'emotions': {},
-                'interests': [],
-                'conversation_id': conversation_id,
-                'message_count': 0,
-                'analyzed_at': datetime.now()
-            }
-        
-        # 提取话题
-        topics = self._extract_topics(messages)
-        
-        # 分析情绪
-        emotions = self._analyze_emotions(messages)
+        matcher = cls._get_keyword_matcher()
+        emotion_types = list(cls.EMOTION_KEYWORDS)
+        neutral_rank = emotion_types.index('neutral')
+        
+        interests: Dict[str, None] = {}  # 保持首次出现顺序的集合
+        user_emotions: Dict[str, Dict] = {}
+        message_count = 0
+        
+        for sender_id, content in messages:
+            message_count += 1
+            counts = user_emotions.get(sender_id)
+            if counts is None:
+                counts = {emotion_type: 0 for emotion_type in emotion_types}
+                counts['total'] = 0
+                user_emotions[sender_id] = counts
+            
+            emotion_rank = neutral_rank
+            for keyword, rank in matcher.find_all(content.lower()):
+                if rank is None:
+                    interests[keyword] = None
+                elif rank < emotion_rank:
+                    emotion_rank = rank
+            
+            # 命中多个情绪类别时取优先级最高（定义顺序最前）的类别
+            counts[emotion_types[emotion_rank]] += 1
+            counts['total'] += 1
         
-        # 提取兴趣
-        interests = self._extract_interests(messages)
+        # 计算情绪比例
+        for counts in user_emotions.values():
+            for emotion_type in emotion_types:
+                counts[f'{emotion_type}_ratio'] = counts[emotion_type] / counts['total']
         
-        analysis_result = {
+        return {
             'conversation_id': conversation_id,
-            'topics': topics,
-            'emotions': emotions,
-            'interests': interests,
-            'message_count': len(messages),
+            'topics': list(interests),
+            'emotions': user_emotions,
+            'interests': list(interests),
+            'message_count': message_count,
             'analyzed_at': datetime.now()
         }
+    
+    def analyze_conversation(
+        self,
+        conversation_id: str,
+        messages: List[Message]
+    ) -> Dict[str, any]:
+        """
+        分析对话内容并提取关键信息
+        
+        Args:
+            conversation_id: 对话ID
+            messages: 消息列表
+            
+        Returns:
+            Dict: 包含话题、情绪、兴趣等关键信息的字典
+        """
+        analysis_result = self.analyze_message_texts(
+            conversation_id,
+            ((message.sender_id, message.content) for message in messages)
+        )
         
         self.logger.info(
             f"Analyzed conversation {conversation_id}: "
-            f"{len(topics)} topics, {len(interests)} interests"
+            f"{len(analysis_result['topics'])} topics, {len(analysis_result['interests'])} interests"
         )
         
         return analysis_result
     
+    def _analyze_messages(self, messages: List[Message]) -> Dict[str, any]:
+        """单遍分析消息列表（不记录日志）"""
+        return self.analyze_message_texts(
+            '', ((message.sender_id, message.content) for message in messages)
+        )
+    
     def _extract_topics(self, messages: List[Message]) -> List[str]:
         """
         从消息中提取话题
@@ -104,18 +203,7 @@ class ProfileUpdateService:
         Returns:
             List[str]: 话题列表
         """
-        topics = set()
-        
-        for message in messages:
-            content = message.content.lower()
-            
-            # 简化的话题提取：查找关键词
-            for category, keywords in self.INTEREST_KEYWORDS.items():
-                for keyword in keywords:
-                    if keyword in content:
-                        topics.add(keyword)
-        
-        return list(topics)
+        return self._analyze_messages(messages)['topics']
     
     def _analyze_emotions(self, messages: List[Message]) -> Dict[str, Dict]:
         """
@@ -127,46 +215,7 @@ class ProfileUpdateService:
         Returns:
             Dict: 每个用户的情绪统计
         """
-        user_emotions = {}
-        
-        for message in messages:
-            user_id = message.sender_id
-            if user_id not in user_emotions:
-                user_emotions[user_id] = {
-                    'positive': 0,
-                    'negative': 0,
-                    'anxious': 0,
-                    'neutral': 0,
-                    'total': 0
-                }
-            
-            # 检测情绪关键词
-            content = message.content.lower()
-            emotion_detected = False
-            
-            for emotion_type, keywords in self.EMOTION_KEYWORDS.items():
-                for keyword in keywords:
-                    if keyword in content:
-                        user_emotions[user_id][emotion_type] += 1
-                        emotion_detected = True
-                        break
-                if emotion_detected:
-                    break
-            
-            if not emotion_detected:
-                user_emotions[user_id]['neutral'] += 1
-            
-            user_emotions[user_id]['total'] += 1
-        
-        # 计算情绪比例
-        for user_id in user_emotions:
-            total = user_emotions[user_id]['total']
-            if total > 0:
-                for emotion_type in ['positive', 'negative', 'anxious', 'neutral']:
-                    count = user_emotions[user_id][emotion_type]
-                    user_emotions[user_id][f'{emotion_type}_ratio'] = count / total
-        
-        return user_emotions
+        return self._analyze_messages(messages)['emotions']
     
     def _extract_interests(self, messages: List[Message]) -> List[str]:
         """
@@ -178,18 +227,7 @@ class ProfileUpdateService:
         Returns:
             List[str]: 兴趣标签列表
         """
-        interests = set()
-        
-        for message in messages:
-            content = message.content.lower()
-            
-            # 提取兴趣关键词
-            for category, keywords in self.INTEREST_KEYWORDS.items():
-                for keyword in keywords:
-                    if keyword in content:
-                        interests.add(keyword)
-        
-        return list(interests)
+        return self._analyze_messages(messages)['interests']
     
     def update_profile_from_conversation(
         self,
@@ -209,18 +247,24 @@ class ProfileUpdateService:
         if not self._user_profile_service:
             raise ValidationError("User profile service not initialized")
         
-        # 保存画像快照用于比较
+        # 记录更新前的版本号，更新后从变更日志读取字段变化
         profile = self._user_profile_service.get_profile(user_id)
-        snapshot = self._create_profile_snapshot(profile)
-        
-        # 更新兴趣标签
-        interests_updated = self._update_interests_from_data(user_id, conversation_data)
-        
-        # 更新情感特征
-        emotions_updated = self._update_emotional_features(user_id, conversation_data)
+        base_version = self._user_profile_service.get_profile_version(user_id)
+        
+        # 兴趣标签和情感特征的更新合并为一次画像写入
+        interest_updates = self._interest_updates(profile, conversation_data)
+        emotion_updates = self._emotional_updates(user_id, profile, conversation_data)
+        interests_updated = bool(interest_updates)
+        emotions_updated = bool(emotion_updates)
+        if interests_updated or emotions_updated:
+            self._user_profile_service.update_profile(
+                user_id, {**interest_updates, **emotion_updates}
+            )
         
         # 计算画像变化程度
         updated_profile = self._user_profile_service.get_profile(user_id)
+        net_changes = self._user_profile_service.get_net_profile_changes(user_id, base_version)
+        snapshot = self._snapshot_from_changes(net_changes, updated_profile)
         change_magnitude = self._calculate_profile_change(snapshot, updated_profile)
         
         # 判断是否需要通知用户
@@ -270,6 +314,30 @@ class ProfileUpdateService:
             'big_five': profile.big_five.dict() if profile.big_five else None
         }
     
+    def _snapshot_from_changes(self, net_changes: Dict[str, Tuple], profile) -> Dict:
+        """
+        由字段净变化还原更新前的比较快照（未变化的字段取当前值）
+        
+        Args:
+            net_changes: 字段 -> (更新前的值, 当前值)
+            profile: 当前画像
+            
+        Returns:
+            Dict: 与 _create_profile_snapshot 结构相同的快照
+        """
+        def before(field, current):
+            return net_changes[field][0] if field in net_changes else current
+        
+        return {
+            'emotion_stability': before('emotion_stability', profile.emotion_stability),
+            'social_energy': before('social_energy', profile.social_energy),
+            'interest_count': sum(
+                len(before(field, getattr(profile, field)) or [])
+                for field in ('academic_interests', 'career_interests', 'hobby_interests')
+            ),
+            'big_five': before('big_five', profile.big_five.dict() if profile.big_five else None)
+        }
+    
     def _update_interests_from_data(
         self,
         user_id: str,
@@ -285,11 +353,26 @@ class ProfileUpdateService:
         Returns:
             bool: 是否有更新
         """
+        profile = self._user_profile_service.get_profile(user_id)
+        updates = self._interest_updates(profile, conversation_data)
+        if updates:
+            self._user_profile_service.update_profile(user_id, updates)
+        return bool(updates)
+    
+    def _interest_updates(self, profile, conversation_data: Dict) -> Dict:
+        """
+        计算兴趣标签的更新内容
+        
+        Args:
+            profile: 用户画像
+            conversation_data: 对话数据
+            
+        Returns:
+            Dict: 待写入画像的字段，无新兴趣时为空
+        """
         extracted_interests = conversation_data.get('interests', [])
         if not extracted_interests:
-            return False
-        
-        profile = self._user_profile_service.get_profile(user_id)
+            return {}
         
         # 分类兴趣
         academic_interests = set(profile.academic_interests)
@@ -312,14 +395,13 @@ class ProfileUpdateService:
                     hobby_interests.add(interest)
                     updated = True
         
-        if updated:
-            self._user_profile_service.update_profile(user_id, {
-                'academic_interests': list(academic_interests),
-                'career_interests': list(career_interests),
-                'hobby_interests': list(hobby_interests)
-            })
-        
-        return updated
+        if not updated:
+            return {}
+        return {
+            'academic_interests': list(academic_interests),
+            'career_interests': list(career_interests),
+            'hobby_interests': list(hobby_interests)
+        }
     
     def _update_emotional_features(
         self,
@@ -336,13 +418,29 @@ class ProfileUpdateService:
         Returns:
             bool: 是否有更新
         """
+        profile = self._user_profile_service.get_profile(user_id)
+        updates = self._emotional_updates(user_id, profile, conversation_data)
+        if updates:
+            self._user_profile_service.update_profile(user_id, updates)
+        return bool(updates)
+    
+    def _emotional_updates(self, user_id: str, profile, conversation_data: Dict) -> Dict:
+        """
+        计算情感特征的更新内容
+        
+        Args:
+            user_id: 用户ID
+            profile: 用户画像
+            conversation_data: 对话数据
+            
+        Returns:
+            Dict: 待写入画像的字段，对话中没有该用户的情绪数据时为空
+        """
         emotions = conversation_data.get('emotions', {})
         user_emotions = emotions.get(user_id)
         
         if not user_emotions:
-            return False
-        
-        profile = self._user_profile_service.get_profile(user_id)
+            return {}
         
         # 计算情绪稳定性（负面和焦虑情绪越少，稳定性越高）
         negative_ratio = user_emotions.get('negative_ratio', 0)
@@ -367,13 +465,10 @@ class ProfileUpdateService:
             (1 - alpha) * profile.social_energy
         )
         
-        # 更新画像
-        self._user_profile_service.update_profile(user_id, {
+        return {
             'emotion_stability': round(updated_stability, 3),
             'social_energy': round(updated_energy, 3)
-        })
-        
-        return True
+        }
     
     def _calculate_profile_change(
         self,
@@ -470,6 +565,11 @@ class ProfileUpdateService:
         # 获取用户当前关注的场景
         profile = self._user_profile_service.get_profile(user_id)
         
+        # 交给调度器合并去抖后异步重算
+        if self._recalculation_scheduler:
+            self._recalculation_scheduler.mark_user_dirty(user_id, profile.current_scenes)
+            return
+        
         # 为每个场景重新计算匹配
         for scene in profile.current_scenes:
             try:
@@ -532,6 +632,216 @@ class ProfileUpdateService:
         
         return new_big_five
     
+    def update_personality_from_message(
+        self,
+        user_id: str,
+        content: str
+    ) -> BigFiveScores:
+        """
+        根据单条新消息增量更新用户的人格估计
+        
+        每条消息的人格得分以指数加权方式并入服务内存中的人格估计，更新代价为O(1)；
+        估计值只在任一维度相对已写回值的偏移达到 MESSAGE_PERSONALITY_WRITE_THRESHOLD，
+        或距上次写回超过 MESSAGE_PERSONALITY_FLUSH_SECONDS 时才写回画像，
+        其余的偏移由 flush_personality_estimates() 批量写回。
+        
+        Args:
+            user_id: 用户ID
+            content: 消息内容
+            
+        Returns:
+            BigFiveScores: 更新后的人格估计
+        """
+        if not self._user_profile_service:
+            raise ValidationError("User profile service not initialized")
+        
+        message_scores = self._personality_service.score_message(content)
+        return self._apply_message_scores(user_id, message_scores)
+    
+    def submit_personality_message(self, user_id: str, content: str) -> Future:
+        """
+        提交一条新消息，在后台更新用户的人格估计
+        
+        配置了人格推理微批调度器时，消息评分与其他并发消息合并为一个批次推理，
+        调用方（如异步的消息发送接口）不会被模型推理阻塞；否则同步评分。
+        
+        Args:
+            user_id: 用户ID
+            content: 消息内容
+            
+        Returns:
+            Future: 完成后结果为更新后的人格估计（BigFiveScores）
+        """
+        if not self._user_profile_service:
+            raise ValidationError("User profile service not initialized")
+        
+        done: Future = Future()
+        if self._personality_scheduler is None:
+            try:
+                done.set_result(self.update_personality_from_message(user_id, content))
+            except Exception as e:
+                done.set_exception(e)
+            return done
+        
+        def on_scored(scored: Future) -> None:
+            try:
+                done.set_result(self._apply_message_scores(user_id, scored.result()))
+            except Exception as e:
+                self.logger.warning(f"Failed to update personality from message for user {user_id}: {e}")
+                done.set_exception(e)
+        
+        self._personality_scheduler.submit_message(content).add_done_callback(on_scored)
+        return done
+    
+    def _apply_message_scores(self, user_id: str, message_scores: Dict[str, float]) -> BigFiveScores:
+        """
+        将单条消息的人格得分并入用户的流式人格估计，达到写回条件时写回画像
+        
+        Args:
+            user_id: 用户ID
+            message_scores: 维度名到得分的映射（可能为空）
+            
+        Returns:
+            BigFiveScores: 更新后的人格估计
+        """
+        profile = self._user_profile_service.get_profile(user_id)
+        profile_scores = profile.big_five.dict() if profile.big_five else {
+            trait: 0.5 for trait in PersonalityRecognitionService.TRAITS
+        }
+        
+        now = datetime.now()
+        pending = None
+        with self._estimate_lock:
+            estimate = self._personality_estimates.get(user_id)
+            if estimate is None or estimate['persisted'] != profile_scores:
+                # 首次估计，或画像中的人格得分已被其他途径更新，以画像为新的起点
+                estimate = {
+                    'scores': profile_scores.copy(),
+                    'persisted': profile_scores,
+                    'written_at': now
+                }
+                self._personality_estimates[user_id] = estimate
+            if not message_scores:
+                return BigFiveScores(**estimate['scores'])
+            
+            alpha = self.MESSAGE_PERSONALITY_ALPHA
+            scores = estimate['scores']
+            for trait, score in message_scores.items():
+                scores[trait] = max(0.0, min(1.0, (1 - alpha) * scores[trait] + alpha * score))
+            
+            drift = self._personality_drift(estimate)
+            if drift >= self.MESSAGE_PERSONALITY_WRITE_THRESHOLD or (
+                drift > 0
+                and now - estimate['written_at'] >= timedelta(seconds=self.MESSAGE_PERSONALITY_FLUSH_SECONDS)
+            ):
+                pending = scores.copy()
+            result = BigFiveScores(**scores)
+        
+        if pending is not None:
+            self._write_personality_estimate(user_id, pending, now)
+        
+        return result
+    
+    def flush_personality_estimates(self, user_id: Optional[str] = None) -> int:
+        """
+        将尚未写回的流式人格估计写回画像，并释放对应的内存状态
+        
+        Args:
+            user_id: 用户ID（默认全部用户）
+            
+        Returns:
+            int: 写回画像的用户数
+        """
+        if not self._user_profile_service:
+            return 0
+        
+        now = datetime.now()
+        with self._estimate_lock:
+            if user_id is None:
+                estimates = list(self._personality_estimates.items())
+                self._personality_estimates.clear()
+            else:
+                estimate = self._personality_estimates.pop(user_id, None)
+                estimates = [(user_id, estimate)] if estimate else []
+        
+        flushed = 0
+        for estimate_user_id, estimate in estimates:
+            if self._personality_drift(estimate) <= 0:
+                continue
+            try:
+                self._write_personality_estimate(estimate_user_id, estimate['scores'], now, track=False)
+                flushed += 1
+            except NotFoundError:
+                continue
+        
+        if flushed:
+            self.logger.info(f"Flushed personality estimates for {flushed} users")
+        return flushed
+    
+    def start(self) -> None:
+        """启动定时写回流式人格估计的后台线程"""
+        if self._flusher is not None:
+            return
+        self._stop.clear()
+        self._flusher = threading.Thread(
+            target=self._run_flusher,
+            name="personality-estimate-flusher",
+            daemon=True
+        )
+        self._flusher.start()
+        self.logger.info(f"Personality estimates flushed every {self.personality_flush_seconds}s")
+    
+    def close(self) -> None:
+        """停止后台线程，并写回全部尚未写回的人格估计"""
+        if self._flusher is not None:
+            self._stop.set()
+            self._flusher.join(timeout=5.0)
+            self._flusher = None
+        self.flush_personality_estimates()
+    
+    def _run_flusher(self) -> None:
+        """后台线程主循环：每个间隔写回并释放全部估计，内存只保留该间隔内发过消息的用户"""
+        while not self._stop.wait(self.personality_flush_seconds):
+            try:
+                self.flush_personality_estimates()
+            except Exception as e:
+                self.logger.warning(f"Failed to flush personality estimates: {e}")
+    
+    @staticmethod
+    def _personality_drift(estimate: Dict) -> float:
+        """计算人格估计相对已写回值的最大偏移"""
+        persisted = estimate['persisted']
+        return max(
+            (abs(score - persisted.get(trait, 0.5)) for trait, score in estimate['scores'].items()),
+            default=0.0
+        )
+    
+    def _write_personality_estimate(
+        self,
+        user_id: str,
+        scores: Dict[str, float],
+        now: datetime,
+        track: bool = True
+    ) -> None:
+        """
+        将人格估计写回画像
+        
+        Args:
+            user_id: 用户ID
+            scores: 人格得分
+            now: 写回时间
+            track: 是否在写回后继续以写回值为基准跟踪该用户的估计
+        """
+        new_big_five = BigFiveScores(**scores)
+        self._user_profile_service.update_profile(user_id, {'big_five': new_big_five})
+        if not track:
+            return
+        with self._estimate_lock:
+            estimate = self._personality_estimates.get(user_id)
+            if estimate is not None:
+                estimate['persisted'] = new_big_five.dict()
+                estimate['written_at'] = now
+    
     def _adjust_personality_scores(
         self,
         current_scores: Dict[str, float],
@@ -0,0 +1,419 @@
+"""预计算推荐列表服务"""
+import queue
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+from src.models.matching import Match
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+RecommendationKey = Tuple[str, str]  # (user_id, scene)
+
+
+class RecommendationList:
+    """单个 (用户, 场景) 的预计算推荐列表"""
+
+    __slots__ = ('matches', 'computed_at', 'profile_version', 'stale', 'last_read')
+
+    def __init__(self, matches: List[Match], computed_at: datetime, profile_version: int):
+        self.matches = matches
+        self.computed_at = computed_at
+        self.profile_version = profile_version
+        self.stale = False
+        self.last_read = computed_at
+
+
+class RecommendationService:
+    """
+    预计算推荐列表服务类
+
+    为每个 (用户, 场景) 保存前K名匹配及计算时间，请求直接从存储返回。
+    用户自身或列表中候选人参与匹配的画像字段变化时列表被标记为过期，只有近期被读取过的列表
+    才由后台线程重新计算；超过 idle_ttl 未被读取的列表由定时检查删除，不再刷新。
+    列表年龄超过场景的过期上限时不再返回旧结果，而是同步重新计算。
+    """
+
+    # 列表年龄达到过期上限的该比例后，由定时刷新提前重新计算
+    PROACTIVE_REFRESH_RATIO = 0.5
+
+    _STOP = object()
+
+    def __init__(
+        self,
+        matching_service,
+        user_profile_service,
+        top_k: int = 20,
+        max_staleness: timedelta = timedelta(minutes=30),
+        scene_max_staleness: Optional[Dict[str, timedelta]] = None,
+        refresh_interval: float = 60.0,
+        num_workers: int = 2,
+        idle_ttl: timedelta = timedelta(hours=2)
+    ):
+        """
+        初始化服务
+
+        Args:
+            matching_service: 匹配服务实例
+            user_profile_service: 用户画像服务实例（订阅画像版本变更）
+            top_k: 每个列表预计算的匹配数
+            max_staleness: 默认过期上限
+            scene_max_staleness: 按场景覆盖的过期上限
+            refresh_interval: 后台定时检查过期列表的间隔（秒）
+            num_workers: 后台刷新线程数
+            idle_ttl: 列表超过该时长未被读取时删除
+        """
+        self._matching_service = matching_service
+        self._user_profile_service = user_profile_service
+        self.top_k = top_k
+        self.max_staleness = max_staleness
+        self.scene_max_staleness = dict(scene_max_staleness or {})
+        self.refresh_interval = refresh_interval
+        self.num_workers = max(1, num_workers)
+        self.idle_ttl = idle_ttl
+        self.logger = logger
+
+        self._lists: Dict[RecommendationKey, RecommendationList] = {}
+        self._user_keys: Dict[str, Set[RecommendationKey]] = {}  # user_id -> 该用户自己的列表
+        self._candidate_keys: Dict[str, Set[RecommendationKey]] = {}  # user_id -> 包含该用户的列表
+        self._lock = threading.Lock()
+
+        # 后台刷新
+        self._queue: queue.Queue = queue.Queue()
+        self._queued: Set[RecommendationKey] = set()
+        self._workers: List[threading.Thread] = []
+        self._stop = threading.Event()
+        self._stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'refreshes': 0, 'evicted': 0, 'skipped_changes': 0}
+
+        user_profile_service.add_profile_listener(self.on_profile_changed)
+
+    # ==================== 查询 ====================
+
+    def get_recommendations(self, user_id: str, scene: str, limit: int = 10) -> List[Match]:
+        """
+        获取推荐列表
+
+        Args:
+            user_id: 用户ID
+            scene: 场景
+            limit: 返回数量
+
+        Returns:
+            List[Match]: 按匹配度排序的匹配列表
+        """
+        if limit > self.top_k:
+            return self._matching_service.find_matches(user_id, scene, limit=limit)
+
+        key = (user_id, scene)
+        now = datetime.now()
+        with self._lock:
+            entry = self._lists.get(key)
+
+        if entry is None or now - entry.computed_at > self.get_max_staleness(scene):
+            # 没有列表或超过过期上限：同步计算
+            with self._lock:
+                self._stats['misses'] += 1
+            entry = self.refresh(user_id, scene)
+        elif entry.stale:
+            with self._lock:
+                self._stats['stale_hits'] += 1
+            if self._workers:
+                self._schedule(key)
+            else:
+                entry = self.refresh(user_id, scene)
+        else:
+            with self._lock:
+                self._stats['hits'] += 1
+        entry.last_read = now
+
+        # 列表计算后新接受、拒绝或封禁的候选在返回前剔除
+        exclusion_filter = self._matching_service.exclusion_filter
+        allowed = set(exclusion_filter.filter_candidates(
+            user_id, [self._other_user(match, user_id) for match in entry.matches]
+        ))
+        return [
+            match for match in entry.matches
+            if self._other_user(match, user_id) in allowed
+        ][:limit]
+
+    def get_max_staleness(self, scene: str) -> timedelta:
+        """
+        获取场景的过期上限
+
+        Args:
+            scene: 场景
+
+        Returns:
+            timedelta: 过期上限
+        """
+        return self.scene_max_staleness.get(scene, self.max_staleness)
+
+    def get_freshness(self, user_id: str, scene: str) -> Optional[datetime]:
+        """
+        获取列表的计算时间
+
+        Args:
+            user_id: 用户ID
+            scene: 场景
+
+        Returns:
+            Optional[datetime]: 计算时间，不存在时返回None
+        """
+        with self._lock:
+            entry = self._lists.get((user_id, scene))
+            return entry.computed_at if entry else None
+
+    # ==================== 刷新 ====================
+
+    def refresh(self, user_id: str, scene: str) -> RecommendationList:
+        """
+        同步重新计算推荐列表
+
+        Args:
+            user_id: 用户ID
+            scene: 场景
+
+        Returns:
+            RecommendationList: 新的推荐列表
+        """
+        key = (user_id, scene)
+        version = self._user_profile_service.get_profile_version(user_id)
+        matches = self._matching_service.find_matches(user_id, scene, limit=self.top_k)
+        entry = RecommendationList(matches, datetime.now(), version)
+
+        with self._lock:
+            old = self._lists.get(key)
+            if old is not None:
+                entry.last_read = old.last_read
+                for match in old.matches:
+                    self._discard_index(self._candidate_keys, self._other_user(match, user_id), key)
+            self._lists[key] = entry
+            self._user_keys.setdefault(user_id, set()).add(key)
+            for match in matches:
+                self._candidate_keys.setdefault(self._other_user(match, user_id), set()).add(key)
+            # 计算期间画像又发生变化时保持过期标记
+            entry.stale = self._user_profile_service.get_profile_version(user_id) != version
+            self._queued.discard(key)
+            self._stats['refreshes'] += 1
+
+        return entry
+
+    def on_profile_changed(self, user_id: str, version: int) -> None:
+        """
+        画像版本变更回调：标记该用户自己的列表和包含该用户的列表为过期
+
+        只有参与匹配打分的字段变化时才处理；过期列表中只有近期被读取过的才加入刷新队列，
+        其余列表等下次读取时再重新计算（或被定时检查删除）。
+
+        Args:
+            user_id: 用户ID
+            version: 新版本号
+        """
+        changed_fields = self._user_profile_service.get_net_profile_changes(user_id, version - 1)
+        # 变更日志没有记录字段时无法判断，按相关处理
+        if changed_fields and not self._matching_service.PROFILE_FIELDS.intersection(changed_fields):
+            with self._lock:
+                self._stats['skipped_changes'] += 1
+            return
+
+        read_after = datetime.now() - self.idle_ttl
+        due = []
+        with self._lock:
+            keys = self._user_keys.get(user_id, set()) | self._candidate_keys.get(user_id, set())
+            for key in keys:
+                entry = self._lists[key]
+                if key[0] == user_id and entry.profile_version >= version:
+                    continue
+                entry.stale = True
+                if entry.last_read >= read_after:
+                    due.append(key)
+        for key in due:
+            self._schedule(key)
+
+    def request_refresh(self, user_id: str, scene: str) -> bool:
+        """
+        请求重新计算推荐列表（与画像变更触发的刷新共用同一去重队列）
+
+        列表不存在（没有人请求过）或已反映当前画像版本时不做任何事；
+        未启动后台线程时同步重新计算。
+
+        Args:
+            user_id: 用户ID
+            scene: 场景
+
+        Returns:
+            bool: 是否安排了重新计算
+        """
+        key = (user_id, scene)
+        version = self._user_profile_service.get_profile_version(user_id)
+        with self._lock:
+            entry = self._lists.get(key)
+            if entry is None or (not entry.stale and entry.profile_version >= version):
+                return False
+            entry.stale = True
+        if self._workers:
+            self._schedule(key)
+        else:
+            self.refresh(user_id, scene)
+        return True
+
+    def invalidate(self, user_id: str, scene: Optional[str] = None) -> None:
+        """
+        删除用户的推荐列表（下次请求时重新计算）
+
+        Args:
+            user_id: 用户ID
+            scene: 场景（None表示全部场景）
+        """
+        with self._lock:
+            keys = [
+                key for key in self._user_keys.get(user_id, set())
+                if scene is None or key[1] == scene
+            ]
+            for key in keys:
+                self._remove(key)
+
+    def refresh_expired(self, now: Optional[datetime] = None) -> int:
+        """
+        删除超过 idle_ttl 未被读取的列表，将其余接近过期上限或已标记过期的列表加入刷新队列
+
+        Args:
+            now: 当前时间（默认datetime.now()）
+
+        Returns:
+            int: 加入队列的列表数
+        """
+        now = now or datetime.now()
+        read_after = now - self.idle_ttl
+        due = []
+        with self._lock:
+            idle = [key for key, entry in self._lists.items() if entry.last_read < read_after]
+            for key in idle:
+                self._remove(key)
+            self._stats['evicted'] += len(idle)
+            for key, entry in self._lists.items():
+                if entry.stale or now - entry.computed_at \
+                        >= self.get_max_staleness(key[1]) * self.PROACTIVE_REFRESH_RATIO:
+                    due.append(key)
+        for key in due:
+            self._schedule(key)
+        return len(due)
+
+    def run_pending(self) -> int:
+        """
+        在当前线程中处理刷新队列（未启动后台线程时使用）
+
+        Returns:
+            int: 刷新的列表数
+        """
+        count = 0
+        while True:
+            try:
+                key = self._queue.get_nowait()
+            except queue.Empty:
+                return count
+            if key is not self._STOP:
+                self._refresh_key(key)
+                count += 1
+
+    def start(self) -> None:
+        """启动后台刷新线程和定时检查线程"""
+        if self._workers:
+            return
+        self._stop.clear()
+        for i in range(self.num_workers):
+            worker = threading.Thread(
+                target=self._run_worker,
+                name=f"recommendation-refresh-{i}",
+                daemon=True
+            )
+            worker.start()
+            self._workers.append(worker)
+        ticker = threading.Thread(target=self._run_ticker, name="recommendation-ticker", daemon=True)
+        ticker.start()
+        self._workers.append(ticker)
+        self.logger.info(f"Recommendation refresher started with {self.num_workers} workers")
+
+    def close(self) -> None:
+        """停止后台线程"""
+        if not self._workers:
+            return
+        self._stop.set()
+        for _ in range(self.num_workers):
+            self._queue.put(self._STOP)
+        for worker in self._workers:
+            worker.join(timeout=5.0)
+        self._workers = []
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        获取服务统计
+
+        Returns:
+            Dict[str, int]: 列表数、命中数、过期命中数、未命中数、刷新次数和队列长度
+        """
+        with self._lock:
+            return {
+                'lists': len(self._lists),
+                **self._stats,
+                'queue_depth': len(self._queued)
+            }
+
+    # ==================== 内部方法 ====================
+
+    def _schedule(self, key: RecommendationKey) -> None:
+        """将列表加入刷新队列（已在队列中的不重复加入）"""
+        with self._lock:
+            if key in self._queued:
+                return
+            self._queued.add(key)
+        self._queue.put(key)
+
+    def _remove(self, key: RecommendationKey) -> None:
+        """在持有锁的情况下删除列表及其索引"""
+        entry = self._lists.pop(key)
+        user_id = key[0]
+        for match in entry.matches:
+            self._discard_index(self._candidate_keys, self._other_user(match, user_id), key)
+        self._discard_index(self._user_keys, user_id, key)
+
+    def _refresh_key(self, key: RecommendationKey) -> None:
+        """刷新单个列表，失败时记录日志"""
+        with self._lock:
+            if key not in self._lists:
+                # 排队期间已被删除（空闲淘汰或失效），不再重新计算
+                self._queued.discard(key)
+                return
+        try:
+            self.refresh(*key)
+        except Exception as e:
+            with self._lock:
+                self._queued.discard(key)
+            self.logger.warning(f"Failed to refresh recommendations for {key}: {e}")
+
+    def _run_worker(self) -> None:
+        """后台刷新线程主循环"""
+        while True:
+            key = self._queue.get()
+            if key is self._STOP:
+                return
+            self._refresh_key(key)
+
+    def _run_ticker(self) -> None:
+        """定时检查过期列表"""
+        while not self._stop.wait(self.refresh_interval):
+            self.refresh_expired()
+
+    @staticmethod
+    def _other_user(match: Match, user_id: str) -> str:
+        """匹配中的对方用户ID"""
+        return match.user_b_id if match.user_a_id == user_id else match.user_a_id
+
+    @staticmethod
+    def _discard_index(index: Dict[str, Set[RecommendationKey]], user_id: str, key: RecommendationKey) -> None:
+        """从反向索引中移除列表键"""
+        keys = index.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del index[user_id]
@@ -2,6 +2,7 @@
 from typing import List, Dict, Optional
 from src.models.matching import SceneConfig
 from src.models.user import UserProfile
+from src.services.scene_registry import SceneRegistry
 from src.utils.exceptions import ValidationError, NotFoundError
 from src.utils.logger import get_logger
 
@@ -11,118 +12,30 @@ logger = get_logger(__name__)
 class SceneManagementService:
     """场景管理服务类"""
     
-    def __init__(self, user_profile_service=None, matching_service=None):
+    def __init__(
+        self,
+        user_profile_service=None,
+        matching_service=None,
+        recalculation_scheduler=None,
+        scene_registry: Optional[SceneRegistry] = None
+    ):
         """
         初始化场景管理服务
         
         Args:
             user_profile_service: 用户画像服务实例
             matching_service: 匹配服务实例
+            recalculation_scheduler: 匹配重新计算调度器（可选，未提供时同步重算）
+            scene_registry: 场景配置注册表（默认使用匹配服务的注册表）
         """
         self._user_profile_service = user_profile_service
         self._matching_service = matching_service
-        self._scene_configs: Dict[str, SceneConfig] = self._initialize_scene_configs()
+        self._recalculation_scheduler = recalculation_scheduler
+        if scene_registry is None:
+            scene_registry = getattr(matching_service, 'scene_registry', None) or SceneRegistry()
+        self.scene_registry = scene_registry
         self.logger = logger
     
-    def _initialize_scene_configs(self) -> Dict[str, SceneConfig]:
-        """
-        初始化所有场景配置
-        
-        Returns:
-            Dict[str, SceneConfig]: 场景配置字典
-        """
-        configs = {}
-        
-        # 考研自习室场景
-        configs['考研自习室'] = SceneConfig(
-            scene_name='考研自习室',
-            display_name='考研自习室',
-            description='为准备考研的同学提供学习伙伴匹配，优先匹配相同目标院校和专业的用户',
-            match_weights={
-                'personality': 0.25,
-                'interest': 0.35,
-                'scene': 0.30,
-                'emotion': 0.10
-            },
-            topic_templates=[
-                '你的目标院校是哪里？',
-                '你每天的学习时间安排是怎样的？',
-                '有什么好的学习方法可以分享吗？',
-                '你觉得考研最大的挑战是什么？',
-                '你是如何保持学习动力的？'
-            ],
-            intervention_threshold=15,
-            max_interventions_per_hour=3
-        )
-        
-        # 职业咨询室场景
-        configs['职业咨询室'] = SceneConfig(
-            scene_name='职业咨询室',
-            display_name='职业咨询室',
-            description='为职业规划和求职提供交流平台，优先匹配相同职业兴趣或有相关经验的用户',
-            match_weights={
-                'personality': 0.20,
-                'interest': 0.40,
-                'scene': 0.30,
-                'emotion': 0.10
-            },
-            topic_templates=[
-                '你对哪个行业感兴趣？',
-                '你有什么职业规划？',
-                '你参加过哪些实习或项目？',
-                '你理想的工作是什么样的？',
-                '你在求职过程中遇到了什么困难？'
-            ],
-            intervention_threshold=15,
-            max_interventions_per_hour=3
-        )
-        
-        # 心理树洞场景
-        configs['心理树洞'] = SceneConfig(
-            scene_name='心理树洞',
-            display_name='心理树洞',
-            description='提供情感支持和心理倾诉空间，优先匹配有相似经历或情绪状态的用户',
-            match_weights={
-                'personality': 0.30,
-                'interest': 0.10,
-                'scene': 0.20,
-                'emotion': 0.40
-            },
-            topic_templates=[
-                '最近有什么让你感到困扰的事情吗？',
-                '你通常如何缓解压力？',
-                '有什么让你感到开心的事情吗？',
-                '你觉得什么样的支持对你最有帮助？',
-                '你想聊聊你的感受吗？'
-            ],
-            intervention_threshold=20,  # 心理树洞场景给更多时间
-            max_interventions_per_hour=2  # 减少介入频率
-        )
-        
-        # 兴趣社群场景
-        configs['兴趣社群'] = SceneConfig(
-            scene_name='兴趣社群',
-            display_name='兴趣社群',
-            description='基于共同兴趣爱好的社交匹配，优先匹配相同兴趣爱好的用户',
-            match_weights={
-                'personality': 0.20,
-                'interest': 0.50,
-                'scene': 0.20,
-                'emotion': 0.10
-            },
-            topic_templates=[
-                '你最喜欢的兴趣爱好是什么？',
-                '你平时喜欢做什么？',
-                '有什么想一起做的活动吗？',
-                '你是怎么开始这个爱好的？',
-                '你有什么推荐的资源或经验吗？'
-            ],
-            intervention_threshold=15,
-            max_interventions_per_hour=3
-        )
-        
-        return configs
-    
     def get_scene_config(self, scene: str) -> SceneConfig:
         """
         获取场景配置
@@ -136,10 +49,7 @@ class SceneManagementService:
         Raises:
             ValidationError: 场景名称无效
         """
-        if scene not in self._scene_configs:
-            raise ValidationError(f"Invalid scene: {scene}")
-        
-        return self._scene_configs[scene]
+        return self.scene_registry.get_scene_config(scene)
     
     def get_match_weights(self, scene: str) -> Dict[str, float]:
         """
@@ -169,7 +79,9 @@ class SceneManagementService:
         """
         scenes = []
         
-        for scene_name, config in self._scene_configs.items():
+        snapshot = self.scene_registry.snapshot
+        for scene_name in snapshot.scenes:
+            config = snapshot.get(scene_name)
             scene_info = {
                 'scene_name': config.scene_name,
                 'display_name': config.display_name,
@@ -204,7 +116,7 @@ class SceneManagementService:
             NotFoundError: 用户不存在
         """
         # 验证场景
-        if scene not in self._scene_configs:
+        if not self.scene_registry.has_scene(scene):
             raise ValidationError(f"Invalid scene: {scene}")
         
         # 验证优先级
@@ -285,7 +197,7 @@ class SceneManagementService:
             NotFoundError: 用户不存在
         """
         # 验证场景
-        if scene not in self._scene_configs:
+        if not self.scene_registry.has_scene(scene):
             raise ValidationError(f"Invalid scene: {scene}")
         
         # 验证优先级
@@ -321,10 +233,21 @@ class SceneManagementService:
         Args:
             user_id: 用户ID
         """
-        # 这里可以触发异步任务来重新计算匹配度
-        # 实际实现中应该使用消息队列
         self.logger.info(f"Triggering match recalculation for user: {user_id}")
-        # TODO: 实现异步匹配度重新计算
+        profile = self._user_profile_service.get_profile(user_id)
+        
+        # 交给调度器合并去抖后异步重算
+        if self._recalculation_scheduler:
+            self._recalculation_scheduler.mark_user_dirty(user_id, profile.current_scenes)
+            return
+        
+        for scene in profile.current_scenes:
+            try:
+                self._matching_service.find_matches(user_id=user_id, scene=scene, limit=10)
+            except Exception as e:
+                self.logger.error(
+                    f"Failed to recalculate matches for user {user_id} in scene {scene}: {e}"
+                )
     
     def get_scene_topic_templates(self, scene: str) -> List[str]:
         """
@@ -371,7 +294,7 @@ class SceneManagementService:
         Returns:
             bool: 场景是否有效
         """
-        return scene in self._scene_configs
+        return self.scene_registry.has_scene(scene)
     
     def get_all_scene_names(self) -> List[str]:
         """
@@ -380,4 +303,4 @@ class SceneManagementService:
         Returns:
             List[str]: 场景名称列表
         """
-        return list(self._scene_configs.keys())
+        return self.scene_registry.snapshot.scenes
@@ -0,0 +1,556 @@
+"""场景配置注册表（版本化快照，跨进程热更新）"""
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from types import MappingProxyType
+from typing import Callable, Dict, List, Mapping, Optional
+from src.models.matching import SceneConfig
+from src.utils.exceptions import ValidationError
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def default_scene_configs() -> Dict[str, SceneConfig]:
+    """
+    内置的场景配置
+
+    Returns:
+        Dict[str, SceneConfig]: 场景名称 -> 场景配置
+    """
+    configs = {}
+
+    # 考研自习室场景
+    configs['考研自习室'] = SceneConfig(
+        scene_name='考研自习室',
+        display_name='考研自习室',
+        description='为准备考研的同学提供学习伙伴匹配，优先匹配相同目标院校和专业的用户',
+        match_weights={
+            'personality': 0.25,
+            'interest': 0.35,
+            'scene': 0.30,
+            'emotion': 0.10
+        },
+        topic_templates=[
+            '你的目标院校是哪里？',
+            '你每天的学习时间安排是怎样的？',
+            '有什么好的学习方法可以分享吗？',
+            '你觉得考研最大的挑战是什么？',
+            '你是如何保持学习动力的？'
+        ],
+        intervention_threshold=15,
+        max_interventions_per_hour=3
+    )
+
+    # 职业咨询室场景
+    configs['职业咨询室'] = SceneConfig(
+        scene_name='职业咨询室',
+        display_name='职业咨询室',
+        description='为职业规划和求职提供交流平台，优先匹配相同职业兴趣或有相关经验的用户',
+        match_weights={
+            'personality': 0.20,
+            'interest': 0.40,
+            'scene': 0.30,
+            'emotion': 0.10
+        },
+        topic_templates=[
+            '你对哪个行业感兴趣？',
+            '你有什么职业规划？',
+            '你参加过哪些实习或项目？',
+            '你理想的工作是什么样的？',
+            '你在求职过程中遇到了什么困难？'
+        ],
+        intervention_threshold=15,
+        max_interventions_per_hour=3
+    )
+
+    # 心理树洞场景
+    configs['心理树洞'] = SceneConfig(
+        scene_name='心理树洞',
+        display_name='心理树洞',
+        description='提供情感支持和心理倾诉空间，优先匹配有相似经历或情绪状态的用户',
+        match_weights={
+            'personality': 0.30,
+            'interest': 0.10,
+            'scene': 0.20,
+            'emotion': 0.40
+        },
+        topic_templates=[
+            '最近有什么让你感到困扰的事情吗？',
+            '你通常如何缓解压力？',
+            '有什么让你感到开心的事情吗？',
+            '你觉得什么样的支持对你最有帮助？',
+            '你想聊聊你的感受吗？'
+        ],
+        intervention_threshold=20,  # 心理树洞场景给更多时间
+        max_interventions_per_hour=2  # 减少介入频率
+    )
+
+    # 兴趣社群场景
+    configs['兴趣社群'] = SceneConfig(
+        scene_name='兴趣社群',
+        display_name='兴趣社群',
+        description='基于共同兴趣爱好的社交匹配，优先匹配相同兴趣爱好的用户',
+        match_weights={
+            'personality': 0.20,
+            'interest': 0.50,
+            'scene': 0.20,
+            'emotion': 0.10
+        },
+        topic_templates=[
+            '你最喜欢的兴趣爱好是什么？',
+            '你平时喜欢做什么？',
+            '有什么想一起做的活动吗？',
+            '你是怎么开始这个爱好的？',
+            '你有什么推荐的资源或经验吗？'
+        ],
+        intervention_threshold=15,
+        max_interventions_per_hour=3
+    )
+
+    return configs
+
+
+class SceneSnapshot:
+    """
+    某一版本的全部场景配置
+
+    快照发布后不再修改，读取方可以不加锁地持有引用。快照持有配置的私有副本，
+    get() 返回副本，匹配热路径通过 get_match_weights() 读取只读的权重映射，
+    调用方修改拿到的对象不会影响快照。
+    """
+
+    __slots__ = ('version', '_configs', '_weights', 'created_at')
+
+    def __init__(self, version: int, configs: Dict[str, SceneConfig], created_at: Optional[datetime] = None):
+        self.version = version
+        self._configs: Dict[str, SceneConfig] = {
+            name: config.model_copy(deep=True) for name, config in configs.items()
+        }
+        self._weights: Dict[str, Mapping[str, float]] = {
+            name: MappingProxyType(dict(config.match_weights)) for name, config in self._configs.items()
+        }
+        self.created_at = created_at or datetime.now()
+
+    @property
+    def scenes(self) -> List[str]:
+        """快照中的场景名称"""
+        return list(self._configs)
+
+    def get(self, scene: str) -> Optional[SceneConfig]:
+        """获取场景配置的副本，不存在时返回None"""
+        config = self._configs.get(scene)
+        return config.model_copy(deep=True) if config is not None else None
+
+    def get_match_weights(self, scene: str) -> Optional[Mapping[str, float]]:
+        """获取场景的只读匹配权重，不存在时返回None"""
+        return self._weights.get(scene)
+
+    def copy_configs(self) -> Dict[str, SceneConfig]:
+        """复制全部场景配置（用于生成下一版本快照）"""
+        return {name: config.model_copy(deep=True) for name, config in self._configs.items()}
+
+    def to_payload(self) -> Dict:
+        """转换为可持久化的字典"""
+        return {
+            'version': self.version,
+            'created_at': self.created_at.isoformat(),
+            'scenes': {name: config.dict() for name, config in self._configs.items()}
+        }
+
+    def __contains__(self, scene: object) -> bool:
+        return scene in self._configs
+
+    @classmethod
+    def from_payload(cls, payload: Dict) -> 'SceneSnapshot':
+        """从持久化的字典恢复快照"""
+        return cls(
+            payload['version'],
+            {name: SceneConfig(**data) for name, data in payload['scenes'].items()},
+            datetime.fromisoformat(payload['created_at'])
+        )
+
+
+class FileSceneStore:
+    """
+    基于共享文件的场景配置存储
+
+    快照写入临时文件后原子替换；读取方通过文件修改时间判断是否有新版本。
+    发布时对旁路锁文件加 fcntl 排他锁（仅POSIX平台），多个进程的"读取最新快照 -> 修改 -> 版本加一 -> 替换"
+    互斥执行，不会分配重复的版本号或覆盖其他进程的修改。
+    """
+
+    def __init__(self, path: str):
+        """
+        初始化存储
+
+        Args:
+            path: 快照文件路径（各工作进程需指向同一文件）
+        """
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(f"{self.path.name}.lock")
+        self._lock = threading.Lock()
+        self._cached_mtime: Optional[int] = None
+        self._cached_version = 0
+
+    def load(self) -> Optional[Dict]:
+        """
+        读取最新快照
+
+        Returns:
+            Optional[Dict]: 快照字典，文件不存在时为None
+        """
+        try:
+            return json.loads(self.path.read_text(encoding='utf-8'))
+        except FileNotFoundError:
+            return None
+
+    def current_version(self) -> int:
+        """
+        获取存储中的快照版本号
+
+        Returns:
+            int: 版本号，没有快照时为0
+        """
+        try:
+            mtime = self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return 0
+        if mtime != self._cached_mtime:
+            payload = self.load()
+            self._cached_version = payload['version'] if payload else 0
+            self._cached_mtime = mtime
+        return self._cached_version
+
+    def publish(self, payload: Dict) -> int:
+        """
+        发布快照，版本号在存储中的最新版本上递增
+
+        Args:
+            payload: 快照字典（version 字段会被覆盖）
+
+        Returns:
+            int: 分配的版本号
+        """
+        return self.update(lambda latest: payload)['version']
+
+    def update(self, build: Callable[[Optional[Dict]], Optional[Dict]]) -> Optional[Dict]:
+        """
+        在存储锁内读取最新快照、生成并发布新快照
+
+        Args:
+            build: 根据最新快照字典（没有时为None）生成新快照字典的函数，返回None表示不发布
+
+        Returns:
+            Optional[Dict]: 发布后的快照字典（不发布时为读取到的最新快照）
+        """
+        # 文件锁只在发布时需要（仅POSIX平台提供fcntl），不影响其他后端的导入
+        import fcntl
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # 线程锁保证本进程内互斥，文件锁保证跨进程互斥
+        with self._lock, open(self.lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                latest = self.load()
+                payload = build(latest)
+                if payload is None:
+                    return latest
+                payload = {**payload, 'version': (latest['version'] if latest else 0) + 1}
+                tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+                tmp_path.write_text(json.dumps(payload, ensure_ascii=False), encoding='utf-8')
+                os.replace(tmp_path, self.path)
+                return payload
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+class RedisSceneStore:
+    """
+    基于Redis的场景配置存储
+
+    版本号和快照JSON存放在两个键中，发布时 WATCH 两个键，读取最新快照、修改后在 MULTI 事务中同时写入，
+    并发发布时后提交的一方基于新快照重试，版本号与快照始终一一对应。
+    """
+
+    def __init__(self, get_client: Callable, key: str = "scene_registry"):
+        """
+        初始化存储
+
+        Args:
+            get_client: 返回Redis客户端的函数（首次使用时才连接）
+            key: 键名前缀
+        """
+        self._get_client = get_client
+        self.snapshot_key = f"{key}:snapshot"
+        self.version_key = f"{key}:version"
+
+    def load(self) -> Optional[Dict]:
+        """
+        读取最新快照
+
+        Returns:
+            Optional[Dict]: 快照字典，不存在时为None
+        """
+        data = self._get_client().get(self.snapshot_key)
+        return json.loads(data) if data else None
+
+    def current_version(self) -> int:
+        """
+        获取存储中的快照版本号
+
+        Returns:
+            int: 版本号，没有快照时为0
+        """
+        return int(self._get_client().get(self.version_key) or 0)
+
+    def publish(self, payload: Dict) -> int:
+        """
+        发布快照
+
+        Args:
+            payload: 快照字典（version 字段会被覆盖）
+
+        Returns:
+            int: 分配的版本号
+        """
+        return self.update(lambda latest: payload)['version']
+
+    def update(self, build: Callable[[Optional[Dict]], Optional[Dict]]) -> Optional[Dict]:
+        """
+        在 WATCH/MULTI 事务中读取最新快照、生成并发布新快照
+
+        Args:
+            build: 根据最新快照字典（没有时为None）生成新快照字典的函数，返回None表示不发布；
+                事务冲突时会以新的最新快照再次调用
+
+        Returns:
+            Optional[Dict]: 发布后的快照字典（不发布时为读取到的最新快照）
+        """
+        from redis.exceptions import WatchError
+
+        with self._get_client().pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(self.version_key, self.snapshot_key)
+                    data = pipe.get(self.snapshot_key)
+                    latest = json.loads(data) if data else None
+                    payload = build(latest)
+                    if payload is None:
+                        pipe.unwatch()
+                        return latest
+                    payload = {**payload, 'version': int(pipe.get(self.version_key) or 0) + 1}
+                    pipe.multi()
+                    pipe.set(self.version_key, payload['version'])
+                    pipe.set(self.snapshot_key, json.dumps(payload, ensure_ascii=False))
+                    pipe.execute()
+                    return payload
+                except WatchError:
+                    # 其他进程在此期间发布了新版本，基于最新快照重试
+                    continue
+
+
+class SceneRegistry:
+    """
+    场景配置注册表
+
+    匹配服务、场景管理服务等共享同一个注册表。当前配置是一个不可变快照，
+    读取方直接取 snapshot 引用，匹配热路径上不加锁；更新时复制出新快照、
+    版本号加一后整体替换引用。配置了共享存储（文件或Redis）时，更新会发布到存储，
+    其他工作进程的后台线程按 poll_interval 轮询版本号并加载新快照。
+    """
+
+    def __init__(
+        self,
+        configs: Optional[Dict[str, SceneConfig]] = None,
+        store=None,
+        poll_interval: float = 0.5
+    ):
+        """
+        初始化注册表
+
+        Args:
+            configs: 初始场景配置（默认使用内置配置）
+            store: 共享存储（FileSceneStore / RedisSceneStore，None表示只在本进程内生效）
+            poll_interval: 轮询共享存储的间隔（秒）
+        """
+        self._store = store
+        self.poll_interval = poll_interval
+        self.logger = logger
+
+        self._snapshot = SceneSnapshot(0, configs if configs is not None else default_scene_configs())
+        self._write_lock = threading.Lock()
+        self._listeners: List[Callable[[SceneSnapshot], None]] = []
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def snapshot(self) -> SceneSnapshot:
+        """当前快照（不可变，读取不加锁）"""
+        return self._snapshot
+
+    @property
+    def version(self) -> int:
+        """当前快照版本号"""
+        return self._snapshot.version
+
+    def get_scene_config(self, scene: str) -> SceneConfig:
+        """
+        获取场景配置（副本，修改不影响注册表）
+
+        Args:
+            scene: 场景名称
+
+        Returns:
+            SceneConfig: 场景配置
+
+        Raises:
+            ValidationError: 场景名称无效
+        """
+        config = self._snapshot.get(scene)
+        if config is None:
+            raise ValidationError(f"Invalid scene: {scene}")
+        return config
+
+    def has_scene(self, scene: str) -> bool:
+        """
+        判断场景是否存在
+
+        Args:
+            scene: 场景名称
+
+        Returns:
+            bool: 是否存在
+        """
+        return scene in self._snapshot
+
+    def add_listener(self, listener: Callable[[SceneSnapshot], None]) -> None:
+        """
+        注册快照变更监听器
+
+        Args:
+            listener: 回调函数，参数为新快照
+        """
+        self._listeners.append(listener)
+
+    def update_match_weights(self, scene: str, weights: Dict[str, float]) -> SceneSnapshot:
+        """
+        更新场景的匹配权重并发布新快照
+
+        Args:
+            scene: 场景名称
+            weights: 新的权重配置
+
+        Returns:
+            SceneSnapshot: 新快照
+
+        Raises:
+            ValidationError: 场景名称无效或权重总和不为1
+        """
+        self.get_scene_config(scene)
+        if abs(sum(weights.values()) - 1.0) > 0.01:
+            raise ValidationError("Weights must sum to 1.0")
+
+        def modify(configs: Dict[str, SceneConfig]) -> None:
+            if scene not in configs:
+                raise ValidationError(f"Invalid scene: {scene}")
+            configs[scene].match_weights = dict(weights)
+
+        with self._write_lock:
+            snapshot = self._publish_locked(modify)
+
+        self.logger.info(f"Updated match weights for scene {scene} (version {snapshot.version})")
+        return snapshot
+
+    def refresh(self) -> bool:
+        """
+        从共享存储加载更新的快照
+
+        Returns:
+            bool: 是否加载了新快照
+        """
+        if self._store is None:
+            return False
+        with self._write_lock:
+            return self._refresh_locked()
+
+    def start(self) -> None:
+        """启动共享存储轮询线程（未配置共享存储时不启动）"""
+        if self._store is None or self._watcher is not None:
+            return
+        with self._write_lock:
+            if not self._refresh_locked() and self._store.current_version() == 0:
+                # 共享存储为空时由首个进程写入初始配置（存储锁内再次确认为空，不覆盖其他进程的快照）
+                initial = self._snapshot.to_payload()
+                payload = self._store.update(lambda latest: None if latest else initial)
+                if payload and payload['version'] > self._snapshot.version:
+                    self._swap(SceneSnapshot.from_payload(payload))
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._run_watcher, name="scene-registry-watcher", daemon=True)
+        self._watcher.start()
+        self.logger.info(f"Scene registry watching shared store every {self.poll_interval}s")
+
+    def close(self) -> None:
+        """停止轮询线程"""
+        if self._watcher is None:
+            return
+        self._stop.set()
+        self._watcher.join(timeout=5.0)
+        self._watcher = None
+
+    # ==================== 内部方法 ====================
+
+    def _publish_locked(self, modify: Callable[[Dict[str, SceneConfig]], None]) -> SceneSnapshot:
+        """
+        在持有写锁的情况下基于最新配置生成并发布新快照
+
+        配置了共享存储时，读取最新快照、复制、修改和发布都在存储锁（文件锁或Redis事务）内完成，
+        不同进程并发修改不同场景时不会丢失任何一方的更新。
+
+        Args:
+            modify: 就地修改配置副本的函数
+        """
+        if self._store is None:
+            configs = self._snapshot.copy_configs()
+            modify(configs)
+            snapshot = SceneSnapshot(self._snapshot.version + 1, configs)
+        else:
+            def build(latest: Optional[Dict]) -> Dict:
+                base = SceneSnapshot.from_payload(latest) if latest else self._snapshot
+                configs = base.copy_configs()
+                modify(configs)
+                return SceneSnapshot(0, configs).to_payload()
+
+            snapshot = SceneSnapshot.from_payload(self._store.update(build))
+        self._swap(snapshot)
+        return snapshot
+
+    def _refresh_locked(self) -> bool:
+        """在持有写锁的情况下加载共享存储中更新的快照"""
+        if self._store is None or self._store.current_version() <= self._snapshot.version:
+            return False
+        payload = self._store.load()
+        if not payload or payload['version'] <= self._snapshot.version:
+            return False
+        self._swap(SceneSnapshot.from_payload(payload))
+        self.logger.info(f"Loaded scene registry version {payload['version']} from shared store")
+        return True
+
+    def _swap(self, snapshot: SceneSnapshot) -> None:
+        """替换当前快照引用并通知监听器"""
+        self._snapshot = snapshot
+        for listener in self._listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                self.logger.warning(f"Scene registry listener failed: {e}")
+
+    def _run_watcher(self) -> None:
+        """轮询线程主循环"""
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                self.logger.warning(f"Failed to refresh scene registry: {e}")
@@ -0,0 +1,190 @@
+"""对话沉默检测调度器（服务端定时，主动推送话题建议）"""
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+SuggestionListener = Callable[[str, Dict], None]
+
+
+class SilenceScheduler:
+    """
+    对话沉默检测调度器
+
+    每条新消息通过 DialogueAssistantService.update_last_message_time 以O(1)重置对话的沉默定时器（时间轮）。
+    后台线程每个刻度推进一次时间轮，只处理沉默刚超过阈值的对话：
+    检测沉默类型、检查介入偏好和频率，生成话题建议并推送给监听器，客户端无需轮询。
+    同一线程每隔 evict_interval_seconds 淘汰一次空闲对话的状态。
+    """
+
+    def __init__(
+        self,
+        dialogue_assistant_service,
+        conversation_service,
+        tick_seconds: float = 1.0,
+        recent_message_limit: int = 20,
+        evict_interval_seconds: float = 60.0
+    ):
+        """
+        初始化调度器
+
+        Args:
+            dialogue_assistant_service: 对话助手服务实例（持有沉默定时器）
+            conversation_service: 对话服务实例（对话和消息来源）
+            tick_seconds: 推进时间轮的间隔（秒）
+            recent_message_limit: 沉默类型分析使用的最近消息数
+            evict_interval_seconds: 淘汰空闲对话状态的间隔（秒）
+        """
+        self._assistant = dialogue_assistant_service
+        self._conversation_service = conversation_service
+        self.tick_seconds = tick_seconds
+        self.recent_message_limit = recent_message_limit
+        self.evict_interval_seconds = evict_interval_seconds
+        self.logger = logger
+
+        self._listeners: List[SuggestionListener] = []
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._stats_lock = threading.Lock()
+        self._stats = {'fired': 0, 'suggested': 0, 'skipped': 0, 'failed': 0, 'evicted': 0}
+
+    def add_suggestion_listener(self, listener: SuggestionListener) -> None:
+        """
+        注册话题建议监听器
+
+        Args:
+            listener: 回调函数，参数为 (对话ID, 建议内容字典)
+        """
+        self._listeners.append(listener)
+
+    def remove_suggestion_listener(self, listener: SuggestionListener) -> None:
+        """
+        移除话题建议监听器
+
+        Args:
+            listener: 已注册的回调函数
+        """
+        try:
+            self._listeners.remove(listener)
+        except ValueError:
+            pass
+
+    def run_due(self, now: Optional[datetime] = None) -> int:
+        """
+        在当前线程中处理沉默已到期的对话（未启动后台线程时使用）
+
+        Args:
+            now: 当前时间（默认当前时间）
+
+        Returns:
+            int: 推送的话题建议数
+        """
+        suggested = 0
+        for conversation_id in self._assistant.pop_silent_conversations(now):
+            try:
+                if self._handle_silence(conversation_id, now):
+                    suggested += 1
+            except Exception as e:
+                self._count('failed')
+                self.logger.error(f"Failed to handle silence in conversation {conversation_id}: {e}")
+        return suggested
+
+    def start(self) -> None:
+        """启动后台推进线程"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="silence-scheduler", daemon=True)
+        self._thread.start()
+        self.logger.info(f"Silence scheduler started with {self.tick_seconds}s ticks")
+
+    def close(self) -> None:
+        """停止后台推进线程"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=5.0)
+        self._thread = None
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        获取调度统计
+
+        Returns:
+            Dict[str, int]: 计时中的对话数、到期/推送/跳过/失败次数和淘汰的空闲对话数
+        """
+        with self._stats_lock:
+            return {'pending_timers': len(self._assistant.silence_timers), **self._stats}
+
+    # ==================== 内部方法 ====================
+
+    def _handle_silence(self, conversation_id: str, now: Optional[datetime] = None) -> bool:
+        """处理一个沉默到期的对话，生成建议时返回True"""
+        self._count('fired')
+        conversation = self._conversation_service.conversations.get(conversation_id)
+        if conversation is None or conversation.status != "active":
+            self._count('skipped')
+            return False
+
+        messages = self._conversation_service.messages.get(conversation_id, [])[-self.recent_message_limit:]
+        is_silent, silence_type = self._assistant.detect_silence(conversation_id, messages, now)
+        participants = (conversation.user_a_id, conversation.user_b_id)
+        if not is_silent or not all(
+            self._assistant.should_intervene(conversation_id, user_id) for user_id in participants
+        ):
+            self._count('skipped')
+            return False
+
+        suggestion = self._assistant.generate_topic_suggestion(
+            conversation_id=conversation_id,
+            scene=conversation.scene,
+            recent_messages=messages,
+            silence_type=silence_type
+        )
+        intervention = self._assistant.record_intervention(
+            conversation_id=conversation_id,
+            trigger_type="silence",
+            intervention_type="topic_suggestion",
+            content=suggestion
+        )
+        payload = {
+            "conversation_id": conversation_id,
+            "intervention_id": intervention.intervention_id,
+            "suggestion": suggestion,
+            "silence_type": silence_type.type if silence_type else None,
+            "silence_duration": self._assistant.get_silence_duration(conversation_id)
+        }
+        self._count('suggested')
+        for listener in list(self._listeners):
+            try:
+                listener(conversation_id, payload)
+            except Exception as e:
+                self.logger.warning(f"Suggestion listener failed for conversation {conversation_id}: {e}")
+        return True
+
+    def _count(self, name: str) -> None:
+        """累加统计计数"""
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def _evict_idle(self) -> None:
+        """淘汰空闲对话的状态"""
+        try:
+            evicted = self._assistant.evict_idle()
+        except Exception as e:
+            self.logger.error(f"Failed to evict idle dialogue state: {e}")
+            return
+        with self._stats_lock:
+            self._stats['evicted'] += evicted['conversations']
+
+    def _run(self) -> None:
+        """后台线程主循环"""
+        next_evict = time.monotonic() + self.evict_interval_seconds
+        while not self._stop.wait(self.tick_seconds):
+            self.run_due()
+            if time.monotonic() >= next_evict:
+                self._evict_idle()
+                next_evict = time.monotonic() + self.evict_interval_seconds
@@ -1,8 +1,9 @@
 """用户画像服务"""
 import uuid
 import hashlib
+import threading
 from datetime import datetime
-from typing import Optional, List, Dict
+from typing import Any, Callable, Optional, List, Dict
 from src.models.user import (
     User, UserProfile, BigFiveScores,
     UserRegistrationRequest, MBTITestRequest, BigFiveTestRequest,
@@ -10,6 +11,7 @@ from src.models.user import (
 )
 from src.utils.exceptions import ValidationError, NotFoundError
 from src.utils.logger import get_logger
+from src.utils.profile_change_log import ProfileChangeLog, normalize_value
 
 logger = get_logger(__name__)
 
@@ -17,19 +19,110 @@ logger = get_logger(__name__)
 class UserProfileService:
     """用户画像服务类"""
     
-    def __init__(self, personality_service=None):
+    def __init__(
+        self,
+        personality_service=None,
+        change_log: Optional[ProfileChangeLog] = None,
+        personality_scheduler=None
+    ):
         """
         初始化服务
         
         Args:
             personality_service: 人格识别服务实例（可选，用于依赖注入）
+            change_log: 画像变更日志（可选，默认新建）
+            personality_scheduler: 人格推理微批调度器（可选，提供时人格分析请求经调度器合并为批次推理）
         """
         # 临时存储，实际应使用数据库
         self._users: Dict[str, User] = {}
         self._profiles: Dict[str, UserProfile] = {}
+        self._profile_versions: Dict[str, int] = {}
+        self._profile_listeners: List[Callable[[str, int], None]] = []
+        self._change_log = change_log or ProfileChangeLog()
+        # 保护字段变化计算、版本递增与变更日志追加，保证版本号唯一且日志按版本顺序写入
+        self._version_lock = threading.RLock()
         self._personality_service = personality_service
+        self._personality_scheduler = personality_scheduler
         self.logger = logger
     
+    def add_profile_listener(self, listener: Callable[[str, int], None]) -> None:
+        """
+        注册画像变更监听器
+        
+        Args:
+            listener: 回调函数，参数为 (user_id, 新版本号)
+        """
+        self._profile_listeners.append(listener)
+    
+    def get_profile_version(self, user_id: str) -> int:
+        """
+        获取用户画像版本号（每次画像变更递增）
+        
+        Args:
+            user_id: 用户ID
+            
+        Returns:
+            int: 版本号，画像不存在时为0
+        """
+        return self._profile_versions.get(user_id, 0)
+    
+    def get_profile_changes(self, user_id: str, since_version: int = 0) -> Dict[str, Any]:
+        """
+        获取某版本之后的画像字段变化（直接读取变更日志，不重建快照）
+        
+        Args:
+            user_id: 用户ID
+            since_version: 起始版本（不含）
+            
+        Returns:
+            Dict: 当前版本号、已压缩字段和逐版本的字段变化
+        """
+        if user_id not in self._profiles:
+            raise NotFoundError(f"Profile not found for user: {user_id}")
+        if since_version < 0:
+            raise ValidationError("since_version must be non-negative")
+        
+        changes = self._change_log.changes_since(user_id, since_version)
+        changes['user_id'] = user_id
+        changes['current_version'] = self.get_profile_version(user_id)
+        return changes
+    
+    def get_net_profile_changes(self, user_id: str, since_version: int) -> Dict[str, tuple]:
+        """
+        获取某版本之后每个字段的净变化
+        
+        Args:
+            user_id: 用户ID
+            since_version: 起始版本（不含）
+            
+        Returns:
+            Dict[str, tuple]: 字段 -> (起始版本时的值, 当前值)，未变化的字段不出现
+        """
+        return self._change_log.net_changes_since(user_id, since_version)
+    
+    def _bump_profile_version(self, user_id: str, changes: Optional[Dict[str, tuple]] = None) -> int:
+        """递增画像版本号，记录字段变化并通知监听器"""
+        version = self._next_profile_version(user_id, changes)
+        self._notify_profile_listeners(user_id, version)
+        return version
+    
+    def _next_profile_version(self, user_id: str, changes: Optional[Dict[str, tuple]] = None) -> int:
+        """在锁内递增画像版本号并记录字段变化"""
+        with self._version_lock:
+            version = self._profile_versions.get(user_id, 0) + 1
+            self._profile_versions[user_id] = version
+            if changes:
+                self._change_log.record(user_id, version, changes)
+        return version
+    
+    def _notify_profile_listeners(self, user_id: str, version: int) -> None:
+        """通知画像变更监听器（在锁外调用，监听器可能回读画像）"""
+        for listener in self._profile_listeners:
+            try:
+                listener(user_id, version)
+            except Exception as e:
+                self.logger.warning(f"Profile listener failed for user {user_id}: {e}")
+    
     def create_profile(self, user_id: str, basic_info: dict) -> UserProfile:
         """
         创建用户画像
@@ -63,10 +156,21 @@ class UserProfileService:
             raise NotFoundError(f"Profile not found for user: {user_id}")
         
         profile = self._profiles[user_id]
-        for key, value in updates.items():
-            if hasattr(profile, key):
-                setattr(profile, key, value)
-        profile.updated_at = datetime.now()
+        with self._version_lock:
+            changes = {}
+            for key, value in updates.items():
+                if hasattr(profile, key):
+                    old_value = normalize_value(getattr(profile, key))
+                    new_value = normalize_value(value)
+                    if old_value != new_value:
+                        changes[key] = (old_value, new_value)
+                    setattr(profile, key, value)
+            if not changes:
+                # 没有字段真正变化：不递增版本，也不通知监听器
+                return profile
+            profile.updated_at = datetime.now()
+            version = self._next_profile_version(user_id, changes)
+        self._notify_profile_listeners(user_id, version)
         
         return profile
     
@@ -276,6 +380,7 @@ class UserProfileService:
         profile_vector = self._generate_profile_vector(profile)
         profile.profile_vector = profile_vector
         profile.updated_at = datetime.now()
+        self._bump_profile_version(user_id)
         
         return profile
     
@@ -403,7 +508,7 @@ class UserProfileService:
         if user_id not in self._users:
             raise NotFoundError(f"User not found: {user_id}")
         
-        if self._personality_service is None:
+        if self._personality_service is None and self._personality_scheduler is None:
             self.logger.warning("Personality service not initialized, using default scores")
             # 如果没有人格识别服务，返回默认得分
             return BigFiveScores(
@@ -414,8 +519,11 @@ class UserProfileService:
                 conscientiousness=0.5
             )
         
-        # 使用人格识别服务分析文本
-        scores = self._personality_service.analyze_personality(text_data)
+        # 使用人格识别服务分析文本（配置了调度器时与并发请求合并为一个批次）
+        if self._personality_scheduler is not None:
+            scores = self._personality_scheduler.analyze(text_data)
+        else:
+            scores = self._personality_service.analyze_personality(text_data)
         
         # 更新用户画像
         self.update_profile(user_id, {'big_five': scores})
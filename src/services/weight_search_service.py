@@ -0,0 +1,258 @@
+"""匹配权重离线搜索服务"""
+from datetime import datetime, timedelta
+from itertools import combinations
+from typing import Dict, List, Optional, Tuple
+from src.models.optimization import WeightAdjustment
+from src.utils.exceptions import NotFoundError, ValidationError
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+class WeightSearchService:
+    """
+    匹配权重离线搜索服务类
+
+    回放已记录匹配的四个维度得分（人格、兴趣、场景、情感同步），
+    与用户反馈的满意度关联后，对成千上万组候选权重做向量化评估：
+    按候选权重重新计算总分并排序，取排名靠前部分匹配的平均满意度作为预测满意度，
+    返回预测满意度最高的权重，并可直接交给 adjust_weights 生效。
+    """
+
+    # 权重键与Match上维度得分字段的对应关系（顺序即矩阵列顺序）
+    WEIGHT_FIELDS: Tuple[Tuple[str, str], ...] = (
+        ('personality', 'personality_score'),
+        ('interest', 'interest_score'),
+        ('scene', 'scene_score'),
+        ('emotion', 'emotion_sync_score'),
+    )
+
+    SEARCH_METHODS = ('random', 'grid')
+
+    # 每次向量化评估的候选数，限制 样本数×候选数 矩阵的内存占用
+    CANDIDATE_CHUNK_SIZE = 512
+
+    def __init__(self, matching_service, optimization_service):
+        """
+        初始化服务
+
+        Args:
+            matching_service: 匹配服务实例（提供匹配记录和当前权重）
+            optimization_service: 算法优化服务实例（提供反馈数据并应用权重）
+        """
+        self._matching_service = matching_service
+        self._optimization_service = optimization_service
+        self.logger = logger
+
+    def build_dataset(self, scene: str, days: Optional[int] = None):
+        """
+        构建回放数据集
+
+        Args:
+            scene: 场景
+            days: 只使用最近N天的反馈（None表示全部）
+
+        Returns:
+            (维度得分矩阵 [样本数, 4], 满意度向量 [样本数])
+        """
+        start_date = datetime.now() - timedelta(days=days) if days is not None else None
+        feedbacks = self._optimization_service.get_feedbacks_by_scene(scene, start_date=start_date)
+
+        rows: List[List[float]] = []
+        outcomes: List[float] = []
+        for feedback in feedbacks:
+            try:
+                match = self._matching_service.get_match(feedback.match_id)
+            except NotFoundError:
+                continue
+            rows.append([getattr(match, field) for _, field in self.WEIGHT_FIELDS])
+            outcomes.append(feedback.satisfaction_score)
+
+        return (
+            np.asarray(rows, dtype=np.float64).reshape(-1, len(self.WEIGHT_FIELDS)),
+            np.asarray(outcomes, dtype=np.float64)
+        )
+
+    def search_weights(
+        self,
+        scene: str,
+        method: str = 'random',
+        num_candidates: int = 5000,
+        grid_step: float = 0.05,
+        min_weight: float = 0.05,
+        top_fraction: float = 0.3,
+        min_sample_size: int = 30,
+        days: Optional[int] = None,
+        seed: Optional[int] = None
+    ) -> Dict[str, any]:
+        """
+        搜索预测满意度最高的场景权重
+
+        Args:
+            scene: 场景
+            method: 搜索方式（random: 单纯形上均匀随机采样；grid: 按步长枚举网格）
+            num_candidates: 随机搜索的候选数
+            grid_step: 网格搜索的步长
+            min_weight: 每个维度的最小权重
+            top_fraction: 计算预测满意度时取排名靠前的样本比例
+            min_sample_size: 最少回放样本数
+            days: 只使用最近N天的反馈（None表示全部）
+            seed: 随机种子
+
+        Returns:
+            Dict: 最优权重、预测满意度、当前权重的预测满意度及搜索统计
+
+        Raises:
+            ValidationError: 参数无效、numpy不可用或样本不足
+        """
+        if not NUMPY_AVAILABLE:
+            raise ValidationError("numpy is required for offline weight search")
+        if method not in self.SEARCH_METHODS:
+            raise ValidationError(f"Invalid search method: {method}")
+        if not (0.0 < top_fraction <= 1.0):
+            raise ValidationError("Top fraction must be between 0 and 1")
+
+        current_weights = self._matching_service.get_scene_config(scene).match_weights
+        scores, outcomes = self.build_dataset(scene, days)
+        if len(outcomes) < min_sample_size:
+            raise ValidationError(
+                f"Insufficient replay samples for scene {scene}: "
+                f"{len(outcomes)} < {min_sample_size}"
+            )
+
+        candidates = self._generate_candidates(method, num_candidates, grid_step, min_weight, seed)
+        current = np.array(
+            [[current_weights.get(key, 0.25) for key, _ in self.WEIGHT_FIELDS]],
+            dtype=np.float64
+        )
+        # 当前权重作为第0个候选，并列时保持不变
+        candidates = np.vstack([current, candidates])
+
+        top_k = max(1, int(round(len(outcomes) * top_fraction)))
+        predicted = self._evaluate_candidates(scores, outcomes, candidates, top_k)
+
+        best_index = int(np.argmax(predicted))
+        best_weights = {
+            key: round(float(weight), 4)
+            for (key, _), weight in zip(self.WEIGHT_FIELDS, candidates[best_index])
+        }
+
+        self.logger.info(
+            f"Weight search for {scene}: {len(candidates)} candidates on {len(outcomes)} samples, "
+            f"predicted satisfaction {predicted[0]:.3f} -> {predicted[best_index]:.3f}"
+        )
+
+        return {
+            'scene': scene,
+            'method': method,
+            'sample_size': int(len(outcomes)),
+            'candidates_evaluated': int(len(candidates)),
+            'current_weights': dict(current_weights),
+            'current_predicted_satisfaction': float(predicted[0]),
+            'best_weights': best_weights,
+            'best_predicted_satisfaction': float(predicted[best_index]),
+            'improvement': float(predicted[best_index] - predicted[0])
+        }
+
+    def apply_best_weights(
+        self,
+        scene: str,
+        min_improvement: float = 0.05,
+        **search_kwargs
+    ) -> Optional[WeightAdjustment]:
+        """
+        搜索并应用最优权重
+
+        Args:
+            scene: 场景
+            min_improvement: 预测满意度至少提升多少才应用
+            **search_kwargs: 传给 search_weights 的参数
+
+        Returns:
+            Optional[WeightAdjustment]: 调整记录，提升不足时返回None
+        """
+        result = self.search_weights(scene, **search_kwargs)
+        if result['improvement'] < min_improvement:
+            self.logger.info(
+                f"Weight search for {scene} improvement {result['improvement']:.3f} "
+                f"below threshold {min_improvement}, keeping current weights"
+            )
+            return None
+
+        # 四舍五入后重新归一化，保证总和为1
+        total = sum(result['best_weights'].values())
+        new_weights = {key: weight / total for key, weight in result['best_weights'].items()}
+
+        return self._optimization_service.adjust_weights(
+            scene,
+            new_weights,
+            f"离线权重搜索：预测满意度 {result['current_predicted_satisfaction']:.2f} -> "
+            f"{result['best_predicted_satisfaction']:.2f}（{result['sample_size']}条样本）"
+        )
+
+    def _generate_candidates(
+        self,
+        method: str,
+        num_candidates: int,
+        grid_step: float,
+        min_weight: float,
+        seed: Optional[int]
+    ):
+        """
+        生成候选权重矩阵
+
+        Returns:
+            候选权重矩阵 [候选数, 4]，每行和为1且各维度不低于min_weight
+        """
+        dims = len(self.WEIGHT_FIELDS)
+        if min_weight * dims >= 1.0:
+            raise ValidationError("Minimum weight too large for the number of dimensions")
+
+        if method == 'grid':
+            steps = int(round(1.0 / grid_step))
+            # 隔板法枚举 steps 个单位在 dims 个维度上的所有分配
+            rows = []
+            for bars in combinations(range(steps + dims - 1), dims - 1):
+                edges = (-1,) + bars + (steps + dims - 1,)
+                rows.append([edges[i + 1] - edges[i] - 1 for i in range(dims)])
+            candidates = np.asarray(rows, dtype=np.float64) / steps
+            return candidates[(candidates >= min_weight - 1e-9).all(axis=1)]
+
+        # 在满足最小权重的单纯形上均匀采样
+        rng = np.random.default_rng(seed)
+        free = rng.dirichlet(np.ones(dims), size=num_candidates)
+        return min_weight + free * (1.0 - min_weight * dims)
+
+    def _evaluate_candidates(self, scores, outcomes, candidates, top_k: int):
+        """
+        向量化计算每组候选权重的预测满意度
+
+        Args:
+            scores: 维度得分矩阵 [样本数, 4]
+            outcomes: 满意度向量 [样本数]
+            candidates: 候选权重矩阵 [候选数, 4]
+            top_k: 取排名前top_k的样本
+
+        Returns:
+            预测满意度向量 [候选数]
+        """
+        predicted = np.empty(len(candidates), dtype=np.float64)
+        count = len(outcomes)
+
+        for start in range(0, len(candidates), self.CANDIDATE_CHUNK_SIZE):
+            block = candidates[start:start + self.CANDIDATE_CHUNK_SIZE]
+            totals = scores @ block.T  # [样本数, 块大小]
+            if top_k >= count:
+                predicted[start:start + len(block)] = outcomes.mean()
+                continue
+            # 每列取总分最高的top_k个样本
+            top_rows = np.argpartition(-totals, top_k - 1, axis=0)[:top_k]
+            predicted[start:start + len(block)] = outcomes[top_rows].mean(axis=0)
+
+        return predicted
@@ -0,0 +1,231 @@
+"""文本嵌入缓存（内容寻址，内存LRU + 可选磁盘内存映射层）"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+class EmbeddingCache:
+    """
+    按文本内容哈希缓存池化后的BERT嵌入向量
+
+    内存层为LRU；配置disk_path后启用磁盘层，向量以float16写入内存映射文件，
+    写满后按环形覆盖最早的槽位。
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        disk_path: Optional[str] = None,
+        disk_capacity: int = 100000,
+        dim: int = 768
+    ):
+        """
+        初始化缓存
+
+        Args:
+            max_entries: 内存层最大条目数
+            disk_path: 磁盘层数据文件路径（None表示不启用磁盘层）
+            disk_capacity: 磁盘层最大条目数
+            dim: 嵌入向量维度
+        """
+        self.max_entries = max_entries
+        self.dim = dim
+        self.logger = logger
+
+        self._memory: "OrderedDict[str, object]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+        # 磁盘层
+        self._disk = None
+        self._disk_index: Dict[str, int] = {}
+        self._row_keys: List[Optional[str]] = []
+        self._next_row = 0
+        self._disk_path: Optional[Path] = None
+
+        if disk_path is not None:
+            if not NUMPY_AVAILABLE:
+                self.logger.warning("numpy not available, embedding cache disk tier disabled")
+            else:
+                self._open_disk(Path(disk_path), disk_capacity)
+
+    @staticmethod
+    def make_key(text: str, namespace: str = "") -> str:
+        """
+        计算文本的内容哈希键
+
+        Args:
+            text: 文本内容
+            namespace: 命名空间（如模型名称，模型变化时缓存自动失效）
+
+        Returns:
+            str: 哈希键
+        """
+        return hashlib.sha1(f"{namespace}\0{text}".encode('utf-8')).hexdigest()
+
+    def get(self, key: str):
+        """
+        获取缓存的嵌入向量
+
+        Args:
+            key: 哈希键
+
+        Returns:
+            嵌入向量，未命中返回None
+        """
+        with self._lock:
+            vector = self._get_locked(key)
+            if vector is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+            return vector
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, object]:
+        """
+        批量获取缓存的嵌入向量
+
+        Args:
+            keys: 哈希键列表
+
+        Returns:
+            Dict[str, object]: 命中的键到向量的映射
+        """
+        found = {}
+        with self._lock:
+            for key in keys:
+                vector = self._get_locked(key)
+                if vector is None:
+                    self._misses += 1
+                else:
+                    self._hits += 1
+                    found[key] = vector
+        return found
+
+    def put(self, key: str, vector) -> None:
+        """
+        写入嵌入向量
+
+        Args:
+            key: 哈希键
+            vector: 嵌入向量
+        """
+        with self._lock:
+            self._put_memory(key, vector)
+            if self._disk is not None and key not in self._disk_index:
+                self._put_disk(key, vector)
+
+    def flush(self) -> None:
+        """将磁盘层数据和索引持久化"""
+        with self._lock:
+            if self._disk is None:
+                return
+            self._disk.flush()
+            index_data = {
+                'dim': self.dim,
+                'next_row': self._next_row,
+                'rows': self._row_keys
+            }
+            self._index_path().write_text(json.dumps(index_data), encoding='utf-8')
+
+    def clear(self) -> None:
+        """清空内存层"""
+        with self._lock:
+            self._memory.clear()
+
+    def get_stats(self) -> Dict[str, float]:
+        """
+        获取缓存统计
+
+        Returns:
+            Dict[str, float]: 命中数、未命中数、命中率及各层条目数
+        """
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': self._hits / total if total else 0.0,
+                'memory_entries': len(self._memory),
+                'disk_entries': len(self._disk_index)
+            }
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._memory)
+
+    def _get_locked(self, key: str):
+        """在持有锁的情况下查找（内存层优先，磁盘命中后提升到内存层）"""
+        vector = self._memory.get(key)
+        if vector is not None:
+            self._memory.move_to_end(key)
+            return vector
+
+        if self._disk is not None:
+            row = self._disk_index.get(key)
+            if row is not None:
+                vector = np.array(self._disk[row], dtype=np.float32)
+                self._put_memory(key, vector)
+                return vector
+
+        return None
+
+    def _put_memory(self, key: str, vector) -> None:
+        """写入内存层并淘汰最久未使用的条目"""
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _put_disk(self, key: str, vector) -> None:
+        """写入磁盘层的下一个槽位，覆盖该槽位上的旧条目"""
+        row = self._next_row
+        old_key = self._row_keys[row]
+        if old_key is not None:
+            self._disk_index.pop(old_key, None)
+
+        self._disk[row] = np.asarray(vector, dtype=np.float16)
+        self._row_keys[row] = key
+        self._disk_index[key] = row
+        self._next_row = (row + 1) % len(self._row_keys)
+
+    def _index_path(self) -> Path:
+        """磁盘层索引文件路径"""
+        return self._disk_path.with_name(self._disk_path.name + '.index.json')
+
+    def _open_disk(self, path: Path, capacity: int) -> None:
+        """打开（或创建）磁盘层内存映射文件并加载索引"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._disk_path = path
+
+        index_path = self._index_path()
+        if path.exists() and index_path.exists():
+            index_data = json.loads(index_path.read_text(encoding='utf-8'))
+            if index_data.get('dim') == self.dim and len(index_data.get('rows', [])) == capacity:
+                self._disk = np.memmap(path, dtype=np.float16, mode='r+', shape=(capacity, self.dim))
+                self._row_keys = index_data['rows']
+                self._next_row = index_data.get('next_row', 0)
+                self._disk_index = {
+                    key: row for row, key in enumerate(self._row_keys) if key is not None
+                }
+                self.logger.info(f"Loaded embedding cache with {len(self._disk_index)} entries from {path}")
+                return
+            self.logger.warning(f"Embedding cache at {path} has incompatible layout, recreating")
+
+        self._disk = np.memmap(path, dtype=np.float16, mode='w+', shape=(capacity, self.dim))
+        self._row_keys = [None] * capacity
+        self._next_row = 0
+        self._disk_index = {}
@@ -0,0 +1,268 @@
+"""按天分桶的用户情绪时间序列"""
+from collections import deque
+from datetime import date, datetime, timedelta
+from typing import Deque, Iterable, Iterator, List, Optional
+from src.utils.running_stats import RunningStats
+
+# 计入负面情绪占比的情绪类型
+NEGATIVE_EMOTION_TYPES = frozenset({'anxious', 'depressed'})
+# 当天出现强度超过该值的负面情绪即记为负面日
+NEGATIVE_DAY_INTENSITY = 0.5
+# 抑郁强度超过该值视为严重抑郁
+SEVERE_DEPRESSION_INTENSITY = 0.8
+
+
+class EmotionDayBucket:
+    """单日情绪汇总（记录按时间排序，计数和强度统计随写入增量更新）"""
+
+    __slots__ = (
+        'day', 'records', 'stats', 'negative_count',
+        'strong_negative_count', 'severe_count', 'critical_count'
+    )
+
+    def __init__(self, day: date):
+        self.day = day
+        self.records: List = []
+        self.stats = RunningStats()  # 强度统计
+        self.negative_count = 0  # 焦虑/抑郁记录数
+        self.strong_negative_count = 0  # 强度超过阈值的焦虑/抑郁记录数
+        self.severe_count = 0  # 严重抑郁记录数
+        self.critical_count = 0  # 含自杀/自残关键词的记录数
+
+    @property
+    def has_negative(self) -> bool:
+        """当天是否为负面日"""
+        return self.strong_negative_count > 0
+
+
+class EmotionWindowSummary:
+    """时间窗口内的情绪汇总"""
+
+    __slots__ = (
+        'stats', 'negative_count', 'has_severe_depression', 'has_critical_keywords',
+        'negative_days', 'last_negative_date', 'recent'
+    )
+
+    def __init__(self):
+        self.stats = RunningStats()
+        self.negative_count = 0
+        self.has_severe_depression = False
+        self.has_critical_keywords = False
+        self.negative_days = 0  # 从最近有记录的一天起连续的负面日数
+        self.last_negative_date: Optional[datetime] = None
+        self.recent: List = []  # 最近的记录（按时间正序）
+
+    @property
+    def count(self) -> int:
+        """窗口内记录数"""
+        return self.stats.count
+
+
+class EmotionTimeline:
+    """
+    单个用户的滚动情绪时间序列
+
+    记录按自然日分桶，每个桶增量维护强度的在线统计、负面/严重抑郁/危机关键词计数，
+    另维护末尾连续负面日（按有记录的日期计）。按时间顺序写入时每条记录O(1)更新，
+    过期按天整桶淘汰（均摊O(1)）；窗口查询只合并窗口内的日桶，不再扫描全部记录。
+    """
+
+    def __init__(
+        self,
+        critical_keywords: Iterable[str] = (),
+        retention: timedelta = timedelta(days=30)
+    ):
+        """
+        初始化时间序列
+
+        Args:
+            critical_keywords: 危机关键词（自杀/自残）
+            retention: 保留期（按天粒度淘汰）
+        """
+        self.critical_keywords = frozenset(critical_keywords)
+        self.retention = retention
+        self._days: Deque[EmotionDayBucket] = deque()
+        self._negative_run: Deque[date] = deque()  # 末尾连续负面日，按日期正序
+        self._size = 0
+
+    # ==================== 写入 ====================
+
+    def append(self, emotion) -> None:
+        """
+        追加一条情绪记录
+
+        Args:
+            emotion: 情绪状态（EmotionState）
+        """
+        day = emotion.timestamp.date()
+        days = self._days
+
+        if not days or day > days[-1].day:
+            previous_day = days[-1].day if days else None
+            bucket = EmotionDayBucket(day)
+            days.append(bucket)
+            self._add(bucket, emotion)
+            if not bucket.has_negative:
+                self._negative_run.clear()
+            elif self._negative_run and self._negative_run[-1] == previous_day:
+                self._negative_run.append(day)
+            else:
+                self._negative_run.clear()
+                self._negative_run.append(day)
+        elif day == days[-1].day:
+            bucket = days[-1]
+            was_negative = bucket.has_negative
+            self._add(bucket, emotion)
+            if bucket.has_negative and not was_negative:
+                # 当天首次转为负面日（每天至多一次）
+                self._rebuild_negative_run()
+        else:
+            # 回填更早日期的记录
+            self._add(self._bucket_for(day), emotion)
+            self._rebuild_negative_run()
+
+    def expire(self, now: Optional[datetime] = None) -> int:
+        """
+        淘汰超过保留期的日桶
+
+        Args:
+            now: 当前时间（默认datetime.now()）
+
+        Returns:
+            int: 淘汰的记录数
+        """
+        cutoff_day = ((now or datetime.now()) - self.retention).date()
+        removed = 0
+        while self._days and self._days[0].day < cutoff_day:
+            removed += len(self._days.popleft().records)
+        while self._negative_run and self._negative_run[0] < cutoff_day:
+            self._negative_run.popleft()
+        self._size -= removed
+        return removed
+
+    # ==================== 查询 ====================
+
+    def summarize(self, since: datetime, recent_limit: int = 10) -> EmotionWindowSummary:
+        """
+        汇总时间窗口内的情绪
+
+        Args:
+            since: 窗口起始时间（含）
+            recent_limit: 返回最近记录的条数
+
+        Returns:
+            EmotionWindowSummary: 窗口汇总
+        """
+        summary = EmotionWindowSummary()
+        since_day = since.date()
+        recent: List = []
+        boundary_negative = False
+
+        for bucket in reversed(self._days):
+            if bucket.day < since_day:
+                break
+            if bucket.day > since_day:
+                records = bucket.records
+                summary.stats.merge(bucket.stats)
+                summary.negative_count += bucket.negative_count
+                summary.has_severe_depression |= bucket.severe_count > 0
+                summary.has_critical_keywords |= bucket.critical_count > 0
+            else:
+                # 起始日只统计窗口内的记录
+                records = [e for e in bucket.records if e.timestamp >= since]
+                for emotion in records:
+                    negative, strong, severe, critical = self._classify(emotion)
+                    summary.stats.update(emotion.intensity)
+                    summary.negative_count += negative
+                    summary.has_severe_depression |= severe
+                    summary.has_critical_keywords |= critical
+                    boundary_negative |= strong
+            if len(recent) < recent_limit:
+                recent.extend(reversed(records[-(recent_limit - len(recent)):]))
+
+        recent.reverse()
+        summary.recent = recent
+
+        run = self._negative_run
+        for run_day in reversed(run):
+            if run_day > since_day or (run_day == since_day and boundary_negative):
+                summary.negative_days += 1
+            else:
+                break
+        if summary.negative_days:
+            summary.last_negative_date = datetime.combine(run[-1], datetime.min.time())
+
+        return summary
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator:
+        for bucket in self._days:
+            yield from bucket.records
+
+    def __getitem__(self, index: int):
+        if index == -1 and self._days:
+            return self._days[-1].records[-1]
+        return list(self)[index]
+
+    def __setitem__(self, index: int, emotion) -> None:
+        """替换一条记录（记录的时间戳可能已被修改，整体重建索引）"""
+        records = list(self)
+        records[index] = emotion
+        self._rebuild(records)
+
+    # ==================== 内部方法 ====================
+
+    def _classify(self, emotion):
+        """返回 (负面, 强负面, 严重抑郁, 含危机关键词)"""
+        negative = emotion.emotion_type in NEGATIVE_EMOTION_TYPES
+        return (
+            negative,
+            negative and emotion.intensity > NEGATIVE_DAY_INTENSITY,
+            emotion.emotion_type == 'depressed' and emotion.intensity > SEVERE_DEPRESSION_INTENSITY,
+            not self.critical_keywords.isdisjoint(emotion.detected_keywords)
+        )
+
+    def _add(self, bucket: EmotionDayBucket, emotion) -> None:
+        """把记录加入日桶并更新汇总"""
+        records = bucket.records
+        position = len(records)
+        while position and records[position - 1].timestamp > emotion.timestamp:
+            position -= 1
+        records.insert(position, emotion)
+
+        negative, strong, severe, critical = self._classify(emotion)
+        bucket.stats.update(emotion.intensity)
+        bucket.negative_count += negative
+        bucket.strong_negative_count += strong
+        bucket.severe_count += severe
+        bucket.critical_count += critical
+        self._size += 1
+
+    def _bucket_for(self, day: date) -> EmotionDayBucket:
+        """获取或按日期顺序插入日桶"""
+        position = len(self._days)
+        while position and self._days[position - 1].day > day:
+            position -= 1
+        if position and self._days[position - 1].day == day:
+            return self._days[position - 1]
+        bucket = EmotionDayBucket(day)
+        self._days.insert(position, bucket)
+        return bucket
+
+    def _rebuild_negative_run(self) -> None:
+        """从最近一天向前重新计算末尾连续负面日"""
+        self._negative_run.clear()
+        for bucket in reversed(self._days):
+            if not bucket.has_negative:
+                break
+            self._negative_run.appendleft(bucket.day)
+
+    def _rebuild(self, records: List) -> None:
+        """按时间顺序重建全部日桶"""
+        self._days.clear()
+        self._negative_run.clear()
+        self._size = 0
+        for emotion in sorted(records, key=lambda e: e.timestamp):
+            self.append(emotion)
@@ -0,0 +1,157 @@
+"""匹配候选排除过滤器（用户ID驻留 + 稀疏下标集合）"""
+import heapq
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class ExclusionFilter:
+    """
+    匹配候选排除过滤器
+
+    用户ID驻留为连续整数下标，每个用户维护一个稀疏的下标集合记录不应再推荐给他的用户，
+    另有一个全局集合记录被封禁的用户。内存只与排除关系的数量成正比，与驻留用户总数无关；
+    每个候选的判断为两次O(1)的集合成员检查，在打分前剪枝候选。
+    """
+
+    def __init__(self):
+        """初始化过滤器"""
+        self._index: Dict[str, int] = {}
+        self._excluded: Dict[str, Set[int]] = {}  # user_id -> 被排除用户的下标集合
+        self._blocked: Set[int] = set()  # 被封禁用户的下标
+        self._blocked_until: Dict[str, Optional[datetime]] = {}  # user_id -> 解封时间（None表示永久）
+        self._unblock_heap: List[Tuple[datetime, str]] = []  # (解封时间, user_id)，惰性删除
+        self._lock = threading.Lock()
+        self.logger = logger
+
+    def intern(self, user_id: str) -> int:
+        """
+        获取用户的驻留下标（首次出现时分配）
+
+        Args:
+            user_id: 用户ID
+
+        Returns:
+            int: 下标
+        """
+        index = self._index.get(user_id)
+        if index is None:
+            with self._lock:
+                index = self._index.setdefault(user_id, len(self._index))
+        return index
+
+    def exclude_pair(self, user_a_id: str, user_b_id: str) -> None:
+        """
+        双向排除两个用户（已接受、已拒绝或已在对话中）
+
+        Args:
+            user_a_id: 用户A的ID
+            user_b_id: 用户B的ID
+        """
+        index_a = self.intern(user_a_id)
+        index_b = self.intern(user_b_id)
+        with self._lock:
+            self._excluded.setdefault(user_a_id, set()).add(index_b)
+            self._excluded.setdefault(user_b_id, set()).add(index_a)
+
+    def block(self, user_id: str, until: Optional[datetime] = None) -> None:
+        """
+        封禁用户，使其不出现在任何人的候选中
+
+        Args:
+            user_id: 用户ID
+            until: 解封时间（None表示永久）
+        """
+        index = self.intern(user_id)
+        with self._lock:
+            if user_id in self._blocked_until:
+                current = self._blocked_until[user_id]
+                # 已有永久封禁或更晚的解封时间时保持不变
+                if current is None or (until is not None and current >= until):
+                    return
+            self._blocked.add(index)
+            self._blocked_until[user_id] = until
+            if until is not None:
+                heapq.heappush(self._unblock_heap, (until, user_id))
+
+    def unblock(self, user_id: str) -> None:
+        """
+        解除用户封禁
+
+        Args:
+            user_id: 用户ID
+        """
+        index = self._index.get(user_id)
+        if index is None:
+            return
+        with self._lock:
+            self._blocked.discard(index)
+            self._blocked_until.pop(user_id, None)
+
+    def is_excluded(self, user_id: str, candidate_id: str) -> bool:
+        """
+        判断候选是否应被排除
+
+        Args:
+            user_id: 请求用户ID
+            candidate_id: 候选用户ID
+
+        Returns:
+            bool: 是否排除
+        """
+        return not self.filter_candidates(user_id, [candidate_id])
+
+    def filter_candidates(self, user_id: str, candidate_ids: Iterable[str]) -> List[str]:
+        """
+        过滤候选用户
+
+        Args:
+            user_id: 请求用户ID
+            candidate_ids: 候选用户ID列表
+
+        Returns:
+            List[str]: 未被排除的候选用户ID
+        """
+        with self._lock:
+            self._expire_blocks(datetime.now())
+            excluded = self._excluded.get(user_id)
+            blocked = self._blocked
+
+        if not excluded and not blocked:
+            return list(candidate_ids)
+
+        # 只取集合引用，不复制；集合成员检查在并发添加时也是安全的
+        excluded = excluded or ()
+        index = self._index
+        kept = []
+        for candidate_id in candidate_ids:
+            position = index.get(candidate_id)
+            if position is None or (position not in excluded and position not in blocked):
+                kept.append(candidate_id)
+        return kept
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        获取过滤器统计
+
+        Returns:
+            Dict[str, int]: 驻留用户数、有排除记录的用户数、封禁用户数
+        """
+        with self._lock:
+            return {
+                'interned_users': len(self._index),
+                'users_with_exclusions': len(self._excluded),
+                'blocked_users': len(self._blocked_until)
+            }
+
+    def _expire_blocks(self, now: datetime) -> None:
+        """在持有锁的情况下解除已到期的封禁"""
+        while self._unblock_heap and self._unblock_heap[0][0] <= now:
+            until, user_id = heapq.heappop(self._unblock_heap)
+            # 封禁已被延长、改为永久或已解除时跳过
+            if user_id in self._blocked_until and self._blocked_until[user_id] == until:
+                self._blocked.discard(self._index[user_id])
+                del self._blocked_until[user_id]
@@ -0,0 +1,244 @@
+"""AI介入记录存储（每个对话有界环形缓冲 + 聚合计数 + 介入ID索引）"""
+import threading
+from collections import Counter, OrderedDict, deque
+from datetime import datetime
+from itertools import islice
+from typing import Deque, Dict, Iterable, Iterator, List, MutableMapping, Optional, Tuple
+
+from src.models.conversation import AIIntervention
+
+
+class InterventionHistory:
+    """
+    单个对话的介入历史
+
+    只保留最近 max_size 条记录，更早的记录被丢弃，但计入聚合计数，
+    因此总介入次数和各类型/响应的分布不受缓冲区大小影响。
+    """
+
+    __slots__ = ('_items', 'total', 'by_trigger', 'by_type', 'by_response', 'last_active')
+
+    def __init__(self, max_size: int):
+        self._items: Deque[AIIntervention] = deque(maxlen=max_size)
+        self.total = 0
+        self.by_trigger: Counter = Counter()
+        self.by_type: Counter = Counter()
+        self.by_response: Counter = Counter()
+        self.last_active: Optional[datetime] = None
+
+    def append(self, intervention: AIIntervention) -> Optional[AIIntervention]:
+        """
+        追加一条记录
+
+        Args:
+            intervention: 介入记录
+
+        Returns:
+            Optional[AIIntervention]: 缓冲区已满时被挤出的最早记录
+        """
+        dropped = self._items[0] if len(self._items) == self._items.maxlen else None
+        self._items.append(intervention)
+        self.total += 1
+        self.by_trigger[intervention.trigger_type] += 1
+        self.by_type[intervention.intervention_type] += 1
+        if intervention.user_response:
+            self.by_response[intervention.user_response] += 1
+        self.last_active = intervention.timestamp
+        return dropped
+
+    def recent(self, limit: Optional[int] = None) -> List[AIIntervention]:
+        """
+        获取最近的记录（按时间正序）
+
+        Args:
+            limit: 最多返回的条数（默认全部保留的记录）
+
+        Returns:
+            List[AIIntervention]: 介入记录列表
+        """
+        if limit is None or limit >= len(self._items):
+            return list(self._items)
+        if limit <= 0:
+            return []
+        return list(islice(reversed(self._items), limit))[::-1]
+
+    def get_stats(self) -> Dict:
+        """
+        获取聚合计数
+
+        Returns:
+            Dict: 总次数、保留条数、按触发类型/介入类型/用户响应的计数和最后介入时间
+        """
+        return {
+            'total': self.total,
+            'retained': len(self._items),
+            'by_trigger': dict(self.by_trigger),
+            'by_type': dict(self.by_type),
+            'by_response': dict(self.by_response),
+            'last_active': self.last_active
+        }
+
+    def __getitem__(self, index: int) -> AIIntervention:
+        return self._items[index]
+
+    def __iter__(self) -> Iterator[AIIntervention]:
+        return iter(self._items)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __bool__(self) -> bool:
+        return bool(self._items)
+
+
+class InterventionStore(MutableMapping[str, InterventionHistory]):
+    """
+    AI介入记录存储
+
+    以对话ID为键的映射，值为有界的 InterventionHistory；对话按最近介入时间排序，
+    超过 max_conversations 时淘汰最久未介入的对话，空闲对话可按时间批量淘汰。
+    介入ID另建索引，更新用户响应无需遍历历史；记录被挤出缓冲区或对话被淘汰时同步删除索引，
+    内存占用只取决于对话数上限和每个对话的缓冲区大小。
+    """
+
+    def __init__(self, max_per_conversation: int = 50, max_conversations: int = 100000):
+        """
+        初始化存储
+
+        Args:
+            max_per_conversation: 每个对话保留的最近介入条数
+            max_conversations: 最多保留的对话数
+        """
+        self.max_per_conversation = max(1, max_per_conversation)
+        self.max_conversations = max(1, max_conversations)
+        self._histories: "OrderedDict[str, InterventionHistory]" = OrderedDict()
+        self._index: Dict[str, Tuple[str, AIIntervention]] = {}  # 介入ID -> (对话ID, 记录)
+        self._lock = threading.RLock()
+
+    def append(self, intervention: AIIntervention) -> InterventionHistory:
+        """
+        记录一次介入
+
+        Args:
+            intervention: 介入记录
+
+        Returns:
+            InterventionHistory: 该对话的介入历史
+        """
+        with self._lock:
+            return self._append(intervention.conversation_id, intervention)
+
+    def find(self, intervention_id: str) -> Optional[AIIntervention]:
+        """
+        按介入ID查找记录
+
+        Args:
+            intervention_id: 介入记录ID
+
+        Returns:
+            Optional[AIIntervention]: 介入记录，不存在（或已被淘汰）时返回None
+        """
+        entry = self._index.get(intervention_id)
+        return entry[1] if entry else None
+
+    def update_response(self, intervention_id: str, response: str) -> Optional[AIIntervention]:
+        """
+        更新用户响应并同步响应计数
+
+        Args:
+            intervention_id: 介入记录ID
+            response: 用户响应
+
+        Returns:
+            Optional[AIIntervention]: 更新后的记录，不存在时返回None
+        """
+        with self._lock:
+            entry = self._index.get(intervention_id)
+            if entry is None:
+                return None
+            conversation_id, intervention = entry
+            history = self._histories[conversation_id]
+            if intervention.user_response:
+                history.by_response[intervention.user_response] -= 1
+                if history.by_response[intervention.user_response] <= 0:
+                    del history.by_response[intervention.user_response]
+            intervention.user_response = response
+            history.by_response[response] += 1
+            return intervention
+
+    def evict_idle(self, before: datetime) -> List[str]:
+        """
+        淘汰最后介入时间早于指定时间的对话
+
+        Args:
+            before: 截止时间
+
+        Returns:
+            List[str]: 被淘汰的对话ID
+        """
+        evicted = []
+        with self._lock:
+            # 对话按最近介入排序，遇到第一个仍活跃的对话即可停止
+            while self._histories:
+                conversation_id, history = next(iter(self._histories.items()))
+                if history.last_active is not None and history.last_active >= before:
+                    break
+                self._drop(conversation_id)
+                evicted.append(conversation_id)
+        return evicted
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        获取存储统计
+
+        Returns:
+            Dict[str, int]: 对话数和已索引的介入记录数
+        """
+        return {'conversations': len(self._histories), 'indexed': len(self._index)}
+
+    def __setitem__(self, conversation_id: str, interventions: Iterable[AIIntervention]) -> None:
+        with self._lock:
+            if conversation_id in self._histories:
+                self._drop(conversation_id)
+            for intervention in interventions:
+                self._append(conversation_id, intervention)
+
+    def __getitem__(self, conversation_id: str) -> InterventionHistory:
+        return self._histories[conversation_id]
+
+    def __delitem__(self, conversation_id: str) -> None:
+        with self._lock:
+            if conversation_id not in self._histories:
+                raise KeyError(conversation_id)
+            self._drop(conversation_id)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._histories))
+
+    def __len__(self) -> int:
+        return len(self._histories)
+
+    def __contains__(self, conversation_id: object) -> bool:
+        return conversation_id in self._histories
+
+    def _append(self, conversation_id: str, intervention: AIIntervention) -> InterventionHistory:
+        """在持有锁的情况下追加记录，并按上限淘汰最久未介入的对话"""
+        history = self._histories.get(conversation_id)
+        if history is None:
+            history = InterventionHistory(self.max_per_conversation)
+            self._histories[conversation_id] = history
+        else:
+            self._histories.move_to_end(conversation_id)
+        dropped = history.append(intervention)
+        if dropped is not None:
+            self._index.pop(dropped.intervention_id, None)
+        self._index[intervention.intervention_id] = (conversation_id, intervention)
+        while len(self._histories) > self.max_conversations:
+            self._drop(next(iter(self._histories)))
+        return history
+
+    def _drop(self, conversation_id: str) -> None:
+        """在持有锁的情况下删除对话及其索引"""
+        history = self._histories.pop(conversation_id)
+        for intervention in history:
+            self._index.pop(intervention.intervention_id, None)
@@ -0,0 +1,88 @@
+"""多关键词单遍匹配（Aho-Corasick自动机）"""
+from collections import deque
+from typing import Dict, Generic, Iterable, List, Tuple, TypeVar
+
+T = TypeVar('T')
+
+
+class KeywordAutomaton(Generic[T]):
+    """
+    Aho-Corasick 关键词自动机
+
+    构造时把全部关键词编译为带失败指针的字典树，匹配时对文本只扫描一遍，
+    每个字符的状态转移均摊O(1)，与关键词数量无关。每个关键词可关联任意附加信息
+    （如 (类别, 严重程度)），同一关键词可出现在多个类别中。
+    """
+
+    def __init__(self, keywords: Iterable[Tuple[str, T]]):
+        """
+        编译自动机
+
+        Args:
+            keywords: (关键词, 附加信息) 序列，匹配结果按此顺序返回
+        """
+        self._entries: List[Tuple[str, T]] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Tuple[int, ...]] = [()]
+
+        terminal: Dict[int, List[int]] = {}
+        for keyword, payload in keywords:
+            if not keyword:
+                continue
+            entry_id = len(self._entries)
+            self._entries.append((keyword, payload))
+            state = 0
+            for char in keyword:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(())
+                state = next_state
+            terminal.setdefault(state, []).append(entry_id)
+
+        # 按层序计算失败指针，并把失败链上的输出合并到每个状态
+        queue = deque(self._goto[0].values())
+        for state in queue:
+            self._output[state] = tuple(terminal.get(state, ()))
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state] = (
+                    tuple(terminal.get(next_state, ())) + self._output[self._fail[next_state]]
+                )
+                queue.append(next_state)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def find_all(self, text: str) -> List[Tuple[str, T]]:
+        """
+        查找文本中出现的全部关键词
+
+        Args:
+            text: 待匹配文本
+
+        Returns:
+            List[Tuple[str, T]]: 出现过的 (关键词, 附加信息)，每项只返回一次，按编译顺序排列
+        """
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        found = set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return [self._entries[entry_id] for entry_id in sorted(found)]
@@ -0,0 +1,262 @@
+"""匹配事件日志（定长二进制记录，分块追加写入，内存映射回读）"""
+import struct
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, List, Optional
+from src.utils.exceptions import ValidationError
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+# 结果编码
+OUTCOME_CANDIDATE = 0   # 已打分的候选（rank >= 返回数量时未展示给用户）
+OUTCOME_PENDING = 1     # 已返回给用户，等待处理
+OUTCOME_ACCEPTED = 2
+OUTCOME_REJECTED = 3
+OUTCOME_EXPIRED = 4
+
+OUTCOME_CODES = {
+    'candidate': OUTCOME_CANDIDATE,
+    'pending': OUTCOME_PENDING,
+    'accepted': OUTCOME_ACCEPTED,
+    'rejected': OUTCOME_REJECTED,
+    'expired': OUTCOME_EXPIRED,
+}
+
+# 定长字段宽度（字节，UTF-8编码后超长部分截断）
+ID_WIDTH = 36
+SCENE_WIDTH = 32
+
+# 记录布局（小端、无填充），与 EVENT_DTYPE 一一对应
+_RECORD_FORMAT = f'<{ID_WIDTH}s{ID_WIDTH}s{ID_WIDTH}s{SCENE_WIDTH}s5fhBdd'
+_RECORD_STRUCT = struct.Struct(_RECORD_FORMAT)
+RECORD_SIZE = _RECORD_STRUCT.size
+
+if NUMPY_AVAILABLE:
+    EVENT_DTYPE = np.dtype([
+        ('match_id', f'S{ID_WIDTH}'),
+        ('user_a_id', f'S{ID_WIDTH}'),
+        ('user_b_id', f'S{ID_WIDTH}'),
+        ('scene', f'S{SCENE_WIDTH}'),
+        ('personality_score', '<f4'),
+        ('interest_score', '<f4'),
+        ('scene_score', '<f4'),
+        ('emotion_sync_score', '<f4'),
+        ('match_score', '<f4'),
+        ('rank', '<i2'),
+        ('outcome', 'u1'),
+        ('created_at', '<f8'),
+        ('event_at', '<f8'),
+    ])
+
+
+class MatchEventLog:
+    """
+    仅追加的匹配事件日志
+
+    每条事件为定长二进制记录（用户ID、场景、四个维度得分、总分、排名、结果、时间戳），
+    先写入内存缓冲区，攒够一批后追加到当前分块文件；分块达到记录上限后轮转到新文件。
+    回读时每个分块以numpy结构化数组内存映射打开，无需反序列化为Pydantic对象。
+    """
+
+    FILE_PREFIX = 'match_events-'
+    FILE_SUFFIX = '.bin'
+
+    def __init__(
+        self,
+        log_dir: str,
+        max_records_per_chunk: int = 1_000_000,
+        flush_every: int = 256
+    ):
+        """
+        初始化事件日志
+
+        Args:
+            log_dir: 日志目录
+            max_records_per_chunk: 每个分块文件的最大记录数
+            flush_every: 缓冲多少条记录后写盘
+        """
+        if max_records_per_chunk <= 0:
+            raise ValidationError("max_records_per_chunk must be positive")
+
+        self.log_dir = Path(log_dir)
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        self.max_records_per_chunk = max_records_per_chunk
+        self.flush_every = max(1, flush_every)
+        self.logger = logger
+
+        self._lock = threading.Lock()
+        self._buffer: List[bytes] = []
+
+        # 从已有的最后一个分块续写
+        chunks = self.chunk_paths()
+        if chunks:
+            self._chunk_index = self._parse_index(chunks[-1])
+            self._chunk_records = self._truncate_partial_record(chunks[-1])
+        else:
+            self._chunk_index = 0
+            self._chunk_records = 0
+
+    # ==================== 写入 ====================
+
+    def append(
+        self,
+        match,
+        outcome: str,
+        rank: int = -1,
+        event_at: Optional[datetime] = None
+    ) -> None:
+        """
+        追加一条匹配事件
+
+        Args:
+            match: 匹配记录（Match）
+            outcome: 结果（candidate / pending / accepted / rejected / expired）
+            rank: 在本次候选中的排名（从0开始，-1表示不适用）
+            event_at: 事件时间（默认当前时间）
+        """
+        code = OUTCOME_CODES.get(outcome)
+        if code is None:
+            raise ValidationError(f"Invalid match outcome: {outcome}")
+
+        record = _RECORD_STRUCT.pack(
+            match.match_id.encode('utf-8')[:ID_WIDTH],
+            match.user_a_id.encode('utf-8')[:ID_WIDTH],
+            match.user_b_id.encode('utf-8')[:ID_WIDTH],
+            match.scene.encode('utf-8')[:SCENE_WIDTH],
+            match.personality_score,
+            match.interest_score,
+            match.scene_score,
+            match.emotion_sync_score,
+            match.match_score,
+            max(-1, min(rank, 32767)),
+            code,
+            match.created_at.timestamp(),
+            (event_at or datetime.now()).timestamp()
+        )
+
+        with self._lock:
+            self._buffer.append(record)
+            if len(self._buffer) >= self.flush_every:
+                self._flush_locked()
+
+    def append_ranked(self, ranked_matches: List, returned: int) -> None:
+        """
+        追加一次匹配计算的全部候选
+
+        Args:
+            ranked_matches: 按总分排序后的全部候选匹配
+            returned: 返回给用户的数量（排名在此之前的记为pending，其余记为candidate）
+        """
+        event_at = datetime.now()
+        for rank, match in enumerate(ranked_matches):
+            self.append(
+                match,
+                'pending' if rank < returned else 'candidate',
+                rank=rank,
+                event_at=event_at
+            )
+
+    def flush(self) -> None:
+        """将缓冲区中的记录写盘"""
+        with self._lock:
+            self._flush_locked()
+
+    def close(self) -> None:
+        """写盘并关闭日志"""
+        self.flush()
+
+    def _flush_locked(self) -> None:
+        """在持有锁的情况下按分块上限写盘，必要时轮转"""
+        pending = self._buffer
+        self._buffer = []
+        while pending:
+            if self._chunk_records >= self.max_records_per_chunk:
+                self._chunk_index += 1
+                self._chunk_records = 0
+                self.logger.info(f"Rotating match event log to chunk {self._chunk_index}")
+
+            room = self.max_records_per_chunk - self._chunk_records
+            batch, pending = pending[:room], pending[room:]
+            with open(self._chunk_path(self._chunk_index), 'ab') as f:
+                f.write(b''.join(batch))
+            self._chunk_records += len(batch)
+
+    def _truncate_partial_record(self, path: Path) -> int:
+        """
+        截掉分块末尾不完整的记录（上次写入中断时留下），保证续写的记录仍按定长对齐
+
+        Args:
+            path: 分块文件路径
+
+        Returns:
+            int: 分块中完整记录的条数
+        """
+        size = path.stat().st_size
+        records, remainder = divmod(size, RECORD_SIZE)
+        if remainder:
+            with open(path, 'r+b') as f:
+                f.truncate(records * RECORD_SIZE)
+            self.logger.warning(f"Truncated {remainder} trailing bytes of partial record in {path.name}")
+        return records
+
+    # ==================== 回读 ====================
+
+    def chunk_paths(self) -> List[Path]:
+        """
+        获取全部分块文件路径（按写入顺序）
+
+        Returns:
+            List[Path]: 分块文件路径列表
+        """
+        return sorted(
+            self.log_dir.glob(f'{self.FILE_PREFIX}*{self.FILE_SUFFIX}'),
+            key=self._parse_index
+        )
+
+    def iter_chunks(self) -> Iterator:
+        """
+        逐个以内存映射方式打开已写盘的分块
+
+        Yields:
+            numpy结构化数组（dtype为EVENT_DTYPE，只读）
+        """
+        if not NUMPY_AVAILABLE:
+            raise ValidationError("numpy is required to read the match event log")
+
+        for path in self.chunk_paths():
+            # 忽略异常中断留下的不完整尾部记录
+            count = path.stat().st_size // RECORD_SIZE
+            if count == 0:
+                continue
+            yield np.memmap(path, dtype=EVENT_DTYPE, mode='r', shape=(count,))
+
+    def read_all(self):
+        """
+        读取全部事件
+
+        Returns:
+            numpy结构化数组（dtype为EVENT_DTYPE）
+        """
+        chunks = list(self.iter_chunks())
+        if not chunks:
+            return np.empty(0, dtype=EVENT_DTYPE)
+        if len(chunks) == 1:
+            return chunks[0]
+        return np.concatenate(chunks)
+
+    def _chunk_path(self, index: int) -> Path:
+        """分块文件路径"""
+        return self.log_dir / f'{self.FILE_PREFIX}{index:06d}{self.FILE_SUFFIX}'
+
+    def _parse_index(self, path: Path) -> int:
+        """从分块文件名解析序号"""
+        return int(path.name[len(self.FILE_PREFIX):-len(self.FILE_SUFFIX)])
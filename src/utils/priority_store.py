@@ -0,0 +1,220 @@
+"""按优先级出队并按用户、状态索引的记录存储"""
+import heapq
+import itertools
+import threading
+from typing import Callable, Dict, Generic, Iterator, List, Optional, Tuple, TypeVar
+
+T = TypeVar('T')
+
+
+class PriorityRecordStore(Generic[T]):
+    """
+    带优先级堆和二级索引的内存记录存储
+
+    记录需有 user_id、status、created_at 字段。处于待处理状态的记录进入按
+    (优先级降序, created_at升序) 排列的堆，取下一条为O(log n)；状态变化时堆中旧条目
+    通过令牌惰性失效。另维护 用户 -> 记录、状态 -> 记录 两个索引，按用户或状态查询
+    只访问命中的记录。
+    """
+
+    def __init__(
+        self,
+        id_field: str,
+        priority: Callable[[T], int],
+        pending_status: str = 'pending'
+    ):
+        """
+        初始化存储
+
+        Args:
+            id_field: 记录ID字段名
+            priority: 计算记录优先级的函数（越大越优先）
+            pending_status: 进入优先级堆的状态
+        """
+        self.id_field = id_field
+        self.priority = priority
+        self.pending_status = pending_status
+
+        self._records: Dict[str, T] = {}
+        self._by_user: Dict[str, Dict[str, None]] = {}  # user_id -> 有序记录ID集合
+        self._by_status: Dict[str, Dict[str, None]] = {}  # status -> 有序记录ID集合
+        self._heap: List[Tuple[int, float, int, str]] = []  # (-优先级, 创建时间, 令牌, 记录ID)
+        self._heap_tokens: Dict[str, int] = {}  # 记录ID -> 堆中有效条目的令牌
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def add(self, record: T) -> T:
+        """
+        添加记录
+
+        Args:
+            record: 记录
+
+        Returns:
+            T: 添加的记录
+        """
+        record_id = getattr(record, self.id_field)
+        with self._lock:
+            self._records[record_id] = record
+            self._by_user.setdefault(record.user_id, {})[record_id] = None
+            self._by_status.setdefault(record.status, {})[record_id] = None
+            if record.status == self.pending_status:
+                self._push(record_id, record)
+        return record
+
+    def get(self, record_id: str) -> Optional[T]:
+        """
+        获取记录
+
+        Args:
+            record_id: 记录ID
+
+        Returns:
+            Optional[T]: 记录，不存在时返回None
+        """
+        return self._records.get(record_id)
+
+    def set_status(self, record_id: str, status: str) -> Optional[T]:
+        """
+        更新记录状态并维护索引
+
+        Args:
+            record_id: 记录ID
+            status: 新状态
+
+        Returns:
+            Optional[T]: 更新后的记录，不存在时返回None
+        """
+        with self._lock:
+            record = self._records.get(record_id)
+            if record is None:
+                return None
+            self._set_status_locked(record_id, record, status)
+            return record
+
+    def pop_next(self, new_status: str) -> Optional[T]:
+        """
+        取出优先级最高（同级中最早）的待处理记录，并将其状态改为new_status
+
+        Args:
+            new_status: 取出后的状态
+
+        Returns:
+            Optional[T]: 记录，没有待处理记录时返回None
+        """
+        with self._lock:
+            while self._heap:
+                _, _, token, record_id = heapq.heappop(self._heap)
+                if self._heap_tokens.get(record_id) != token:
+                    continue
+                record = self._records[record_id]
+                self._set_status_locked(record_id, record, new_status)
+                return record
+            return None
+
+    def peek_next(self) -> Optional[T]:
+        """
+        查看优先级最高的待处理记录（不取出）
+
+        Returns:
+            Optional[T]: 记录，没有待处理记录时返回None
+        """
+        with self._lock:
+            while self._heap:
+                _, _, token, record_id = self._heap[0]
+                if self._heap_tokens.get(record_id) == token:
+                    return self._records[record_id]
+                heapq.heappop(self._heap)
+            return None
+
+    def pending_by_priority(self) -> List[T]:
+        """
+        按出队顺序列出全部待处理记录
+
+        Returns:
+            List[T]: 待处理记录
+        """
+        with self._lock:
+            entries = sorted(
+                entry for entry in self._heap
+                if self._heap_tokens.get(entry[3]) == entry[2]
+            )
+            return [self._records[entry[3]] for entry in entries]
+
+    def by_user(self, user_id: str, status: Optional[str] = None) -> List[T]:
+        """
+        获取用户的记录（按创建顺序）
+
+        Args:
+            user_id: 用户ID
+            status: 状态过滤
+
+        Returns:
+            List[T]: 记录列表
+        """
+        with self._lock:
+            records = [self._records[record_id] for record_id in self._by_user.get(user_id, {})]
+        if status is not None:
+            records = [record for record in records if record.status == status]
+        return records
+
+    def by_status(self, status: str) -> List[T]:
+        """
+        获取某状态的记录（按进入该状态的顺序）
+
+        Args:
+            status: 状态
+
+        Returns:
+            List[T]: 记录列表
+        """
+        with self._lock:
+            return [self._records[record_id] for record_id in self._by_status.get(status, {})]
+
+    def count_by_status(self) -> Dict[str, int]:
+        """
+        统计各状态的记录数
+
+        Returns:
+            Dict[str, int]: 状态 -> 记录数
+        """
+        with self._lock:
+            return {status: len(ids) for status, ids in self._by_status.items() if ids}
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(list(self._records.values()))
+
+    def _push(self, record_id: str, record: T) -> None:
+        """在持有锁的情况下把记录加入优先级堆"""
+        token = next(self._counter)
+        self._heap_tokens[record_id] = token
+        heapq.heappush(
+            self._heap,
+            (-self.priority(record), record.created_at.timestamp(), token, record_id)
+        )
+
+    def _set_status_locked(self, record_id: str, record: T, status: str) -> None:
+        """在持有锁的情况下更新状态索引和优先级堆"""
+        old_status = record.status
+        if old_status == status:
+            return
+        ids = self._by_status.get(old_status)
+        if ids is not None:
+            ids.pop(record_id, None)
+        self._by_status.setdefault(status, {})[record_id] = None
+        record.status = status
+
+        if status == self.pending_status:
+            self._push(record_id, record)
+        else:
+            # 堆中旧条目惰性失效，失效条目过多时压缩
+            self._heap_tokens.pop(record_id, None)
+            if len(self._heap) > 2 * len(self._heap_tokens) + 64:
+                self._heap = [
+                    entry for entry in self._heap
+                    if self._heap_tokens.get(entry[3]) == entry[2]
+                ]
+                heapq.heapify(self._heap)
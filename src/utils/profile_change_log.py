@@ -0,0 +1,209 @@
+"""用户画像字段级变更日志（增量 + 定期压缩为检查点）"""
+import threading
+from bisect import bisect_right
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def normalize_value(value: Any) -> Any:
+    """把画像字段值转换为可比较、与原对象解耦的形式"""
+    if hasattr(value, 'dict'):
+        return value.dict()
+    if isinstance(value, (list, tuple, set)):
+        return list(value)
+    if isinstance(value, dict):
+        return dict(value)
+    return value
+
+
+class ProfileDelta:
+    """单个字段的一次变更"""
+
+    __slots__ = ('version', 'field', 'old', 'new', 'changed_at')
+
+    def __init__(self, version: int, field: str, old: Any, new: Any, changed_at: datetime):
+        self.version = version
+        self.field = field
+        self.old = old
+        self.new = new
+        self.changed_at = changed_at
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典"""
+        return {
+            'version': self.version,
+            'field': self.field,
+            'old': self.old,
+            'new': self.new,
+            'changed_at': self.changed_at
+        }
+
+
+class _UserChangeLog:
+    """单个用户的变更日志"""
+
+    __slots__ = ('deltas', 'versions', 'checkpoint', 'checkpoint_version', 'latest')
+
+    def __init__(self):
+        self.deltas: List[ProfileDelta] = []  # 检查点之后的变更，按版本排序
+        self.versions: List[int] = []  # 与deltas对应的版本号，用于二分查找
+        # 检查点：字段 -> (检查点时的值, 最后变更版本, 最后变更时间)
+        self.checkpoint: Dict[str, Tuple[Any, int, datetime]] = {}
+        self.checkpoint_version = 0
+        self.latest: Dict[str, Any] = {}  # 字段 -> 最新值（只含记录过的字段）
+
+
+class ProfileChangeLog:
+    """
+    用户画像变更日志
+
+    每次画像更新只记录发生变化的字段（旧值、新值、版本号），不复制整个画像。
+    单个用户的增量超过上限时，较早的增量被折叠进检查点（每个字段只保留检查点时的值和
+    最后变更版本），最近的增量原样保留。"某版本之后的变化"直接由检查点和增量回答，
+    无需重建完整快照。
+    """
+
+    def __init__(self, max_deltas: int = 200, retain_deltas: int = 50):
+        """
+        初始化日志
+
+        Args:
+            max_deltas: 单个用户增量数超过该值时压缩
+            retain_deltas: 压缩后保留的最近增量数
+        """
+        self.max_deltas = max(1, max_deltas)
+        self.retain_deltas = min(max(0, retain_deltas), self.max_deltas)
+        self._logs: Dict[str, _UserChangeLog] = {}
+        self._lock = threading.Lock()
+
+    def last_value(self, user_id: str, field: str, default: Any = None) -> Any:
+        """
+        获取字段最近记录的值
+
+        Args:
+            user_id: 用户ID
+            field: 字段名
+            default: 未记录过该字段时的返回值
+
+        Returns:
+            Any: 最近记录的值
+        """
+        log = self._logs.get(user_id)
+        if log is None or field not in log.latest:
+            return default
+        return log.latest[field]
+
+    def record(
+        self,
+        user_id: str,
+        version: int,
+        changes: Dict[str, Tuple[Any, Any]],
+        changed_at: Optional[datetime] = None
+    ) -> int:
+        """
+        记录一次画像更新中发生变化的字段
+
+        Args:
+            user_id: 用户ID
+            version: 本次更新后的画像版本号
+            changes: 字段 -> (旧值, 新值)，值需已规范化
+            changed_at: 变更时间（默认当前时间）
+
+        Returns:
+            int: 记录的字段数
+        """
+        if not changes:
+            return 0
+        changed_at = changed_at or datetime.now()
+        with self._lock:
+            log = self._logs.setdefault(user_id, _UserChangeLog())
+            for field, (old, new) in changes.items():
+                log.deltas.append(ProfileDelta(version, field, old, new, changed_at))
+                log.versions.append(version)
+                log.latest[field] = new
+            if len(log.deltas) > self.max_deltas:
+                self._compact(log)
+        return len(changes)
+
+    def changes_since(self, user_id: str, since_version: int = 0) -> Dict[str, Any]:
+        """
+        查询某版本之后的变化
+
+        Args:
+            user_id: 用户ID
+            since_version: 起始版本（不含）
+
+        Returns:
+            Dict: changes 为增量列表（按版本排序）；若起始版本早于检查点，
+                compacted 为检查点中该版本之后变化过的字段（只有检查点时的值，没有旧值）
+        """
+        with self._lock:
+            log = self._logs.get(user_id)
+            if log is None:
+                return {'since_version': since_version, 'compacted': [], 'changes': []}
+
+            compacted = []
+            if since_version < log.checkpoint_version:
+                compacted = [
+                    {'field': field, 'value': value, 'version': version, 'changed_at': changed_at}
+                    for field, (value, version, changed_at) in log.checkpoint.items()
+                    if version > since_version
+                ]
+                compacted.sort(key=lambda entry: entry['version'])
+
+            start = bisect_right(log.versions, since_version)
+            return {
+                'since_version': since_version,
+                'checkpoint_version': log.checkpoint_version,
+                'compacted': compacted,
+                'changes': [delta.to_dict() for delta in log.deltas[start:]]
+            }
+
+    def net_changes_since(self, user_id: str, since_version: int) -> Dict[str, Tuple[Any, Any]]:
+        """
+        合并某版本之后每个字段的净变化
+
+        Args:
+            user_id: 用户ID
+            since_version: 起始版本（不含，应不早于检查点）
+
+        Returns:
+            Dict[str, Tuple[Any, Any]]: 字段 -> (起始版本时的值, 最新值)
+        """
+        with self._lock:
+            log = self._logs.get(user_id)
+            if log is None:
+                return {}
+            net: Dict[str, Tuple[Any, Any]] = {}
+            for delta in log.deltas[bisect_right(log.versions, since_version):]:
+                old = net[delta.field][0] if delta.field in net else delta.old
+                net[delta.field] = (old, delta.new)
+            return net
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        获取日志统计
+
+        Returns:
+            Dict[str, int]: 用户数、增量总数、检查点字段总数
+        """
+        with self._lock:
+            return {
+                'users': len(self._logs),
+                'deltas': sum(len(log.deltas) for log in self._logs.values()),
+                'checkpoint_fields': sum(len(log.checkpoint) for log in self._logs.values())
+            }
+
+    def _compact(self, log: _UserChangeLog) -> None:
+        """在持有锁的情况下把较早的增量折叠进检查点"""
+        cut = len(log.deltas) - self.retain_deltas
+        # 同一版本的增量不拆开
+        while 0 < cut < len(log.deltas) and log.versions[cut] == log.versions[cut - 1]:
+            cut -= 1
+        if cut <= 0:
+            return
+        for delta in log.deltas[:cut]:
+            log.checkpoint[delta.field] = (delta.new, delta.version, delta.changed_at)
+        log.checkpoint_version = log.versions[cut - 1]
+        del log.deltas[:cut]
+        del log.versions[:cut]
@@ -0,0 +1,144 @@
+"""在线统计工具（Welford累加器与Welch t检验）"""
+import math
+from typing import Tuple
+
+
+class RunningStats:
+    """
+    单变量在线统计累加器
+
+    使用Welford算法维护样本数、均值和离差平方和（M2），
+    每次更新O(1)，数值稳定，无需保存原始样本。
+    """
+
+    __slots__ = ('count', 'mean', 'm2')
+
+    def __init__(self):
+        """初始化空累加器"""
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, value: float) -> None:
+        """
+        加入一个样本
+
+        Args:
+            value: 样本值
+        """
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def merge(self, other: 'RunningStats') -> None:
+        """
+        合并另一个累加器（Chan并行公式）
+
+        Args:
+            other: 另一组统计
+        """
+        if other.count == 0:
+            return
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.mean += delta * other.count / total
+        self.count = total
+
+    @property
+    def variance(self) -> float:
+        """样本方差（无偏，样本数不足2时为0）"""
+        if self.count < 2:
+            return 0.0
+        return self.m2 / (self.count - 1)
+
+    @property
+    def population_variance(self) -> float:
+        """总体方差（样本数为0时为0）"""
+        if self.count == 0:
+            return 0.0
+        return self.m2 / self.count
+
+    def __repr__(self) -> str:
+        return f"RunningStats(count={self.count}, mean={self.mean:.4f}, variance={self.variance:.4f})"
+
+
+def welch_t_test(a: RunningStats, b: RunningStats) -> Tuple[float, float]:
+    """
+    基于两组累加器做Welch t检验（不假设方差相等）
+
+    Args:
+        a: 第一组统计
+        b: 第二组统计
+
+    Returns:
+        (t统计量, 双侧p值)；任一组样本数不足2时返回 (0.0, 1.0)
+    """
+    if a.count < 2 or b.count < 2:
+        return 0.0, 1.0
+
+    var_a = a.variance / a.count
+    var_b = b.variance / b.count
+    diff = a.mean - b.mean
+    standard_error_sq = var_a + var_b
+
+    # 两组方差均为0时，均值不同即视为完全显著
+    if standard_error_sq == 0.0:
+        return (0.0, 1.0) if diff == 0.0 else (math.copysign(math.inf, diff), 0.0)
+
+    t = diff / math.sqrt(standard_error_sq)
+    # Welch–Satterthwaite 自由度
+    df = standard_error_sq ** 2 / (
+        var_a ** 2 / (a.count - 1) + var_b ** 2 / (b.count - 1)
+    )
+    p_value = _regularized_incomplete_beta(df / 2.0, 0.5, df / (df + t * t))
+    return t, min(max(p_value, 0.0), 1.0)
+
+
+def _regularized_incomplete_beta(a: float, b: float, x: float) -> float:
+    """正则化不完全Beta函数 I_x(a, b)（连分式展开）"""
+    if x <= 0.0:
+        return 0.0
+    if x >= 1.0:
+        return 1.0
+
+    log_front = (
+        math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b)
+        + a * math.log(x) + b * math.log1p(-x)
+    )
+    # 连分式在 x < (a+1)/(a+b+2) 时收敛快，否则利用对称性
+    if x < (a + 1.0) / (a + b + 2.0):
+        return math.exp(log_front) * _beta_continued_fraction(a, b, x) / a
+    return 1.0 - math.exp(log_front) * _beta_continued_fraction(b, a, 1.0 - x) / b
+
+
+def _beta_continued_fraction(a: float, b: float, x: float) -> float:
+    """不完全Beta函数的连分式（Lentz算法）"""
+    tiny = 1e-300
+    c = 1.0
+    d = 1.0 - (a + b) * x / (a + 1.0)
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    result = d
+
+    for m in range(1, 300):
+        m2 = 2 * m
+        # 偶数项
+        numerator = m * (b - m) * x / ((a + m2 - 1.0) * (a + m2))
+        d = 1.0 + numerator * d
+        d = 1.0 / (d if abs(d) > tiny else tiny)
+        c = 1.0 + numerator / c
+        c = c if abs(c) > tiny else tiny
+        result *= d * c
+        # 奇数项
+        numerator = -(a + m) * (a + b + m) * x / ((a + m2) * (a + m2 + 1.0))
+        d = 1.0 + numerator * d
+        d = 1.0 / (d if abs(d) > tiny else tiny)
+        c = 1.0 + numerator / c
+        c = c if abs(c) > tiny else tiny
+        delta = d * c
+        result *= delta
+        if abs(delta - 1.0) < 1e-12:
+            break
+
+    return result
@@ -0,0 +1,104 @@
+"""哈希时间轮定时器"""
+import math
+import threading
+import time
+from typing import Dict, Generic, Hashable, List, Optional, TypeVar
+
+K = TypeVar('K', bound=Hashable)
+
+
+class TimingWheel(Generic[K]):
+    """
+    哈希时间轮
+
+    时间按 tick_seconds 划分为刻度，num_slots 个槽位循环使用，每个定时器按到期刻度放入槽位。
+    设置、重置和取消定时器都是O(1)；推进时只检查经过的槽位，
+    到期刻度超过一圈的定时器留在槽位中等待后续轮次。
+    """
+
+    def __init__(self, tick_seconds: float = 1.0, num_slots: int = 64, start: Optional[float] = None):
+        """
+        初始化时间轮
+
+        Args:
+            tick_seconds: 刻度长度（秒），决定到期时间的精度
+            num_slots: 槽位数
+            start: 起始时间（time.time()，默认当前时间）
+        """
+        self.tick_seconds = tick_seconds
+        self.num_slots = max(1, num_slots)
+        self._slots: List[Dict[K, int]] = [{} for _ in range(self.num_slots)]  # 键 -> 到期刻度
+        self._timers: Dict[K, int] = {}  # 键 -> 槽位
+        self._current_tick = int((time.time() if start is None else start) // tick_seconds)
+        self._lock = threading.Lock()
+
+    def schedule(self, key: K, deadline: float) -> None:
+        """
+        设置定时器，已存在时重置
+
+        Args:
+            key: 定时器键
+            deadline: 到期时间（time.time()）
+        """
+        with self._lock:
+            tick = max(math.ceil(deadline / self.tick_seconds), self._current_tick + 1)
+            self._remove(key)
+            slot = tick % self.num_slots
+            self._slots[slot][key] = tick
+            self._timers[key] = slot
+
+    def cancel(self, key: K) -> bool:
+        """
+        取消定时器
+
+        Args:
+            key: 定时器键
+
+        Returns:
+            bool: 定时器是否存在
+        """
+        with self._lock:
+            return self._remove(key)
+
+    def advance(self, now: Optional[float] = None) -> List[K]:
+        """
+        推进到指定时间并取出到期的定时器
+
+        Args:
+            now: 当前时间（time.time()，默认当前值）
+
+        Returns:
+            List[K]: 到期的定时器键（大致按到期时间排序）
+        """
+        target = int((time.time() if now is None else now) // self.tick_seconds)
+        expired: List[K] = []
+        with self._lock:
+            if target <= self._current_tick:
+                return expired
+            # 跨过一整圈以上时每个槽位只需检查一次
+            steps = min(target - self._current_tick, self.num_slots)
+            for step in range(1, steps + 1):
+                slot = self._slots[(self._current_tick + step) % self.num_slots]
+                if not slot:
+                    continue
+                due = [key for key, tick in slot.items() if tick <= target]
+                for key in due:
+                    del slot[key]
+                    del self._timers[key]
+                expired.extend(due)
+            self._current_tick = target
+        return expired
+
+    def __contains__(self, key: K) -> bool:
+        return key in self._timers
+
+    def __len__(self) -> int:
+        return len(self._timers)
+
+    def _remove(self, key: K) -> bool:
+        """在持有锁的情况下移除定时器"""
+        slot = self._timers.pop(key, None)
+        if slot is None:
+            return False
+        del self._slots[slot][key]
+        return True
@@ -7,7 +7,10 @@ from src.models.user import (
 )
 from src.services.user_profile_service import UserProfileService
 from src.services.matching_service import MatchingService
-from src.services.algorithm_optimization_service import AlgorithmOptimizationService
+from src.services.algorithm_optimization_service import (
+    AlgorithmOptimizationService,
+    SceneFeedbackStore
+)
 from src.models.optimization import (
     FeedbackData, WeightAdjustment, ABTestConfig, ABTestResult, PerformanceMetrics
 )
@@ -108,6 +111,73 @@ class TestFeedbackCollection:
         assert all(fb.scene == "考研自习室" for fb in feedbacks)
 
 
+class TestSceneFeedbackStore:
+    """测试场景反馈存储"""
+    
+    def _feedback(self, created_at, satisfaction=4.0, quality=8.0, accuracy=3.0):
+        """构造指定时间的反馈"""
+        return FeedbackData(
+            feedback_id=f"fb_{created_at.isoformat()}",
+            user_id="user1",
+            match_id="match1",
+            scene="考研自习室",
+            satisfaction_score=satisfaction,
+            conversation_quality=quality,
+            match_accuracy=accuracy,
+            created_at=created_at
+        )
+    
+    def test_range_query_is_ordered_and_inclusive(self):
+        """测试时间范围查询"""
+        store = SceneFeedbackStore()
+        base = datetime(2026, 10, 1, 12, 0)
+        # 乱序插入
+        for offset in [3, 0, 5, 1, 4, 2]:
+            store.add(self._feedback(base + timedelta(days=offset)))
+        
+        result = store.range(base + timedelta(days=1), base + timedelta(days=3))
+        
+        assert [fb.created_at for fb in result] == [
+            base + timedelta(days=1),
+            base + timedelta(days=2),
+            base + timedelta(days=3)
+        ]
+        assert len(store.range()) == 6
+    
+    def test_aggregate_matches_rescan(self):
+        """测试日汇总结果与逐条累加一致"""
+        store = SceneFeedbackStore()
+        base = datetime(2026, 10, 1, 0, 30)
+        feedbacks = []
+        for i in range(60):
+            feedback = self._feedback(
+                base + timedelta(hours=7 * i),
+                satisfaction=(i % 5) + 0.5,
+                quality=(i % 10) + 0.25,
+                accuracy=(i % 4) + 1.0
+            )
+            feedbacks.append(feedback)
+            store.add(feedback)
+        
+        start = base + timedelta(days=2, hours=5)
+        end = base + timedelta(days=11, hours=3)
+        expected = [fb for fb in feedbacks if start <= fb.created_at <= end]
+        
+        count, satisfaction, quality, accuracy = store.aggregate(start, end)
+        
+        assert count == len(expected)
+        assert satisfaction == pytest.approx(sum(fb.satisfaction_score for fb in expected))
+        assert quality == pytest.approx(sum(fb.conversation_quality for fb in expected))
+        assert accuracy == pytest.approx(sum(fb.match_accuracy for fb in expected))
+    
+    def test_aggregate_empty_range(self):
+        """测试空范围汇总"""
+        store = SceneFeedbackStore()
+        store.add(self._feedback(datetime(2026, 10, 1, 12, 0)))
+        
+        assert store.aggregate(datetime(2026, 11, 1), datetime(2026, 11, 2)) == (0, 0.0, 0.0, 0.0)
+
+
 class TestWeightAdjustment:
     """测试权重动态调整"""
     
@@ -298,6 +368,53 @@ class TestABTesting:
         
         assert group1 == group2
     
+    def _create_test(self, traffic_split=0.5):
+        """创建默认权重的测试"""
+        return self.optimization_service.create_ab_test(
+            test_name="测试",
+            scene="考研自习室",
+            control_weights={'personality': 0.25, 'interest': 0.35, 'scene': 0.30, 'emotion': 0.10},
+            treatment_weights={'personality': 0.35, 'interest': 0.30, 'scene': 0.25, 'emotion': 0.10},
+            traffic_split=traffic_split
+        )
+    
+    def test_hash_bucketing_follows_traffic_split(self):
+        """测试哈希分桶比例接近流量分配"""
+        test_config = self._create_test(traffic_split=0.3)
+        
+        groups = [
+            self.optimization_service.assign_to_test_group(test_config.test_id, f"user{i}")
+            for i in range(2000)
+        ]
+        
+        assert 0.25 < groups.count("treatment") / len(groups) < 0.35
+        for i in range(20):
+            value = self.optimization_service.bucket_value(test_config.test_id, f"user{i}")
+            assert 0.0 <= value < 1.0
+    
+    def test_hash_bucketing_extreme_splits(self):
+        """测试流量比例为0和1时的分组"""
+        none_treated = self._create_test(traffic_split=0.0)
+        all_treated = self._create_test(traffic_split=1.0)
+        
+        for i in range(50):
+            assert self.optimization_service.assign_to_test_group(none_treated.test_id, f"user{i}") == "control"
+            assert self.optimization_service.assign_to_test_group(all_treated.test_id, f"user{i}") == "treatment"
+    
+    def test_group_override(self):
+        """测试显式分组覆盖"""
+        test_config = self._create_test(traffic_split=0.0)
+        
+        self.optimization_service.set_test_group_override(test_config.test_id, "user1", "treatment")
+        assert self.optimization_service.assign_to_test_group(test_config.test_id, "user1") == "treatment"
+        assert self.optimization_service.get_test_weights(test_config.test_id, "user1") == test_config.treatment_weights
+        
+        self.optimization_service.set_test_group_override(test_config.test_id, "user1", None)
+        assert self.optimization_service.assign_to_test_group(test_config.test_id, "user1") == "control"
+        
+        with pytest.raises(ValidationError):
+            self.optimization_service.set_test_group_override(test_config.test_id, "user1", "other")
+    
     def test_get_test_weights(self):
         """测试获取测试权重"""
         control_weights = {
@@ -387,6 +504,46 @@ class TestABTesting:
         assert result.treatment_sample_size >= 10
         assert result.winner in ["control", "treatment", "tie"]
     
+    def test_evaluate_ab_test_uses_running_statistics(self):
+        """测试在线统计与逐条计算结果一致"""
+        test_config = self.optimization_service.create_ab_test(
+            test_name="测试",
+            scene="考研自习室",
+            control_weights={'personality': 0.25, 'interest': 0.35, 'scene': 0.30, 'emotion': 0.10},
+            treatment_weights={'personality': 0.35, 'interest': 0.30, 'scene': 0.25, 'emotion': 0.10},
+            min_sample_size=2
+        )
+        
+        # 分配前的反馈和其他场景的反馈
+        self.optimization_service.collect_feedback("early", "m0", "考研自习室", 3.0, 6.0, 3.0)
+        self.optimization_service.collect_feedback("early", "m0", "通用场景", 1.0, 1.0, 1.0)
+        
+        scores = {"control": [], "treatment": []}
+        early_group = self.optimization_service.assign_to_test_group(test_config.test_id, "early")
+        scores[early_group].append((3.0, 6.0))
+        
+        for i in range(40):
+            user_id = f"user{i}"
+            group = self.optimization_service.assign_to_test_group(test_config.test_id, user_id)
+            satisfaction = (i % 5) + (0.5 if group == "treatment" else 0.0)
+            quality = (i % 7) + 1.0
+            self.optimization_service.collect_feedback(
+                user_id, f"match{i}", "考研自习室", satisfaction, quality, 3.0
+            )
+            scores[group].append((satisfaction, quality))
+        
+        result = self.optimization_service.evaluate_ab_test(test_config.test_id)
+        
+        assert result.control_sample_size == len(scores["control"])
+        assert result.treatment_sample_size == len(scores["treatment"])
+        assert result.control_avg_satisfaction == pytest.approx(
+            sum(s for s, _ in scores["control"]) / len(scores["control"])
+        )
+        assert result.treatment_avg_quality == pytest.approx(
+            sum(q for _, q in scores["treatment"]) / len(scores["treatment"])
+        )
+        assert 0.0 <= result.p_value <= 1.0
+    
     def test_complete_ab_test(self):
         """测试完成A/B测试"""
         control_weights = {
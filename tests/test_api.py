@@ -13,6 +13,12 @@ from src.api.matching_api import router as matching_router
 from src.api.conversation_api import router as conversation_router
 from src.api.report_api import router as report_router
 from src.api.moderation_api import router as moderation_router
+from src.api.mental_health_api import router as mental_health_router
+from src.api.admin_api import router as admin_router
+from src.api.auth_api import create_access_token
+from src.api.dependencies import get_conversation_service
+from src.config import settings
+from src.models.conversation import ConversationCreateRequest
 
 # 注册路由
 app.include_router(auth_router)
@@ -21,6 +27,8 @@ app.include_router(matching_router)
 app.include_router(conversation_router)
 app.include_router(report_router)
 app.include_router(moderation_router)
+app.include_router(mental_health_router)
+app.include_router(admin_router)
 
 # 添加基本路由
 @app.get("/")
@@ -177,6 +185,21 @@ class TestConversationAPI:
         
         response = client.post("/api/conversations/create", json=conversation_data)
         assert response.status_code == 403  # Forbidden without auth
+    
+    def test_ai_history_and_stats_forbidden_for_non_participants(self):
+        """测试非对话参与者查询AI介入记录和统计返回403"""
+        conversation = get_conversation_service().create_conversation(ConversationCreateRequest(
+            user_a_id="user_001",
+            user_b_id="user_002",
+            scene="考研自习室"
+        ))
+        outsider_headers = {"Authorization": f"Bearer {create_access_token('user_003')}"}
+        member_headers = {"Authorization": f"Bearer {create_access_token('user_001')}"}
+        
+        for path in ("ai-history", "ai-stats"):
+            url = f"/api/conversations/{conversation.conversation_id}/{path}"
+            assert client.get(url, headers=outsider_headers).status_code == 403
+            assert client.get(url, headers=member_headers).status_code == 200
 
 
 class TestReportAPI:
@@ -208,6 +231,49 @@ class TestModerationAPI:
         assert response.status_code == 403  # Forbidden without auth
 
 
+class TestMentalHealthAPI:
+    """心理健康API测试"""
+    
+    def test_alerts_require_staff(self, monkeypatch):
+        """测试预警与转介处理接口仅限值班人员"""
+        monkeypatch.setattr(settings, "staff_user_ids", ["staff_001"])
+        user_headers = {"Authorization": f"Bearer {create_access_token('user_001')}"}
+        staff_headers = {"Authorization": f"Bearer {create_access_token('staff_001')}"}
+        
+        assert client.get("/api/mental-health/alerts", headers=user_headers).status_code == 403
+        assert client.get("/api/mental-health/referrals/pending", headers=user_headers).status_code == 403
+        response = client.put(
+            "/api/mental-health/alerts/alert_001/status",
+            json={"status": "dismissed"},
+            headers=user_headers
+        )
+        assert response.status_code == 403
+        
+        assert client.get("/api/mental-health/alerts", headers=staff_headers).status_code == 200
+        # 普通用户仍可查看自己的转介
+        assert client.get("/api/mental-health/referrals", headers=user_headers).status_code == 200
+
+
+class TestAdminAPI:
+    """运维管理API测试"""
+    
+    def test_embedding_job_requires_staff(self, monkeypatch):
+        """测试消息嵌入批处理任务仅限工作人员触发"""
+        monkeypatch.setattr(settings, "staff_user_ids", ["staff_001"])
+        user_headers = {"Authorization": f"Bearer {create_access_token('user_001')}"}
+        staff_headers = {"Authorization": f"Bearer {create_access_token('staff_001')}"}
+        
+        response = client.post("/api/admin/embedding-jobs", json={}, headers=user_headers)
+        assert response.status_code == 403
+        
+        response = client.post(
+            "/api/admin/embedding-jobs",
+            json={"job_name": "../outside"},
+            headers=staff_headers
+        )
+        assert response.status_code == 400
+
+
 class TestHealthCheck:
     """健康检查测试"""
     
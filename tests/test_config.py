@@ -23,3 +23,9 @@ def test_security_config():
     assert settings.secret_key is not None
     assert len(settings.secret_key) > 0
     assert settings.algorithm == "HS256"
+
+
+def test_personality_inference_backend_config():
+    """测试人格识别推理后端配置"""
+    assert settings.personality_inference_backend in ('fp32', 'int8', 'onnx')
+    assert settings.personality_onnx_path
@@ -0,0 +1,92 @@
+"""文本嵌入缓存测试"""
+import pytest
+from src.utils.embedding_cache import EmbeddingCache, NUMPY_AVAILABLE
+
+if NUMPY_AVAILABLE:
+    import numpy as np
+
+
+class TestEmbeddingCacheMemory:
+    """内存层测试类"""
+
+    def test_make_key_is_content_addressed(self):
+        """测试相同内容得到相同键"""
+        key1 = EmbeddingCache.make_key("我喜欢读书", "bert-base-chinese")
+        key2 = EmbeddingCache.make_key("我喜欢读书", "bert-base-chinese")
+        key3 = EmbeddingCache.make_key("我喜欢读书", "other-model")
+
+        assert key1 == key2
+        assert key1 != key3
+
+    def test_put_and_get(self):
+        """测试写入和读取"""
+        cache = EmbeddingCache(max_entries=10)
+        key = EmbeddingCache.make_key("文本")
+
+        assert cache.get(key) is None
+        cache.put(key, [0.1, 0.2, 0.3])
+        assert cache.get(key) == [0.1, 0.2, 0.3]
+
+        stats = cache.get_stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+
+    def test_lru_eviction(self):
+        """测试超出容量时淘汰最久未使用的条目"""
+        cache = EmbeddingCache(max_entries=2)
+        cache.put('a', [1.0])
+        cache.put('b', [2.0])
+        cache.get('a')
+        cache.put('c', [3.0])
+
+        assert len(cache) == 2
+        assert cache.get('b') is None
+        assert cache.get('a') == [1.0]
+        assert cache.get('c') == [3.0]
+
+    def test_get_many(self):
+        """测试批量读取只返回命中的条目"""
+        cache = EmbeddingCache()
+        cache.put('a', [1.0])
+        cache.put('b', [2.0])
+
+        found = cache.get_many(['a', 'b', 'missing'])
+
+        assert found == {'a': [1.0], 'b': [2.0]}
+
+
+@pytest.mark.skipif(not NUMPY_AVAILABLE, reason="numpy not available")
+class TestEmbeddingCacheDisk:
+    """磁盘层测试类"""
+
+    def test_disk_tier_survives_memory_eviction(self, tmp_path):
+        """测试内存层淘汰后仍可从磁盘层读取"""
+        cache = EmbeddingCache(max_entries=1, disk_path=str(tmp_path / 'emb.dat'), disk_capacity=10, dim=4)
+        cache.put('a', np.array([1.0, 2.0, 3.0, 4.0]))
+        cache.put('b', np.array([5.0, 6.0, 7.0, 8.0]))
+
+        vector = cache.get('a')
+
+        assert vector is not None
+        assert np.allclose(vector, [1.0, 2.0, 3.0, 4.0])
+
+    def test_disk_tier_persists_after_flush(self, tmp_path):
+        """测试flush后重新打开仍可读取"""
+        path = str(tmp_path / 'emb.dat')
+        cache = EmbeddingCache(disk_path=path, disk_capacity=10, dim=4)
+        cache.put('a', np.array([0.5, 0.25, 0.125, 1.0]))
+        cache.flush()
+
+        reopened = EmbeddingCache(disk_path=path, disk_capacity=10, dim=4)
+
+        assert np.allclose(reopened.get('a'), [0.5, 0.25, 0.125, 1.0])
+
+    def test_disk_tier_wraps_around(self, tmp_path):
+        """测试磁盘层写满后覆盖最早的槽位"""
+        cache = EmbeddingCache(max_entries=1, disk_path=str(tmp_path / 'emb.dat'), disk_capacity=2, dim=2)
+        cache.put('a', np.array([1.0, 1.0]))
+        cache.put('b', np.array([2.0, 2.0]))
+        cache.put('c', np.array([3.0, 3.0]))
+
+        assert cache.get('a') is None
+        assert cache.get_stats()['disk_entries'] == 2
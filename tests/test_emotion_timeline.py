@@ -0,0 +1,104 @@
+"""用户情绪时间序列测试"""
+import pytest
+from datetime import datetime, timedelta
+
+from src.models.mental_health import EmotionState
+from src.utils.emotion_timeline import EmotionTimeline
+
+
+def _emotion(timestamp, emotion_type='neutral', intensity=0.3, keywords=None):
+    """构造情绪记录"""
+    return EmotionState(
+        user_id="user_001",
+        emotion_type=emotion_type,
+        intensity=intensity,
+        detected_keywords=keywords or [],
+        source_message_id=None,
+        timestamp=timestamp
+    )
+
+
+class TestEmotionTimeline:
+    """用户情绪时间序列测试类"""
+
+    def setup_method(self):
+        """每个测试前的设置"""
+        self.timeline = EmotionTimeline(critical_keywords={'想死'})
+        self.now = datetime.now().replace(hour=12, minute=0, second=0, microsecond=0)
+
+    def test_consecutive_negative_days(self):
+        """测试连续负面日从最近一天向前计算，遇到非负面日中断"""
+        self.timeline.append(_emotion(self.now - timedelta(days=4), 'anxious', 0.7))
+        self.timeline.append(_emotion(self.now - timedelta(days=3), 'positive', 0.6))
+        for day in (2, 1, 0):
+            self.timeline.append(_emotion(self.now - timedelta(days=day), 'depressed', 0.6))
+
+        summary = self.timeline.summarize(self.now - timedelta(days=7))
+
+        assert summary.negative_days == 3
+        assert summary.last_negative_date.date() == self.now.date()
+
+    def test_day_turns_negative_later(self):
+        """测试当天稍后出现负面情绪时接上之前的连续负面日"""
+        self.timeline.append(_emotion(self.now - timedelta(days=1), 'anxious', 0.7))
+        self.timeline.append(_emotion(self.now - timedelta(hours=2), 'neutral', 0.3))
+        assert self.timeline.summarize(self.now - timedelta(days=7)).negative_days == 0
+
+        self.timeline.append(_emotion(self.now, 'anxious', 0.8))
+        assert self.timeline.summarize(self.now - timedelta(days=7)).negative_days == 2
+
+    def test_stability_statistics_match_records(self):
+        """测试窗口统计与逐条计算一致，且只统计窗口内的记录"""
+        records = [
+            _emotion(self.now - timedelta(days=9), 'depressed', 0.9),
+            _emotion(self.now - timedelta(days=2), 'anxious', 0.6),
+            _emotion(self.now - timedelta(days=1), 'positive', 0.8),
+            _emotion(self.now - timedelta(hours=1), 'neutral', 0.3),
+        ]
+        for record in records:
+            self.timeline.append(record)
+
+        summary = self.timeline.summarize(self.now - timedelta(days=7))
+        intensities = [0.6, 0.8, 0.3]
+        mean = sum(intensities) / len(intensities)
+
+        assert summary.count == 3
+        assert summary.negative_count == 1
+        assert summary.stats.population_variance == pytest.approx(
+            sum((x - mean) ** 2 for x in intensities) / len(intensities)
+        )
+        assert summary.has_severe_depression is False
+        assert summary.recent == records[1:]
+
+    def test_critical_keywords_flag(self):
+        """测试危机关键词标记"""
+        self.timeline.append(_emotion(self.now, 'depressed', 0.9, keywords=['想死']))
+
+        summary = self.timeline.summarize(self.now - timedelta(days=7))
+
+        assert summary.has_critical_keywords is True
+        assert summary.has_severe_depression is True
+
+    def test_replace_record_rebuckets(self):
+        """测试替换记录（修改时间戳）后重新分桶"""
+        for _ in range(3):
+            emotion = _emotion(self.now, 'anxious', 0.7)
+            self.timeline.append(emotion)
+        for day, emotion in enumerate(list(self.timeline)):
+            emotion.timestamp = self.now - timedelta(days=day)
+            self.timeline[day] = emotion
+
+        assert len(self.timeline) == 3
+        assert [e.timestamp for e in self.timeline] == sorted(e.timestamp for e in self.timeline)
+        assert self.timeline.summarize(self.now - timedelta(days=7)).negative_days == 3
+
+    def test_expire_drops_old_days(self):
+        """测试超过保留期的日桶被淘汰"""
+        self.timeline.append(_emotion(self.now - timedelta(days=40), 'anxious', 0.7))
+        self.timeline.append(_emotion(self.now - timedelta(days=1), 'anxious', 0.7))
+
+        removed = self.timeline.expire(self.now)
+
+        assert removed == 1
+        assert len(self.timeline) == 1
+        assert self.timeline[-1].timestamp == self.now - timedelta(days=1)
@@ -0,0 +1,93 @@
+"""匹配候选排除过滤器测试"""
+from datetime import datetime, timedelta
+from src.models.conversation import ConversationCreateRequest
+from src.services.conversation_service import ConversationService
+from src.services.content_moderation_service import ContentModerationService
+from src.models.moderation import Penalty
+from src.utils.exclusion_filter import ExclusionFilter
+
+
+class TestExclusionFilter:
+    """排除过滤器测试类"""
+    
+    def test_exclude_pair_is_symmetric(self):
+        """测试排除关系是双向的"""
+        exclusion_filter = ExclusionFilter()
+        exclusion_filter.exclude_pair("a", "b")
+        
+        assert exclusion_filter.is_excluded("a", "b")
+        assert exclusion_filter.is_excluded("b", "a")
+        assert not exclusion_filter.is_excluded("a", "c")
+    
+    def test_filter_candidates_keeps_order(self):
+        """测试过滤保留候选顺序"""
+        exclusion_filter = ExclusionFilter()
+        for i in range(100):
+            exclusion_filter.intern(f"user{i}")
+        exclusion_filter.exclude_pair("user0", "user42")
+        exclusion_filter.exclude_pair("user0", "user7")
+        
+        candidates = [f"user{i}" for i in range(1, 100)] + ["unknown"]
+        kept = exclusion_filter.filter_candidates("user0", candidates)
+        
+        assert kept == [c for c in candidates if c not in ("user42", "user7")]
+    
+    def test_exclusions_are_sparse(self):
+        """测试排除记录只保存实际排除的下标，与驻留用户总数无关"""
+        exclusion_filter = ExclusionFilter()
+        for i in range(20000):
+            exclusion_filter.intern(f"user{i}")
+        exclusion_filter.exclude_pair("user0", "user19999")
+        exclusion_filter.exclude_pair("user1", "user19999")
+        
+        assert exclusion_filter._excluded["user0"] == {exclusion_filter.intern("user19999")}
+        assert len(exclusion_filter._excluded["user19999"]) == 2
+        assert exclusion_filter.filter_candidates("user0", ["user19999", "user5"]) == ["user5"]
+    
+    def test_block_and_unblock(self):
+        """测试封禁和解封"""
+        exclusion_filter = ExclusionFilter()
+        exclusion_filter.block("bad")
+        
+        assert exclusion_filter.filter_candidates("a", ["bad", "good"]) == ["good"]
+        
+        exclusion_filter.unblock("bad")
+        assert exclusion_filter.filter_candidates("a", ["bad", "good"]) == ["bad", "good"]
+    
+    def test_timed_block_expires(self):
+        """测试到期后自动解封，永久封禁不会被短期封禁覆盖"""
+        exclusion_filter = ExclusionFilter()
+        exclusion_filter.block("temp", until=datetime.now() - timedelta(seconds=1))
+        exclusion_filter.block("perm")
+        exclusion_filter.block("perm", until=datetime.now() - timedelta(seconds=1))
+        
+        assert exclusion_filter.filter_candidates("a", ["temp", "perm"]) == ["temp"]
+
+
+class TestExclusionFilterWiring:
+    """排除过滤器与各服务的集成测试类"""
+    
+    def test_conversation_creation_excludes_pair(self):
+        """测试创建对话后双方互相排除"""
+        exclusion_filter = ExclusionFilter()
+        service = ConversationService(exclusion_filter=exclusion_filter)
+        service.create_conversation(ConversationCreateRequest(
+            user_a_id="user_a",
+            user_b_id="user_b",
+            scene="考研自习室"
+        ))
+        
+        assert exclusion_filter.is_excluded("user_a", "user_b")
+    
+    def test_blocking_penalty_blocks_user(self):
+        """测试暂停和封号处罚使用户不出现在匹配中，警告不影响"""
+        exclusion_filter = ExclusionFilter()
+        service = ContentModerationService(exclusion_filter=exclusion_filter)
+        
+        service.apply_penalty("warned", "v1", Penalty.TYPE_WARNING)
+        service.apply_penalty("suspended", "v2", Penalty.TYPE_SUSPEND)
+        service.apply_penalty("banned", "v3", Penalty.TYPE_BAN)
+        
+        assert exclusion_filter.filter_candidates(
+            "user", ["warned", "suspended", "banned"]
+        ) == ["warned"]
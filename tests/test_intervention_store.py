@@ -0,0 +1,107 @@
+"""AI介入记录存储与空闲淘汰测试"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.models.conversation import AIIntervention
+from src.services.dialogue_assistant_service import DialogueAssistantService
+from src.utils.intervention_store import InterventionStore
+
+
+def make_intervention(intervention_id: str, conversation_id: str = "conv_1", **kwargs) -> AIIntervention:
+    """创建测试用介入记录"""
+    return AIIntervention(
+        intervention_id=intervention_id,
+        conversation_id=conversation_id,
+        trigger_type=kwargs.get('trigger_type', "silence"),
+        intervention_type=kwargs.get('intervention_type', "topic_suggestion"),
+        content="建议话题",
+        timestamp=kwargs.get('timestamp', datetime.now())
+    )
+
+
+class TestInterventionStore:
+    """AI介入记录存储测试类"""
+
+    def setup_method(self):
+        """每个测试前的设置"""
+        self.store = InterventionStore(max_per_conversation=3, max_conversations=2)
+
+    def test_ring_buffer_keeps_counters(self):
+        """测试缓冲区只保留最近N条，聚合计数包含被挤出的记录"""
+        for i in range(5):
+            trigger = "silence" if i % 2 == 0 else "emotion_conflict"
+            self.store.append(make_intervention(f"int_{i}", trigger_type=trigger))
+
+        history = self.store["conv_1"]
+        assert [item.intervention_id for item in history] == ["int_2", "int_3", "int_4"]
+        assert history.recent(2)[-1].intervention_id == "int_4"
+        stats = history.get_stats()
+        assert stats['total'] == 5
+        assert stats['retained'] == 3
+        assert stats['by_trigger'] == {"silence": 3, "emotion_conflict": 2}
+        # 被挤出的记录同时移出索引
+        assert self.store.find("int_0") is None
+        assert self.store.get_stats()['indexed'] == 3
+
+    def test_update_response_by_index(self):
+        """测试按介入ID更新响应并同步响应计数"""
+        self.store.append(make_intervention("int_1"))
+
+        self.store.update_response("int_1", "rejected")
+        updated = self.store.update_response("int_1", "accepted")
+
+        assert updated.user_response == "accepted"
+        assert self.store["conv_1"].get_stats()['by_response'] == {"accepted": 1}
+        assert self.store.update_response("missing", "accepted") is None
+
+    def test_conversation_limit_and_idle_eviction(self):
+        """测试超过对话数上限淘汰最久未介入的对话，空闲对话按时间淘汰"""
+        now = datetime.now()
+        self.store.append(make_intervention("int_1", "conv_1", timestamp=now - timedelta(hours=2)))
+        self.store.append(make_intervention("int_2", "conv_2", timestamp=now - timedelta(hours=1)))
+        self.store.append(make_intervention("int_3", "conv_3", timestamp=now))
+
+        assert "conv_1" not in self.store
+        assert self.store.find("int_1") is None
+
+        assert self.store.evict_idle(now - timedelta(minutes=30)) == ["conv_2"]
+        assert list(self.store) == ["conv_3"]
+
+
+class TestDialogueStateEviction:
+    """对话助手空闲状态淘汰测试类"""
+
+    @pytest.fixture
+    def service(self):
+        """创建对话助手服务实例"""
+        return DialogueAssistantService(history_size=2, idle_seconds=3600)
+
+    def test_update_user_response_checks_conversation(self, service):
+        """测试介入记录不属于指定对话时报错"""
+        intervention = service.record_intervention("conv_1", "silence", "topic_suggestion", "话题")
+
+        with pytest.raises(ValueError):
+            service.update_user_response(intervention.intervention_id, "conv_2", "accepted")
+
+        service.update_user_response(intervention.intervention_id, "conv_1", "accepted")
+        assert service.get_intervention_stats("conv_1")['by_response'] == {"accepted": 1}
+        assert service.get_intervention_stats("conv_2")['total'] == 0
+
+    def test_evict_idle_state(self, service):
+        """测试淘汰空闲对话的最后消息时间、沉默定时器和默认偏好，保留关闭介入的偏好"""
+        now = datetime.now()
+        service.update_last_message_time("conv_old", now - timedelta(hours=2))
+        service.update_last_message_time("conv_new", now + timedelta(hours=1))
+        service.record_user_preference("user_enabled", ai_intervention_enabled=True)
+        service.record_user_preference("user_disabled", ai_intervention_enabled=False)
+
+        evicted = service.evict_idle(now + timedelta(hours=1, minutes=30))
+
+        assert evicted['conversations'] == 1
+        assert evicted['preferences'] == 1
+        assert "conv_old" not in service.last_message_time
+        assert "conv_old" not in service.silence_timers
+        assert "conv_new" in service.last_message_time
+        assert service.get_user_preference("user_enabled") is None
+        assert service.get_user_preference("user_disabled").ai_intervention_enabled is False
@@ -0,0 +1,51 @@
+"""关键词自动机测试"""
+import random
+
+from src.services.mental_health_service import MentalHealthService
+from src.utils.keyword_automaton import KeywordAutomaton
+
+
+class TestKeywordAutomaton:
+    """关键词自动机测试类"""
+
+    def test_overlapping_keywords(self):
+        """测试重叠和互为前后缀的关键词均被命中"""
+        automaton = KeywordAutomaton([
+            ('he', 1), ('she', 2), ('his', 3), ('hers', 4), ('好', 5), ('不好', 6)
+        ])
+
+        assert automaton.find_all('ushers') == [('he', 1), ('she', 2), ('hers', 4)]
+        assert automaton.find_all('今天不好') == [('好', 5), ('不好', 6)]
+        assert automaton.find_all('') == []
+
+    def test_same_keyword_in_multiple_categories(self):
+        """测试同一关键词关联多个附加信息，且每项只返回一次"""
+        automaton = KeywordAutomaton([('烦', 'a'), ('烦', 'b')])
+
+        assert automaton.find_all('烦烦烦') == [('烦', 'a'), ('烦', 'b')]
+
+    def test_matches_substring_search(self):
+        """测试结果与逐个子串查找一致"""
+        service = MentalHealthService()
+        keywords = [
+            word
+            for words in list(service.NEGATIVE_KEYWORDS.values()) + list(service.SENTIMENT_WORDS.values())
+            for word in words
+        ]
+        alphabet = ''.join(sorted(set(''.join(keywords)))) + '的了我'
+        rng = random.Random(42)
+
+        for _ in range(200):
+            text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
+            found = [keyword for keyword, _ in service.keyword_matcher.find_all(text)]
+            assert found == [keyword for keyword in keywords if keyword in text]
+
+    def test_crisis_terms_map_to_critical_tier(self):
+        """测试危机关键词映射为最高严重程度"""
+        service = MentalHealthService()
+
+        matches = service.keyword_matcher.find_all("我不想活了，想伤害自己")
+
+        assert {keyword for keyword, _ in matches} == {'不想活', '伤害自己'}
+        assert all(severity == service.CRITICAL_SEVERITY for _, (_, severity) in matches)
+        assert all(keyword in service.CRITICAL_KEYWORDS for keyword, _ in matches)
@@ -0,0 +1,135 @@
+"""匹配事件日志测试"""
+import pytest
+from datetime import datetime
+from src.models.matching import Match
+from src.services.matching_service import MatchingService
+from src.utils.match_event_log import (
+    MatchEventLog, NUMPY_AVAILABLE, RECORD_SIZE,
+    OUTCOME_CANDIDATE, OUTCOME_PENDING, OUTCOME_ACCEPTED, OUTCOME_REJECTED
+)
+from src.utils.exceptions import ValidationError
+
+
+def _match(i, scene="考研自习室"):
+    """构造匹配记录"""
+    return Match(
+        match_id=f"match{i}",
+        user_a_id="user_a",
+        user_b_id=f"user{i}",
+        scene=scene,
+        match_score=90.0 - i,
+        match_reason="",
+        personality_score=80.0,
+        interest_score=70.0 + i,
+        scene_score=60.0,
+        emotion_sync_score=50.0,
+        status='pending',
+        created_at=datetime(2026, 10, 1, 12, 0)
+    )
+
+
+class TestMatchEventLogWrite:
+    """事件日志写入测试类"""
+    
+    def test_buffered_until_flush(self, tmp_path):
+        """测试缓冲区写满或flush后才写盘"""
+        log = MatchEventLog(str(tmp_path), flush_every=10)
+        for i in range(3):
+            log.append(_match(i), 'candidate', rank=i)
+        
+        assert log.chunk_paths() == []
+        
+        log.flush()
+        
+        assert len(log.chunk_paths()) == 1
+        assert log.chunk_paths()[0].stat().st_size == 3 * RECORD_SIZE
+    
+    def test_rotation(self, tmp_path):
+        """测试分块达到上限后轮转"""
+        log = MatchEventLog(str(tmp_path), max_records_per_chunk=4, flush_every=3)
+        for i in range(10):
+            log.append(_match(i), 'candidate', rank=i)
+        log.flush()
+        
+        sizes = [path.stat().st_size // RECORD_SIZE for path in log.chunk_paths()]
+        
+        assert sizes == [4, 4, 2]
+    
+    def test_resume_existing_chunk(self, tmp_path):
+        """测试重新打开后在最后一个分块续写"""
+        log = MatchEventLog(str(tmp_path), max_records_per_chunk=4, flush_every=1)
+        for i in range(5):
+            log.append(_match(i), 'candidate')
+        
+        reopened = MatchEventLog(str(tmp_path), max_records_per_chunk=4, flush_every=1)
+        for i in range(5):
+            reopened.append(_match(i), 'candidate')
+        
+        sizes = [path.stat().st_size // RECORD_SIZE for path in reopened.chunk_paths()]
+        assert sizes == [4, 4, 2]
+    
+    def test_invalid_outcome(self, tmp_path):
+        """测试无效结果"""
+        log = MatchEventLog(str(tmp_path))
+        
+        with pytest.raises(ValidationError):
+            log.append(_match(0), 'unknown')
+
+
+@pytest.mark.skipif(not NUMPY_AVAILABLE, reason="numpy not available")
+class TestMatchEventLogRead:
+    """事件日志回读测试类"""
+    
+    def test_memory_mapped_readback(self, tmp_path):
+        """测试内存映射回读字段"""
+        log = MatchEventLog(str(tmp_path), max_records_per_chunk=3)
+        log.append_ranked([_match(i) for i in range(5)], returned=2)
+        log.flush()
+        
+        events = log.read_all()
+        
+        assert len(events) == 5
+        assert events['rank'].tolist() == [0, 1, 2, 3, 4]
+        assert events['outcome'].tolist() == [OUTCOME_PENDING] * 2 + [OUTCOME_CANDIDATE] * 3
+        assert events['interest_score'].tolist() == [70.0, 71.0, 72.0, 73.0, 74.0]
+        assert events[0]['match_id'].decode() == "match0"
+        assert events[0]['scene'].decode('utf-8') == "考研自习室"
+        assert events[0]['created_at'] == datetime(2026, 10, 1, 12, 0).timestamp()
+    
+    def test_truncated_tail_ignored(self, tmp_path):
+        """测试忽略不完整的尾部记录"""
+        log = MatchEventLog(str(tmp_path), flush_every=1)
+        log.append(_match(0), 'candidate')
+        with open(log.chunk_paths()[0], 'ab') as f:
+            f.write(b'\0' * (RECORD_SIZE // 2))
+        
+        assert len(log.read_all()) == 1
+    
+    def test_reopen_truncates_partial_record(self, tmp_path):
+        """测试重新打开时截掉不完整的尾部记录，续写的记录保持对齐"""
+        log = MatchEventLog(str(tmp_path), flush_every=1)
+        log.append(_match(0), 'candidate')
+        with open(log.chunk_paths()[0], 'ab') as f:
+            f.write(b'x' * 10)
+        
+        reopened = MatchEventLog(str(tmp_path), flush_every=1)
+        reopened.append(_match(2), 'accepted')
+        
+        assert reopened.chunk_paths()[0].stat().st_size == 2 * RECORD_SIZE
+        events = reopened.read_all()
+        assert [event['match_id'].decode() for event in events] == ["match0", "match2"]
+        assert events['outcome'].tolist() == [OUTCOME_CANDIDATE, OUTCOME_ACCEPTED]
+    
+    def test_matching_service_logs_outcomes(self, tmp_path):
+        """测试匹配服务记录接受和拒绝事件"""
+        log = MatchEventLog(str(tmp_path), flush_every=1)
+        matching_service = MatchingService(event_log=log)
+        for i in range(2):
+            match = _match(i)
+            matching_service._matches[match.match_id] = match
+        
+        matching_service.accept_match("match0", "user_a")
+        matching_service.reject_match("match1", "user1")
+        
+        events = log.read_all()
+        assert events['outcome'].tolist() == [OUTCOME_ACCEPTED, OUTCOME_REJECTED]
@@ -0,0 +1,147 @@
+"""匹配重新计算调度器测试"""
+import threading
+import time
+
+from src.models.user import (
+    UserRegistrationRequest, MBTITestRequest, BigFiveTestRequest,
+    InterestSelectionRequest, SceneSelectionRequest
+)
+from src.services.match_recalculation_scheduler import MatchRecalculationScheduler
+from src.services.matching_service import MatchingService
+from src.services.recommendation_service import RecommendationService
+from src.services.user_profile_service import UserProfileService
+
+
+class _RecordingRecommendationService:
+    """记录 request_refresh 调用的推荐列表服务"""
+
+    def __init__(self):
+        self.calls = []
+        self.called = threading.Event()
+
+    def request_refresh(self, user_id, scene):
+        self.calls.append((user_id, scene))
+        self.called.set()
+        return True
+
+
+class TestMatchRecalculationScheduler:
+    """匹配重新计算调度器测试类"""
+
+    def setup_method(self):
+        """每个测试前的设置"""
+        self.recommendation_service = _RecordingRecommendationService()
+        self.scheduler = MatchRecalculationScheduler(self.recommendation_service, debounce_seconds=10.0)
+
+    def teardown_method(self):
+        """每个测试后的清理"""
+        self.scheduler.close()
+
+    def test_repeated_marks_coalesce(self):
+        """测试窗口内的重复标记合并为一次重算"""
+        for _ in range(5):
+            self.scheduler.mark_user_dirty("user_001", ["考研自习室", "兴趣社群"])
+
+        stats = self.scheduler.get_stats()
+        assert stats['pending'] == 2
+        assert stats['coalesced'] == 8
+
+        assert self.scheduler.flush() == 2
+        assert sorted(self.recommendation_service.calls) == [
+            ("user_001", "兴趣社群"), ("user_001", "考研自习室")
+        ]
+
+    def test_debounce_window(self):
+        """测试窗口到期前不重算"""
+        self.scheduler.mark_dirty("user_001", "考研自习室")
+
+        assert self.scheduler.run_due() == 0
+        assert self.scheduler.is_pending("user_001", "考研自习室")
+
+        assert self.scheduler.run_due(now=time.monotonic() + 10.0) == 1
+        assert not self.scheduler.is_pending("user_001", "考研自习室")
+        assert self.recommendation_service.calls == [("user_001", "考研自习室")]
+
+    def test_mark_after_recalculation_starts_new_window(self):
+        """测试重算后的新标记开启新的窗口"""
+        self.scheduler.mark_dirty("user_001", "考研自习室")
+        self.scheduler.flush()
+        self.scheduler.mark_dirty("user_001", "考研自习室")
+
+        assert self.scheduler.get_stats()['pending'] == 1
+        assert self.scheduler.flush() == 1
+        assert len(self.recommendation_service.calls) == 2
+
+    def test_background_workers(self):
+        """测试后台线程在窗口到期后重算"""
+        scheduler = MatchRecalculationScheduler(self.recommendation_service, debounce_seconds=0.05)
+        scheduler.start()
+        try:
+            scheduler.mark_dirty("user_001", "考研自习室")
+            scheduler.mark_dirty("user_001", "考研自习室")
+
+            assert self.recommendation_service.called.wait(timeout=5.0)
+        finally:
+            scheduler.close()
+
+        assert self.recommendation_service.calls == [("user_001", "考研自习室")]
+        assert scheduler.get_stats()['recalculated'] == 1
+
+
+class TestRecalculationRefreshesRecommendations:
+    """调度器刷新推荐列表测试类"""
+
+    def setup_method(self):
+        """每个测试前的设置"""
+        self.profile_service = UserProfileService()
+        self.matching_service = MatchingService(self.profile_service)
+        self.user_ids = [self._create_complete_user(i) for i in range(3)]
+        self.recommendation_service = RecommendationService(self.matching_service, self.profile_service)
+        self.scheduler = MatchRecalculationScheduler(self.recommendation_service, debounce_seconds=10.0)
+
+    def _create_complete_user(self, i):
+        """创建完整用户"""
+        user = self.profile_service.register_user(UserRegistrationRequest(
+            username=f"用户{i}",
+            email=f"user{i}@example.com",
+            password="password123",
+            school="清华大学",
+            major="计算机科学",
+            grade=2
+        ))
+        self.profile_service.process_mbti_test(MBTITestRequest(user_id=user.user_id, answers=[3] * 60))
+        self.profile_service.process_big_five_test(BigFiveTestRequest(user_id=user.user_id, answers=[3] * 50))
+        self.profile_service.update_interests(InterestSelectionRequest(
+            user_id=user.user_id,
+            academic_interests=["考研"],
+            career_interests=["软件工程师"],
+            hobby_interests=["阅读"]
+        ))
+        self.profile_service.update_scenes(SceneSelectionRequest(user_id=user.user_id, scenes=["考研自习室"]))
+        self.profile_service.generate_initial_profile(user.user_id)
+        return user.user_id
+
+    def test_skips_lists_nobody_requested(self):
+        """测试没有人请求过的列表不计算匹配"""
+        self.scheduler.mark_dirty(self.user_ids[0], "考研自习室")
+
+        assert self.scheduler.flush() == 1
+        assert self.scheduler.get_stats()['skipped'] == 1
+        assert self.matching_service.get_match_history(self.user_ids[0]) == []
+
+    def test_refreshes_served_list_once(self):
+        """测试刷新 /find 读取的列表，已被监听器刷新的列表不重复计算"""
+        user_id = self.user_ids[0]
+        self.recommendation_service.get_recommendations(user_id, "考研自习室")
+        computed_at = self.recommendation_service.get_freshness(user_id, "考研自习室")
+
+        # 画像变化：监听器标记过期，调度器负责刷新（未启动后台线程时同步执行）
+        self.profile_service.update_profile(user_id, {'hobby_interests': ["音乐"]})
+        self.scheduler.mark_dirty(user_id, "考研自习室")
+        self.recommendation_service.run_pending()
+        refreshed_at = self.recommendation_service.get_freshness(user_id, "考研自习室")
+        assert refreshed_at > computed_at
+
+        assert self.scheduler.flush() == 1
+        assert self.scheduler.get_stats()['skipped'] == 1
+        assert self.recommendation_service.get_freshness(user_id, "考研自习室") == refreshed_at
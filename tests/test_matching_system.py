@@ -1,5 +1,6 @@
 """智能匹配系统测试"""
 import pytest
+from datetime import datetime, timedelta
 from src.models.user import (
     UserRegistrationRequest, MBTITestRequest, BigFiveTestRequest,
     InterestSelectionRequest, SceneSelectionRequest, BigFiveScores
@@ -551,3 +552,144 @@ class TestMatchResult:
         assert 'mbti_type' in result.personality_traits
         assert 'academic_interests' in result.interest_tags
         assert len(result.scene_needs) > 0
+
+
+class TestMatchHistoryIndex:
+    """测试匹配记录索引与过期清理"""
+    
+    def setup_method(self):
+        """每个测试方法前的设置"""
+        self.profile_service = UserProfileService()
+        self.matching_service = MatchingService(self.profile_service)
+        
+        self.users = [
+            self._create_complete_user(f"用户{i}", f"user{i}@example.com")
+            for i in range(3)
+        ]
+    
+    def _create_complete_user(self, username, email):
+        """创建完整用户"""
+        user = self.profile_service.register_user(
+            UserRegistrationRequest(
+                username=username,
+                email=email,
+                password="password123",
+                school="清华大学",
+                major="计算机科学",
+                grade=2
+            )
+        )
+        self.profile_service.process_mbti_test(
+            MBTITestRequest(user_id=user.user_id, answers=[3] * 60)
+        )
+        self.profile_service.process_big_five_test(
+            BigFiveTestRequest(user_id=user.user_id, answers=[3] * 50)
+        )
+        self.profile_service.update_interests(
+            InterestSelectionRequest(
+                user_id=user.user_id,
+                academic_interests=["考研"],
+                career_interests=["软件工程师"],
+                hobby_interests=["阅读"]
+            )
+        )
+        self.profile_service.update_scenes(
+            SceneSelectionRequest(user_id=user.user_id, scenes=["考研自习室"])
+        )
+        self.profile_service.generate_initial_profile(user.user_id)
+        return user
+    
+    def test_pending_matches_deduplicated(self):
+        """测试重复查找时同一对用户只保留一条待处理匹配"""
+        user_id = self.users[0].user_id
+        first = self.matching_service.find_matches(user_id, "考研自习室")
+        second = self.matching_service.find_matches(user_id, "考研自习室")
+        
+        assert {m.match_id for m in first} == {m.match_id for m in second}
+        assert len(self.matching_service.get_match_history(user_id)) == 2
+    
+    def test_pending_expiry_heap_compacted(self):
+        """测试反复刷新同一批匹配时过期堆中的过时条目被压缩"""
+        user_id = self.users[0].user_id
+        for _ in range(200):
+            matches = self.matching_service.find_matches(user_id, "考研自习室")
+        
+        live = len(self.matching_service._pending_by_pair)
+        assert live == 2
+        assert len(self.matching_service._pending_expiry) <= 2 * live + 65
+        # 压缩后过期清理仍然有效
+        expired = self.matching_service.expire_pending_matches(
+            now=datetime.now() + timedelta(days=8)
+        )
+        assert expired == 2
+        assert self.matching_service._pending_expiry == []
+        with pytest.raises(NotFoundError):
+            self.matching_service.get_match(matches[0].match_id)
+    
+    def test_history_newest_first(self):
+        """测试历史记录按创建时间倒序"""
+        user_id = self.users[0].user_id
+        matches = self.matching_service.find_matches(user_id, "考研自习室")
+        self.matching_service.find_matches(user_id, "兴趣社群")
+        
+        history = self.matching_service.get_match_history(user_id)
+        
+        assert len(history) == 4
+        assert [m.created_at for m in history] == sorted(
+            (m.created_at for m in history), reverse=True
+        )
+        assert history[-1].scene == "考研自习室"
+        assert len(self.matching_service.get_match_history(user_id, limit=1)) == 1
+        # 对方的历史中也能查到
+        other_id = matches[0].user_b_id
+        assert matches[0].match_id in [
+            m.match_id for m in self.matching_service.get_match_history(other_id)
+        ]
+    
+    def test_accepted_candidate_excluded(self):
+        """测试已接受的用户不再被推荐"""
+        user_id = self.users[0].user_id
+        match = self.matching_service.find_matches(user_id, "考研自习室", limit=1)[0]
+        self.matching_service.accept_match(match.match_id, user_id)
+        
+        new_matches = self.matching_service.find_matches(user_id, "考研自习室")
+        
+        assert [m.user_b_id for m in new_matches] != []
+        assert match.user_b_id not in [m.user_b_id for m in new_matches]
+        assert self.matching_service.get_match(match.match_id).status == "accepted"
+    
+    def test_rejected_candidate_excluded_both_ways(self):
+        """测试拒绝后双方都不再互相推荐"""
+        user_id = self.users[0].user_id
+        match = self.matching_service.find_matches(user_id, "考研自习室", limit=1)[0]
+        self.matching_service.reject_match(match.match_id, user_id)
+        
+        reverse_matches = self.matching_service.find_matches(match.user_b_id, "考研自习室")
+        
+        assert user_id not in [m.user_b_id for m in reverse_matches]
+    
+    def test_blocked_user_excluded(self):
+        """测试被封禁的用户不出现在候选中"""
+        blocked_id = self.users[1].user_id
+        self.matching_service.exclusion_filter.block(blocked_id)
+        
+        matches = self.matching_service.find_matches(self.users[0].user_id, "考研自习室")
+        
+        assert [m.user_b_id for m in matches] == [self.users[2].user_id]
+    
+    def test_expire_pending_matches(self):
+        """测试过期的待处理匹配被清理，已处理的保留"""
+        user_id = self.users[0].user_id
+        matches = self.matching_service.find_matches(user_id, "考研自习室")
+        self.matching_service.accept_match(matches[0].match_id, user_id)
+        
+        expired = self.matching_service.expire_pending_matches(
+            now=datetime.now() + timedelta(days=8)
+        )
+        
+        assert expired == 1
+        with pytest.raises(NotFoundError):
+            self.matching_service.get_match(matches[1].match_id)
+        assert [m.match_id for m in self.matching_service.get_match_history(user_id)] == [
+            matches[0].match_id
+        ]
@@ -293,3 +293,77 @@ class TestMentalHealthService:
         
         assert session1.anonymous_id != session2.anonymous_id
         assert session1.session_id != session2.session_id
+
+
+class TestAlertQueue:
+    """风险预警与转介队列测试类"""
+    
+    @pytest.fixture
+    def service(self):
+        """创建服务实例"""
+        return MentalHealthService()
+    
+    def test_next_alert_by_severity_then_age(self, service):
+        """测试按风险等级优先、同级按创建时间领取预警"""
+        first_high = service.create_risk_alert("user_101", "severe_depression", "测试1", 0.8)
+        critical = service.create_risk_alert("user_102", "suicide_risk", "测试2", 0.9)
+        second_high = service.create_risk_alert("user_103", "severe_depression", "测试3", 0.8)
+        
+        assert service.get_pending_alerts() == [critical, first_high, second_high]
+        
+        claimed = [service.get_next_alert() for _ in range(3)]
+        
+        assert claimed == [critical, first_high, second_high]
+        assert all(alert.status == "processing" for alert in claimed)
+        assert service.get_next_alert() is None
+        assert service.get_pending_alerts() == []
+    
+    def test_status_and_user_indexes(self, service):
+        """测试状态变化后索引和队列同步更新"""
+        alert = service.create_risk_alert("user_104", "suicide_risk", "测试", 0.9)
+        other = service.create_risk_alert("user_105", "self_harm", "测试", 0.9)
+        
+        service.update_alert_status(alert.alert_id, "resolved")
+        
+        assert service.get_alerts_by_status("resolved") == [alert]
+        assert service.get_alerts_by_status("pending") == [other]
+        assert service.get_user_alerts("user_104") == [alert]
+        assert service.get_next_alert() is other
+        
+        # 退回待处理后重新排队
+        service.update_alert_status(alert.alert_id, "pending")
+        assert service.get_next_alert() is alert
+    
+    def test_update_alert_status_errors(self, service):
+        """测试更新不存在的预警或无效状态"""
+        from src.utils.exceptions import NotFoundError, ValidationError
+        alert = service.create_risk_alert("user_106", "suicide_risk", "测试", 0.9)
+        
+        with pytest.raises(ValidationError):
+            service.update_alert_status(alert.alert_id, "unknown")
+        with pytest.raises(NotFoundError):
+            service.update_alert_status("missing", "resolved")
+    
+    def test_alert_listener_receives_new_alerts(self, service):
+        """测试新预警通知监听器"""
+        received = []
+        service.add_alert_listener(received.append)
+        
+        alert = service.create_risk_alert("user_107", "suicide_risk", "测试", 0.9)
+        service.remove_alert_listener(received.append)
+        service.create_risk_alert("user_108", "suicide_risk", "测试", 0.9)
+        
+        assert received == [alert]
+    
+    def test_referrals_by_urgency_and_user(self, service):
+        """测试转介按紧急程度排队并按用户索引"""
+        medium = service.create_professional_referral("user_109", "counseling", "测试", "medium")
+        emergency = service.create_professional_referral("user_110", "emergency", "测试", "emergency")
+        service.create_professional_referral("user_109", "counseling", "测试", "low")
+        
+        assert service.get_next_referral() is emergency
+        assert service.get_next_referral() is medium
+        assert len(service.get_user_referrals("user_109")) == 2
+        
+        service.update_referral_status(medium.referral_id, "completed")
+        assert medium.status == "completed"
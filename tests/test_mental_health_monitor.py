@@ -0,0 +1,71 @@
+"""心理健康异步监测流水线测试"""
+import threading
+
+from src.services.mental_health_monitor import MentalHealthMonitor
+from src.services.mental_health_service import MentalHealthService
+
+
+class TestMentalHealthMonitor:
+    """心理健康异步监测流水线测试类"""
+
+    def setup_method(self):
+        """每个测试前的设置"""
+        self.service = MentalHealthService()
+        self.monitor = MentalHealthMonitor(self.service, queue_size=4, num_workers=2)
+
+    def teardown_method(self):
+        """每个测试后的清理"""
+        self.monitor.close()
+
+    def test_normal_messages_are_queued(self):
+        """测试普通消息入队，处理后才产生情绪记录"""
+        assert self.monitor.submit("user_001", "感觉很焦虑", "msg_1") is True
+
+        assert len(self.service.emotion_states.get("user_001", [])) == 0
+        assert self.monitor.get_stats()['queue_depth']['normal'] == 1
+
+        assert self.monitor.run_pending() == 1
+
+        assert len(self.service.emotion_states["user_001"]) == 1
+        stats = self.monitor.get_stats()
+        assert stats['queue_depth']['normal'] == 0
+        assert stats['processed'] == 1
+        assert stats['latency']['normal']['count'] == 1
+
+    def test_critical_messages_bypass_queue(self):
+        """测试危机消息不排队，立即创建预警"""
+        for i in range(2):
+            self.monitor.submit("user_002", "今天有点烦", f"msg_{i}")
+
+        self.monitor.submit("user_003", "我不想活了", "msg_crisis")
+
+        assert len(self.service.get_pending_alerts()) == 1
+        stats = self.monitor.get_stats()
+        assert stats['critical'] == 1
+        assert stats['queue_depth']['normal'] == 2
+        assert stats['latency']['critical']['count'] == 1
+
+    def test_full_queue_drops_messages(self):
+        """测试队列已满时丢弃普通消息并计数"""
+        results = [self.monitor.submit("user_004", "今天还好", f"msg_{i}") for i in range(5)]
+
+        # 同一用户的消息进入同一分片，分片容量为 4 // 2
+        assert results == [True, True, False, False, False]
+        assert self.monitor.get_stats()['dropped'] == 3
+
+    def test_background_workers_process_messages(self):
+        """测试后台线程处理消息，危机消息走快速通道"""
+        alerted = threading.Event()
+        self.service.add_alert_listener(lambda alert: alerted.set())
+        self.monitor.start()
+
+        self.monitor.submit("user_005", "感觉很抑郁", "msg_1")
+        self.monitor.submit("user_006", "想伤害自己", "msg_2")
+
+        assert alerted.wait(timeout=5.0)
+        self.monitor.close()
+
+        stats = self.monitor.get_stats()
+        assert stats['processed'] == 2
+        assert stats['queue_depth'] == {'normal': 0, 'critical': 0}
+        assert len(self.service.emotion_states["user_005"]) == 1
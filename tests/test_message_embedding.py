@@ -0,0 +1,155 @@
+"""消息嵌入离线批处理测试"""
+import os
+import pytest
+from src.models.conversation import ConversationCreateRequest, MessageSendRequest
+from src.services.conversation_service import ConversationService
+from src.services.message_embedding_service import MessageEmbeddingService, NUMPY_AVAILABLE
+from src.utils.exceptions import AIModelError, ValidationError
+
+if NUMPY_AVAILABLE:
+    import numpy as np
+
+
+class FakeBertConfig:
+    hidden_size = 8
+
+
+class FakeBert:
+    config = FakeBertConfig()
+
+
+class FakeModel:
+    bert = FakeBert()
+
+
+class FakePersonalityService:
+    """按文本长度生成确定性向量的假人格识别服务"""
+
+    def __init__(self, ready=True):
+        self.ready = ready
+        self.model = FakeModel()
+        self.batches = []
+
+    def wait_until_ready(self, timeout=None):
+        return self.ready
+
+    def extract_personality_features_batch(self, texts, batch_size=32):
+        self.batches.append(len(texts))
+        return [np.full(8, len(text), dtype=np.float32) for text in texts]
+
+
+@pytest.mark.skipif(not NUMPY_AVAILABLE, reason="numpy not available")
+class TestMessageEmbeddingService:
+    """消息嵌入批处理服务测试类"""
+
+    @pytest.fixture
+    def conversation_service(self):
+        """创建包含消息的对话服务"""
+        service = ConversationService()
+        conversation = service.create_conversation(ConversationCreateRequest(
+            user_a_id="user_a",
+            user_b_id="user_b",
+            scene="考研自习室"
+        ))
+        for i in range(5):
+            service.send_message(MessageSendRequest(
+                conversation_id=conversation.conversation_id,
+                sender_id="user_a" if i % 2 == 0 else "user_b",
+                content="你好" * (i + 1),
+                message_type="text"
+            ))
+        return service
+
+    def test_run_embedding_job(self, conversation_service, tmp_path):
+        """测试批处理写入嵌入矩阵和ID索引"""
+        personality_service = FakePersonalityService()
+        service = MessageEmbeddingService(
+            conversation_service,
+            personality_service,
+            output_dir=str(tmp_path),
+            batch_size=2
+        )
+
+        result = service.run_embedding_job("test_job")
+
+        assert result['message_count'] == 5
+        assert result['dim'] == 8
+        assert personality_service.batches == [2, 2, 1]
+
+        matrix = service.load_embeddings("test_job")
+        assert len(matrix) == 5
+        for messages in conversation_service.messages.values():
+            for message in messages:
+                assert message.message_id in matrix
+                assert np.allclose(matrix.get(message.message_id), len(message.content))
+
+    def test_missing_message_returns_none(self, conversation_service, tmp_path):
+        """测试查询不存在的消息"""
+        service = MessageEmbeddingService(
+            conversation_service,
+            FakePersonalityService(),
+            output_dir=str(tmp_path)
+        )
+        service.run_embedding_job("test_job")
+
+        assert service.load_embeddings("test_job").get("missing") is None
+
+    def test_job_requires_model(self, conversation_service, tmp_path):
+        """测试模型不可用时拒绝执行"""
+        service = MessageEmbeddingService(
+            conversation_service,
+            FakePersonalityService(ready=False),
+            output_dir=str(tmp_path)
+        )
+
+        with pytest.raises(AIModelError):
+            service.run_embedding_job("test_job")
+
+    def test_torch_threads_restored(self, conversation_service, tmp_path):
+        """测试任务结束后（包括失败时）恢复进程级的torch线程数"""
+        torch = pytest.importorskip("torch")
+        personality_service = FakePersonalityService()
+        service = MessageEmbeddingService(
+            conversation_service,
+            personality_service,
+            output_dir=str(tmp_path),
+            num_workers=64
+        )
+        before = torch.get_num_threads()
+        during = []
+
+        def extract(texts, batch_size=32):
+            during.append(torch.get_num_threads())
+            return [np.zeros(8, dtype=np.float32) for _ in texts]
+
+        personality_service.extract_personality_features_batch = extract
+        service.run_embedding_job("test_job")
+        assert during and during[0] == max(1, (os.cpu_count() or 1) // 64)
+        assert torch.get_num_threads() == before
+
+        def fail(texts, batch_size=32):
+            raise RuntimeError("encode failed")
+
+        personality_service.extract_personality_features_batch = fail
+        with pytest.raises(RuntimeError):
+            service.run_embedding_job("test_job")
+        assert torch.get_num_threads() == before
+
+    def test_job_name_and_single_job(self, conversation_service, tmp_path):
+        """测试拒绝非法任务名称和并发运行的任务"""
+        service = MessageEmbeddingService(
+            conversation_service,
+            FakePersonalityService(),
+            output_dir=str(tmp_path)
+        )
+
+        with pytest.raises(ValidationError):
+            service.run_embedding_job("../outside")
+
+        service._job_lock.acquire()
+        try:
+            with pytest.raises(ValidationError):
+                service.run_embedding_job("test_job")
+        finally:
+            service._job_lock.release()
+        assert service.run_embedding_job("test_job")['message_count'] == 5
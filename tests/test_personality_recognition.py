@@ -1,12 +1,25 @@
 """人格识别模型测试"""
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
 import pytest
-from src.services.personality_recognition_service import PersonalityRecognitionService, ML_AVAILABLE
-from src.models.user import BigFiveScores
+from src.services import personality_recognition_service
+from src.services.personality_recognition_service import (
+    PersonalityRecognitionService,
+    PersonalityBatchScheduler,
+    ML_AVAILABLE,
+    ONNX_AVAILABLE
+)
+from src.services.user_profile_service import UserProfileService
+from src.models.user import BigFiveScores, UserRegistrationRequest
 
 # 只在ML库可用时导入
 if ML_AVAILABLE:
+    import copy
     import torch
-    from src.services.personality_recognition_service import PersonalityClassifier
+    from src.services.personality_recognition_service import PersonalityClassifier, quantize_model
 
 
 class TestPersonalityRecognitionService:
@@ -150,6 +163,238 @@ class TestPersonalityRecognitionService:
         # 验证特征向量存在
         assert features is not None
         assert len(features) > 0
+    
+    def test_embedding_cache_key_includes_backend(self, service):
+        """测试嵌入缓存键区分模型名称和推理后端"""
+        fp32_key = service._embedding_cache_key("我喜欢读书")
+        assert fp32_key == service._embedding_cache_key("我喜欢读书")
+        
+        service.backend = 'int8'
+        assert service._embedding_cache_key("我喜欢读书") != fp32_key
+        
+        service.backend = 'fp32'
+        service.model_name = "other-model"
+        assert service._embedding_cache_key("我喜欢读书") != fp32_key
+
+
+class TestLazyModelLoading:
+    """ML依赖延迟导入与后台预热测试类"""
+    
+    def test_module_import_does_not_load_torch(self):
+        """测试导入服务模块时不导入torch"""
+        code = (
+            "import sys\n"
+            "import src.services.personality_recognition_service\n"
+            "print('torch' in sys.modules, 'transformers' in sys.modules)"
+        )
+        result = subprocess.run(
+            [sys.executable, '-c', code],
+            capture_output=True,
+            text=True,
+            cwd=Path(__file__).resolve().parent.parent
+        )
+        
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip().splitlines()[-1] == "False False"
+    
+    def test_falls_back_to_simple_analysis_until_warm(self, monkeypatch):
+        """测试模型预热完成前使用简化分析"""
+        release = threading.Event()
+        
+        def slow_failing_load(self, model_name, device, backend):
+            release.wait(5)
+            self.ml_enabled = False
+            self._load_finished.set()
+        
+        monkeypatch.setattr(personality_recognition_service, 'ML_AVAILABLE', True)
+        monkeypatch.setattr(PersonalityRecognitionService, '_load_model', slow_failing_load)
+        
+        service = PersonalityRecognitionService()
+        text_data = ["我喜欢和朋友们一起出去玩。"]
+        
+        assert service.ml_enabled
+        assert not service.is_ready
+        assert service.analyze_personality(text_data) == service._analyze_personality_simple(text_data)
+        
+        release.set()
+        assert service.wait_until_ready(timeout=5) is False
+        assert not service.ml_enabled
+    
+    def test_synchronous_load_when_background_disabled(self, monkeypatch):
+        """测试关闭后台加载时在构造函数内完成加载"""
+        calls = []
+        
+        def fake_load(self, model_name, device, backend):
+            calls.append(threading.current_thread())
+            self._load_finished.set()
+        
+        monkeypatch.setattr(personality_recognition_service, 'ML_AVAILABLE', True)
+        monkeypatch.setattr(PersonalityRecognitionService, '_load_model', fake_load)
+        
+        PersonalityRecognitionService(background_load=False)
+        
+        assert calls == [threading.current_thread()]
+
+
+class FakeTokenizer:
+    """按字符切分的简易分词器，用于测试窗口切分逻辑"""
+    
+    cls_token_id = 101
+    sep_token_id = 102
+    pad_token_id = 0
+    
+    def __call__(self, texts, add_special_tokens=False):
+        return {'input_ids': [[1000 + ord(ch) % 1000 for ch in text] for text in texts]}
+
+
+class TestPersonalityWindowing:
+    """人格推理窗口切分与分桶测试类"""
+    
+    @pytest.fixture
+    def service(self):
+        """创建带简易分词器的测试服务实例"""
+        service = PersonalityRecognitionService(use_ml=False)
+        service.tokenizer = FakeTokenizer()
+        return service
+    
+    def test_short_texts_packed_into_one_window(self, service):
+        """测试短文本合并到同一窗口"""
+        windows = service._build_windows(["你好", "今天天气不错"])
+        
+        assert len(windows) == 1
+        assert windows[0][0] == FakeTokenizer.cls_token_id
+        assert windows[0][-1] == FakeTokenizer.sep_token_id
+        # 2 + 6个字符，1个分隔符，外加[CLS]和[SEP]
+        assert len(windows[0]) == 2 + 6 + 1 + 2
+    
+    def test_long_history_is_not_truncated(self, service):
+        """测试长历史被切分为多个窗口而不是截断"""
+        texts = ["字" * 300 for _ in range(5)]
+        
+        windows = service._build_windows(texts)
+        
+        assert len(windows) > 1
+        assert all(len(window) <= service.MAX_SEQ_LENGTH for window in windows)
+        content_tokens = sum(
+            1 for window in windows for token in window[1:-1]
+            if token != FakeTokenizer.sep_token_id
+        )
+        assert content_tokens == 300 * 5
+    
+    def test_single_text_longer_than_window(self, service):
+        """测试单条超长文本被切分"""
+        windows = service._build_windows(["长" * 1200])
+        
+        assert len(windows) == 3
+        assert all(len(window) <= service.MAX_SEQ_LENGTH for window in windows)
+    
+    def test_bucket_windows_groups_similar_lengths(self, service):
+        """测试窗口按长度分桶"""
+        windows = [[1] * 500, [1] * 10, [1] * 480, [1] * 12]
+        
+        buckets = service._bucket_windows(windows, batch_size=2)
+        
+        assert sorted(buckets[0]) == [1, 3]
+        assert sorted(buckets[1]) == [0, 2]
+
+
+class TestPersonalityBatchScheduler:
+    """人格推理微批调度器测试类"""
+    
+    @pytest.fixture
+    def service(self):
+        """创建测试服务实例"""
+        return PersonalityRecognitionService(use_ml=False)
+    
+    def test_scheduler_results_match_direct_analysis(self, service):
+        """测试调度结果与直接分析一致"""
+        scheduler = PersonalityBatchScheduler(service, max_batch_size=4, max_wait_ms=5)
+        text_batches = [
+            ["我喜欢和朋友们一起活动。"],
+            ["我经常感到焦虑和紧张。"],
+            [],
+            ["我做事有计划，努力实现目标。"]
+        ]
+        
+        futures = [scheduler.submit(texts) for texts in text_batches]
+        results = [future.result(timeout=5) for future in futures]
+        scheduler.close()
+        
+        expected = [service.analyze_personality(texts) for texts in text_batches]
+        assert results == expected
+    
+    def test_scheduler_coalesces_requests(self, service):
+        """测试并发请求被合并为批次"""
+        scheduler = PersonalityBatchScheduler(service, max_batch_size=8, max_wait_ms=200)
+        
+        futures = [scheduler.submit(["我喜欢探索新事物。"]) for _ in range(8)]
+        for future in futures:
+            assert isinstance(future.result(timeout=5), BigFiveScores)
+        scheduler.close()
+        
+        stats = scheduler.get_stats()
+        assert stats['requests'] == 8
+        assert stats['batches'] < 8
+        assert stats['max_batch_size'] <= 8
+    
+    def test_scheduler_scores_messages(self, service):
+        """测试消息评分请求与文本分析请求混合提交时分别合并推理"""
+        scheduler = PersonalityBatchScheduler(service, max_batch_size=8, max_wait_ms=200)
+        messages = ["周末和朋友们一起参加社交聚会", "我最近总是焦虑、担心", "嗯嗯"]
+        
+        message_futures = [scheduler.submit_message(text) for text in messages]
+        analyze_future = scheduler.submit(["我喜欢探索新事物。"])
+        results = [future.result(timeout=5) for future in message_futures]
+        analyze_future.result(timeout=5)
+        scheduler.close()
+        
+        assert results == [service.score_message(text) for text in messages]
+        assert results[2] == {}
+        stats = scheduler.get_stats()
+        assert stats['requests'] == 4
+        assert stats['batches'] == 2
+    
+    def test_profile_service_routes_through_scheduler(self, service):
+        """测试用户画像服务的人格分析经调度器合并推理"""
+        scheduler = PersonalityBatchScheduler(service, max_batch_size=4, max_wait_ms=5)
+        profile_service = UserProfileService(personality_service=service, personality_scheduler=scheduler)
+        user = profile_service.register_user(UserRegistrationRequest(
+            username="调度用户",
+            email="scheduler@example.com",
+            password="password123",
+            school="测试大学",
+            major="心理学",
+            grade=2
+        ))
+        texts = ["我喜欢和朋友们一起活动。"]
+        
+        scores = profile_service.analyze_personality(user.user_id, texts)
+        scheduler.close()
+        
+        assert scores == service.analyze_personality(texts)
+        assert profile_service.get_profile(user.user_id).big_five == scores
+        assert scheduler.get_stats()['requests'] == 1
+    
+    def test_submit_after_close_raises(self, service):
+        """测试关闭后提交请求"""
+        scheduler = PersonalityBatchScheduler(service)
+        scheduler.close()
+        
+        with pytest.raises(RuntimeError):
+            scheduler.submit(["文本"])
+    
+    def test_failed_batch_propagates_exception(self, service, monkeypatch):
+        """测试批次失败时异常传递给调用方"""
+        def failing_batch_analyze(text_batches, batch_size=16):
+            raise ValueError("inference failed")
+        
+        monkeypatch.setattr(service, 'batch_analyze', failing_batch_analyze)
+        scheduler = PersonalityBatchScheduler(service, max_wait_ms=1)
+        
+        future = scheduler.submit(["文本"])
+        with pytest.raises(ValueError):
+            future.result(timeout=5)
+        scheduler.close()
 
 
 @pytest.mark.skipif(not ML_AVAILABLE, reason="ML libraries not available")
@@ -196,6 +441,88 @@ class TestPersonalityClassifier:
             pytest.skip(f"Cannot test forward pass: {e}")
 
 
+@pytest.mark.skipif(not ML_AVAILABLE, reason="ML libraries not available")
+class TestQuantizedInference:
+    """量化推理测试类"""
+    
+    @pytest.fixture
+    def classifier(self):
+        """创建小型随机初始化的分类器（无需下载预训练权重）"""
+        from transformers import BertConfig, BertModel
+        torch.manual_seed(0)
+        config = BertConfig(
+            vocab_size=1000,
+            hidden_size=64,
+            num_hidden_layers=2,
+            num_attention_heads=2,
+            intermediate_size=128
+        )
+        classifier = PersonalityClassifier(BertModel(config), hidden_size=64)
+        classifier.eval()
+        return classifier
+    
+    def test_int8_scores_match_fp32(self, classifier):
+        """测试int8量化模型与fp32模型得分一致"""
+        quantized = quantize_model(copy.deepcopy(classifier))
+        quantized.eval()
+        
+        input_ids = torch.randint(0, 1000, (4, 32))
+        attention_mask = torch.ones(4, 32, dtype=torch.long)
+        
+        with torch.no_grad():
+            fp32_scores = classifier(input_ids, attention_mask)
+            int8_scores = quantized(input_ids, attention_mask)
+        
+        assert int8_scores.shape == fp32_scores.shape
+        assert torch.max(torch.abs(int8_scores - fp32_scores)).item() < 0.02
+    
+    def test_int8_model_uses_quantized_linear_layers(self, classifier):
+        """测试量化后全连接层被替换"""
+        quantized = quantize_model(copy.deepcopy(classifier))
+        
+        assert not any(type(module) is torch.nn.Linear for module in quantized.modules())
+    
+    @pytest.mark.skipif(not ONNX_AVAILABLE, reason="onnxruntime not available")
+    def test_onnx_scores_match_pytorch(self, classifier, tmp_path):
+        """测试ONNX Runtime与PyTorch模型得分一致"""
+        service = PersonalityRecognitionService(model_name="tiny-bert", use_ml=False)
+        service.model = classifier
+        session = service._load_onnx_session(service._onnx_export_path(str(tmp_path / "classifier.onnx")))
+        
+        input_ids = torch.randint(0, 1000, (4, 32))
+        attention_mask = torch.ones(4, 32, dtype=torch.long)
+        attention_mask[1, 20:] = 0
+        
+        with torch.no_grad():
+            torch_scores = classifier(input_ids, attention_mask)
+        onnx_scores = torch.from_numpy(session.run(
+            ['scores'],
+            {'input_ids': input_ids.numpy(), 'attention_mask': attention_mask.numpy()}
+        )[0])
+        
+        assert onnx_scores.shape == torch_scores.shape
+        assert torch.max(torch.abs(onnx_scores - torch_scores)).item() < 1e-4
+    
+    def test_onnx_export_path_tracks_model_and_weights(self, classifier, tmp_path):
+        """测试ONNX导出路径随模型名称和权重变化，不会复用其他模型的导出文件"""
+        base_path = str(tmp_path / "classifier.onnx")
+        service = PersonalityRecognitionService(model_name="tiny-bert", use_ml=False)
+        service.model = classifier
+        path = service._onnx_export_path(base_path)
+        
+        assert path == service._onnx_export_path(base_path)
+        assert path.parent == tmp_path
+        assert "tiny-bert" in path.name
+        
+        service.model_name = "other/bert"
+        assert service._onnx_export_path(base_path) != path
+        
+        service.model_name = "tiny-bert"
+        with torch.no_grad():
+            classifier.classifier[-2].bias.add_(0.1)
+        assert service._onnx_export_path(base_path) != path
+
+
 class TestPersonalityIntegration:
     """人格识别集成测试"""
     
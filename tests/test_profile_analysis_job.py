@@ -0,0 +1,173 @@
+"""对话画像分析批处理任务测试"""
+import time
+from datetime import datetime, timedelta
+
+from src.models.conversation import (
+    ConversationCreateRequest,
+    MessageSendRequest,
+    ConversationStatusUpdateRequest
+)
+from src.models.user import UserRegistrationRequest
+from src.services.conversation_service import ConversationService
+from src.services.profile_analysis_job import ProfileAnalysisJob
+from src.services.profile_update_service import ProfileUpdateService
+from src.services.user_profile_service import UserProfileService
+
+
+class TestProfileAnalysisJob:
+    """对话画像分析批处理任务测试类"""
+
+    def setup_method(self):
+        """每个测试前的设置"""
+        self.user_profile_service = UserProfileService()
+        self.conversation_service = ConversationService()
+        self.profile_update_service = ProfileUpdateService(
+            user_profile_service=self.user_profile_service
+        )
+        self.user_ids = [self._register(i) for i in range(3)]
+
+    def _register(self, index: int) -> str:
+        """注册测试用户"""
+        user = self.user_profile_service.register_user(UserRegistrationRequest(
+            username=f"测试用户{index}",
+            email=f"user{index}@example.com",
+            password="password123",
+            school="测试大学",
+            major="计算机科学",
+            grade=3
+        ))
+        return user.user_id
+
+    def _ended_conversation(self, user_a: str, user_b: str, contents) -> str:
+        """创建一段已结束的对话"""
+        conversation = self.conversation_service.create_conversation(ConversationCreateRequest(
+            user_a_id=user_a,
+            user_b_id=user_b,
+            scene="兴趣社群"
+        ))
+        for sender_id, content in contents:
+            self.conversation_service.send_message(MessageSendRequest(
+                conversation_id=conversation.conversation_id,
+                sender_id=sender_id,
+                content=content,
+                message_type="text"
+            ))
+        self.conversation_service.update_conversation_status(ConversationStatusUpdateRequest(
+            conversation_id=conversation.conversation_id,
+            status="ended"
+        ))
+        return conversation.conversation_id
+
+    def _job(self, tmp_path, **kwargs) -> ProfileAnalysisJob:
+        """创建使用临时状态文件的任务"""
+        return ProfileAnalysisJob(
+            self.conversation_service,
+            self.profile_update_service,
+            state_path=str(tmp_path / "state.json"),
+            **kwargs
+        )
+
+    def test_single_scan_matches_analysis(self):
+        """测试单遍分析同时得到话题、兴趣和情绪"""
+        result = ProfileUpdateService.analyze_message_texts("conv_1", [
+            ("user_1", "我今天很开心，去看了电影"),
+            ("user_1", "但是有点担心考试"),
+            ("user_2", "还行吧")
+        ])
+
+        assert set(result['interests']) == {'电影', '考试'}
+        assert result['topics'] == result['interests']
+        assert result['emotions']['user_1']['positive'] == 1
+        assert result['emotions']['user_1']['anxious'] == 1
+        assert result['emotions']['user_2']['neutral_ratio'] == 1.0
+
+    def test_run_updates_profiles_once_per_user(self, tmp_path):
+        """测试按用户合并多个对话，每个用户只写入一次画像"""
+        user_a, user_b, user_c = self.user_ids
+        self._ended_conversation(user_a, user_b, [(user_a, "我在准备考研"), (user_b, "我喜欢音乐")])
+        self._ended_conversation(user_a, user_c, [(user_a, "最近在找实习"), (user_c, "好开心")])
+        versions = {uid: self.user_profile_service.get_profile_version(uid) for uid in self.user_ids}
+
+        stats = self._job(tmp_path).run()
+
+        assert stats['conversation_count'] == 2
+        assert stats['message_count'] == 4
+        assert stats['updated_users'] == 3
+        assert self.user_profile_service.get_profile_version(user_a) == versions[user_a] + 1
+
+        profile = self.user_profile_service.get_profile(user_a)
+        assert '考研' in profile.academic_interests
+        assert '实习' in profile.career_interests
+
+    def test_watermark_skips_processed_conversations(self, tmp_path):
+        """测试水位线之前结束的对话不再处理，且水位线可从状态文件恢复"""
+        user_a, user_b, _ = self.user_ids
+        self._ended_conversation(user_a, user_b, [(user_a, "一起去旅游吧")])
+
+        job = self._job(tmp_path)
+        assert job.run()['conversation_count'] == 1
+        assert job.watermark is not None
+        assert job.run()['conversation_count'] == 0
+
+        restored = self._job(tmp_path)
+        assert restored.watermark == job.watermark
+        assert restored.collect_conversations() == []
+
+    def test_same_end_time_as_watermark_not_skipped(self, tmp_path):
+        """测试与上一批最后一个对话同一时刻结束的对话不会被跳过"""
+        user_a, user_b, user_c = self.user_ids
+        ended_at = datetime.now() - timedelta(minutes=1)
+        first = self._ended_conversation(user_a, user_b, [(user_a, "一起去旅游吧")])
+        self.conversation_service.conversations[first].ended_at = ended_at
+
+        job = self._job(tmp_path)
+        assert job.run()['conversation_count'] == 1
+
+        second = self._ended_conversation(user_b, user_c, [(user_c, "我喜欢摄影")])
+        self.conversation_service.conversations[second].ended_at = ended_at
+
+        assert [c.conversation_id for c in job.collect_conversations()] == [second]
+        assert job.run()['conversation_count'] == 1
+        assert job.watermark == ended_at
+        assert job.watermark_ids == {first, second}
+
+        restored = self._job(tmp_path)
+        assert restored.collect_conversations() == []
+
+    def test_scheduled_run(self, tmp_path):
+        """测试后台线程按间隔定时运行"""
+        user_a, user_b, _ = self.user_ids
+        self._ended_conversation(user_a, user_b, [(user_b, "周末去运动")])
+
+        job = self._job(tmp_path, interval_seconds=0.05)
+        job.start()
+        try:
+            deadline = time.monotonic() + 5.0
+            while job.watermark is None and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            job.close()
+
+        assert job.watermark is not None
+        assert '运动' in self.user_profile_service.get_profile(user_b).hobby_interests
+
+    def test_until_leaves_later_conversations(self, tmp_path):
+        """测试截止时间之后结束的对话留给下次运行"""
+        user_a, user_b, _ = self.user_ids
+        self._ended_conversation(user_a, user_b, [(user_a, "我喜欢摄影")])
+
+        job = self._job(tmp_path)
+        assert job.run(until=datetime.now() - timedelta(hours=1))['conversation_count'] == 0
+        assert job.watermark is None
+        assert job.run()['conversation_count'] == 1
+
+    def test_process_pool(self, tmp_path):
+        """测试多批对话在进程池中分析"""
+        user_a, user_b, _ = self.user_ids
+        for _ in range(3):
+            self._ended_conversation(user_a, user_b, [(user_b, "周末去运动")])
+
+        stats = self._job(tmp_path, num_workers=2, batch_size=1).run()
+
+        assert stats['conversation_count'] == 3
+        assert '运动' in self.user_profile_service.get_profile(user_b).hobby_interests
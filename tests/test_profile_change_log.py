@@ -0,0 +1,123 @@
+"""画像变更日志测试"""
+import sys
+import threading
+from src.utils.profile_change_log import ProfileChangeLog
+from src.services.user_profile_service import UserProfileService
+from src.models.user import UserRegistrationRequest
+
+
+class TestProfileChangeLog:
+    """画像变更日志测试类"""
+
+    def setup_method(self):
+        """每个测试前的设置"""
+        self.log = ProfileChangeLog(max_deltas=4, retain_deltas=2)
+
+    def test_changes_since_version(self):
+        """测试按版本查询增量"""
+        self.log.record("user_001", 1, {'social_energy': (0.5, 0.6)})
+        self.log.record("user_001", 2, {'social_energy': (0.6, 0.7), 'mbti_type': (None, 'INFP')})
+
+        result = self.log.changes_since("user_001", 1)
+
+        assert [(c['version'], c['field']) for c in result['changes']] == [
+            (2, 'social_energy'), (2, 'mbti_type')
+        ]
+        assert result['compacted'] == []
+        assert self.log.changes_since("user_002")['changes'] == []
+
+    def test_net_changes_fold_deltas(self):
+        """测试净变化保留首个旧值和最新值"""
+        self.log.record("user_001", 1, {'social_energy': (0.5, 0.6)})
+        self.log.record("user_001", 2, {'social_energy': (0.6, 0.7)})
+
+        assert self.log.net_changes_since("user_001", 0) == {'social_energy': (0.5, 0.7)}
+        assert self.log.net_changes_since("user_001", 2) == {}
+
+    def test_compaction_into_checkpoint(self):
+        """测试增量超过上限时较早的增量被压缩进检查点"""
+        for version in range(1, 6):
+            self.log.record("user_001", version, {'social_energy': (version - 1, version)})
+
+        stats = self.log.get_stats()
+        assert stats['deltas'] == 2
+        assert stats['checkpoint_fields'] == 1
+
+        result = self.log.changes_since("user_001", 1)
+        assert result['checkpoint_version'] == 3
+        assert result['compacted'][0]['value'] == 3
+        assert [c['version'] for c in result['changes']] == [4, 5]
+
+        # 起始版本不早于检查点时无需检查点
+        assert self.log.changes_since("user_001", 3)['compacted'] == []
+
+
+class TestUserProfileChanges:
+    """用户画像服务变更记录测试类"""
+
+    def setup_method(self):
+        """每个测试前的设置"""
+        self.service = UserProfileService()
+        user = self.service.register_user(UserRegistrationRequest(
+            username="测试用户",
+            email="test@example.com",
+            password="password123",
+            school="测试大学",
+            major="计算机科学",
+            grade=3
+        ))
+        self.user_id = user.user_id
+
+    def test_update_records_only_changed_fields(self):
+        """测试更新只记录发生变化的字段"""
+        base_version = self.service.get_profile_version(self.user_id)
+        profile = self.service.get_profile(self.user_id)
+
+        self.service.update_profile(self.user_id, {
+            'social_energy': 0.9,
+            'emotion_stability': profile.emotion_stability
+        })
+
+        result = self.service.get_profile_changes(self.user_id, base_version)
+        assert result['current_version'] == base_version + 1
+        assert [c['field'] for c in result['changes']] == ['social_energy']
+        assert result['changes'][0]['new'] == 0.9
+
+    def test_list_fields_are_copied(self):
+        """测试列表字段的记录与画像对象解耦"""
+        self.service.update_profile(self.user_id, {'hobby_interests': ['音乐']})
+        self.service.get_profile(self.user_id).hobby_interests.append('电影')
+
+        changes = self.service.get_profile_changes(self.user_id)['changes']
+        assert changes[-1]['new'] == ['音乐']
+
+    def test_concurrent_updates_get_unique_versions(self):
+        """测试并发更新时每次更新获得唯一版本号，变更日志按版本顺序首尾相接"""
+        base_version = self.service.get_profile_version(self.user_id)
+        notified = []
+        self.service.add_profile_listener(lambda user_id, version: notified.append(version))
+        num_threads, per_thread = 8, 20
+
+        def worker(index):
+            for step in range(per_thread):
+                value = round((index * per_thread + step + 1) / 1000, 3)
+                self.service.update_profile(self.user_id, {'social_energy': value})
+
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            threads = [threading.Thread(target=worker, args=(i,)) for i in range(num_threads)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(interval)
+
+        total = num_threads * per_thread
+        assert self.service.get_profile_version(self.user_id) == base_version + total
+        assert sorted(notified) == list(range(base_version + 1, base_version + total + 1))
+        changes = self.service.get_profile_changes(self.user_id, base_version)['changes']
+        assert [c['version'] for c in changes] == list(range(base_version + 1, base_version + total + 1))
+        for previous, current in zip(changes, changes[1:]):
+            assert current['old'] == previous['new']
@@ -1,9 +1,17 @@
 """用户画像动态更新服务测试"""
 import pytest
+import time
 from datetime import datetime
 from src.services.profile_update_service import ProfileUpdateService
 from src.services.user_profile_service import UserProfileService
 from src.services.matching_service import MatchingService
+from src.services.match_recalculation_scheduler import MatchRecalculationScheduler
+from src.services.recommendation_service import RecommendationService
+from src.services.personality_recognition_service import (
+    PersonalityRecognitionService,
+    PersonalityBatchScheduler
+)
+from src.utils.exceptions import NotFoundError
 from src.models.user import (
     User, UserProfile, BigFiveScores,
     UserRegistrationRequest, InterestSelectionRequest
@@ -372,6 +380,154 @@ class TestProfileUpdateService:
         assert 0 <= updated_scores.openness <= 1
         assert 0 <= updated_scores.conscientiousness <= 1
     
+    def test_update_personality_from_message(
+        self,
+        profile_update_service,
+        user_profile_service,
+        test_user
+    ):
+        """测试根据单条消息增量更新人格"""
+        before = user_profile_service.get_profile(test_user.user_id).big_five
+        
+        updated_scores = profile_update_service.update_personality_from_message(
+            user_id=test_user.user_id,
+            content="周末和朋友们一起参加社交聚会，特别热情开朗"
+        )
+        
+        # 外向性关键词应使外向性上升，且单条消息只产生小幅变化
+        assert updated_scores.extraversion > before.extraversion
+        assert updated_scores.extraversion - before.extraversion <= profile_update_service.MESSAGE_PERSONALITY_ALPHA
+        # 没有相关关键词的维度保持不变
+        assert updated_scores.conscientiousness == before.conscientiousness
+        # 单条消息的偏移未达到写回阈值，画像不变，批量写回后才落到画像
+        assert user_profile_service.get_profile(test_user.user_id).big_five == before
+        assert profile_update_service.flush_personality_estimates(test_user.user_id) == 1
+        assert user_profile_service.get_profile(test_user.user_id).big_five == updated_scores
+    
+    def test_personality_estimate_written_past_threshold(
+        self,
+        profile_update_service,
+        user_profile_service,
+        test_user
+    ):
+        """测试人格估计偏移达到阈值时写回画像，画像被其他途径更新后以画像为新起点"""
+        user_id = test_user.user_id
+        version = user_profile_service.get_profile_version(user_id)
+        content = "周末和朋友们一起参加社交聚会，特别热情开朗"
+        
+        profile_update_service.update_personality_from_message(user_id, content)
+        assert user_profile_service.get_profile_version(user_id) == version
+        
+        scores = profile_update_service.update_personality_from_message(user_id, content)
+        assert user_profile_service.get_profile_version(user_id) == version + 1
+        assert user_profile_service.get_profile(user_id).big_five == scores
+        
+        # 画像中的人格得分被直接更新后，流式估计不会覆盖它
+        external = BigFiveScores(**{**scores.dict(), 'extraversion': 0.2})
+        user_profile_service.update_profile(user_id, {'big_five': external})
+        scores = profile_update_service.update_personality_from_message(user_id, content)
+        assert 0.2 < scores.extraversion < 0.25
+        assert profile_update_service.flush_personality_estimates() == 1
+        assert profile_update_service.flush_personality_estimates() == 0
+    
+    def test_background_flush_releases_estimates(
+        self,
+        user_profile_service,
+        test_user
+    ):
+        """测试后台线程定时写回人格估计并释放内存，关闭时写回剩余估计"""
+        service = ProfileUpdateService(
+            user_profile_service=user_profile_service,
+            personality_flush_seconds=0.05
+        )
+        content = "周末和朋友们一起参加社交聚会，特别热情开朗"
+        service.start()
+        try:
+            scores = service.update_personality_from_message(test_user.user_id, content)
+            deadline = time.time() + 5
+            while service._personality_estimates and time.time() < deadline:
+                time.sleep(0.01)
+            assert service._personality_estimates == {}
+            assert user_profile_service.get_profile(test_user.user_id).big_five == scores
+        finally:
+            service.close()
+        
+        # 未启动后台线程时，close()同样写回剩余估计
+        service = ProfileUpdateService(user_profile_service=user_profile_service)
+        scores = service.update_personality_from_message(test_user.user_id, content)
+        service.close()
+        assert service._personality_estimates == {}
+        assert user_profile_service.get_profile(test_user.user_id).big_five == scores
+    
+    def test_update_personality_from_neutral_message(
+        self,
+        profile_update_service,
+        user_profile_service,
+        test_user
+    ):
+        """测试无人格线索的消息不改变人格得分"""
+        before = user_profile_service.get_profile(test_user.user_id).big_five
+        
+        updated_scores = profile_update_service.update_personality_from_message(
+            user_id=test_user.user_id,
+            content="嗯嗯"
+        )
+        
+        assert updated_scores == before
+    
+    def test_submit_personality_message_through_scheduler(
+        self,
+        user_profile_service,
+        test_user
+    ):
+        """测试经微批调度器在后台对消息评分并更新人格估计"""
+        personality_service = PersonalityRecognitionService(use_ml=False)
+        scheduler = PersonalityBatchScheduler(personality_service, max_wait_ms=1)
+        service = ProfileUpdateService(
+            user_profile_service=user_profile_service,
+            personality_service=personality_service,
+            personality_scheduler=scheduler
+        )
+        before = user_profile_service.get_profile(test_user.user_id).big_five
+        
+        try:
+            scores = service.submit_personality_message(
+                test_user.user_id,
+                "周末和朋友们一起参加社交聚会，特别热情开朗"
+            ).result(timeout=5)
+        finally:
+            scheduler.close()
+        
+        assert scores.extraversion > before.extraversion
+        assert scheduler.get_stats()['requests'] == 1
+        
+        # 未知用户的更新失败通过Future传递，不抛给调用方
+        scheduler = PersonalityBatchScheduler(personality_service, max_wait_ms=1)
+        service = ProfileUpdateService(
+            user_profile_service=user_profile_service,
+            personality_scheduler=scheduler
+        )
+        future = service.submit_personality_message("missing_user", "今天很开心")
+        with pytest.raises(NotFoundError):
+            future.result(timeout=5)
+        scheduler.close()
+    
+    def test_personality_stream_converges(
+        self,
+        profile_update_service,
+        test_user
+    ):
+        """测试持续的消息流使人格估计逐步收敛"""
+        scores = None
+        for _ in range(200):
+            scores = profile_update_service.update_personality_from_message(
+                user_id=test_user.user_id,
+                content="我最近压力很大，总是焦虑、担心、紧张"
+            )
+        
+        assert scores.neuroticism > 0.6
+        assert scores.neuroticism <= 1.0
+    
     def test_generate_profile_update_notification(
         self,
         profile_update_service,
@@ -458,6 +614,33 @@ class TestProfileUpdateService:
         # 验证没有抛出异常即可
         assert True
     
+    def test_trigger_match_recalculation_with_scheduler(
+        self,
+        user_profile_service,
+        matching_service,
+        test_user
+    ):
+        """测试使用调度器时只标记待重算，重复触发被合并"""
+        recommendation_service = RecommendationService(matching_service, user_profile_service)
+        scheduler = MatchRecalculationScheduler(recommendation_service, debounce_seconds=60.0)
+        service = ProfileUpdateService(
+            user_profile_service=user_profile_service,
+            matching_service=matching_service,
+            recalculation_scheduler=scheduler
+        )
+        
+        for _ in range(3):
+            service._trigger_match_recalculation(test_user.user_id)
+        
+        stats = scheduler.get_stats()
+        assert stats['pending'] == 2
+        assert stats['coalesced'] == 4
+        assert stats['recalculated'] == 0
+        
+        # 该用户还没有请求过推荐列表，到期后直接跳过
+        assert scheduler.flush() == 2
+        assert scheduler.get_stats()['skipped'] == 2
+    
     def test_full_workflow(
         self,
         profile_update_service,
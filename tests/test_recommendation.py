@@ -0,0 +1,212 @@
+"""预计算推荐列表测试"""
+import threading
+import time
+from datetime import datetime, timedelta
+from src.models.user import (
+    UserRegistrationRequest, MBTITestRequest, BigFiveTestRequest,
+    InterestSelectionRequest, SceneSelectionRequest
+)
+from src.services.user_profile_service import UserProfileService
+from src.services.matching_service import MatchingService
+from src.services.recommendation_service import RecommendationService
+
+
+class TestRecommendationService:
+    """推荐列表服务测试类"""
+    
+    def setup_method(self):
+        """每个测试方法前的设置"""
+        self.profile_service = UserProfileService()
+        self.matching_service = MatchingService(self.profile_service)
+        self.users = [
+            self._create_complete_user(f"用户{i}", f"user{i}@example.com")
+            for i in range(4)
+        ]
+        self.service = RecommendationService(
+            self.matching_service,
+            self.profile_service,
+            top_k=10
+        )
+    
+    def teardown_method(self):
+        """每个测试方法后的清理"""
+        self.service.close()
+    
+    def _create_complete_user(self, username, email):
+        """创建完整用户"""
+        user = self.profile_service.register_user(
+            UserRegistrationRequest(
+                username=username,
+                email=email,
+                password="password123",
+                school="清华大学",
+                major="计算机科学",
+                grade=2
+            )
+        )
+        self.profile_service.process_mbti_test(
+            MBTITestRequest(user_id=user.user_id, answers=[3] * 60)
+        )
+        self.profile_service.process_big_five_test(
+            BigFiveTestRequest(user_id=user.user_id, answers=[3] * 50)
+        )
+        self.profile_service.update_interests(
+            InterestSelectionRequest(
+                user_id=user.user_id,
+                academic_interests=["考研"],
+                career_interests=["软件工程师"],
+                hobby_interests=["阅读"]
+            )
+        )
+        self.profile_service.update_scenes(
+            SceneSelectionRequest(user_id=user.user_id, scenes=["考研自习室"])
+        )
+        self.profile_service.generate_initial_profile(user.user_id)
+        return user
+    
+    def test_profile_version_listener(self):
+        """测试画像更新递增版本号并通知监听器"""
+        events = []
+        self.profile_service.add_profile_listener(lambda user_id, version: events.append((user_id, version)))
+        user_id = self.users[0].user_id
+        version = self.profile_service.get_profile_version(user_id)
+        
+        self.profile_service.update_profile(user_id, {'hobby_interests': ["音乐"]})
+        
+        assert self.profile_service.get_profile_version(user_id) == version + 1
+        assert events == [(user_id, version + 1)]
+        
+        # 没有字段真正变化的更新不递增版本，也不通知监听器
+        self.profile_service.update_profile(user_id, {'hobby_interests': ["音乐"]})
+        self.profile_service.update_profile(user_id, {})
+        assert self.profile_service.get_profile_version(user_id) == version + 1
+        assert events == [(user_id, version + 1)]
+    
+    def test_served_from_store(self):
+        """测试第二次请求直接从存储返回"""
+        user_id = self.users[0].user_id
+        
+        first = self.service.get_recommendations(user_id, "考研自习室", limit=2)
+        computed_at = self.service.get_freshness(user_id, "考研自习室")
+        second = self.service.get_recommendations(user_id, "考研自习室", limit=2)
+        
+        assert len(first) == 2
+        assert [m.match_id for m in first] == [m.match_id for m in second]
+        assert self.service.get_freshness(user_id, "考研自习室") == computed_at
+        stats = self.service.get_stats()
+        assert stats['misses'] == 1
+        assert stats['hits'] == 1
+    
+    def test_candidate_profile_change_marks_stale(self):
+        """测试候选人画像变化后列表被重新计算"""
+        user_id = self.users[0].user_id
+        self.service.get_recommendations(user_id, "考研自习室")
+        computed_at = self.service.get_freshness(user_id, "考研自习室")
+        
+        self.profile_service.update_profile(self.users[1].user_id, {'hobby_interests': ["音乐"]})
+        
+        assert self.service.get_stats()['queue_depth'] == 1
+        assert self.service.run_pending() == 1
+        assert self.service.get_freshness(user_id, "考研自习室") > computed_at
+        self.service.get_recommendations(user_id, "考研自习室")
+        assert self.service.get_stats()['hits'] == 1
+    
+    def test_stale_list_recomputed_without_workers(self):
+        """测试未启动后台线程时过期列表同步重新计算"""
+        user_id = self.users[0].user_id
+        self.service.get_recommendations(user_id, "考研自习室")
+        computed_at = self.service.get_freshness(user_id, "考研自习室")
+        
+        self.profile_service.update_profile(user_id, {'hobby_interests': ["音乐"]})
+        self.service.get_recommendations(user_id, "考研自习室")
+        
+        assert self.service.get_freshness(user_id, "考研自习室") > computed_at
+        assert self.service.get_stats()['stale_hits'] == 1
+    
+    def test_scene_staleness_bound(self):
+        """测试超过场景过期上限时同步重新计算"""
+        service = RecommendationService(
+            self.matching_service,
+            self.profile_service,
+            scene_max_staleness={"考研自习室": timedelta(0)}
+        )
+        user_id = self.users[0].user_id
+        
+        service.get_recommendations(user_id, "考研自习室")
+        service.get_recommendations(user_id, "考研自习室")
+        
+        assert service.get_max_staleness("考研自习室") == timedelta(0)
+        assert service.get_max_staleness("兴趣社群") == service.max_staleness
+        assert service.get_stats()['misses'] == 2
+    
+    def test_accepted_candidate_filtered_from_cached_list(self):
+        """测试缓存列表中已接受的候选在返回时被剔除"""
+        user_id = self.users[0].user_id
+        matches = self.service.get_recommendations(user_id, "考研自习室")
+        self.matching_service.accept_match(matches[0].match_id, user_id)
+        
+        remaining = self.service.get_recommendations(user_id, "考研自习室")
+        
+        assert matches[0].match_id not in [m.match_id for m in remaining]
+        assert len(remaining) == len(matches) - 1
+    
+    def test_background_refresh(self):
+        """测试后台线程刷新过期列表"""
+        user_id = self.users[0].user_id
+        self.service.get_recommendations(user_id, "考研自习室")
+        computed_at = self.service.get_freshness(user_id, "考研自习室")
+        self.service.start()
+        
+        self.profile_service.update_profile(self.users[2].user_id, {'hobby_interests': ["音乐"]})
+        
+        deadline = time.time() + 5.0
+        while self.service.get_freshness(user_id, "考研自习室") == computed_at and time.time() < deadline:
+            time.sleep(0.01)
+        assert self.service.get_freshness(user_id, "考研自习室") > computed_at
+    
+    def test_irrelevant_field_change_ignored(self):
+        """测试不参与匹配打分的字段变化不会使列表过期"""
+        user_id = self.users[0].user_id
+        self.service.get_recommendations(user_id, "考研自习室")
+        
+        self.profile_service.update_profile(self.users[1].user_id, {'profile_vector': [0.1, 0.2, 0.3]})
+        
+        assert self.service.get_stats()['queue_depth'] == 0
+        assert self.service.get_stats()['skipped_changes'] == 1
+    
+    def test_idle_lists_evicted(self):
+        """测试长时间未读取的列表被删除而不是继续刷新"""
+        user_id = self.users[0].user_id
+        self.service.get_recommendations(user_id, "考研自习室")
+        
+        queued = self.service.refresh_expired(datetime.now() + self.service.idle_ttl + timedelta(seconds=1))
+        
+        assert queued == 0
+        assert self.service.get_freshness(user_id, "考研自习室") is None
+        assert self.service.get_stats()['evicted'] == 1
+        # 被删除的列表不再因画像变化而刷新
+        self.profile_service.update_profile(self.users[1].user_id, {'hobby_interests': ["音乐"]})
+        assert self.service.run_pending() == 0
+    
+    def test_concurrent_refresh_keeps_match_index(self):
+        """测试并发计算匹配时匹配记录和用户索引保持一致"""
+        errors = []
+        
+        def worker():
+            try:
+                for _ in range(20):
+                    for user in self.users:
+                        self.matching_service.find_matches(user.user_id, "考研自习室", limit=3)
+            except Exception as e:
+                errors.append(e)
+        
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert errors == []
+        for user in self.users:
+            history = self.matching_service.get_match_history(user.user_id, limit=100)
+            assert len({m.match_id for m in history}) == len(history)
@@ -0,0 +1,78 @@
+"""在线统计工具测试"""
+import math
+import pytest
+from src.utils.running_stats import RunningStats, welch_t_test
+
+
+def _stats(values):
+    """由样本构造累加器"""
+    stats = RunningStats()
+    for value in values:
+        stats.update(value)
+    return stats
+
+
+class TestRunningStats:
+    """在线统计累加器测试类"""
+    
+    def test_mean_and_variance(self):
+        """测试均值和样本方差与直接计算一致"""
+        values = [3.5, 4.0, 2.5, 5.0, 4.5, 1.0]
+        stats = _stats(values)
+        
+        mean = sum(values) / len(values)
+        variance = sum((v - mean) ** 2 for v in values) / (len(values) - 1)
+        
+        assert stats.count == len(values)
+        assert stats.mean == pytest.approx(mean)
+        assert stats.variance == pytest.approx(variance)
+    
+    def test_variance_with_single_sample(self):
+        """测试样本数不足时方差为0"""
+        assert _stats([4.0]).variance == 0.0
+
+    def test_merge_matches_single_pass(self):
+        """测试合并两个累加器与一次性累加结果一致"""
+        left = [0.2, 0.9, 0.4]
+        right = [0.7, 0.1, 0.6, 0.8]
+        merged = _stats(left)
+        merged.merge(_stats(right))
+        merged.merge(RunningStats())
+
+        expected = _stats(left + right)
+        assert merged.count == expected.count
+        assert merged.mean == pytest.approx(expected.mean)
+        assert merged.population_variance == pytest.approx(expected.m2 / expected.count)
+
+
+class TestWelchTTest:
+    """Welch t检验测试类"""
+    
+    def test_p_value_matches_reference(self):
+        """测试p值与t分布表一致"""
+        # 两组方差相等且样本数相同，t = 2.0，自由度 = 8
+        a = _stats([3.0, 4.0, 5.0, 6.0, 7.0])
+        b = _stats([1.0, 2.0, 3.0, 4.0, 5.0])
+        
+        t, p_value = welch_t_test(a, b)
+        
+        assert t == pytest.approx(2.0)
+        assert p_value == pytest.approx(0.08052, abs=1e-4)
+    
+    def test_identical_groups_not_significant(self):
+        """测试相同分布的两组p值为1"""
+        t, p_value = welch_t_test(_stats([1.0, 2.0, 3.0]), _stats([1.0, 2.0, 3.0]))
+        
+        assert t == 0.0
+        assert p_value == pytest.approx(1.0)
+    
+    def test_zero_variance_groups(self):
+        """测试两组方差均为0且均值不同时完全显著"""
+        t, p_value = welch_t_test(_stats([4.5] * 5), _stats([3.5] * 5))
+        
+        assert math.isinf(t) and t > 0
+        assert p_value == 0.0
+    
+    def test_insufficient_samples(self):
+        """测试样本不足时不做检验"""
+        assert welch_t_test(_stats([1.0]), _stats([2.0, 3.0])) == (0.0, 1.0)
@@ -0,0 +1,246 @@
+"""场景配置注册表测试"""
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+from src.services.matching_service import MatchingService
+from src.services.scene_management_service import SceneManagementService
+from src.services.scene_registry import SceneRegistry, FileSceneStore
+from src.services.user_profile_service import UserProfileService
+from src.utils.exceptions import ValidationError
+
+NEW_WEIGHTS = {
+    'personality': 0.3,
+    'interest': 0.4,
+    'scene': 0.2,
+    'emotion': 0.1
+}
+
+
+class TestSceneRegistry:
+    """场景配置注册表测试类"""
+
+    def setup_method(self):
+        """每个测试前的设置"""
+        self.registry = SceneRegistry()
+
+    def test_update_publishes_new_snapshot(self):
+        """测试更新权重生成新版本快照，旧快照不变"""
+        old_snapshot = self.registry.snapshot
+        old_weights = dict(old_snapshot.get("考研自习室").match_weights)
+
+        new_snapshot = self.registry.update_match_weights("考研自习室", NEW_WEIGHTS)
+
+        assert new_snapshot.version == old_snapshot.version + 1
+        assert self.registry.snapshot is new_snapshot
+        assert self.registry.get_scene_config("考研自习室").match_weights == NEW_WEIGHTS
+        assert old_snapshot.get("考研自习室").match_weights == old_weights
+        # 未修改的场景配置保持不变
+        assert new_snapshot.get("心理树洞") == old_snapshot.get("心理树洞")
+
+    def test_returned_configs_are_copies(self):
+        """测试修改取得的场景配置不影响注册表中的快照"""
+        config = self.registry.get_scene_config("考研自习室")
+        config.match_weights['interest'] = 0.99
+        config.topic_templates.append("新话题")
+
+        snapshot = self.registry.snapshot
+        assert snapshot.get("考研自习室").match_weights['interest'] == 0.35
+        assert "新话题" not in self.registry.get_scene_config("考研自习室").topic_templates
+        assert snapshot.get_match_weights("考研自习室")['interest'] == 0.35
+        with pytest.raises(TypeError):
+            snapshot.get_match_weights("考研自习室")['interest'] = 0.99
+        assert self.registry.version == 0
+
+    def test_invalid_updates(self):
+        """测试无效场景和权重总和不为1"""
+        with pytest.raises(ValidationError):
+            self.registry.update_match_weights("无效场景", NEW_WEIGHTS)
+        with pytest.raises(ValidationError):
+            self.registry.update_match_weights("考研自习室", {'personality': 0.9, 'interest': 0.9})
+        assert self.registry.version == 0
+
+    def test_import_without_fcntl(self):
+        """测试没有fcntl的平台（如Windows）上可以导入并使用内存注册表"""
+        code = (
+            "import sys\n"
+            "sys.modules['fcntl'] = None\n"
+            "from src.services.scene_registry import SceneRegistry\n"
+            "registry = SceneRegistry()\n"
+            "print(registry.update_match_weights('兴趣社群', "
+            "{'personality': 0.3, 'interest': 0.4, 'scene': 0.2, 'emotion': 0.1}).version)"
+        )
+        result = subprocess.run(
+            [sys.executable, '-c', code],
+            capture_output=True,
+            text=True,
+            cwd=Path(__file__).resolve().parent.parent
+        )
+
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip().splitlines()[-1] == "1"
+
+    def test_services_share_registry(self):
+        """测试匹配服务与场景管理服务共享同一份配置"""
+        matching_service = MatchingService(UserProfileService(), scene_registry=self.registry)
+        scene_service = SceneManagementService(matching_service=matching_service)
+
+        matching_service.update_match_weights("兴趣社群", {
+            'personality': 0.1,
+            'interest': 0.6,
+            'scene': 0.2,
+            'emotion': 0.1
+        })
+
+        assert scene_service.get_match_weights("兴趣社群")['interest'] == 0.6
+
+
+class TestSharedSceneStore:
+    """共享存储跨进程同步测试类"""
+
+    def setup_method(self):
+        """每个测试前的设置"""
+        self.registries = []
+
+    def teardown_method(self):
+        """每个测试后的清理"""
+        for registry in self.registries:
+            registry.close()
+
+    def _registry(self, path, **kwargs) -> SceneRegistry:
+        """创建使用共享文件的注册表（模拟一个工作进程）"""
+        registry = SceneRegistry(store=FileSceneStore(str(path)), **kwargs)
+        self.registries.append(registry)
+        return registry
+
+    def test_refresh_loads_other_worker_update(self, tmp_path):
+        """测试其他工作进程的更新通过共享文件加载"""
+        path = tmp_path / "scenes.json"
+        worker_a = self._registry(path)
+        worker_b = self._registry(path)
+
+        snapshot = worker_a.update_match_weights("职业咨询室", NEW_WEIGHTS)
+
+        assert worker_b.refresh() is True
+        assert worker_b.version == snapshot.version
+        assert worker_b.get_scene_config("职业咨询室").match_weights == NEW_WEIGHTS
+        assert worker_b.refresh() is False
+
+    def test_update_merges_newer_shared_snapshot(self, tmp_path):
+        """测试更新前先合并共享存储中的新版本，不覆盖其他进程的修改"""
+        path = tmp_path / "scenes.json"
+        worker_a = self._registry(path)
+        worker_b = self._registry(path)
+
+        worker_a.update_match_weights("职业咨询室", NEW_WEIGHTS)
+        worker_b.update_match_weights("兴趣社群", NEW_WEIGHTS)
+
+        worker_a.refresh()
+        assert worker_a.version == worker_b.version == 2
+        assert worker_a.get_scene_config("职业咨询室").match_weights == NEW_WEIGHTS
+        assert worker_a.get_scene_config("兴趣社群").match_weights == NEW_WEIGHTS
+
+    def test_interleaved_updates_keep_every_scene(self, tmp_path):
+        """测试两个工作进程交替更新不同场景时，任何一方的更新都不会被另一方基于旧快照的发布覆盖"""
+        path = tmp_path / "scenes.json"
+        worker_a = self._registry(path)
+        worker_b = self._registry(path)
+        worker_a.start()
+        worker_b.start()
+
+        # A读取本地快照之后、取得存储锁之前，B发布了新版本（心理树洞）
+        store_a = worker_a._store
+        original_update = store_a.update
+
+        def interleaved_update(build):
+            store_a.update = original_update
+            worker_b.update_match_weights("心理树洞", {
+                'personality': 0.1,
+                'interest': 0.1,
+                'scene': 0.1,
+                'emotion': 0.7
+            })
+            return original_update(build)
+
+        store_a.update = interleaved_update
+        snapshot = worker_a.update_match_weights("职业咨询室", NEW_WEIGHTS)
+
+        assert snapshot.version == 3
+        assert snapshot.get_match_weights("心理树洞")['emotion'] == 0.7
+        assert snapshot.get_match_weights("职业咨询室") == NEW_WEIGHTS
+
+        # 两个工作进程在各自线程中交替更新不同场景
+        def update(worker, scene, weights_list):
+            for weights in weights_list:
+                worker.update_match_weights(scene, weights)
+
+        a_weights = [{'personality': 0.02 * i, 'interest': 0.5 - 0.02 * i, 'scene': 0.4, 'emotion': 0.1}
+                     for i in range(1, 11)]
+        b_weights = [{'personality': 0.2, 'interest': 0.02 * i, 'scene': 0.2, 'emotion': 0.6 - 0.02 * i}
+                     for i in range(1, 11)]
+        threads = [
+            threading.Thread(target=update, args=(worker_a, "兴趣社群", a_weights)),
+            threading.Thread(target=update, args=(worker_b, "考研自习室", b_weights))
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        worker_a.refresh()
+        worker_b.refresh()
+        for worker in (worker_a, worker_b):
+            assert worker.version == 23
+            assert worker.get_scene_config("兴趣社群").match_weights == a_weights[-1]
+            assert worker.get_scene_config("考研自习室").match_weights == b_weights[-1]
+            assert worker.get_scene_config("心理树洞").match_weights['emotion'] == 0.7
+
+    def test_concurrent_publish_assigns_unique_versions(self, tmp_path):
+        """测试多个存储实例并发发布时版本号不重复，最终版本等于发布次数"""
+        path = tmp_path / "scenes.json"
+        payload = SceneRegistry().snapshot.to_payload()
+        versions = []
+        lock = threading.Lock()
+
+        def publish():
+            # 每个线程使用独立的存储实例，模拟不同的工作进程
+            store = FileSceneStore(str(path))
+            for _ in range(10):
+                version = store.publish(payload)
+                with lock:
+                    versions.append(version)
+
+        threads = [threading.Thread(target=publish) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sorted(versions) == list(range(1, 41))
+        assert FileSceneStore(str(path)).current_version() == 40
+
+    def test_watcher_propagates_within_poll_interval(self, tmp_path):
+        """测试后台轮询线程自动加载新快照"""
+        path = tmp_path / "scenes.json"
+        worker_a = self._registry(path, poll_interval=0.05)
+        worker_b = self._registry(path, poll_interval=0.05)
+        loaded = threading.Event()
+        worker_b.add_listener(lambda snapshot: loaded.set())
+        worker_a.start()
+        worker_b.start()
+        initial_version = worker_b.version
+        loaded.clear()
+
+        worker_a.update_match_weights("心理树洞", {
+            'personality': 0.2,
+            'interest': 0.1,
+            'scene': 0.2,
+            'emotion': 0.5
+        })
+
+        assert loaded.wait(timeout=1.0)
+        assert worker_b.version > initial_version
+        assert worker_b.get_scene_config("心理树洞").match_weights['emotion'] == 0.5
@@ -0,0 +1,130 @@
+"""对话沉默检测调度器测试"""
+import threading
+from datetime import datetime, timedelta
+
+from src.models.conversation import ConversationCreateRequest, ConversationStatusUpdateRequest
+from src.services.conversation_service import ConversationService
+from src.services.dialogue_assistant_service import DialogueAssistantService
+from src.services.silence_scheduler import SilenceScheduler
+from src.utils.timing_wheel import TimingWheel
+
+
+class TestTimingWheel:
+    """时间轮测试类"""
+
+    def setup_method(self):
+        """每个测试前的设置"""
+        self.wheel = TimingWheel(tick_seconds=1.0, num_slots=8, start=1000.0)
+
+    def test_fires_after_deadline(self):
+        """测试定时器在到期刻度触发且只触发一次"""
+        self.wheel.schedule("conv_1", 1005.0)
+
+        assert self.wheel.advance(1004.9) == []
+        assert self.wheel.advance(1005.0) == ["conv_1"]
+        assert self.wheel.advance(1010.0) == []
+        assert len(self.wheel) == 0
+
+    def test_reschedule_and_cancel(self):
+        """测试重置定时器推迟到期，取消后不再触发"""
+        self.wheel.schedule("conv_1", 1003.0)
+        self.wheel.schedule("conv_2", 1003.0)
+        self.wheel.schedule("conv_1", 1006.0)
+        assert self.wheel.cancel("conv_2") is True
+        assert self.wheel.cancel("conv_2") is False
+
+        assert self.wheel.advance(1004.0) == []
+        assert self.wheel.advance(1006.0) == ["conv_1"]
+
+    def test_deadline_beyond_one_revolution(self):
+        """测试超过一圈的定时器等待后续轮次"""
+        self.wheel.schedule("conv_1", 1020.0)
+
+        assert self.wheel.advance(1012.0) == []
+        assert "conv_1" in self.wheel
+        assert self.wheel.advance(1100.0) == ["conv_1"]
+
+
+class TestSilenceScheduler:
+    """对话沉默检测调度器测试类"""
+
+    def setup_method(self):
+        """每个测试前的设置"""
+        self.conversation_service = ConversationService()
+        self.assistant = DialogueAssistantService()
+        self.scheduler = SilenceScheduler(self.assistant, self.conversation_service, tick_seconds=0.05)
+        self.pushed = []
+        self.scheduler.add_suggestion_listener(
+            lambda conversation_id, payload: self.pushed.append((conversation_id, payload))
+        )
+        self.conversation = self.conversation_service.create_conversation(ConversationCreateRequest(
+            user_a_id="user_001",
+            user_b_id="user_002",
+            scene="考研自习室"
+        ))
+        self.conversation_id = self.conversation.conversation_id
+
+    def teardown_method(self):
+        """每个测试后的清理"""
+        self.scheduler.close()
+
+    def test_pushes_suggestion_after_threshold(self):
+        """测试沉默超过阈值后主动推送话题建议"""
+        now = datetime.now()
+        self.assistant.update_last_message_time(self.conversation_id, now - timedelta(seconds=20))
+
+        # 已过期的定时器在下一个刻度触发
+        assert self.scheduler.run_due(now + timedelta(seconds=1)) == 1
+
+        conversation_id, payload = self.pushed[0]
+        assert conversation_id == self.conversation_id
+        assert payload['suggestion']
+        assert len(self.assistant.get_intervention_history(self.conversation_id)) == 1
+        # 同一段沉默不重复推送
+        assert self.scheduler.run_due(now + timedelta(seconds=30)) == 0
+
+    def test_new_message_resets_timer(self):
+        """测试新消息重置沉默定时器"""
+        now = datetime.now()
+        self.assistant.update_last_message_time(self.conversation_id, now - timedelta(seconds=10))
+        self.assistant.update_last_message_time(self.conversation_id, now)
+
+        assert self.scheduler.run_due(now + timedelta(seconds=10)) == 0
+        assert self.scheduler.get_stats()['pending_timers'] == 1
+        assert self.scheduler.run_due(now + timedelta(seconds=16)) == 1
+
+    def test_skips_inactive_and_opted_out(self):
+        """测试已结束的对话和关闭AI介入的用户不推送"""
+        now = datetime.now()
+        self.assistant.record_user_preference("user_002", ai_intervention_enabled=False)
+        self.assistant.update_last_message_time(self.conversation_id, now - timedelta(seconds=20))
+        assert self.scheduler.run_due(now + timedelta(seconds=1)) == 0
+
+        other = self.conversation_service.create_conversation(ConversationCreateRequest(
+            user_a_id="user_003",
+            user_b_id="user_004",
+            scene="兴趣社群"
+        ))
+        self.conversation_service.update_conversation_status(ConversationStatusUpdateRequest(
+            conversation_id=other.conversation_id,
+            status="ended"
+        ))
+        self.assistant.update_last_message_time(other.conversation_id, now - timedelta(seconds=20))
+        assert self.scheduler.run_due(now + timedelta(seconds=2)) == 0
+
+        assert self.pushed == []
+        assert self.scheduler.get_stats()['skipped'] == 2
+
+    def test_background_thread(self):
+        """测试后台线程在沉默到期后推送"""
+        pushed = threading.Event()
+        self.scheduler.add_suggestion_listener(lambda conversation_id, payload: pushed.set())
+        self.scheduler.start()
+
+        self.assistant.update_last_message_time(
+            self.conversation_id,
+            datetime.now() - timedelta(seconds=self.assistant.SILENCE_DURATION_THRESHOLD)
+        )
+
+        assert pushed.wait(timeout=5.0)
+        assert self.scheduler.get_stats()['suggested'] == 1
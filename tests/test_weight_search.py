@@ -0,0 +1,90 @@
+"""匹配权重离线搜索测试"""
+import random
+import pytest
+from datetime import datetime
+from src.models.matching import Match
+from src.services.matching_service import MatchingService
+from src.services.algorithm_optimization_service import AlgorithmOptimizationService
+from src.services.weight_search_service import WeightSearchService, NUMPY_AVAILABLE
+from src.utils.exceptions import ValidationError
+
+
+@pytest.mark.skipif(not NUMPY_AVAILABLE, reason="numpy not available")
+class TestWeightSearchService:
+    """权重离线搜索服务测试类"""
+    
+    def setup_method(self):
+        """每个测试方法前的设置"""
+        self.matching_service = MatchingService()
+        self.optimization_service = AlgorithmOptimizationService(self.matching_service)
+        self.search_service = WeightSearchService(self.matching_service, self.optimization_service)
+    
+    def _log_matches(self, count, scene="考研自习室"):
+        """记录匹配和反馈，满意度只由兴趣得分决定"""
+        rng = random.Random(7)
+        for i in range(count):
+            interest = rng.uniform(0, 100)
+            match = Match(
+                match_id=f"match{i}",
+                user_a_id=f"user{i}",
+                user_b_id=f"user{i + 1}",
+                scene=scene,
+                match_score=50.0,
+                match_reason="",
+                personality_score=rng.uniform(0, 100),
+                interest_score=interest,
+                scene_score=rng.uniform(0, 100),
+                emotion_sync_score=rng.uniform(0, 100),
+                status='accepted',
+                created_at=datetime.now()
+            )
+            self.matching_service._matches[match.match_id] = match
+            self.optimization_service.collect_feedback(
+                user_id=f"user{i}",
+                match_id=match.match_id,
+                scene=scene,
+                satisfaction_score=round(interest / 20.0, 2),
+                conversation_quality=7.0,
+                match_accuracy=3.0
+            )
+    
+    def test_build_dataset_joins_feedback_with_matches(self):
+        """测试回放数据集关联反馈和匹配得分"""
+        self._log_matches(10)
+        self.optimization_service.collect_feedback("ghost", "missing", "考研自习室", 3.0, 5.0, 3.0)
+        
+        scores, outcomes = self.search_service.build_dataset("考研自习室")
+        
+        assert scores.shape == (10, 4)
+        assert outcomes.shape == (10,)
+    
+    @pytest.mark.parametrize("method", ["random", "grid"])
+    def test_search_prefers_predictive_dimension(self, method):
+        """测试搜索结果偏向决定满意度的维度"""
+        self._log_matches(200)
+        
+        result = self.search_service.search_weights("考研自习室", method=method, seed=1)
+        
+        best = result['best_weights']
+        assert sum(best.values()) == pytest.approx(1.0, abs=1e-3)
+        assert all(weight >= 0.05 - 1e-6 for weight in best.values())
+        assert best['interest'] == max(best.values())
+        assert result['best_predicted_satisfaction'] >= result['current_predicted_satisfaction']
+    
+    def test_insufficient_samples(self):
+        """测试样本不足时拒绝搜索"""
+        self._log_matches(5)
+        
+        with pytest.raises(ValidationError):
+            self.search_service.search_weights("考研自习室")
+    
+    def test_apply_best_weights(self):
+        """测试将最优权重应用到匹配服务"""
+        self._log_matches(200)
+        
+        adjustment = self.search_service.apply_best_weights("考研自习室", min_improvement=0.0, seed=1)
+        
+        assert adjustment is not None
+        weights = self.matching_service.get_scene_config("考研自习室").match_weights
+        assert weights == adjustment.new_weights
+        assert sum(weights.values()) == pytest.approx(1.0)